@@ -0,0 +1,75 @@
+import os
+import shutil
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+from bridge.msg import msg_from_tile_packet
+from bridge.pubsub import (
+    MessageLog,
+    append_to_log,
+    load_from_base,
+    publish_to_dir,
+    publish_to_dir_npz,
+)
+
+
+ROI = ROIBox(88, 168, 88, 168, 120, 200)
+REPS = 10
+
+
+def _best_ms(fn) -> float:
+    best = float("inf")
+    for _ in range(REPS):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _bench(name: str, publish, out_dir: str, msg) -> None:
+    base = publish(msg, out_dir)
+    pub_ms = _best_ms(lambda: publish(msg, out_dir))
+    load_ms = _best_ms(lambda: load_from_base(base))
+    rx = load_from_base(base)
+    assert np.array_equal(rx.tiles, msg.tiles) and np.array_equal(rx.tile_bounds_zyx, msg.tile_bounds_zyx)
+
+    nbytes = sum(os.path.getsize(base + ext) for ext in (".civdmsg", ".npz", ".json") if os.path.exists(base + ext))
+    mb = msg.tiles.nbytes / 1e6
+    print(
+        f"{name:<12} size={nbytes / 1e6:7.2f}MB  publish={pub_ms:8.2f}ms ({mb / pub_ms * 1000:7.1f} MB/s)"
+        f"  load={load_ms:8.2f}ms ({mb / load_ms * 1000:7.1f} MB/s)"
+    )
+
+
+def main() -> None:
+    w = World.open(".")
+    msg = msg_from_tile_packet(w.query_tiles(time_name="t001", roi=ROI, mode="full"))
+
+    out_dir = "bridge_out/bench"
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    print("CIVD Bridge Message Format Benchmark")
+    print("-----------------------------------")
+    print(f"tiles: {tuple(msg.tiles.shape)}  payload: {msg.tiles.nbytes / 1e6:.2f} MB  best of {REPS}")
+
+    _bench("npz", publish_to_dir_npz, out_dir, msg)
+    _bench("civdmsg-raw", lambda m, d: publish_to_dir(m, d, compress="raw"), out_dir, msg)
+    _bench("civdmsg-zstd", lambda m, d: publish_to_dir(m, d, compress="zstd"), out_dir, msg)
+
+    log_path = os.path.join(out_dir, "stream.civdlog")
+    t0 = time.perf_counter()
+    for _ in range(REPS):
+        append_to_log(msg, log_path)
+    append_ms = (time.perf_counter() - t0) * 1000.0 / REPS
+
+    t0 = time.perf_counter()
+    with MessageLog(log_path) as log:
+        n = sum(int(m.tiles.shape[0]) for m in log)
+    scan_ms = (time.perf_counter() - t0) * 1000.0
+    print(f"log (raw)    append={append_ms:8.2f}ms/msg  mmap scan of {len(log)} msgs ({n} tiles)={scan_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
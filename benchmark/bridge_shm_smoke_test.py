@@ -0,0 +1,68 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.source import ObservationRequest
+from civd.bridge import ShmPacketHeader, ShmPacketRing, ShmPacketClient
+from civd.bridge.shm import serve
+
+
+ROI = ROIBox(88, 168, 88, 168, 120, 200)
+
+
+def server(names, requests, headers) -> None:
+    w = World.open(".")
+    nbytes = int(np.prod(w.query_shape("t001", ROI))) * 4
+    ring = ShmPacketRing(slot_nbytes=nbytes, n_slots=4)
+    names.put(ring.name)
+    served = serve(w, requests, headers, ring=ring)
+    names.get()  # keep the segment alive until the client is done
+    ring.close()
+    ring.unlink()
+    print("server: packets served:", served)
+
+
+def main() -> None:
+    print("CIVD Bridge Shared-Memory Smoke Test")
+    print("-----------------------------------")
+
+    ctx = mp.get_context("spawn")
+    names, requests, headers = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    proc = ctx.Process(target=server, args=(names, requests, headers))
+    proc.start()
+
+    client = ShmPacketClient(names.get())
+    w = World.open(".")
+
+    for mode in ("full", "delta"):
+        requests.put(ObservationRequest(time_name="t001", roi=ROI, mode=mode))
+        hdr = ShmPacketHeader.from_dict(headers.get())
+        pkt = client.packet(hdr)
+
+        ref = w.query(time_name="t001", roi=ROI, mode=mode)
+        assert np.array_equal(pkt.volume, ref.volume)
+        print(f"{mode}: slot={hdr.slot} seq={hdr.seq} shape={hdr.shape_zyxc} decode_ms={hdr.decode_ms:.2f}")
+        del pkt
+
+    # a failing request comes back as an error header; the server keeps serving
+    requests.put(ObservationRequest(time_name="t999", roi=ROI))
+    try:
+        ShmPacketHeader.from_dict(headers.get())
+    except RuntimeError as e:
+        print("missing time:", e)
+    else:
+        raise AssertionError("request for a missing time did not fail")
+    requests.put(ObservationRequest(time_name="t001", roi=ROI))
+    hdr = ShmPacketHeader.from_dict(headers.get())
+    assert client.is_current(hdr)
+
+    requests.put(None)
+    client.close()
+    names.put("done")
+    proc.join()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+
+
+def bench(fn, repeats: int = 20) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeats
+
+
+def main() -> None:
+    w = World.open(".")
+    t = w.times()[-1]
+    roi = ROIBox(0, 256, 0, 256, 0, 320)  # clamped to the volume
+    e = w.load_time_index(t)["tiles"][0]
+    codec = e.get("codec") or (e.get("ref") or {}).get("codec") or {}
+
+    print("CIVD Channels-First Query Benchmark")
+    print("-----------------------------------")
+    print(f"pack frame layout: {codec.get('layout', 'zyxc')}")
+
+    ref = w.query(t, roi).volume
+    planar = w.query(t, roi, layout="czyx").volume
+    assert np.array_equal(planar, np.moveaxis(ref, -1, 0))
+
+    out = np.empty_like(planar)
+    cases = [
+        ("query + moveaxis copy", lambda: np.ascontiguousarray(np.moveaxis(w.query(t, roi).volume, -1, 0))),
+        ('query(layout="czyx")', lambda: w.query(t, roi, layout="czyx")),
+        ('query(layout="czyx", out=)', lambda: w.query(t, roi, layout="czyx", out=out)),
+    ]
+    for label, fn in cases:
+        print(f"{label:<28} {bench(fn):8.2f} ms   {planar.nbytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.container import CONTAINER_VERSION, ContainerStorage, extract_container, write_container
+from civd.storage import LocalStorage
+
+
+ROI = ROIBox(88, 168, 88, 168, 120, 200)
+
+
+def check(a: World, b: World, label: str) -> None:
+    assert a.times() == b.times()
+    for t in b.times():
+        for mode in ("full", "delta"):
+            x = a.query(t, ROI, mode=mode)
+            y = b.query(t, ROI, mode=mode)
+            assert np.array_equal(x.volume, y.volume), (label, t, mode)
+            assert x.tiles_included == y.tiles_included
+        print(f"[{label}] {t} ok")
+
+
+def strip_tile_coords(dst: str) -> str:
+    """
+    Copy the world's data/civd_time tree to `dst` with no "tile_coords" in
+    any tile entry: flat tz/ty/tx, "tcoords", bounds only or tile_id only.
+    """
+    shutil.copytree(os.path.join("data", "civd_time"), os.path.join(dst, "data", "civd_time"))
+    for t in os.listdir(os.path.join(dst, "data", "civd_time")):
+        path = os.path.join(dst, "data", "civd_time", t, "index.json")
+        if not os.path.isfile(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            idx = json.load(f)
+        levels = [idx] + [lv for lv in (idx.get("lod") or {}).get("levels") or [] if isinstance(lv, dict)]
+        for lv in levels:
+            for i, e in enumerate(lv.get("tiles", [])):
+                tc = e.pop("tile_coords")
+                form = i % 4
+                if form == 0:
+                    e.update(tc)
+                elif form == 1:
+                    e["tcoords"] = tc
+                elif form == 2:
+                    e.pop("tile_id", None)
+                else:
+                    e.pop("bounds_zyx", None)
+                    e.pop("bounds", None)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(idx, f)
+    return dst
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else 0
+
+
+def check_rejects(path: str, out: str) -> None:
+    """
+    Corrupt copies of a container are refused without leaking the file
+    handle or the mapping.
+    """
+    with open(path, "rb") as f:
+        good = f.read()
+    bad = {
+        "magic": b"NOTCIVD!" + good[8:],
+        "version": good[:8] + (CONTAINER_VERSION + 1).to_bytes(4, "little") + good[12:],
+        "truncated": good[:20],
+        "empty": b"",
+    }
+    before = open_fds()
+    errors = []  # keep the tracebacks (and the half-built storages in them) alive
+    for label, data in bad.items():
+        p = os.path.join(out, f"bad_{label}.civd")
+        with open(p, "wb") as f:
+            f.write(data)
+        try:
+            ContainerStorage(p)
+        except Exception as e:
+            errors.append(e)
+        else:
+            raise AssertionError(f"{label}: corrupt container opened")
+        os.remove(p)
+    assert open_fds() == before, "rejected containers left files open"
+    print(f"ok: {len(bad)} corrupt containers rejected, no handles leaked")
+
+
+def main() -> None:
+    print("CIVD Container Smoke Test")
+    print("-------------------------")
+
+    out = tempfile.mkdtemp(prefix="civd_")
+    path = os.path.join(out, "world.civd")
+    info = write_container(path)
+    print(f"wrote {path}: {info['tiles']} tiles, {info['frames']} frames, {info['bytes']:,} bytes")
+
+    local = World.open(".", storage=LocalStorage(os.getcwd()))
+
+    t0 = time.perf_counter()
+    w = World.open(path)
+    print(f"open: {(time.perf_counter() - t0) * 1000.0:.3f} ms")
+    check(w, local, "container")
+
+    tree = os.path.join(out, "tree")
+    extract_container(path, tree)
+    check(World.open(tree, storage=LocalStorage(tree)), local, "extracted")
+
+    # indices without "tile_coords" keep their tile positions
+    bare = strip_tile_coords(os.path.join(out, "bare"))
+    bare_path = os.path.join(out, "bare.civd")
+    write_container(bare_path, bare, storage=LocalStorage(bare))
+    check(World.open(bare_path), local, "no tile_coords")
+
+    check_rejects(path, out)
+
+    print("ok: container matches the world tree")
+
+
+if __name__ == "__main__":
+    main()
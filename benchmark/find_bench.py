@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+
+
+def main() -> None:
+    w = World.open(".")
+    roi = ROIBox(0, 256, 0, 256, 0, 320)  # clamped to the volume
+    cases = [("> 0.9", 0), (("==", 3), 1)]
+
+    print("CIVD Value-Predicate Query Benchmark")
+    print("-----------------------------------")
+
+    for pred, ch in cases:
+        t0 = time.perf_counter()
+        pkt = w.query(time_name="t001", roi=roi)
+        sub = pkt.volume[..., ch]
+        if isinstance(pred, str):
+            n_ref = int((sub > float(pred.split()[1])).sum())
+        else:
+            n_ref = int((sub == pred[1]).sum())
+        t_dense = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        res = w.find("t001", roi, pred, ch)
+        t_find = time.perf_counter() - t0
+        assert res.count == n_ref
+
+        print(
+            f"{res.predicate:<8} ch={ch} matches={res.count:,}  "
+            f"tiles decoded {res.tiles_candidates}/{res.tiles_total} (pruned {res.tiles_pruned})  "
+            f"dense={t_dense*1000:.1f} ms  find={t_find*1000:.1f} ms  "
+            f"bytes {res.bytes_read:,} vs {pkt.bytes_read:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.lod import build_pyramid
+from civd.schema import verify_index_v1
+from civd.temporal_tiler import build_timepack
+from civd.tile_set import TileSet
+from civd.tiler import TileSpec
+from civd.upgrade_index import upgrade_index_inplace
+
+
+LEVELS = 2
+SPEC = TileSpec(16, 16, 16, 2)
+SHAPE_ZYX = (45, 70, 83)  # odd, ragged at every level
+
+
+def expect_value_error(fn) -> None:
+    try:
+        fn()
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError")
+
+
+def build_world() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    v = rng.random(SHAPE_ZYX + (2,), dtype=np.float32)
+    v[..., 1] = np.floor(v[..., 1] * 4)
+    os.makedirs("data")
+    np.save("data/volume.npy", v)
+
+    t0 = time.perf_counter()
+    build_timepack("data/volume.npy", "data/civd_flat/t000", spec=SPEC, timestamp="t000")
+    t_flat = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    build_timepack("data/volume.npy", "data/civd_time/t000", spec=SPEC, timestamp="t000", lod_levels=LEVELS)
+    t_lod = time.perf_counter() - t0
+    upgrade_index_inplace("data/civd_time/t000/index.json")
+    t0 = time.perf_counter()
+    build_pyramid(v, LEVELS)
+    t_pyr = time.perf_counter() - t0
+
+    print(
+        f"build: level 0 only {t_flat*1000:.1f} ms  with {LEVELS} LOD levels {t_lod*1000:.1f} ms  "
+        f"(build_pyramid alone {t_pyr*1000:.1f} ms)"
+    )
+    return v
+
+
+def main() -> None:
+    print("CIVD LOD Query Smoke Test")
+    print("-------------------------")
+
+    root = tempfile.mkdtemp(prefix="civd_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        v = build_world()
+        with open("data/civd_time/t000/index.json", "r", encoding="utf-8") as f:
+            verify_index_v1(json.load(f))
+
+        w = World.open(".")
+        pyramid = [v] + build_pyramid(v, LEVELS)
+        assert int(w.meta("t000")["lod_levels"]) == LEVELS
+        full = ROIBox(0, SHAPE_ZYX[0], 0, SHAPE_ZYX[1], 0, SHAPE_ZYX[2])
+        roi = ROIBox(5, 37, 11, 60, 3, 70)
+
+        for k, ref in enumerate(pyramid):
+            s = 2 ** k
+            t0 = time.perf_counter()
+            pkt = w.query("t000", full, lod=k)
+            dt = time.perf_counter() - t0
+            assert pkt.meta["lod"] == k and pkt.meta["lod_scale"] == s, pkt.meta
+            assert np.array_equal(pkt.volume, ref), k
+
+            # level-0 ROI -> smallest level box covering it
+            sub = w.query("t000", roi, lod=k)
+            r = sub.roi
+            assert (r.z0, r.y0, r.x0) == (roi.z0 // s, roi.y0 // s, roi.x0 // s), r
+            assert np.array_equal(sub.volume, ref[r.z0:r.z1, r.y0:r.y1, r.x0:r.x1]), k
+            print(f"lod {k}: shape {ref.shape[:3]}  full read {dt*1000:.1f} ms  {pkt.bytes_read:,} bytes  ok")
+
+        # voxel_size picks the coarsest level with 2**k <= voxel_size; past the top it clamps
+        for vs, k in ((1.0, 0), (1.9, 0), (2.0, 1), (3.5, 1), (4.0, 2), (100.0, LEVELS)):
+            assert w.query("t000", roi, voxel_size=vs).meta["lod"] == k, vs
+        assert w.query("t000", roi, lod=LEVELS + 3).meta["lod"] == LEVELS
+        expect_value_error(lambda: w.query("t000", TileSet.full((1, 1, 1), lod=LEVELS + 1)))
+        print("voxel_size -> lod selection ok")
+
+        # an index missing level 1: requests fall back to the coarsest stored level below
+        with open("data/civd_time/t000/index.json", "r", encoding="utf-8") as f:
+            idx = json.load(f)
+        idx["lod"]["levels"] = [lv for lv in idx["lod"]["levels"] if lv["level"] != 1]
+        with open("data/civd_time/t000/index.json", "w", encoding="utf-8") as f:
+            json.dump(idx, f)
+        w = World.open(".")
+        for kw, k in (({"lod": 1}, 0), ({"lod": 2}, 2), ({"lod": 7}, 2), ({"voxel_size": 3.0}, 0), ({"voxel_size": 9.0}, 2)):
+            assert w.query("t000", roi, **kw).meta["lod"] == k, kw
+        assert np.array_equal(w.query("t000", full, lod=7).volume, pyramid[2])
+        expect_value_error(lambda: w.query("t000", TileSet.full((1, 1, 1), lod=1)))
+        print("gapped lod levels: fallback to stored levels, unstored tile set lod rejected")
+    finally:
+        os.chdir(cwd)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+
+
+def run(w: World, roi: ROIBox, steps: int, reuse: bool):
+    out = None
+    if reuse:
+        probe = w.query(time_name="t001", roi=roi, mode="full")
+        out = np.empty(probe.shape_zyxc, dtype=np.float32)
+
+    times = []
+    for _ in range(steps):
+        t0 = time.perf_counter()
+        pkt = w.query(time_name="t001", roi=roi, mode="full", out=out)
+        times.append(time.perf_counter() - t0)
+    return pkt, times
+
+
+def main():
+    w = World.open(".")
+    roi = ROIBox(88, 168, 88, 168, 120, 200)
+    steps = 30
+
+    pkt_a, t_alloc = run(w, roi, steps, reuse=False)
+    pkt_b, t_reuse = run(w, roi, steps, reuse=True)
+    assert np.array_equal(pkt_a.volume, pkt_b.volume)
+
+    mb = pkt_a.volume.nbytes / 1e6
+    print("CIVD — Output Buffer Reuse Benchmark")
+    print("-----------------------------------")
+    print(f"ROI: {roi}  volume: {mb:.2f} MB  steps: {steps}")
+    print(f"  fresh array / query: median {np.median(t_alloc)*1000:.2f} ms")
+    print(f"  out= reused buffer:  median {np.median(t_reuse)*1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
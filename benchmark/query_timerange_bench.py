@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+
+
+def bench(fn, repeats: int = 10) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeats
+
+
+def main() -> None:
+    w = World.open(".")
+    times = w.times()
+    roi = ROIBox(0, 256, 0, 256, 0, 320)  # clamped to the volume
+
+    print("CIVD Time-Range Query Benchmark")
+    print("-------------------------------")
+
+    p = w.query_timerange(roi, times)
+    for i, t in enumerate(times):
+        assert np.array_equal(p.volume[i], w.query(t, roi).volume)
+    print(f"{len(times)} times, {p.tiles_included} tile placements from {p.unique_payloads} unique payloads, "
+          f"{p.meta['frames_repeated']} repeated frames")
+
+    cases = [
+        ("query() per time + stack", lambda: np.stack([w.query(t, roi).volume for t in times])),
+        ("query_timerange()", lambda: w.query_timerange(roi, times)),
+        ("query_timerange(repeat_frames=False)", lambda: w.query_timerange(roi, times, repeat_frames=False)),
+    ]
+    for label, fn in cases:
+        print(f"{label:<38} {bench(fn):8.2f} ms   {p.volume.nbytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import time
+from typing import Dict, List
+
+from civd import World
+from civd.roi import roi_from_center_radius, roi_tiles
+from civd.roi_shapes import Sphere
+from civd.tile_index import BrickMap
+from civd.time_loader import load_index, tile_shape_from_index
+
+
+def dict_lookup_tiles(idx: Dict, roi) -> List[Dict]:
+    # the old selection: a (tz,ty,tx) -> entry dict, then a loop over the box
+    sz, sy, sx = tile_shape_from_index(idx)
+    lut = {}
+    for e in idx["tiles"]:
+        c = e["tile_coords"]
+        lut[(c["tz"], c["ty"], c["tx"])] = e
+    hits = []
+    for a in range(roi.z0 // sz, (roi.z1 + sz - 1) // sz):
+        for b in range(roi.y0 // sy, (roi.y1 + sy - 1) // sy):
+            for c in range(roi.x0 // sx, (roi.x1 + sx - 1) // sx):
+                e = lut.get((a, b, c))
+                if e is not None:
+                    hits.append(e)
+    return hits
+
+
+def bench(fn, n: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main() -> None:
+    w = World.open(".")
+    t = w.times()[-1]
+    idx = load_index(f"data/civd_time/{t}/index.json")
+    Z, Y, X, _ = idx["volume"]["shape_zyxc"]
+    center = (Z // 2, Y // 2, X // 2)
+    tmap = w.tile_map(t)
+    n = 200
+
+    print("CIVD ROI Tile Selection Benchmark")
+    print("--------------------------------")
+    print(f"time {t}: {len(idx['tiles'])} tiles, grid {tmap.grid_dims}")
+
+    for radius in (16, 40, 96):
+        roi = roi_from_center_radius(center, radius, (Z, Y, X))
+        ref = dict_lookup_tiles(idx, roi)
+        assert roi_tiles(idx, roi) == ref
+        assert roi_tiles(idx, roi, tile_map=tmap) == ref
+        assert roi_tiles(idx, roi, delta=True) == roi_tiles(idx, roi, delta=True, tile_map=tmap)
+        assert roi_tiles(idx, roi, delta=True) == [e for e in ref if "ref" not in e]
+        # a different index dict (or a replaced tiles list) gets its own map
+        part = dict(idx, tiles=idx["tiles"][::3])
+        assert roi_tiles(part, roi) == dict_lookup_tiles(part, roi)
+
+        us_dict = bench(lambda: dict_lookup_tiles(idx, roi), n)
+        us_index = bench(lambda: roi_tiles(idx, roi), n)
+        us_cached = bench(lambda: roi_tiles(idx, roi, tile_map=tmap), n)
+        print(
+            f"r={radius:<3} tiles={len(ref):<4} dict lookup={us_dict:8.1f} us  "
+            f"index only={us_index:8.1f} us  World.tile_map={us_cached:8.1f} us"
+        )
+    us_map = bench(lambda: BrickMap.from_index(idx), 20)
+    print(f"BrickMap.from_index (first selection on an index) {us_map:8.1f} us")
+
+    sphere = Sphere(center, 40)
+    n_sphere = len(roi_tiles(idx, sphere, tile_map=tmap))
+    us_sphere = bench(lambda: roi_tiles(idx, sphere, tile_map=tmap), n)
+    print(f"sphere r=40 tiles={n_sphere:<4} cached tile_map={us_sphere:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
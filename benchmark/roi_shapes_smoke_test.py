@@ -0,0 +1,76 @@
+import numpy as np
+
+from civd import ROIBox
+from civd.roi_shapes import Capsule, Frustum, OrientedBox, Sphere
+
+
+# anisotropic tiles that divide none of the volume's edges: ragged on every axis
+TILE_ZYX = (8, 16, 12)
+SHAPE_ZYX = (40, 50, 61)
+N_PER_KIND = 100
+PAD = 3  # bbox margin searched for stray inside voxels
+
+
+def random_shape(rng: np.random.Generator, kind: str):
+    c = rng.uniform(-8, np.array(SHAPE_ZYX) + 8)  # some shapes stick out of the volume
+    if kind == "sphere":
+        return Sphere(tuple(c), float(rng.uniform(0.3, 20)))
+    if kind == "capsule":
+        return Capsule(tuple(c), tuple(c + rng.normal(0, 12, 3)), float(rng.uniform(0.3, 8)))
+    if kind == "obox":
+        q, _ = np.linalg.qr(rng.normal(size=(3, 3)))
+        return OrientedBox(tuple(c), tuple(rng.uniform(0.3, 15, 3)), tuple(map(tuple, q)))
+    f = rng.normal(size=3)
+    return Frustum(
+        tuple(c), tuple(f), tuple(rng.normal(size=3)),
+        float(rng.uniform(10, 120)), float(rng.uniform(0.5, 2)), float(rng.uniform(0, 5)), float(rng.uniform(6, 40)),
+    )
+
+
+def tile_grid() -> tuple:
+    return tuple(range(-(-n // s)) for n, s in zip(SHAPE_ZYX, TILE_ZYX))
+
+
+def check(shape) -> tuple:
+    vol = ROIBox(0, SHAPE_ZYX[0], 0, SHAPE_ZYX[1], 0, SHAPE_ZYX[2])
+    inside = shape.voxel_mask(vol)
+    pts = np.argwhere(inside)
+
+    # bbox: no inside voxel in a margin around it (also past the volume edge)
+    box = shape.bbox()
+    grown = ROIBox(box.z0 - PAD, box.z1 + PAD, box.y0 - PAD, box.y1 + PAD, box.x0 - PAD, box.x1 + PAD)
+    every = np.argwhere(shape.voxel_mask(grown)) + (grown.z0, grown.y0, grown.x0)
+    if len(every):
+        assert (every.min(0) >= (box.z0, box.y0, box.x0)).all(), (shape, box)
+        assert (every.max(0) < (box.z1, box.y1, box.x1)).all(), (shape, box)
+
+    # tile_mask: never drops a tile holding an inside voxel
+    tz, ty, tx = tile_grid()
+    mask = shape.tile_mask(tz, ty, tx, TILE_ZYX, SHAPE_ZYX)
+    truth = np.zeros_like(mask)
+    truth[tuple((pts // np.array(TILE_ZYX)).T)] = True
+    missed = truth & ~mask
+    assert not missed.any(), (shape, np.argwhere(missed)[:3])
+    return int(mask.sum()), int(truth.sum())
+
+
+def main() -> None:
+    print("CIVD ROI Shapes Smoke Test")
+    print("--------------------------")
+
+    rng = np.random.default_rng(0)
+    for kind in ("sphere", "capsule", "obox", "frustum"):
+        selected = touched = 0
+        for _ in range(N_PER_KIND):
+            s, t = check(random_shape(rng, kind))
+            selected += s
+            touched += t
+        extra = (selected - touched) / max(1, selected)
+        print(f"{kind:<8} {N_PER_KIND} shapes: {touched} tiles touched, {selected} selected "
+              f"({extra:.1%} conservative), no false negatives")
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
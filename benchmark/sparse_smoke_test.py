@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.schema import verify_index_v1
+from civd.temporal_tiler import build_timepack
+from civd.tiler import TileSpec, build_tiles, build_tiles_from_points
+from civd.time_loader import decode_tile_from_entry
+from civd.upgrade_index import upgrade_index_inplace
+
+
+SPEC = TileSpec(16, 16, 16, 2)
+SHAPE_ZYX = (40, 56, 72)
+
+
+def blob(v: np.ndarray, z: slice, y: slice, x: slice, value: float) -> None:
+    v[z, y, x, 0] = value
+    v[z, y, x, 1] = 2.0
+
+
+def build_world() -> list:
+    v0 = np.zeros(SHAPE_ZYX + (2,), dtype=np.float32)
+    blob(v0, slice(2, 9), slice(3, 12), slice(5, 30), 0.75)
+    blob(v0, slice(20, 38), slice(40, 56), slice(60, 72), 1.5)  # ragged corner
+    v1 = v0.copy()
+    v1[2:9, 3:12, 5:30] = 0.0  # cleared: its tiles become tombstones
+    blob(v1, slice(30, 34), slice(18, 20), slice(33, 50), 0.25)
+    vols = [v0, v1]
+    os.makedirs("data")
+    for i, v in enumerate(vols):
+        t = f"t{i:03d}"
+        np.save(f"data/{t}.npy", v)
+        base = {"base_index_path": f"data/civd_time/t{i - 1:03d}/index.json"} if i else {}
+        build_timepack(f"data/{t}.npy", f"data/civd_time/{t}", spec=SPEC, timestamp=t, sparse=True, lod_levels=1, **base)
+        upgrade_index_inplace(f"data/civd_time/{t}/index.json")
+    return vols
+
+
+def occupied_tiles(v: np.ndarray) -> int:
+    n = 0
+    for z in range(0, SHAPE_ZYX[0], SPEC.tile_z):
+        for y in range(0, SHAPE_ZYX[1], SPEC.tile_y):
+            for x in range(0, SHAPE_ZYX[2], SPEC.tile_x):
+                n += bool(v[z:z + SPEC.tile_z, y:y + SPEC.tile_y, x:x + SPEC.tile_x].any())
+    return n
+
+
+def check_world(vols: list) -> None:
+    for t in ("t000", "t001"):
+        with open(f"data/civd_time/{t}/index.json", "r", encoding="utf-8") as f:
+            idx = verify_index_v1(json.load(f))
+        assert idx["grid"]["layout"] == "brickmap"
+    tomb = [e for e in idx["tiles"] if e.get("empty")]
+    assert tomb, "t001 should carry tombstones for the cleared blob"
+
+    w = World.open(".")
+    full = ROIBox(0, SHAPE_ZYX[0], 0, SHAPE_ZYX[1], 0, SHAPE_ZYX[2])
+    roi = ROIBox(1, 35, 2, 50, 4, 66)
+    for i, t in enumerate(w.times()):
+        v = vols[i]
+        assert np.array_equal(w.query(t, full).volume, v), t
+        tmap = w.tile_map(t)
+        assert tmap.occupancy < 1.0
+        for pred in ("> 0.5", "== 0", "< 0.3"):
+            r = w.find(t, roi, pred, 0)
+            sub = v[roi.z0:roi.z1, roi.y0:roi.y1, roi.x0:roi.x1, 0]
+            ref = (sub > 0.5) if pred == "> 0.5" else (sub == 0) if pred == "== 0" else (sub < 0.3)
+            assert r.count == int(ref.sum()), (t, pred, r.count, int(ref.sum()))
+            got = np.zeros_like(ref)
+            c = r.coords_zyx - np.array([roi.z0, roi.y0, roi.x0])
+            got[c[:, 0], c[:, 1], c[:, 2]] = True
+            assert np.array_equal(got, ref), (t, pred)
+        print(f"[{t}] {len(tmap)} of {int(np.prod(tmap.grid_dims))} bricks stored, query + find ok")
+    print(f"[t001] {len(tomb)} tombstones")
+
+
+def check_builders(v: np.ndarray) -> None:
+    np.save("data/dense.npy", v)
+    dense = build_tiles("data/dense.npy", "data/civd_tiles", spec=SPEC, sparse=True)
+    pts = np.argwhere(v.any(axis=3))
+    points = build_tiles_from_points(pts, v[pts[:, 0], pts[:, 1], pts[:, 2]], SHAPE_ZYX, "data/civd_points", spec=SPEC)
+
+    for idx in (dense, points):
+        assert idx["grid"]["layout"] == "brickmap"
+        assert len(idx["tiles"]) == occupied_tiles(v), (len(idx["tiles"]), occupied_tiles(v))
+    by_id = {e["tile_id"]: e for e in points["tiles"]}
+    assert set(by_id) == {e["tile_id"] for e in dense["tiles"]}
+    for e in dense["tiles"]:
+        a, _ = decode_tile_from_entry(e, dense)
+        b, _ = decode_tile_from_entry(by_id[e["tile_id"]], points)
+        assert np.array_equal(a, b), e["tile_id"]
+    print(f"build_tiles(sparse=True) == build_tiles_from_points: {len(dense['tiles'])} tiles ok")
+
+
+def main() -> None:
+    print("CIVD Sparse (Brick-Map) Smoke Test")
+    print("----------------------------------")
+
+    root = tempfile.mkdtemp(prefix="civd_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        vols = build_world()
+        check_world(vols)
+        check_builders(vols[1])
+    finally:
+        os.chdir(cwd)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
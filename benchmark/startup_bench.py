@@ -0,0 +1,58 @@
+import json
+import statistics
+import subprocess
+import sys
+
+
+# each case runs in a fresh interpreter and prints {phase: ms}
+_CASE = r"""
+import json, time
+t0 = time.perf_counter()
+import civd
+t_import = time.perf_counter()
+from civd import World, ROIBox
+t_world = time.perf_counter()
+w = World.open(".", warm={warm})
+t_open = time.perf_counter()
+t = w.times()[-1]
+w.query(t, ROIBox(0, 32, 0, 32, 0, 32))
+t_query = time.perf_counter()
+print(json.dumps({{
+    "import civd": (t_import - t0) * 1000.0,
+    "load World": (t_world - t_import) * 1000.0,
+    "open": (t_open - t_world) * 1000.0,
+    "first query": (t_query - t_open) * 1000.0,
+    "total": (t_query - t0) * 1000.0,
+}}))
+"""
+
+
+def run(warm: bool, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", _CASE.format(warm=warm)], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+
+def main() -> None:
+    print("CIVD Startup Benchmark")
+    print("----------------------")
+
+    bare = subprocess.run(
+        [sys.executable, "-c", "import sys, civd; print(sorted(m for m in ('numpy', 'zstandard', 'torch') if m in sys.modules))"],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    print(f"`import civd` loads: {bare}")
+
+    for warm in (False, True):
+        r = run(warm, repeats=5)
+        label = "warm open" if warm else "lazy open"
+        print(
+            f"{label:<9}  import={r['import civd']:6.2f} ms  World={r['load World']:6.2f} ms  "
+            f"open={r['open']:6.2f} ms  first query={r['first query']:6.2f} ms  total={r['total']:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
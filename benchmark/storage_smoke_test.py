@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.storage import LocalStorage, MemoryStorage, MmapStorage
+from civd.time_loader import resolve_tile_frame
+
+
+ROI = ROIBox(88, 168, 88, 168, 120, 200)
+
+
+def frame_ranges(w: World):
+    out = []
+    for t in w.times():
+        idx = w.load_time_index(t)
+        for e in w.tile_map(t).entries:
+            loc = resolve_tile_frame(e, idx, w.storage)
+            if loc["ref_mode"] != "empty":
+                out.append((loc["pack"], loc["offset"], loc["length"]))
+    return out
+
+
+def threaded_reads(reqs, n_threads: int = 8, rounds: int = 20) -> None:
+    # max_open=1: every switch between packs evicts the handle another
+    # thread may be reading from
+    st = LocalStorage(max_open=1)
+    expect = {}
+    for p, o, n in reqs:
+        with open(p, "rb") as f:
+            f.seek(o)
+            expect[(p, o, n)] = f.read(n)
+    errors = []
+
+    def work(seed: int) -> None:
+        rng = np.random.default_rng(seed)
+        try:
+            for _ in range(rounds):
+                for i in rng.permutation(len(reqs)):
+                    r = reqs[int(i)]
+                    if st.read(*r) != expect[r]:
+                        errors.append(("mismatch", r))
+        except Exception as e:  # EBADF etc.
+            errors.append((type(e).__name__, str(e)))
+
+    threads = [threading.Thread(target=work, args=(s,)) for s in range(n_threads)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    st.close()
+    assert not errors, errors[:3]
+    print(f"[threads] {n_threads} threads x {rounds} rounds over {len({r[0] for r in reqs})} packs, max_open=1 ok")
+
+
+def main() -> None:
+    print("CIVD Storage Smoke Test")
+    print("-----------------------")
+
+    ref = World.open(".")
+    for label, st in (("local", LocalStorage()), ("mmap", MmapStorage()), ("memory", MemoryStorage.from_dir("."))):
+        w = World.open(".", storage=st)
+        for t in w.times():
+            for mode in ("full", "delta"):
+                assert np.array_equal(w.query(t, ROI, mode=mode).volume, ref.query(t, ROI, mode=mode).volume)
+        st.close()
+        print(f"[{label}] queries match")
+
+    threaded_reads(frame_ranges(ref))
+    print("ok: storage backends agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,13 @@
 import json
 import time
 import tracemalloc
-from dataclasses import asdict
-from typing import Dict, List, Set, Tuple
+from typing import Dict
 
-from civd.roi import roi_from_center_radius, roi_tiles
+from civd.roi import roi_from_center_radius
 from civd.loader import load_index, read_tile
-
-
-def tile_key(entry: Dict) -> Tuple[int, int, int]:
-    c = entry["tile_coords"]
-    return (c["tz"], c["ty"], c["tx"])
+from civd.tile_index import BrickMap
+from civd.tile_set import TileSet
+from civd.time_loader import tile_shape_from_index
 
 
 def stream_benchmark(index: Dict, steps: int = 20, radius_vox: int = 40, stride_vox: int = 16):
@@ -25,12 +22,11 @@ def stream_benchmark(index: Dict, steps: int = 20, radius_vox: int = 40, stride_
     Z, Y, X, _ = vol_shape
     pack_path = index["pack"]["path"]
 
-    # Prebuild a lookup from tile coords -> tile entry
-    lookup = {}
-    for t in index["tiles"]:
-        lookup[tile_key(t)] = t
-
-    cache: Set[Tuple[int, int, int]] = set()
+    # Tile coords -> entry lookup, and the cache as a bitset over the grid
+    bmap = BrickMap.from_index(index)
+    tile_shape = tile_shape_from_index(index)
+    cache = TileSet.empty(bmap.grid_dims)
+    present = TileSet.from_coords(bmap.grid_dims, bmap.coords)
 
     # Start near one side, move across X
     cz, cy = Z // 2, Y // 2
@@ -46,29 +42,28 @@ def stream_benchmark(index: Dict, steps: int = 20, radius_vox: int = 40, stride_
     for i in range(steps):
         cx = min(X - 1, start_x + i * stride_vox)
         roi = roi_from_center_radius((cz, cy, cx), radius_vox=radius_vox, vol_shape_zyx=(Z, Y, X))
-        tiles = roi_tiles(index, roi)
-
-        requested = [tile_key(t) for t in tiles]
-        requested_set = set(requested)
+        # only tiles present in the index can be requested
+        requested = TileSet.from_roi(roi, tile_shape, (Z, Y, X)) & present
+        missing = requested - cache
 
-        hits = sum(1 for k in requested if k in cache)
-        misses = len(requested) - hits
+        n_requested = len(requested)
+        misses = len(missing)
+        hits = n_requested - misses
 
         # Decode only misses (simulate streaming/cache behavior)
         t0 = time.perf_counter()
         comp_read = 0
-        for k in requested:
-            if k in cache:
-                continue
-            entry = lookup[k]
+        tz, ty, tx = missing.box()
+        for slot in bmap.query_mask(tz, ty, tx, missing.mask(tz, ty, tx)):
+            entry = bmap.entries[int(slot)]
             comp_read += entry["length"]
             _ = read_tile(pack_path, entry)  # decode (we discard array; we measure cost)
-            cache.add(k)
+        cache |= missing
         t1 = time.perf_counter()
 
         dt = (t1 - t0) if misses > 0 else 0.0
 
-        total_tiles_requested += len(requested)
+        total_tiles_requested += n_requested
         total_hits += hits
         total_misses += misses
         total_comp_read += comp_read
@@ -77,7 +72,7 @@ def stream_benchmark(index: Dict, steps: int = 20, radius_vox: int = 40, stride_
         results.append({
             "step": i,
             "center_zyx": (cz, cy, cx),
-            "tiles_requested": len(requested),
+            "tiles_requested": n_requested,
             "hits": hits,
             "misses": misses,
             "compressed_bytes_read": comp_read,
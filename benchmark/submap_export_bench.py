@@ -1,37 +1,52 @@
+import contextlib
+import io
 import os
-from civd.export_submap import export_submap
+import time
+
+from civd.export_submap import export_submap, read_submap
 
 
 def fsize(path: str) -> int:
     return os.path.getsize(path) if os.path.exists(path) else 0
 
 
+def timed_export(time_name: str, center, r: int, mode: str, fmt: str, repeats: int = 3):
+    best = None
+    meta = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            meta = export_submap(time_name, center, r, mode=mode, format=fmt)
+        dt = (time.perf_counter() - t0) * 1000.0
+        best = dt if best is None else min(best, dt)
+    return meta, best
+
+
 def main():
     center = (128, 128, 160)
     r = 40
-    t1 = "data/civd_time/t001/index.json"
-
-    m_full = export_submap(t1, center, r, mode="full")
-    m_delta = export_submap(t1, center, r, mode="delta")
-
-    full_npz = m_full["npz_path"]
-    delta_npz = m_delta["npz_path"]
 
     print("CIVD Phase E — Submap Export Benchmark")
     print("-------------------------------------")
-    print("t001 full ROI submap")
-    print("  tiles:", m_full["tile_count"])
-    print("  decode_ms:", f'{m_full["decode_ms"]:.2f}')
-    print("  npz bytes:", fsize(full_npz))
-    print("")
-    print("t001 delta-only submap")
-    print("  tiles:", m_delta["tile_count"])
-    print("  decode_ms:", f'{m_delta["decode_ms"]:.2f}')
-    print("  npz bytes:", fsize(delta_npz))
-    print("")
-    if fsize(full_npz) > 0:
-        ratio = fsize(delta_npz) / fsize(full_npz)
-        print(f"Export size ratio (delta/full): {ratio:.3f}  ({(1-ratio)*100:.2f}% smaller)")
+    for mode in ("full", "delta"):
+        m_frames, ms_frames = timed_export("t001", center, r, mode, "frames")
+        # both formats share the manifest name: read the frames export back first
+        json_path = m_frames["pack"]["path"][:-len(".zstpack")] + ".json"
+        t0 = time.perf_counter()
+        vol = read_submap(json_path)
+        ms_read = (time.perf_counter() - t0) * 1000.0
+
+        m_npz, ms_npz = timed_export("t001", center, r, mode, "npz")
+
+        print(f"t001 {mode} ROI submap")
+        print(f"  tiles:            {m_frames['tiles_included']}  "
+              f"(copied raw: {m_frames['tiles_copied']}, re-encoded: {m_frames['tiles_reencoded']})")
+        print(f"  frames: {ms_frames:8.2f} ms  {m_frames['bytes_written']:,} bytes")
+        print(f"  npz:    {ms_npz:8.2f} ms  {fsize(m_npz['npz_path']):,} bytes")
+        if ms_frames > 0:
+            print(f"  speedup (npz/frames): {ms_npz / ms_frames:.2f}x")
+        print(f"  read_submap(frames): {ms_read:.2f} ms  shape={vol.shape}")
+        print("")
 
 
 if __name__ == "__main__":
@@ -4,11 +4,11 @@ import argparse
 import json
 import os
 
-from civd.submap_schema import verify_submap_v1
+from civd.submap_schema import verify_submap
 
 
 def main() -> None:
-    ap = argparse.ArgumentParser(description="Verify CIVD submap manifest schema v1")
+    ap = argparse.ArgumentParser(description="Verify CIVD submap manifest schema (v1 or v2)")
     ap.add_argument("--manifest", required=True, help="Path to exports/*.json manifest")
     args = ap.parse_args()
 
@@ -17,8 +17,8 @@ def main() -> None:
         raise SystemExit(f"Manifest not found: {path}")
 
     m = json.load(open(path, "r", encoding="utf-8"))
-    verify_submap_v1(m)
-    print(f"OK: {path} conforms to civd.submap.v1")
+    verify_submap(m)
+    print(f"OK: {path} conforms to {m['schema_version']}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+import time
+
+from civd import World
+from civd.tile_history import TileHistory
+from civd.tile_index import _has_own_payload
+
+
+def scan_indices(times, t0: str, t1: str):
+    # without a history: load every index in (t0, t1] and look for local payloads
+    w = World.open(".")
+    changed = set()
+    for t in times[times.index(t0) + 1:times.index(t1) + 1]:
+        tmap = w.tile_map(t)
+        for e, c in zip(tmap.entries, tmap.coords_of(range(len(tmap)))):
+            if _has_own_payload(e):
+                changed.add(tuple(int(v) for v in c))
+    return changed
+
+
+def ms(fn, repeats: int = 10) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeats
+
+
+def main() -> None:
+    w = World.open(".")
+    times = w.times()
+    t0, t1 = times[0], times[-1]
+
+    print("CIVD Tile History Benchmark")
+    print("---------------------------")
+    h = TileHistory.build(w, times)
+    assert {tuple(c) for c in h.changed_tiles(t0, t1).tolist()} == scan_indices(times, t0, t1)
+    print(f"{len(times)} times, {len(h)} tile changes")
+
+    print(f"{'build history':<34} {ms(lambda: TileHistory.build(World.open('.'), times), 3):9.3f} ms")
+    print(f"{'scan indices: changed in (t0, t1]':<34} {ms(lambda: scan_indices(times, t0, t1), 3):9.3f} ms")
+    print(f"{'history: changed in (t0, t1]':<34} {ms(lambda: h.changed_tiles(t0, t1)):9.3f} ms")
+    c = tuple(int(v) for v in h.changed_tiles(t0, t1)[0]) if len(h.changed_tiles(t0, t1)) else (0, 0, 0)
+    print(f"{'history: latest version of a tile':<34} {ms(lambda: h.latest(c, t1), 1000):9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.temporal_tiler import build_timepack
+from civd.tiler import TileSpec
+from civd.upgrade_index import upgrade_index_inplace
+
+
+# ragged on every axis, brick-map layout (tombstones at t001), ref-based delta
+SPEC = TileSpec(8, 16, 12, 2)
+SHAPE_ZYX = (37, 50, 61)
+ROIS = [ROIBox(0, 37, 0, 50, 0, 61), ROIBox(3, 29, 7, 44, 11, 58), ROIBox(30, 40, 40, 55, 50, 70)]
+
+
+def build_world() -> list:
+    rng = np.random.default_rng(0)
+    v0 = np.zeros(SHAPE_ZYX + (2,), dtype=np.float32)
+    v0[2:30, 5:45, 3:60] = rng.random((28, 40, 57, 2), dtype=np.float32)
+    v1 = v0.copy()
+    v1[2:10, 5:20, 3:30] = 0.0  # cleared: tombstones
+    v1[28:37, 40:50, 48:61, 0] = 2.5  # the ragged far corner
+    vols = [v0, v1]
+    os.makedirs("data")
+    for i, v in enumerate(vols):
+        t = f"t{i:03d}"
+        np.save(f"data/{t}.npy", v)
+        base = {"base_index_path": f"data/civd_time/t{i - 1:03d}/index.json"} if i else {}
+        build_timepack(f"data/{t}.npy", f"data/civd_time/{t}", spec=SPEC, timestamp=t, sparse=True, **base)
+        upgrade_index_inplace(f"data/civd_time/{t}/index.json")
+    return vols
+
+
+def check(w: World, vols: list) -> None:
+    for i, t in enumerate(w.times()):
+        for roi in ROIS:
+            for mode in ("full", "delta"):
+                for channels in (None, [1], [1, 0]):
+                    ch = slice(None) if channels is None else channels
+                    pkt = w.query(t, roi, channels=channels, mode=mode)
+                    tp = w.query_tiles(t, roi, channels=channels, mode=mode)
+                    key = (t, roi, mode, channels)
+
+                    assert len(tp) == tp.tiles_included == pkt.tiles_included == int(tp.tile_mask.sum()), key
+                    assert tp.tiles.shape == (len(tp), SPEC.tile_z, SPEC.tile_y, SPEC.tile_x, pkt.shape_zyxc[3]), key
+                    assert tp.tiles.flags.c_contiguous
+                    sz, sy, sx = tp.tile_shape_zyx
+                    b = tp.tile_bounds_zyx
+                    assert np.array_equal(tp.tile_coords_zyx, np.stack([b[:, 0] // sz, b[:, 2] // sy, b[:, 4] // sx], 1))
+                    for j, (z0, z1, y0, y1, x0, x1) in enumerate(b):
+                        assert np.array_equal(tp.tile(j), vols[i][z0:z1, y0:y1, x0:x1][..., ch]), (key, j)
+
+                    # dense(out=) stitches into the caller's buffer, fills what no tile covers,
+                    # and leaves the cached dense() alone
+                    out = np.full(pkt.volume.shape, -3.0, dtype=np.float32)
+                    assert tp.dense(out=out) is out
+                    assert np.array_equal(out, pkt.volume), key
+                    d = tp.dense()
+                    assert d is not out and np.array_equal(d, pkt.volume), key
+                    assert tp.dense() is d
+        print(f"[{t}] query_tiles == query for {len(ROIS)} ROIs x full/delta x 3 channel picks, dense(out=) ok")
+
+
+def main() -> None:
+    print("CIVD Tile Packet Smoke Test")
+    print("---------------------------")
+
+    root = tempfile.mkdtemp(prefix="civd_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        vols = build_world()
+        check(World.open("."), vols)
+    finally:
+        os.chdir(cwd)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
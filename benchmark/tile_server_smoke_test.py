@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.tile_server import TileServer
+
+
+ROI = ROIBox(88, 168, 88, 168, 120, 200)
+
+
+def check(remote: World, local: World, label: str) -> None:
+    assert remote.times() == local.times()
+    for t in local.times():
+        for mode in ("full", "delta"):
+            before = remote.stats["round_trips"]
+            t0 = time.perf_counter()
+            tp = remote.query_tiles(t, ROI, mode=mode)
+            ms = (time.perf_counter() - t0) * 1000.0
+            trips = remote.stats["round_trips"] - before
+
+            ref = local.query_tiles(t, ROI, mode=mode)
+            assert np.array_equal(tp.dense(), ref.dense())
+            assert np.array_equal(remote.query(t, ROI, mode=mode).volume, local.query(t, ROI, mode=mode).volume)
+            print(f"[{label}] {t} {mode:<5} tiles={tp.tiles_included:3d} round_trips={trips} {ms:7.2f} ms")
+
+    # a repeated query is served from the client cache: no frame round trip
+    before = remote.stats["round_trips"]
+    remote.query_tiles(local.times()[-1], ROI)
+    assert remote.stats["round_trips"] == before
+
+    # slots outside the tile map are rejected, never wrapped or a server error
+    t = local.times()[0]
+    n = len(local.tile_map(t).entries)
+    remote._request("GET", f"/tile/{t}/{n}", ok=(404,))
+    remote._request("GET", f"/tile/{t}/-1", ok=(404,))
+    for bad in (-1, n):
+        body = json.dumps({"time": t, "lod": 0, "slots": [0, bad]}).encode("utf-8")
+        remote._request("POST", "/frames", body, {"Content-Type": "application/json"}, ok=(400,))
+
+    # byte-range reads of the pack itself
+    idx = local.load_time_index(local.times()[0])
+    e = next(e for e in idx["tiles"] if "offset" in e)
+    with open(idx["pack"]["path"].replace("\\", "/"), "rb") as f:
+        f.seek(int(e["offset"]))
+        assert remote.read_range(idx["pack"]["path"], int(e["offset"]), int(e["length"])) == f.read(int(e["length"]))
+
+    # only packs an index refers to are served: not the index itself, nor anything else under the root
+    for other in (f"data/civd_time/{t}/index.json", "data/civd_time", "../" + idx["pack"]["path"].replace("\\", "/")):
+        remote._request("GET", "/pack/" + other, ok=(404,))
+
+
+def main() -> None:
+    print("CIVD Tile Server Smoke Test")
+    print("---------------------------")
+
+    local = World.open(".")
+
+    with TileServer(".") as srv:
+        remote = World.open(srv.url)
+        check(remote, local, "http")
+        print(f"[http] stats: {remote.stats}")
+        remote.close()
+
+    if hasattr(os, "fork"):  # Unix sockets
+        sock = os.path.join(tempfile.mkdtemp(prefix="civd_"), "tiles.sock")
+        with TileServer(".", unix_socket=sock) as srv:
+            remote = World.open(srv.url)
+            check(remote, local, "unix")
+            print(f"[unix] stats: {remote.stats}")
+            remote.close()
+
+    print("ok: remote queries match local")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.roi_shapes import Sphere
+from civd.temporal_tiler import build_timepack
+from civd.tile_set import TileSet
+from civd.tiler import TileSpec
+from civd.upgrade_index import upgrade_index_inplace
+
+
+# grid sizes whose tile counts are not multiples of 8: the last bitset byte is padded
+GRIDS = [(1, 1, 1), (3, 5, 7), (4, 4, 4), (5, 9, 11), (2, 3, 13)]
+SPEC = TileSpec(8, 16, 12, 2)
+SHAPE_ZYX = (37, 50, 61)
+
+
+def as_set(m: np.ndarray) -> set:
+    return {tuple(int(v) for v in c) for c in np.argwhere(m)}
+
+
+def check_algebra(rng: np.random.Generator) -> None:
+    n = 0
+    for grid in GRIDS:
+        for _ in range(40):
+            ma, mb = rng.random(grid) < rng.random(), rng.random(grid) < rng.random()
+            a, b = TileSet.from_mask(ma), TileSet.from_mask(mb)
+            for got, want in ((a | b, ma | mb), (a & b, ma & mb), (a - b, ma & ~mb), (a ^ b, ma ^ mb), (~a, ~ma)):
+                assert np.array_equal(got.dense(), want), grid
+                assert len(got) == int(want.sum()) and bool(got) == bool(want.any()), grid
+                assert set(got) == as_set(want) and np.array_equal(got.coords(), np.argwhere(want)), grid
+                assert np.array_equal(got.keys(), np.flatnonzero(want)), grid
+            assert ~~a == a and len(~a) == a.size - len(a)
+            for op, want in (("__ior__", ma | mb), ("__iand__", ma & mb), ("__isub__", ma & ~mb)):
+                c = a.copy()
+                assert getattr(c, op)(b) is c and np.array_equal(c.dense(), want), (grid, op)
+            assert a == TileSet.from_mask(ma) and np.array_equal(ma, a.dense())
+
+            # box / mask / membership, also past the grid edge
+            if ma.any():
+                nz = [np.flatnonzero(ma.any(axis=ax)) for ax in ((1, 2), (0, 2), (0, 1))]
+                assert a.box() == tuple(range(int(v[0]), int(v[-1]) + 1) for v in nz)
+            else:
+                assert a.box() == (range(0, 0),) * 3
+            tz, ty, tx = (range(-1, g + 1) for g in grid)
+            padded = np.zeros((grid[0] + 2, grid[1] + 2, grid[2] + 2), dtype=bool)
+            padded[1:-1, 1:-1, 1:-1] = ma
+            assert np.array_equal(a.mask(tz, ty, tx), padded)
+            for c in rng.integers(-1, np.array(grid) + 1, size=(10, 3)):
+                assert (tuple(c) in a) == bool(padded[tuple(c + 1)])
+            coords = rng.integers(-2, np.array(grid) + 2, size=(25, 3))
+            inside = np.all((coords >= 0) & (coords < grid), axis=1)
+            want = np.zeros(grid, dtype=bool)
+            want[tuple(coords[inside].T)] = True
+            assert np.array_equal(TileSet.from_coords(grid, coords).dense(), want)
+            n += 1
+
+    a, b = TileSet.full((3, 5, 7)), TileSet.full((3, 5, 7), lod=1)
+    for other in (b, TileSet.full((3, 5, 8))):
+        try:
+            a | other
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("sets on different grids combined")
+    print(f"{n} random set pairs on {len(GRIDS)} grids: | & - ^ ~, in-place ops, box/mask/contains ok")
+
+
+def check_world() -> None:
+    rng = np.random.default_rng(0)
+    v = rng.random(SHAPE_ZYX + (2,), dtype=np.float32)
+    os.makedirs("data")
+    np.save("data/t000.npy", v)
+    build_timepack("data/t000.npy", "data/civd_time/t000", spec=SPEC, timestamp="t000", lod_levels=1)
+    upgrade_index_inplace("data/civd_time/t000/index.json")
+
+    w = World.open(".")
+    tile_zyx = (SPEC.tile_z, SPEC.tile_y, SPEC.tile_x)
+    box, sphere = ROIBox(3, 29, 7, 44, 11, 58), Sphere((18, 25, 30), 14)
+    for roi in (box, sphere):
+        ts = w.tile_set("t000", roi)
+        assert ts == TileSet.from_roi(roi, tile_zyx, SHAPE_ZYX)
+        assert {tuple(c) for c in w.query_tiles("t000", roi).tile_coords_zyx} == set(ts)
+
+    a, b = w.tile_set("t000", box), w.tile_set("t000", sphere)
+    for ts in (a - b, b - a, a & b, a ^ b, ~a):
+        tp = w.query_tiles("t000", ts)
+        assert {tuple(c) for c in tp.tile_coords_zyx} == set(ts)
+        for j, (z0, z1, y0, y1, x0, x1) in enumerate(tp.tile_bounds_zyx):
+            assert np.array_equal(tp.tile(j), v[z0:z1, y0:y1, x0:x1])
+
+    coarse = w.tile_set("t000", box, lod=1)
+    assert coarse.lod == 1 and w.query("t000", coarse).meta["lod"] == 1
+    try:
+        w.query("t000", coarse, lod=0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("lod-1 tile set queried at lod 0")
+    print("World.tile_set matches TileSet.from_roi; set algebra results query exactly their tiles")
+
+
+def main() -> None:
+    print("CIVD Tile Set Smoke Test")
+    print("------------------------")
+
+    check_algebra(np.random.default_rng(0))
+    root = tempfile.mkdtemp(prefix="civd_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        check_world()
+    finally:
+        os.chdir(cwd)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.lod import build_pyramid
+from civd.temporal_tiler import build_timepack
+from civd.tile_stats import may_contain, subbrick_mask
+from civd.tiler import TileSpec
+from civd.upgrade_index import upgrade_index_inplace
+
+
+LEVELS = 1
+SUB = 4
+SPEC = TileSpec(8, 16, 12, 2)
+SHAPE_ZYX = (37, 50, 61)
+RANGES = [(0, 0.9, None), (0, None, 0.05), (0, 0.4, 0.41), (0, 1.5, None), (1, 3.0, 3.0), (1, None, -1.0)]
+
+
+def build_world() -> list:
+    rng = np.random.default_rng(0)
+    v0 = (rng.random(SHAPE_ZYX + (2,), dtype=np.float32) ** 4).astype(np.float32)
+    v0[..., 1] = np.floor(v0[..., 1] * 4)
+    v1 = v0.copy()
+    v1[20:37, 30:50, 40:61, 0] += 1.0
+    vols = [v0, v1]
+    os.makedirs("data")
+    for i, v in enumerate(vols):
+        t = f"t{i:03d}"
+        np.save(f"data/{t}.npy", v)
+        base = {"base_index_path": f"data/civd_time/t{i - 1:03d}/index.json"} if i else {}
+        build_timepack(
+            f"data/{t}.npy", f"data/civd_time/{t}", spec=SPEC, timestamp=t, lod_levels=LEVELS, stats_subbrick=SUB, **base
+        )
+        upgrade_index_inplace(f"data/civd_time/{t}/index.json")
+    return vols
+
+
+def in_range(a: np.ndarray, lo, hi) -> np.ndarray:
+    m = np.ones(a.shape, dtype=bool)
+    if lo is not None:
+        m &= a >= lo
+    if hi is not None:
+        m &= a <= hi
+    return m
+
+
+def check_stats(w: World, vols: list) -> None:
+    for i, t in enumerate(w.times()):
+        pyramid = [vols[i]] + build_pyramid(vols[i], LEVELS)
+        for lod, ref in enumerate(pyramid):
+            st = w.tile_stats(t, lod=lod)
+            assert st["has_stats"].all()
+            for j, (z0, z1, y0, y1, x0, x1) in enumerate(st["bounds"]):
+                flat = ref[z0:z1, y0:y1, x0:x1].reshape(-1, ref.shape[3])
+                assert np.array_equal(st["min"][j], flat.min(0)) and np.array_equal(st["max"][j], flat.max(0)), (t, lod, j)
+                assert np.allclose(st["mean"][j], flat.mean(0, dtype=np.float64), rtol=1e-6, atol=1e-6), (t, lod, j)
+            print(f"[{t}] lod {lod}: stats of {len(st['bounds'])} tiles match the volume")
+
+
+def check_pruning(w: World, vols: list) -> None:
+    roi = ROIBox(3, 37, 2, 50, 5, 61)
+    for i, t in enumerate(w.times()):
+        v = vols[i]
+        tmap = w.tile_map(t)
+        for c, lo, hi in RANGES:
+            hit = in_range(v[..., c], lo, hi)
+            pruned = sub_pruned = 0
+            for e in tmap.entries:
+                tc = e["tile_coords"]
+                z0, y0, x0 = tc["tz"] * SPEC.tile_z, tc["ty"] * SPEC.tile_y, tc["tx"] * SPEC.tile_x
+                h = hit[z0:z0 + SPEC.tile_z, y0:y0 + SPEC.tile_y, x0:x0 + SPEC.tile_x]
+                if not may_contain(e, c, lo, hi):
+                    assert not h.any(), (t, c, lo, hi, e["tile_id"])
+                    pruned += 1
+                shape, keep = subbrick_mask(e, c, lo, hi)
+                bz, by, bx = shape
+                for a, b, d in np.argwhere(~keep):
+                    assert not h[a * bz:(a + 1) * bz, b * by:(b + 1) * by, d * bx:(d + 1) * bx].any(), (t, c, lo, hi)
+                sub_pruned += int((~keep).sum())
+
+            # value_range keeps every tile that holds a voxel in range
+            tp = w.query_tiles(t, roi, value_range=(c, lo, hi))
+            kept = {tuple(x) for x in tp.tile_coords_zyx}
+            full = w.query_tiles(t, roi)
+            for (z0, z1, y0, y1, x0, x1), tc in zip(full.tile_bounds_zyx, full.tile_coords_zyx):
+                if hit[z0:z1, y0:y1, x0:x1].any():
+                    assert tuple(tc) in kept, (t, c, lo, hi, tc)
+            assert tp.meta["tiles_pruned"] == len(full) - len(tp)
+            print(
+                f"[{t}] ch{c} [{lo}, {hi}]: {pruned}/{len(tmap)} tiles and {sub_pruned} sub-bricks pruned, "
+                f"value_range kept {len(tp)}/{len(full)}, no false negatives"
+            )
+
+
+def main() -> None:
+    print("CIVD Tile Stats Smoke Test")
+    print("--------------------------")
+
+    root = tempfile.mkdtemp(prefix="civd_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        vols = build_world()
+        w = World.open(".")
+        check_stats(w, vols)
+        check_pruning(w, vols)
+    finally:
+        os.chdir(cwd)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
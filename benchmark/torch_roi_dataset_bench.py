@@ -0,0 +1,68 @@
+import time
+
+import torch
+from torch.utils.data import DataLoader
+
+from civd import World
+from civd.adapters import TorchAdapter, TorchROIDataset, TorchROIIterableDataset, SharedTileCache, roi_grid
+from civd.roi_shapes import Sphere
+from civd.source import ObservationRequest
+
+
+SIZE = (32, 32, 32)
+BATCH = 8
+
+
+def rate(n: int, seconds: float) -> str:
+    return f"{n / seconds:8.1f} samples/s"
+
+
+def main() -> None:
+    print("CIVD Torch ROI Dataset Benchmark")
+    print("--------------------------------")
+
+    w = World.open(".")
+    Z, Y, X, _C = w.load_time_index(w.times()[0])["volume"]["shape_zyxc"]
+    samples = [(t, r) for t in w.times() for r in roi_grid((Z, Y, X), SIZE, (16, 16, 16))]
+    print(f"{len(samples)} samples of {SIZE}, batch {BATCH}")
+
+    # baseline: one request at a time through TorchAdapter (copy + permute)
+    ad = TorchAdapter(w.as_observation_source(), channels_first=True)
+    t0 = time.perf_counter()
+    for t, r in samples:
+        ad.get(ObservationRequest(time_name=t, roi=r, mode="full"))
+    print(f"TorchAdapter.get           {rate(len(samples), time.perf_counter() - t0)}")
+
+    ref = TorchROIDataset(".", samples)
+    for i in range(0, len(samples), max(1, len(samples) // 16)):
+        t, r = samples[i]
+        expect = torch.from_numpy(w.query(t, r).volume).permute(3, 0, 1, 2)
+        assert torch.equal(ref[i], expect)
+
+    # ROI shapes and delta mode select tiles as World.query does, cached or not
+    cache = SharedTileCache.for_world(w, 64 << 20)
+    spheres = [(t, Sphere((Z // 2, Y // 2, X // 2), min(SIZE) // 2)) for t in w.times()]
+    for mode in ("full", "delta"):
+        ds = TorchROIDataset(".", spheres, mode=mode, cache=cache)
+        for _ in range(2):
+            for i, (t, s) in enumerate(spheres):
+                assert torch.equal(ds[i], torch.from_numpy(w.query(t, s, mode=mode, layout="czyx").volume))
+    cache.close()
+
+    for workers in (0, 2, 4):
+        for cached in (False, True):
+            cache = SharedTileCache.for_world(w, 256 << 20) if cached else None
+            ds = TorchROIIterableDataset(".", samples, batch_size=BATCH, cache=cache, pin_memory=True)
+            dl = DataLoader(ds, batch_size=None, num_workers=workers, pin_memory=torch.cuda.is_available())
+            for epoch in range(2):  # the second epoch shows the shared cache
+                t0 = time.perf_counter()
+                n = sum(int(b.shape[0]) for b in dl)
+                assert n == len(samples)
+                label = f"iterable workers={workers} cache={'on ' if cached else 'off'} epoch={epoch}"
+                print(f"{label:<27}{rate(n, time.perf_counter() - t0)}")
+            if cache is not None:
+                cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import tempfile
+
+import numpy as np
+
+from civd import World, ROIBox
+from civd.lod import build_pyramid
+from civd.roi_shapes import Sphere
+from civd.temporal_tiler import build_timepack
+from civd.tiler import TileSpec
+from civd.upgrade_index import upgrade_index_inplace
+
+
+# Every World read path (query, query_tiles, read_compressed, query_timerange,
+# find) plans its ROI through World._plan: check them against each other and
+# against the source volumes, at both LOD levels, in full, delta and since modes.
+LEVELS = 1
+SPEC = TileSpec(8, 16, 16, 2)
+SHAPE_ZYX = (37, 50, 61)
+ROIS = [ROIBox(0, 37, 0, 50, 0, 61), ROIBox(3, 29, 7, 44, 11, 58), ROIBox(30, 37, 40, 50, 50, 61)]
+
+
+def build_world() -> list:
+    rng = np.random.default_rng(0)
+    v0 = rng.random(SHAPE_ZYX + (2,), dtype=np.float32)
+    v0[..., 1] = np.floor(v0[..., 1] * 4)
+    v1 = v0.copy()
+    v1[4:12, 10:30, 20:40, 0] += 1.0
+    v2 = v1.copy()
+    v2[30:37, 40:50, 50:61, 0] += 2.0  # the ragged far corner
+    vols = [v0, v1, v2]
+    os.makedirs("data")
+    for i, v in enumerate(vols):
+        t = f"t{i:03d}"
+        np.save(f"data/{t}.npy", v)
+        base = {"base_index_path": f"data/civd_time/t{i - 1:03d}/index.json"} if i else {}
+        build_timepack(f"data/{t}.npy", f"data/civd_time/{t}", spec=SPEC, timestamp=t, lod_levels=LEVELS, **base)
+        upgrade_index_inplace(f"data/civd_time/{t}/index.json")
+    return vols
+
+
+def crop(v: np.ndarray, r: ROIBox) -> np.ndarray:
+    return v[r.z0:r.z1, r.y0:r.y1, r.x0:r.x1]
+
+
+def changed_since(vols: list, k0: int, k: int, shape_zyx, tile_zyx) -> np.ndarray:
+    # voxels of the tiles written at any time after k0 up to k (ROI-free, full grid)
+    m = np.zeros(shape_zyx, dtype=bool)
+    sz, sy, sx = tile_zyx
+    for a, b in zip(vols[k0:k], vols[k0 + 1:k + 1]):
+        diff = (a != b).any(axis=3)
+        for z in range(0, shape_zyx[0], sz):
+            for y in range(0, shape_zyx[1], sy):
+                for x in range(0, shape_zyx[2], sx):
+                    if diff[z:z + sz, y:y + sy, x:x + sx].any():
+                        m[z:z + sz, y:y + sy, x:x + sx] = True
+    return m
+
+
+def check_paths(w: World, vols: list) -> None:
+    times = w.times()
+    pyramids = [[v] + build_pyramid(v, LEVELS) for v in vols]
+    for lod in range(LEVELS + 1):
+        for roi in ROIS:
+            seq = w.query_timerange(roi, lod=lod)
+            for i, t in enumerate(times):
+                ref = pyramids[i][lod]
+                pkt = w.query(t, roi, lod=lod)
+                assert np.array_equal(pkt.volume, crop(ref, pkt.roi)), (t, lod, roi)
+                assert np.array_equal(seq.volume[i], pkt.volume), (t, lod, roi)
+
+                out = np.full((pkt.volume.shape[3],) + pkt.volume.shape[:3], -7.0, dtype=np.float32)
+                w.query(t, roi, lod=lod, out=out, layout="czyx")
+                assert np.array_equal(np.moveaxis(out, 0, -1), pkt.volume), (t, lod, roi)
+
+                for mode in ("full", "delta"):
+                    vol = w.query(t, roi, lod=lod, mode=mode).volume
+                    tp = w.query_tiles(t, roi, lod=lod, mode=mode)
+                    cp = w.read_compressed(t, roi, lod=lod, mode=mode)
+                    assert np.array_equal(tp.dense(), vol), (t, lod, roi, mode)
+                    assert np.array_equal(cp.to_tile_packet().dense(), vol), (t, lod, roi, mode)
+                    assert tp.tiles_included == len(cp) == cp.tiles_included, (t, lod, roi, mode)
+
+                for pred in ("> 0.9", "< 0.05"):
+                    r = w.find(t, roi, pred, 0, lod=lod)
+                    sub = crop(ref, pkt.roi)[..., 0]
+                    want = np.argwhere(sub > 0.9 if pred == "> 0.9" else sub < 0.05)
+                    got = r.coords_zyx - np.array([pkt.roi.z0, pkt.roi.y0, pkt.roi.x0])
+                    assert sorted(map(tuple, got)) == sorted(map(tuple, want)), (t, lod, roi, pred)
+        print(f"lod {lod}: query / out= / query_tiles / read_compressed / query_timerange / find agree")
+
+
+def check_since(w: World, vols: list) -> None:
+    times = w.times()
+    tile_zyx = (SPEC.tile_z, SPEC.tile_y, SPEC.tile_x)
+    for k in range(1, len(times)):
+        for k0 in range(k):
+            m = changed_since(vols, k0, k, SHAPE_ZYX, tile_zyx)
+            for roi in ROIS:
+                pkt = w.query(times[k], roi, since=times[k0])
+                want = np.where(crop(m, roi)[..., None], crop(vols[k], roi), 0.0)
+                assert np.array_equal(pkt.volume, want), (times[k0], times[k], roi)
+    print("since=t0 deltas ok")
+
+
+def check_shapes_and_sets(w: World, vols: list) -> None:
+    t = w.times()[-1]
+    sphere = Sphere((18, 25, 30), 14)
+    pkt = w.query(t, sphere, mask_outside=True)
+    r = pkt.roi
+    want = np.where(sphere.voxel_mask(r)[..., None], crop(vols[-1], r), 0.0)
+    assert np.array_equal(pkt.volume, want)
+    assert np.array_equal(w.query_tiles(t, sphere, mask_outside=True).dense(), pkt.volume)
+
+    a, b = w.tile_set(t, ROIS[1]), w.tile_set(t, sphere)
+    for ts in (a, b, a - b, a | b, a & b, a ^ b):
+        # member tiles read as stored, the rest of their bounding box as fill
+        bits = ts.dense()
+        for axis, n in enumerate((SPEC.tile_z, SPEC.tile_y, SPEC.tile_x)):
+            bits = np.repeat(bits, n, axis=axis)
+        m = bits[:SHAPE_ZYX[0], :SHAPE_ZYX[1], :SHAPE_ZYX[2]]
+        pkt = w.query(t, ts)
+        tp = w.query_tiles(t, ts)
+        assert tp.tiles_included == len(ts) == len(w.read_compressed(t, ts))
+        want = np.where(crop(m, pkt.roi)[..., None], crop(vols[-1], pkt.roi), 0.0)
+        assert np.array_equal(pkt.volume, want), ts
+        assert np.array_equal(tp.dense(), want), ts
+    print("ROI shapes and tile sets ok")
+
+
+def main() -> None:
+    print("CIVD World Read Paths Smoke Test")
+    print("--------------------------------")
+
+    root = tempfile.mkdtemp(prefix="civd_")
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        vols = build_world()
+        w = World.open(".")
+        check_paths(w, vols)
+        check_since(w, vols)
+        check_shapes_and_sets(w, vols)
+    finally:
+        os.chdir(cwd)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+CIVD binary message frame ("civdmsg"): one SubmapDeltaMsg per record.
+
+Record layout (little endian, every block 64-byte aligned from record start):
+
+  header   fixed struct (_HEADER, 128 bytes)
+  strings  schema utf-8 | timestamp utf-8
+  bounds   int32 (N, 6)
+  payload  raw:  float32 (N, tz, ty, tx, C), one contiguous block
+           zstd: uint64 (N,) frame lengths, then N zstd frames back to back;
+                 a frame decodes to a full (tz, ty, tx, C) tile, or to the
+                 tile's bounds shape for ragged edge tiles (frames relayed
+                 from the pack by encode_compressed)
+
+Records carry their own total length, so a file of concatenated records is
+an append-only log that can be scanned (and, for raw payloads, read with
+zero copies) through mmap.
+"""
+
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import zstandard as zstd
+
+from bridge.msg import SubmapDeltaMsg
+
+
+MAGIC = b"CIVDMSG1"
+VERSION = 1
+
+COMPRESS_RAW = 0
+COMPRESS_ZSTD = 1
+_COMPRESS_NAMES = {"raw": COMPRESS_RAW, "zstd": COMPRESS_ZSTD}
+
+_MODES = {"full": 0, "delta": 1}
+_MODE_NAMES = {v: k for k, v in _MODES.items()}
+
+_ALIGN = 64
+
+# magic, version, compress, mode, reserved, n_tiles, tz, ty, tx, C,
+# roi_zyx[6], schema_len, timestamp_len, bytes_read_est, decode_ms,
+# record_len, strings_off, bounds_off, payload_off, payload_len
+_HEADER = struct.Struct("<8sHBBI5I6iHHqdQQQQQ")
+HEADER_SIZE = 128
+assert _HEADER.size <= HEADER_SIZE
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _align(n: int) -> int:
+    return -(-int(n) // _ALIGN) * _ALIGN
+
+
+def _byte_view(a: np.ndarray) -> memoryview:
+    # flat uint8 view of a C-contiguous array (also valid for empty arrays)
+    return memoryview(a.reshape(-1).view(np.uint8))
+
+
+def encode_msg(msg: SubmapDeltaMsg, *, compress: str = "raw", level: int = 3) -> bytes:
+    """
+    Serialize a SubmapDeltaMsg into one civdmsg record.
+
+    compress="raw" stores the tile arena as-is (fastest, mmap zero-copy);
+    compress="zstd" stores one zstd frame per tile.
+    """
+    if compress not in _COMPRESS_NAMES:
+        raise ValueError(f"compress must be one of {sorted(_COMPRESS_NAMES)}, got {compress!r}")
+    if msg.mode not in _MODES:
+        raise ValueError(f"mode must be one of {sorted(_MODES)}, got {msg.mode!r}")
+
+    tiles = np.ascontiguousarray(msg.tiles, dtype=np.float32)
+    if tiles.ndim != 5:
+        raise ValueError("msg.tiles must be (N, tz, ty, tx, C)")
+    n, tz, ty, tx, c = (int(v) for v in tiles.shape)
+    bounds = np.ascontiguousarray(msg.tile_bounds_zyx, dtype=np.int32).reshape(n, 6)
+
+    schema = msg.schema.encode("utf-8")
+    ts = str(msg.timestamp).encode("utf-8")
+
+    if compress == "raw":
+        payload: List[Buffer] = [_byte_view(tiles)]
+    else:
+        cctx = zstd.ZstdCompressor(level=level)
+        frames = [cctx.compress(_byte_view(tiles[i])) for i in range(n)]
+        lengths = np.array([len(f) for f in frames], dtype=np.uint64)
+        payload = [lengths.tobytes()] + frames
+    payload_len = sum(len(p) for p in payload)
+
+    strings_off = HEADER_SIZE
+    bounds_off = _align(strings_off + len(schema) + len(ts))
+    payload_off = _align(bounds_off + bounds.nbytes)
+    record_len = _align(payload_off + payload_len)
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, _COMPRESS_NAMES[compress], _MODES[msg.mode], 0,
+        n, tz, ty, tx, c,
+        *(int(v) for v in msg.roi_zyx),
+        len(schema), len(ts),
+        -1 if msg.compressed_bytes_read_est is None else int(msg.compressed_bytes_read_est),
+        float("nan") if msg.decode_ms is None else float(msg.decode_ms),
+        record_len, strings_off, bounds_off, payload_off, payload_len,
+    )
+
+    out = bytearray(record_len)
+    out[:len(header)] = header
+    out[strings_off:strings_off + len(schema)] = schema
+    out[strings_off + len(schema):strings_off + len(schema) + len(ts)] = ts
+    out[bounds_off:bounds_off + bounds.nbytes] = _byte_view(bounds)
+    pos = payload_off
+    for p in payload:
+        out[pos:pos + len(p)] = p
+        pos += len(p)
+    return bytes(out)
+
+
+def encode_compressed(
+    pkt: Any,
+    *,
+    schema: str = "civd.ros2.submap_delta.v2",
+    timestamp: Optional[str] = None,
+) -> bytes:
+    """
+    Serialize a CompressedPacket (World.read_compressed) into one zstd
+    civdmsg record without decompressing or recompressing its frames.
+
+    Frames are copied byte-for-byte; ragged edge tiles keep their own
+    (smaller) frames and decode to their bounds shape. Tombstones (no
+    frame) are sent as a tiny zstd frame of the packet's fill value.
+    """
+    if pkt.mode not in _MODES:
+        raise ValueError(f"mode must be one of {sorted(_MODES)}, got {pkt.mode!r}")
+    for c in pkt.codecs:
+        if c.get("name") not in ("zstd", "empty"):
+            raise ValueError(f"cannot relay {c.get('name')!r} frames in a civdmsg record")
+        if c.get("layout", "zyxc") != "zyxc":
+            # civdmsg tiles are (tz,ty,tx,C); planar packs need a decoding publisher
+            raise ValueError(f"cannot relay {c['layout']!r} (planar) frames in a civdmsg record")
+
+    n = len(pkt.frames)
+    tz, ty, tx = (int(v) for v in pkt.tile_shape_zyx)
+    c = int(pkt.shape_zyxc[3])
+    bounds = np.ascontiguousarray(pkt.tile_bounds_zyx, dtype=np.int32).reshape(n, 6)
+
+    fills: Dict[Tuple[int, ...], bytes] = {}
+    frames: List[Buffer] = []
+    for i, f in enumerate(pkt.frames):
+        if f is None:
+            shape = tuple(int(v) for v in pkt.tile_shapes_zyxc[i])
+            if shape not in fills:
+                fill = np.full(shape, pkt.fill_value, dtype=np.float32)
+                fills[shape] = zstd.ZstdCompressor(level=1).compress(_byte_view(fill))
+            f = fills[shape]
+        frames.append(f)
+    lengths = np.array([len(f) for f in frames], dtype=np.uint64)
+    payload: List[Buffer] = [lengths.tobytes()] + frames
+    payload_len = sum(len(p) for p in payload)
+
+    schema_b = schema.encode("utf-8")
+    ts = str(pkt.time if timestamp is None else timestamp).encode("utf-8")
+
+    strings_off = HEADER_SIZE
+    bounds_off = _align(strings_off + len(schema_b) + len(ts))
+    payload_off = _align(bounds_off + bounds.nbytes)
+    record_len = _align(payload_off + payload_len)
+
+    r = pkt.roi
+    header = _HEADER.pack(
+        MAGIC, VERSION, COMPRESS_ZSTD, _MODES[pkt.mode], 0,
+        n, tz, ty, tx, c,
+        int(r.z0), int(r.z1), int(r.y0), int(r.y1), int(r.x0), int(r.x1),
+        len(schema_b), len(ts),
+        int(pkt.bytes_read),
+        float("nan"),
+        record_len, strings_off, bounds_off, payload_off, payload_len,
+    )
+
+    out = bytearray(record_len)
+    out[:len(header)] = header
+    out[strings_off:strings_off + len(schema_b)] = schema_b
+    out[strings_off + len(schema_b):strings_off + len(schema_b) + len(ts)] = ts
+    out[bounds_off:bounds_off + bounds.nbytes] = _byte_view(bounds)
+    pos = payload_off
+    for p in payload:
+        out[pos:pos + len(p)] = p
+        pos += len(p)
+    return bytes(out)
+
+
+def read_header(buf: Buffer, offset: int = 0) -> dict:
+    """
+    Parse the fixed header of the record at `offset`.
+    """
+    if len(buf) - offset < HEADER_SIZE:
+        raise ValueError("truncated civdmsg record (header)")
+    f = _HEADER.unpack_from(buf, offset)
+    if f[0] != MAGIC:
+        raise ValueError(f"not a civdmsg record at offset {offset} (magic={f[0]!r})")
+    if f[1] != VERSION:
+        raise ValueError(f"unsupported civdmsg version {f[1]}")
+    return {
+        "compress": f[2],
+        "mode": _MODE_NAMES.get(f[3], "full"),
+        "n_tiles": f[5],
+        "tile_shape_zyxc": tuple(f[6:10]),
+        "roi_zyx": tuple(f[10:16]),
+        "schema_len": f[16],
+        "timestamp_len": f[17],
+        "bytes_read_est": None if f[18] < 0 else int(f[18]),
+        "decode_ms": None if f[19] != f[19] else float(f[19]),
+        "record_len": f[20],
+        "strings_off": f[21],
+        "bounds_off": f[22],
+        "payload_off": f[23],
+        "payload_len": f[24],
+    }
+
+
+def decode_msg(buf: Buffer, offset: int = 0, *, copy: bool = False) -> Tuple[SubmapDeltaMsg, int]:
+    """
+    Decode the record at `offset`. Returns (msg, offset of the next record).
+
+    Raw payloads are returned as views into `buf` unless copy=True (views keep
+    `buf` alive; bytes/mmap buffers are read-only).
+    """
+    h = read_header(buf, offset)
+    if len(buf) - offset < h["record_len"]:
+        raise ValueError("truncated civdmsg record (payload)")
+
+    mv = memoryview(buf)
+    s0 = offset + h["strings_off"]
+    schema = bytes(mv[s0:s0 + h["schema_len"]]).decode("utf-8")
+    s1 = s0 + h["schema_len"]
+    ts = bytes(mv[s1:s1 + h["timestamp_len"]]).decode("utf-8")
+
+    n = h["n_tiles"]
+    tz, ty, tx, c = h["tile_shape_zyxc"]
+    bounds = np.frombuffer(buf, dtype=np.int32, count=n * 6, offset=offset + h["bounds_off"]).reshape(n, 6)
+
+    p0 = offset + h["payload_off"]
+    if h["compress"] == COMPRESS_RAW:
+        tiles = np.frombuffer(buf, dtype=np.float32, count=n * tz * ty * tx * c, offset=p0)
+        tiles = tiles.reshape(n, tz, ty, tx, c)
+        if copy:
+            tiles, bounds = tiles.copy(), bounds.copy()
+    elif h["compress"] == COMPRESS_ZSTD:
+        tiles = np.empty((n, tz, ty, tx, c), dtype=np.float32)
+        dctx = zstd.ZstdDecompressor()
+        for i, frame in enumerate(_frame_views(buf, offset, h)):
+            raw = dctx.decompress(frame, max_output_size=tiles[i].nbytes)
+            if len(raw) == tiles[i].nbytes:
+                tiles[i] = np.frombuffer(raw, dtype=np.float32).reshape(tz, ty, tx, c)
+            else:
+                # ragged edge tile relayed from a pack: place it in the slot corner
+                z0, z1, y0, y1, x0, x1 = (int(v) for v in bounds[i])
+                tiles[i].fill(0.0)
+                tiles[i, :z1 - z0, :y1 - y0, :x1 - x0] = (
+                    np.frombuffer(raw, dtype=np.float32).reshape(z1 - z0, y1 - y0, x1 - x0, c)
+                )
+        bounds = bounds.copy()
+    else:
+        raise ValueError(f"unknown civdmsg compression {h['compress']}")
+
+    msg = SubmapDeltaMsg(
+        schema=schema,
+        timestamp=ts,
+        mode=h["mode"],
+        roi_zyx=h["roi_zyx"],
+        tile_bounds_zyx=bounds,
+        tiles=tiles,
+        compressed_bytes_read_est=h["bytes_read_est"],
+        decode_ms=h["decode_ms"],
+    )
+    return msg, offset + h["record_len"]
+
+
+def _frame_views(buf: Buffer, offset: int, h: dict) -> List[memoryview]:
+    n = h["n_tiles"]
+    p0 = offset + h["payload_off"]
+    lengths = np.frombuffer(buf, dtype=np.uint64, count=n, offset=p0).tolist()
+    mv = memoryview(buf)
+    out: List[memoryview] = []
+    pos = p0 + 8 * n
+    for length in lengths:
+        out.append(mv[pos:pos + length])
+        pos += length
+    return out
+
+
+def read_frames(buf: Buffer, offset: int = 0) -> Tuple[dict, np.ndarray, List[memoryview]]:
+    """
+    (header, bounds (N, 6), frames) of a zstd record, without decoding any
+    tile: frames are views into `buf`, so a receiver decompresses only the
+    tiles it needs (or forwards them as they are).
+    """
+    h = read_header(buf, offset)
+    if h["compress"] != COMPRESS_ZSTD:
+        raise ValueError("read_frames needs a zstd civdmsg record")
+    if len(buf) - offset < h["record_len"]:
+        raise ValueError("truncated civdmsg record (payload)")
+    n = h["n_tiles"]
+    bounds = np.frombuffer(buf, dtype=np.int32, count=n * 6, offset=offset + h["bounds_off"]).reshape(n, 6)
+    return h, bounds, _frame_views(buf, offset, h)
+
+
+def iter_records(buf: Buffer, offset: int = 0, *, copy: bool = False) -> Iterator[SubmapDeltaMsg]:
+    """
+    Decode consecutive records from `buf` (e.g. an mmap of a log file).
+    A trailing partial record (writer still appending) ends the iteration.
+    """
+    end = len(buf)
+    while end - offset >= HEADER_SIZE:
+        h = read_header(buf, offset)
+        if end - offset < h["record_len"]:
+            return
+        msg, offset = decode_msg(buf, offset, copy=copy)
+        yield msg
+
+
+def record_offsets(buf: Buffer) -> List[int]:
+    """
+    Start offsets of all complete records in `buf` (headers only, no decode).
+    """
+    out: List[int] = []
+    offset, end = 0, len(buf)
+    while end - offset >= HEADER_SIZE:
+        h = read_header(buf, offset)
+        if end - offset < h["record_len"]:
+            break
+        out.append(offset)
+        offset += h["record_len"]
+    return out
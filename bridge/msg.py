@@ -22,3 +22,21 @@ class SubmapDeltaMsg:
     # Optional debug/meta
     compressed_bytes_read_est: Optional[int] = None
     decode_ms: Optional[float] = None
+
+
+def msg_from_tile_packet(pkt, *, schema: str = "civd.phase_f.submap_delta_msg.v1") -> SubmapDeltaMsg:
+    """
+    Build a SubmapDeltaMsg from a civd TilePacket (World.query_tiles) without
+    copying: the packet's tile arena and bounds become the message arrays.
+    """
+    r = pkt.roi
+    return SubmapDeltaMsg(
+        schema=schema,
+        timestamp=pkt.time,
+        mode=pkt.mode,
+        roi_zyx=(int(r.z0), int(r.z1), int(r.y0), int(r.y1), int(r.x0), int(r.x1)),
+        tile_bounds_zyx=pkt.tile_bounds_zyx,
+        tiles=pkt.tiles,
+        compressed_bytes_read_est=int(pkt.bytes_read),
+        decode_ms=float(pkt.decode_ms),
+    )
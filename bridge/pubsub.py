@@ -1,25 +1,51 @@
 import json
+import mmap
 import os
 import time
-from typing import Optional
+from typing import Iterator, List, Optional
 
 import numpy as np
 
+from bridge.frame import decode_msg, encode_msg, iter_records, record_offsets
 from bridge.msg import SubmapDeltaMsg
 
 
-def publish_to_dir(msg: SubmapDeltaMsg, out_dir: str = "bridge_out") -> str:
+MSG_EXT = ".civdmsg"
+
+
+def _message_base(msg: SubmapDeltaMsg, out_dir: str) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    name = f"civd_submap_{msg.timestamp}_{msg.mode}_{int(time.time()*1000)}"
+    return os.path.join(out_dir, name)
+
+
+def publish_to_dir(
+    msg: SubmapDeltaMsg,
+    out_dir: str = "bridge_out",
+    *,
+    compress: str = "raw",
+    level: int = 3,
+) -> str:
+    """
+    Writes a 'topic message' to disk as one civdmsg record (see bridge.frame):
+      - <name>.civdmsg : header + tile bounds + raw or zstd tile payloads
+    Returns the base path (without extension).
+    """
+    base = _message_base(msg, out_dir)
+    with open(base + MSG_EXT, "wb") as f:
+        f.write(encode_msg(msg, compress=compress, level=level))
+    return base
+
+
+def publish_to_dir_npz(msg: SubmapDeltaMsg, out_dir: str = "bridge_out") -> str:
     """
-    Writes a 'topic message' to disk:
+    Legacy writer (kept for comparison benchmarks and older subscribers):
       - <name>.npz : tiles + bounds + roi
       - <name>.json: metadata
     Returns the base path (without extension).
     """
-    os.makedirs(out_dir, exist_ok=True)
-
+    base = _message_base(msg, out_dir)
     ts = msg.timestamp
-    name = f"civd_submap_{ts}_{msg.mode}_{int(time.time()*1000)}"
-    base = os.path.join(out_dir, name)
 
     np.savez_compressed(
         base + ".npz",
@@ -49,8 +75,13 @@ def publish_to_dir(msg: SubmapDeltaMsg, out_dir: str = "bridge_out") -> str:
 
 def load_from_base(base_path: str) -> SubmapDeltaMsg:
     """
-    Loads a message written by publish_to_dir().
+    Loads a message written by publish_to_dir() (or the legacy npz writer).
     """
+    if os.path.exists(base_path + MSG_EXT):
+        with open(base_path + MSG_EXT, "rb") as f:
+            msg, _next = decode_msg(f.read())
+        return msg
+
     meta_path = base_path + ".json"
     npz_path = base_path + ".npz"
 
@@ -70,3 +101,72 @@ def load_from_base(base_path: str) -> SubmapDeltaMsg:
         decode_ms=meta.get("decode_ms"),
     )
     return msg
+
+
+def append_to_log(
+    msg: SubmapDeltaMsg,
+    log_path: str,
+    *,
+    compress: str = "raw",
+    level: int = 3,
+) -> int:
+    """
+    Append one civdmsg record to an append-only log file.
+    Returns the record's byte offset in the log.
+    """
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    rec = encode_msg(msg, compress=compress, level=level)
+    with open(log_path, "ab") as f:
+        offset = f.tell()
+        f.write(rec)
+    return offset
+
+
+class MessageLog:
+    """
+    mmap reader over a civdmsg log written by append_to_log().
+
+    Raw-payload messages are views into the mapping (no copy); they stay
+    valid while the reader (or the views themselves) are alive. Records
+    appended after opening are picked up by refresh().
+    """
+
+    def __init__(self, log_path: str):
+        self.path = log_path
+        self._f = open(log_path, "rb")
+        self._mm: Optional[mmap.mmap] = None
+        self.offsets: List[int] = []
+        self.refresh()
+
+    def refresh(self) -> int:
+        size = os.fstat(self._f.fileno()).st_size
+        if size == 0:
+            self._mm, self.offsets = None, []
+            return 0
+        if self._mm is None or len(self._mm) != size:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = record_offsets(self._mm)
+        return len(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, i: int) -> SubmapDeltaMsg:
+        msg, _next = decode_msg(self._mm, self.offsets[i])
+        return msg
+
+    def __iter__(self) -> Iterator[SubmapDeltaMsg]:
+        if self._mm is None:
+            return iter(())
+        return iter_records(self._mm)
+
+    def close(self) -> None:
+        # the mapping itself is released once no message views reference it
+        self._mm = None
+        self._f.close()
+
+    def __enter__(self) -> "MessageLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
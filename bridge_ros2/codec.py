@@ -0,0 +1,168 @@
+import array
+from typing import Any, Iterator, List, Optional, Sequence
+
+from bridge.frame import decode_msg, encode_compressed, encode_msg
+from bridge.msg import SubmapDeltaMsg, msg_from_tile_packet
+
+
+TOPIC = "/civd/submap_delta"
+SCHEMA = "civd.ros2.submap_delta.v2"
+
+
+def encode_payload(msg: SubmapDeltaMsg, *, compress: str = "raw", level: int = 3) -> bytes:
+    """
+    CIVD binary frame (bridge.frame civdmsg record) for one message.
+    """
+    return encode_msg(msg, compress=compress, level=level)
+
+
+def decode_payload(payload: Any, *, copy: bool = False) -> SubmapDeltaMsg:
+    """
+    Decode a civdmsg payload from bytes, memoryview or array.array('B').
+    """
+    msg, _next = decode_msg(payload, copy=copy)
+    return msg
+
+
+def to_uint8_multiarray(payload: bytes, msg_type: Any) -> Any:
+    """
+    Fill a std_msgs UInt8MultiArray (or stand-in) with `payload`.
+
+    rclpy stores uint8[] fields as array.array('B'); assigning one skips the
+    per-element conversion that `list(payload)` costs.
+    """
+    ros_msg = msg_type()
+    ros_msg.data = array.array("B", payload)
+    return ros_msg
+
+
+def from_uint8_multiarray(ros_msg: Any, *, copy: bool = False) -> SubmapDeltaMsg:
+    """
+    Decode a received UInt8MultiArray without rebuilding a bytes object
+    (falls back to bytes() for list-backed data from older bindings).
+    """
+    data = ros_msg.data
+    if isinstance(data, (list, tuple)):
+        data = bytes(data)
+    return decode_payload(memoryview(data), copy=copy)
+
+
+class TimeCursor:
+    """
+    Walks a World's time steps for one ROI: the first message is a full
+    snapshot, every following one carries only the tiles that changed.
+
+    loop=True restarts from the first time (with a new full snapshot) when
+    the last time has been published.
+    """
+
+    def __init__(
+        self,
+        world: Any,
+        roi: Any,
+        *,
+        times: Optional[Sequence[str]] = None,
+        channels: Optional[Sequence[int]] = None,
+        loop: bool = False,
+    ):
+        self.world = world
+        self.roi = roi
+        self.channels = channels
+        self.loop = loop
+        self.times: List[str] = list(times) if times is not None else world.times()
+        if not self.times:
+            raise ValueError("TimeCursor needs at least one time step")
+        self.pos = 0
+
+    def next_msg(self) -> Optional[SubmapDeltaMsg]:
+        if self.pos >= len(self.times):
+            if not self.loop:
+                return None
+            self.pos = 0
+
+        mode = "full" if self.pos == 0 else "delta"
+        pkt = self.world.query_tiles(self.times[self.pos], self.roi, channels=self.channels, mode=mode)
+        self.pos += 1
+        return msg_from_tile_packet(pkt, schema=SCHEMA)
+
+    def next_compressed(self) -> Optional[Any]:
+        """
+        Like next_msg(), as a CompressedPacket (World.read_compressed): the
+        stored frames, nothing decoded. Channel selection does not apply.
+        """
+        if self.pos >= len(self.times):
+            if not self.loop:
+                return None
+            self.pos = 0
+
+        mode = "full" if self.pos == 0 else "delta"
+        pkt = self.world.read_compressed(self.times[self.pos], self.roi, mode=mode)
+        self.pos += 1
+        return pkt
+
+    def __iter__(self) -> Iterator[SubmapDeltaMsg]:
+        while True:
+            msg = self.next_msg()
+            if msg is None:
+                return
+            yield msg
+
+
+class DeltaPublisher:
+    """
+    Publishes TimeCursor messages on a node at a fixed rate.
+
+    compress="passthrough" relays the pack's zstd frames as they are
+    (World.read_compressed + bridge.frame.encode_compressed): the publisher
+    never decodes or re-encodes a tile, and subscribers decode the usual
+    zstd civdmsg record.
+
+    `node` only needs create_publisher(msg_type, topic, qos) and
+    create_timer(period_s, callback), so a fake rclpy node can drive it.
+    """
+
+    def __init__(
+        self,
+        node: Any,
+        msg_type: Any,
+        cursor: TimeCursor,
+        *,
+        topic: str = TOPIC,
+        rate_hz: float = 10.0,
+        qos: int = 10,
+        compress: str = "raw",
+    ):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be > 0")
+        if compress not in ("raw", "zstd", "passthrough"):
+            raise ValueError(f"compress must be 'raw', 'zstd' or 'passthrough', got {compress!r}")
+        if compress == "passthrough" and cursor.channels is not None:
+            raise ValueError("compress='passthrough' relays every channel; drop channels from the cursor")
+        self.msg_type = msg_type
+        self.cursor = cursor
+        self.compress = compress
+        self.published = 0
+        self.bytes_published = 0
+        self.done = False
+        self.pub = node.create_publisher(msg_type, topic, qos)
+        self.timer = node.create_timer(1.0 / rate_hz, self.tick)
+
+    def tick(self) -> bool:
+        """
+        Publish the next message. Returns False once the cursor is exhausted.
+        """
+        if self.done:
+            return False
+        if self.compress == "passthrough":
+            pkt = self.cursor.next_compressed()
+            payload = None if pkt is None else encode_compressed(pkt, schema=SCHEMA)
+        else:
+            msg = self.cursor.next_msg()
+            payload = None if msg is None else encode_payload(msg, compress=self.compress)
+        if payload is None:
+            self.done = True
+            return False
+        self.pub.publish(to_uint8_multiarray(payload, self.msg_type))
+        self.published += 1
+        self.bytes_published += len(payload)
+        return True
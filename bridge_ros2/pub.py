@@ -1,30 +1,18 @@
-import io
 import json
-import numpy as np
+
+from bridge_ros2.codec import TOPIC, DeltaPublisher, TimeCursor
+
 
 def ros2_available() -> bool:
     try:
         import rclpy  # noqa: F401
-        from std_msgs.msg import ByteMultiArray  # noqa: F401
+        from std_msgs.msg import UInt8MultiArray  # noqa: F401
         return True
     except Exception:
         return False
 
 
-def encode_npz_payload(tiles: np.ndarray, bounds: np.ndarray, roi: tuple, timestamp: str, mode: str) -> bytes:
-    buf = io.BytesIO()
-    np.savez_compressed(
-        buf,
-        tiles=tiles,
-        tile_bounds_zyx=bounds,
-        roi=np.array(roi, dtype=np.int32),
-        timestamp=timestamp,
-        mode=mode,
-    )
-    return buf.getvalue()
-
-
-def main():
+def main(rate_hz: float = 10.0, loop: bool = False):
     if not ros2_available():
         raise SystemExit(
             "ROS2 not available. Install ROS2 + rclpy + std_msgs, then rerun.\n"
@@ -33,53 +21,35 @@ def main():
 
     import rclpy
     from rclpy.node import Node
-    from std_msgs.msg import ByteMultiArray
+    from std_msgs.msg import UInt8MultiArray
 
-    from civd.export_submap import export_submap
+    from civd import World, ROIBox
 
     class CIVDPublisher(Node):
         def __init__(self):
             super().__init__("civd_submap_publisher")
-            self.pub = self.create_publisher(ByteMultiArray, "/civd/submap_delta", 10)
 
-            # Produce a delta export from existing CIVD timepack
-            meta = export_submap(
-                "data/civd_time/t001/index.json",
-                (128, 128, 160),
-                40,
-                mode="delta",
-                out_dir="exports",
-            )
+            # Stream the ROI from the World's time steps: full first, then deltas
+            w = World.open(".")
+            roi = ROIBox(88, 168, 88, 168, 120, 200)
+            self.cursor = TimeCursor(w, roi, loop=loop)
+            self.stream = DeltaPublisher(self, UInt8MultiArray, self.cursor, topic=TOPIC, rate_hz=rate_hz)
 
-            npz = np.load(meta["npz_path"], allow_pickle=True)
-            payload = encode_npz_payload(
-                npz["tiles"],
-                npz["tile_bounds_zyx"],
-                tuple(npz["roi"].tolist()),
-                meta["timestamp"],
-                meta["mode"],
-            )
-
-            # Minimal header (optional) — keep it simple
             header = {
-                "schema": "civd.ros2.submap_delta.v1",
-                "timestamp": meta["timestamp"],
-                "mode": meta["mode"],
-                "roi": list(tuple(npz["roi"].tolist())),
-                "tile_count": int(npz["tiles"].shape[0]),
-                "bytes": len(payload),
+                "topic": TOPIC,
+                "times": self.cursor.times,
+                "rate_hz": rate_hz,
+                "roi": [roi.z0, roi.z1, roi.y0, roi.y1, roi.x0, roi.x1],
             }
-            self.get_logger().info("Publishing one delta message: " + json.dumps(header))
-
-            msg = ByteMultiArray()
-            msg.data = list(payload)  # ByteMultiArray stores uint8[]; Python list is acceptable
-            self.pub.publish(msg)
-
-            self.get_logger().info("Published /civd/submap_delta and exiting.")
+            self.get_logger().info("Publishing CIVD deltas: " + json.dumps(header))
 
     rclpy.init()
     node = CIVDPublisher()
-    rclpy.spin_once(node, timeout_sec=0.5)
+    while rclpy.ok() and not node.stream.done:
+        rclpy.spin_once(node, timeout_sec=0.5)
+    node.get_logger().info(
+        f"Published {node.stream.published} messages ({node.stream.bytes_published} bytes) on {TOPIC}."
+    )
     node.destroy_node()
     rclpy.shutdown()
 
@@ -1,21 +1,15 @@
-import io
-import numpy as np
+from bridge_ros2.codec import TOPIC, from_uint8_multiarray
+
 
 def ros2_available() -> bool:
     try:
         import rclpy  # noqa: F401
-        from std_msgs.msg import ByteMultiArray  # noqa: F401
+        from std_msgs.msg import UInt8MultiArray  # noqa: F401
         return True
     except Exception:
         return False
 
 
-def decode_npz_payload(payload: bytes):
-    buf = io.BytesIO(payload)
-    d = np.load(buf, allow_pickle=True)
-    return d
-
-
 def main():
     if not ros2_available():
         raise SystemExit(
@@ -25,43 +19,37 @@ def main():
 
     import rclpy
     from rclpy.node import Node
-    from std_msgs.msg import ByteMultiArray
+    from std_msgs.msg import UInt8MultiArray
 
     from benchmark.replay_submap import reconstruct_roi_from_tiles
 
     class CIVDSubscriber(Node):
         def __init__(self):
             super().__init__("civd_submap_subscriber")
-            self.sub = self.create_subscription(ByteMultiArray, "/civd/submap_delta", self.cb, 10)
-            self.got = False
-
-        def cb(self, msg: ByteMultiArray):
-            payload = bytes(msg.data)
-            d = decode_npz_payload(payload)
+            self.sub = self.create_subscription(UInt8MultiArray, TOPIC, self.cb, 10)
+            self.got = 0
 
-            tiles = d["tiles"]
-            bounds = d["tile_bounds_zyx"]
-            roi = tuple(d["roi"].tolist())
-            ts = str(d["timestamp"])
-            mode = str(d["mode"])
+        def cb(self, msg: UInt8MultiArray):
+            d = from_uint8_multiarray(msg)
 
-            channels = tiles.shape[-1]
-            roi_arr = reconstruct_roi_from_tiles(tiles, bounds, roi, channels)
+            channels = d.tiles.shape[-1]
+            roi_arr = reconstruct_roi_from_tiles(d.tiles, d.tile_bounds_zyx, d.roi_zyx, channels)
 
             self.get_logger().info(
-                f"RX ts={ts} mode={mode} tiles={tiles.shape[0]} roi_shape={roi_arr.shape} "
+                f"RX ts={d.timestamp} mode={d.mode} tiles={d.tiles.shape[0]} roi_shape={roi_arr.shape} "
                 f"min={float(roi_arr.min()):.3f} max={float(roi_arr.max()):.3f}"
             )
-            self.got = True
+            self.got += 1
 
     rclpy.init()
     node = CIVDSubscriber()
 
-    # Spin until one message arrives (or timeout)
-    for _ in range(200):
+    # Spin until a message arrives, then keep receiving until the stream goes quiet
+    idle = 0
+    while idle < 200:
+        before = node.got
         rclpy.spin_once(node, timeout_sec=0.05)
-        if node.got:
-            break
+        idle = 0 if node.got > before else idle + 1
 
     node.destroy_node()
     rclpy.shutdown()
@@ -3,21 +3,65 @@ CIVD Public API (locked surface).
 
 Only objects imported here are considered stable and supported.
 Everything else in the package may change without notice.
+
+Names resolve on first use (PEP 562), so `import civd` stays cheap for CLI
+tools and short-lived workers: NumPy and the query engine load when
+`civd.World` (or another type) is first touched.
 """
 
 from __future__ import annotations
 
-# Public core types
-from civd.source import ROIBox, VolumePacket, Mode
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    # Public core types
+    from civd.source import ROIBox, VolumePacket, TilePacket, CompressedPacket, Mode
+    from civd.roi_shapes import Sphere, Capsule, OrientedBox, Frustum
+    from civd.tile_set import TileSet
 
-# Public entrypoint
-from civd.world import World
+    # Public entrypoint
+    from civd.world import World
+
+_LAZY = {
+    "World": "civd.world",
+    "ROIBox": "civd.source",
+    "Sphere": "civd.roi_shapes",
+    "Capsule": "civd.roi_shapes",
+    "OrientedBox": "civd.roi_shapes",
+    "Frustum": "civd.roi_shapes",
+    "TileSet": "civd.tile_set",
+    "VolumePacket": "civd.source",
+    "TilePacket": "civd.source",
+    "CompressedPacket": "civd.source",
+    "Mode": "civd.source",
+}
 
 __all__ = [
     "World",
     "ROIBox",
+    "Sphere",
+    "Capsule",
+    "OrientedBox",
+    "Frustum",
+    "TileSet",
     "VolumePacket",
+    "TilePacket",
+    "CompressedPacket",
     "Mode",
 ]
 
 __version__ = "0.1.0"
+
+
+def __getattr__(name: str) -> Any:
+    mod = _LAZY.get(name)
+    if mod is None:
+        raise AttributeError(f"module 'civd' has no attribute {name!r}")
+    value = getattr(importlib.import_module(mod), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
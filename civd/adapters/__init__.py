@@ -1,8 +1,26 @@
 from __future__ import annotations
 
-from civd.adapters.numpy_adapter import NumpyAdapter, NumpyObservation
-from civd.adapters.torch_adapter import TorchAdapter, TorchObservation
-from civd.adapters.ros2_adapter import ROS2Adapter
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from civd.adapters.numpy_adapter import NumpyAdapter, NumpyObservation
+    from civd.adapters.torch_adapter import TorchAdapter, TorchObservation
+    from civd.adapters.ros2_adapter import ROS2Adapter
+    from civd.adapters.torch_dataset import SharedTileCache, TorchROIDataset, TorchROIIterableDataset, roi_grid
+
+# adapters load on first use; torch only when a torch adapter is created
+_LAZY = {
+    "NumpyAdapter": "civd.adapters.numpy_adapter",
+    "NumpyObservation": "civd.adapters.numpy_adapter",
+    "TorchAdapter": "civd.adapters.torch_adapter",
+    "TorchObservation": "civd.adapters.torch_adapter",
+    "ROS2Adapter": "civd.adapters.ros2_adapter",
+    "TorchROIDataset": "civd.adapters.torch_dataset",
+    "TorchROIIterableDataset": "civd.adapters.torch_dataset",
+    "SharedTileCache": "civd.adapters.torch_dataset",
+    "roi_grid": "civd.adapters.torch_dataset",
+}
 
 __all__ = [
     "NumpyAdapter",
@@ -10,4 +28,21 @@ __all__ = [
     "TorchAdapter",
     "TorchObservation",
     "ROS2Adapter",
+    "TorchROIDataset",
+    "TorchROIIterableDataset",
+    "SharedTileCache",
+    "roi_grid",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    mod = _LAZY.get(name)
+    if mod is None:
+        raise AttributeError(f"module 'civd.adapters' has no attribute {name!r}")
+    value = getattr(importlib.import_module(mod), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
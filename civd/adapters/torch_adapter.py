@@ -1,16 +1,30 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any, Dict, Optional
 
 import numpy as np
 
 from civd.source import ObservationRequest, ObservationSource
 
-try:
-    import torch
-except Exception:  # pragma: no cover
-    torch = None  # type: ignore
+_torch: Any = None
+
+
+def _require_torch():
+    """
+    Import torch on first use: importing this module (or civd.adapters)
+    does not pay torch's start-up cost.
+    """
+    global _torch
+    if _torch is None:
+        try:
+            import torch
+        except Exception:  # pragma: no cover
+            raise ImportError(
+                "TorchAdapter requires PyTorch. Install with: pip install torch"
+            ) from None
+        _torch = torch
+    return _torch
 
 
 @dataclass
@@ -45,30 +59,27 @@ class TorchAdapter:
         self.channels_first = channels_first
         self.copy = copy
 
-        if torch is None:
-            raise ImportError(
-                "TorchAdapter requires PyTorch. Install with: pip install torch"
-            )
+        torch = _require_torch()
 
         if not hasattr(torch, self.dtype):
             raise ValueError(f"Unknown torch dtype: {self.dtype!r}")
 
     def get(self, req: ObservationRequest) -> TorchObservation:
+        torch = _require_torch()
+        if self.channels_first and req.layout != "czyx":
+            # decode straight into (C,Z,Y,X): no permute pass afterwards
+            req = replace(req, layout="czyx")
         pkt = self.source.observe(req)
-        arr = pkt.volume  # numpy array (Z,Y,X,C)
-
-        if self.copy:
-            t = torch.from_numpy(np.ascontiguousarray(arr)).clone()
-        else:
-            t = torch.from_numpy(arr)
-
-        t = t.to(getattr(torch, self.dtype))
+        arr = np.ascontiguousarray(pkt.volume)
+        planar = (pkt.meta or {}).get("volume_layout") == "czyx"
 
-        if self.channels_first:
+        t = torch.from_numpy(arr)
+        if self.channels_first and not planar:
+            # source ignored the layout request: permute the (Z,Y,X,C) volume
             t = t.permute(3, 0, 1, 2).contiguous()
 
-        if self.device is not None:
-            t = t.to(self.device)
+        # dtype, device and the defensive copy in one pass
+        t = t.to(device=self.device, dtype=getattr(torch, self.dtype), copy=self.copy)
 
         meta = {
             "time_name": pkt.time,
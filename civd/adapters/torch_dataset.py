@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from civd.codec import frame_layout
+from civd.roi_shapes import ROILike
+from civd.source import Mode, ROIBox, fill_uncovered
+from civd.tile_cache import frame_key
+from civd.time_loader import decode_frame, resolve_tile_frame
+from civd.world import World, _ROIPlan, _shape_zyxc_from_index, _tile_shape_from_index
+
+try:
+    import torch
+    from torch.utils.data import Dataset as _Dataset, IterableDataset as _IterableDataset, get_worker_info
+except Exception:  # pragma: no cover
+    torch = None  # type: ignore
+    _Dataset = _IterableDataset = object  # type: ignore
+
+    def get_worker_info():  # type: ignore
+        return None
+
+
+Sample = Tuple[str, ROILike]
+
+
+def roi_grid(
+    shape_zyx: Tuple[int, int, int],
+    size_zyx: Tuple[int, int, int],
+    stride_zyx: Optional[Tuple[int, int, int]] = None,
+) -> List[ROIBox]:
+    """
+    ROIs of `size_zyx` laid over a volume of `shape_zyx` every `stride_zyx`
+    voxels (default: non-overlapping). Only ROIs fully inside are returned.
+    """
+    (Z, Y, X), (sz, sy, sx) = shape_zyx, size_zyx
+    dz, dy, dx = stride_zyx or size_zyx
+    return [
+        ROIBox(z, z + sz, y, y + sy, x, x + sx)
+        for z in range(0, Z - sz + 1, dz)
+        for y in range(0, Y - sy + 1, dy)
+        for x in range(0, X - sx + 1, dx)
+    ]
+
+
+def _slot_key(loc: Dict[str, Any]) -> int:
+    # 63-bit SharedTileCache key of civd.tile_cache.frame_key(loc): unchanged
+    # tiles of later times share it, and it is the same in every process
+    h = hashlib.blake2b(repr(frame_key(loc)).encode("utf-8"), digest_size=8).digest()
+    return (int.from_bytes(h, "little") & 0x7FFFFFFFFFFFFFFF) | 1
+
+
+def _selector(layout: str, zs: slice, ys: slice, xs: slice, ch: Any) -> Callable[[np.ndarray], np.ndarray]:
+    # crop + channel pick of a decoded tile, as a channels-first array
+    if layout == "czyx":
+        return lambda t: t[:, zs, ys, xs][ch]
+    return lambda t: np.moveaxis(t[zs, ys, xs][..., ch], -1, 0)
+
+
+class SharedTileCache:
+    """
+    Decoded tiles shared by every DataLoader worker through one
+    multiprocessing.shared_memory block, so a tile decoded by one worker is
+    a memcpy for the others (and for later epochs).
+
+    Direct-mapped: a frame id hashes to one of `n_slots` slots of
+    `slot_nbytes` bytes each, and a newer tile replaces whatever was there.
+    Each slot carries a sequence number (odd while a write is in progress):
+    readers copy without locking and discard the copy if the number moved;
+    writers take one of a few striped locks and give up instead of waiting.
+
+    Create it in the main process and pass it to the dataset; workers
+    attach by name when the dataset is sent to them. `mp_context` must
+    match the DataLoader's multiprocessing_context (default: the platform
+    default). close() in the creator frees the block.
+    """
+
+    _HEADER_COLS = 4  # seq, key, nbytes, reserved
+
+    def __init__(self, n_slots: int, slot_nbytes: int, *, n_locks: int = 16, mp_context: Any = None):
+        import multiprocessing as mp
+
+        ctx = mp.get_context(mp_context) if mp_context is None or isinstance(mp_context, str) else mp_context
+        self.n_slots = int(n_slots)
+        self.slot_nbytes = int(slot_nbytes)
+        if self.n_slots <= 0 or self.slot_nbytes <= 0:
+            raise ValueError("n_slots and slot_nbytes must be positive")
+        size = self._header_nbytes() + self.n_slots * self.slot_nbytes
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self._locks = [ctx.Lock() for _ in range(max(1, int(n_locks)))]
+        self._bind()
+        self._header[:] = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @classmethod
+    def for_world(cls, world: World, nbytes: int, *, time_name: Optional[str] = None, **kw: Any) -> "SharedTileCache":
+        """
+        A cache of about `nbytes` sized for the full-channel tiles of `world`.
+        """
+        idx = world.load_time_index(time_name or world.times()[0])
+        tz, ty, tx = _tile_shape_from_index(idx)
+        slot = tz * ty * tx * _shape_zyxc_from_index(idx)[3] * 4
+        return cls(max(1, int(nbytes) // slot), slot, **kw)
+
+    def _header_nbytes(self) -> int:
+        return self.n_slots * self._HEADER_COLS * 8
+
+    def _bind(self) -> None:
+        buf = self._shm.buf
+        hn = self._header_nbytes()
+        self._header = np.ndarray((self.n_slots, self._HEADER_COLS), dtype=np.int64, buffer=buf[:hn])
+        self._data = np.ndarray((self.n_slots, self.slot_nbytes), dtype=np.uint8, buffer=buf[hn:])
+
+    # ---- pickling: workers attach to the same block ----
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self._shm.name, "n_slots": self.n_slots, "slot_nbytes": self.slot_nbytes, "locks": self._locks}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.n_slots = state["n_slots"]
+        self.slot_nbytes = state["slot_nbytes"]
+        self._locks = state["locks"]
+        try:
+            self._shm = shared_memory.SharedMemory(name=state["name"], track=False)
+        except TypeError:  # Python < 3.13: children share the creator's resource tracker
+            self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._bind()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    # ---- access ----
+
+    def read_into(self, key: int, shape: Tuple[int, ...], dst: np.ndarray, select: Callable[[np.ndarray], np.ndarray]) -> bool:
+        """
+        Copy cached tile `key` (an array of `shape`, as stored by put) into
+        `dst` as dst[...] = select(tile). False (dst undefined) when the
+        tile is not cached.
+        """
+        slot = key % self.n_slots
+        n = int(np.prod(shape)) * 4
+        h = self._header[slot]
+        seq = int(h[0])
+        if seq & 1 or int(h[1]) != key or int(h[2]) != n:
+            self.stats["misses"] += 1
+            return False
+        tile = self._data[slot, :n].view(np.float32).reshape(shape)
+        dst[...] = select(tile)
+        if int(h[0]) != seq:  # overwritten while copying
+            self.stats["misses"] += 1
+            return False
+        self.stats["hits"] += 1
+        return True
+
+    def put(self, key: int, tile: np.ndarray) -> bool:
+        """
+        Store a decoded float32 tile (in its frame layout); False if it does
+        not fit or another process is writing to the same lock stripe.
+        """
+        raw = np.ascontiguousarray(tile, dtype=np.float32).reshape(-1).view(np.uint8)
+        if raw.nbytes > self.slot_nbytes:
+            return False
+        slot = key % self.n_slots
+        lock = self._locks[slot % len(self._locks)]
+        if not lock.acquire(block=False):
+            return False
+        try:
+            h = self._header[slot]
+            h[0] += 1
+            h[1] = key
+            h[2] = raw.nbytes
+            self._data[slot, :raw.nbytes] = raw
+            h[0] += 1
+        finally:
+            lock.release()
+        self.stats["stores"] += 1
+        return True
+
+    def close(self) -> None:
+        self._header = self._data = None  # release views into the block
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
+
+
+class _ROIReader:
+    """
+    Decodes (time, ROI) samples straight into channels-first (C,Z,Y,X)
+    buffers: each tile is written once into its place (transposed unless
+    the pack stores it planar); tiles found in the shared cache are not
+    read or decoded at all. Tiles are selected as World.query selects them
+    (ROI boxes or shapes, LOD, delta mode).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        samples: Sequence[Sample],
+        *,
+        channels: Optional[Sequence[int]] = None,
+        lod: Optional[int] = None,
+        mode: Mode = "full",
+        cache: Optional[SharedTileCache] = None,
+    ):
+        self.root = root
+        self.samples = [(str(t), r) for t, r in samples]
+        self.channels = None if channels is None else [int(c) for c in channels]
+        self.lod = lod
+        self.mode = mode
+        self.cache = cache
+        self._w: Optional[World] = None
+        self._pid = -1
+        if not self.samples:
+            raise ValueError("no samples")
+        shapes = {self._plan(t, r).roi.shape_zyx for t, r in self.samples}
+        if len(shapes) != 1:
+            raise ValueError(f"samples must share one ROI shape (after clamping), got {sorted(shapes)}")
+        C = self._plan(*self.samples[0]).shape_zyxc[3]
+        self.sample_shape = (len(self.channels) if self.channels is not None else C,) + shapes.pop()
+
+    @property
+    def world(self) -> World:
+        # one World per process: handles opened before a fork are not reused
+        if self._w is None or self._pid != os.getpid():
+            self._w = World.open(self.root)
+            self._pid = os.getpid()
+        return self._w
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_w"] = None
+        return state
+
+    def _plan(self, time_name: str, roi: ROILike) -> _ROIPlan:
+        return self.world._plan(time_name, roi, lod=self.lod, mode=self.mode)
+
+    def read_into(self, i: int, out: np.ndarray) -> np.ndarray:
+        """
+        Decode sample `i` into `out`, a (C,Z,Y,X) float32 array or view.
+        """
+        time_name, roi = self.samples[i]
+        w = self.world
+        plan = self._plan(time_name, roi)
+        roi, idx, fill = plan.roi, plan.idx, plan.fill
+        ch = slice(None) if self.channels is None else self.channels
+        # before any tile lands: a mostly uncovered ROI is filled whole
+        fill_uncovered(np.moveaxis(out, 0, -1), roi, plan.tile_shape, plan.coverage(), fill)
+
+        todo: List[Tuple[Dict[str, Any], Dict[str, Any], Any, Any]] = []
+        for e, (z0, z1, y0, y1, x0, x1) in zip(plan.entries, plan.bounds):
+            a = (max(z0, roi.z0), min(z1, roi.z1), max(y0, roi.y0), min(y1, roi.y1), max(x0, roi.x0), min(x1, roi.x1))
+            dst = out[:, a[0] - roi.z0:a[1] - roi.z0, a[2] - roi.y0:a[3] - roi.y0, a[4] - roi.x0:a[5] - roi.x0]
+
+            loc = resolve_tile_frame(e, idx, w.storage)
+            if loc["ref_mode"] == "empty":
+                dst[...] = float(loc.get("fill", fill))
+                continue
+            # tiles are handled in their frame layout: planar frames copy without a transpose
+            layout = frame_layout(loc.get("codec"))
+            tz, ty, tx, tc = (int(v) for v in loc["shape_zyxc"])
+            shape = (tc, tz, ty, tx) if layout == "czyx" else (tz, ty, tx, tc)
+            select = _selector(layout, slice(a[0] - z0, a[1] - z0), slice(a[2] - y0, a[3] - y0),
+                               slice(a[4] - x0, a[5] - x0), ch)
+            if self.cache is not None and self.cache.read_into(_slot_key(loc), shape, dst, select):
+                continue
+            todo.append((e, loc, dst, (layout, select)))
+
+        if todo:
+            frames = w._read_frames(time_name, plan.level, [e for e, _l, _d, _s in todo], idx)
+            for (_e, loc, dst, (layout, select)), (comp, _loc) in zip(todo, frames):
+                tile = decode_frame(comp, loc, layout)
+                dst[...] = select(tile)
+                if self.cache is not None:
+                    self.cache.put(_slot_key(loc), tile)
+        return out
+
+
+def _require_torch():
+    if torch is None:
+        raise ImportError("civd.adapters.torch_dataset requires PyTorch. Install with: pip install torch")
+    return torch
+
+
+def _new_buffer(shape: Tuple[int, ...], pin_memory: bool):
+    # pin only in the main process: DataLoader(pin_memory=True) pins worker output itself
+    pin = bool(pin_memory) and torch.cuda.is_available() and get_worker_info() is None
+    return torch.empty(shape, dtype=torch.float32, pin_memory=pin)
+
+
+class TorchROIDataset(_Dataset):
+    """
+    Map-style dataset over (time, ROI) samples of a CIVD world. An ROI is
+    an ROIBox or an ROI shape (civd.roi_shapes); lod and mode="delta" select
+    tiles as World.query does.
+
+    dataset[i] is a (C,Z,Y,X) float32 tensor, decoded tile by tile straight
+    into a (optionally pinned) channels-first buffer: no (Z,Y,X,C)
+    intermediate, no permute copy. All samples must have the same shape.
+    Works with any DataLoader sampler; each worker opens its own World and
+    shares decoded tiles through `cache` (SharedTileCache) when given.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        samples: Sequence[Sample],
+        *,
+        channels: Optional[Sequence[int]] = None,
+        lod: Optional[int] = None,
+        mode: Mode = "full",
+        cache: Optional[SharedTileCache] = None,
+        pin_memory: bool = False,
+    ):
+        _require_torch()
+        self.reader = _ROIReader(root, samples, channels=channels, lod=lod, mode=mode, cache=cache)
+        self.pin_memory = pin_memory
+
+    @property
+    def sample_shape(self) -> Tuple[int, int, int, int]:
+        return self.reader.sample_shape
+
+    def __len__(self) -> int:
+        return len(self.reader.samples)
+
+    def __getitem__(self, i: int):
+        buf = _new_buffer(self.reader.sample_shape, self.pin_memory)
+        self.reader.read_into(int(i), buf.numpy())
+        return buf
+
+
+class TorchROIIterableDataset(_IterableDataset):
+    """
+    Iterable dataset yielding batches: (B,C,Z,Y,X) float32 tensors built
+    in place, one (optionally pinned) buffer per batch.
+
+    Samples are sharded across DataLoader workers and, with rank /
+    world_size, across distributed processes: every sample goes to exactly
+    one worker per epoch. shuffle=True permutes the samples with
+    seed + epoch (set_epoch), identically in every worker. Use it with
+    DataLoader(ds, batch_size=None, num_workers=N).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        samples: Sequence[Sample],
+        *,
+        batch_size: int = 8,
+        channels: Optional[Sequence[int]] = None,
+        lod: Optional[int] = None,
+        mode: Mode = "full",
+        cache: Optional[SharedTileCache] = None,
+        pin_memory: bool = False,
+        shuffle: bool = False,
+        seed: int = 0,
+        drop_last: bool = False,
+        rank: int = 0,
+        world_size: int = 1,
+        return_samples: bool = False,
+    ):
+        _require_torch()
+        self.reader = _ROIReader(root, samples, channels=channels, lod=lod, mode=mode, cache=cache)
+        self.batch_size = max(1, int(batch_size))
+        self.pin_memory = pin_memory
+        self.shuffle = shuffle
+        self.seed = int(seed)
+        self.epoch = 0
+        self.drop_last = drop_last
+        self.rank = int(rank)
+        self.world_size = max(1, int(world_size))
+        self.return_samples = return_samples
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = int(epoch)
+
+    def shard(self) -> np.ndarray:
+        """
+        Sample indices handled by the calling worker this epoch.
+        """
+        order = np.arange(len(self.reader.samples))
+        if self.shuffle:
+            order = np.random.default_rng(self.seed + self.epoch).permutation(order)
+        info = get_worker_info()
+        wid, nw = (info.id, info.num_workers) if info is not None else (0, 1)
+        return order[self.rank * nw + wid::self.world_size * nw]
+
+    def __iter__(self) -> Iterator[Any]:
+        ids = self.shard()
+        B = self.batch_size
+        for s in range(0, len(ids), B):
+            chunk = ids[s:s + B]
+            if len(chunk) < B and self.drop_last:
+                return
+            buf = _new_buffer((len(chunk),) + self.reader.sample_shape, self.pin_memory)
+            arr = buf.numpy()
+            for j, i in enumerate(chunk):
+                self.reader.read_into(int(i), arr[j])
+            if self.return_samples:
+                yield buf, [self.reader.samples[int(i)] for i in chunk]
+            else:
+                yield buf
@@ -1,3 +1,9 @@
 ﻿from civd.bridge.voxelgrid import volume_to_voxelgrid_npz
+from civd.bridge.shm import ShmPacketHeader, ShmPacketRing, ShmPacketClient
 
-__all__ = ["volume_to_voxelgrid_npz"]
+__all__ = [
+    "volume_to_voxelgrid_npz",
+    "ShmPacketHeader",
+    "ShmPacketRing",
+    "ShmPacketClient",
+]
@@ -1,40 +1,281 @@
 ﻿from __future__ import annotations
 
 import os
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
 
 import numpy as np
 
-from civd.source import VolumePacket
+from civd.source import ROIBox, TilePacket, VolumePacket
 
 
-def _write_ply_xyzrgb(path: str, xyz: np.ndarray, rgb: Optional[np.ndarray] = None) -> None:
+PLY_FORMATS = ("binary_little_endian", "ascii")
+
+# Fixed-width vertex count so streaming writers can patch it after the fact
+_COUNT_WIDTH = 12
+
+
+def _ply_header(n: int, *, has_rgb: bool, fmt: str) -> bytes:
+    lines = [
+        "ply",
+        f"format {fmt} 1.0",
+        f"element vertex {n:<{_COUNT_WIDTH}d}",
+        "property float x",
+        "property float y",
+        "property float z",
+    ]
+    if has_rgb:
+        lines += ["property uchar red", "property uchar green", "property uchar blue"]
+    lines.append("end_header")
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def _vertex_dtype(has_rgb: bool) -> np.dtype:
+    fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if has_rgb:
+        fields += [("red", "u1"), ("green", "u1"), ("blue", "u1")]
+    return np.dtype(fields)
+
+
+def _vertex_records(xyz: np.ndarray, rgb: Optional[np.ndarray]) -> np.ndarray:
+    rec = np.empty(int(xyz.shape[0]), dtype=_vertex_dtype(rgb is not None))
+    rec["x"], rec["y"], rec["z"] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    if rgb is not None:
+        rec["red"], rec["green"], rec["blue"] = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    return rec
+
+
+def _write_vertices(f, xyz: np.ndarray, rgb: Optional[np.ndarray], fmt: str) -> None:
+    if fmt == "ascii":
+        if rgb is not None:
+            cols = np.concatenate([xyz.astype(np.float64), rgb.astype(np.float64)], axis=1)
+            np.savetxt(f, cols, fmt=["%.6f"] * 3 + ["%d"] * 3)
+        else:
+            np.savetxt(f, xyz, fmt="%.6f")
+    else:
+        _vertex_records(xyz, rgb).tofile(f)
+
+
+def _write_ply_xyzrgb(
+    path: str,
+    xyz: np.ndarray,
+    rgb: Optional[np.ndarray] = None,
+    *,
+    fmt: str = "binary_little_endian",
+) -> None:
     """
-    Write an ASCII PLY with x,y,z and optional r,g,b (uint8).
+    Write a PLY with x,y,z and optional r,g,b (uint8).
+    Binary little-endian by default: one structured array, one tofile().
     """
-    n = int(xyz.shape[0])
+    if fmt not in PLY_FORMATS:
+        raise ValueError(f"fmt must be one of {PLY_FORMATS}, got {fmt!r}")
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
 
-    has_rgb = rgb is not None
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("ply\n")
-        f.write("format ascii 1.0\n")
-        f.write(f"element vertex {n}\n")
-        f.write("property float x\n")
-        f.write("property float y\n")
-        f.write("property float z\n")
-        if has_rgb:
-            f.write("property uchar red\n")
-            f.write("property uchar green\n")
-            f.write("property uchar blue\n")
-        f.write("end_header\n")
-
-        if has_rgb:
-            for (x, y, z), (r, g, b) in zip(xyz, rgb):
-                f.write(f"{x:.6f} {y:.6f} {z:.6f} {int(r)} {int(g)} {int(b)}\n")
-        else:
-            for (x, y, z) in xyz:
-                f.write(f"{x:.6f} {y:.6f} {z:.6f}\n")
+    with open(path, "wb") as f:
+        f.write(_ply_header(int(xyz.shape[0]), has_rgb=rgb is not None, fmt=fmt))
+        _write_vertices(f, xyz, rgb, fmt)
+
+
+@lru_cache(maxsize=16)
+def _coord_grid(shape_zyx: Tuple[int, int, int]) -> np.ndarray:
+    """
+    Read-only float32 (z,y,x,3) grid of block-local x,y,z coordinates.
+    Masking this grid is much faster than np.nonzero + per-axis arithmetic.
+    """
+    z, y, x = shape_zyx
+    g = np.empty((z, y, x, 3), dtype=np.float32)
+    g[..., 0] = np.arange(x, dtype=np.float32)[None, None, :]
+    g[..., 1] = np.arange(y, dtype=np.float32)[None, :, None]
+    g[..., 2] = np.arange(z, dtype=np.float32)[:, None, None]
+    g.flags.writeable = False
+    return g
+
+
+# voxels per slab when a large block is scanned in z-slabs
+_SLAB_VOXELS = 1 << 18
+
+
+def _occupied_points(
+    occ: np.ndarray,
+    origin_zyx: Tuple[int, int, int],
+    *,
+    threshold: float,
+    stride: int = 1,
+    phase_zyx: Tuple[int, int, int] = (0, 0, 0),
+    color_mode: str = "none",
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    (xyz float32 (N,3), rgb uint8 (N,3) or None) of voxels with occ >= threshold.
+
+    occ is a (z,y,x) block whose voxel [0,0,0] sits at origin_zyx in world
+    voxel coordinates. With stride > 1 only voxels at phase + k*stride (block
+    local) are tested. Large blocks are scanned in z-slabs so the coordinate
+    grid stays small and cache-resident.
+    """
+    if color_mode not in ("none", "by_value"):
+        raise ValueError("color_mode must be 'none' or 'by_value'")
+
+    pz, py, px = phase_zyx
+    if stride > 1:
+        occ = occ[pz::stride, py::stride, px::stride]
+    else:
+        pz = py = px = 0
+        stride = 1
+
+    Z, Y, X = occ.shape
+    dz = max(1, min(Z, _SLAB_VOXELS // max(1, Y * X)))
+    offset = np.array(
+        [px + origin_zyx[2], py + origin_zyx[1], pz + origin_zyx[0]], dtype=np.float32
+    )
+
+    xyz_parts = []
+    val_parts = []
+    for z0 in range(0, Z, dz):
+        slab = occ[z0:z0 + dz]
+        mask = slab >= threshold
+        pts = _coord_grid(slab.shape)[mask]
+        if not pts.shape[0]:
+            continue
+        if stride > 1:
+            pts *= np.float32(stride)
+        pts[:, 2] += np.float32(z0 * stride)
+        pts += offset
+        xyz_parts.append(pts)
+        if color_mode == "by_value":
+            val_parts.append(slab[mask])
+
+    if not xyz_parts:
+        xyz = np.zeros((0, 3), dtype=np.float32)
+        return xyz, (np.zeros((0, 3), dtype=np.uint8) if color_mode == "by_value" else None)
+
+    xyz = xyz_parts[0] if len(xyz_parts) == 1 else np.concatenate(xyz_parts, axis=0)
+
+    rgb = None
+    if color_mode == "by_value":
+        vals = np.clip(np.concatenate(val_parts), 0.0, 1.0)
+        g = (vals * 255.0).astype(np.uint8)
+        rgb = np.repeat(g[:, None], 3, axis=1)
+
+    return xyz, rgb
+
+
+def _as_points(xyz: np.ndarray, rgb: Optional[np.ndarray]) -> np.ndarray:
+    if rgb is None:
+        return xyz
+    return np.concatenate([xyz, rgb.astype(np.float32)], axis=1)
+
+
+def _check_channel(C: int, occupancy_channel: int) -> None:
+    if occupancy_channel < 0 or occupancy_channel >= C:
+        raise ValueError(f"occupancy_channel out of range (C={C})")
+
+
+def volume_to_points(
+    pkt: VolumePacket,
+    *,
+    occupancy_channel: int = 0,
+    threshold: float = 0.5,
+    stride: int = 1,
+    color_mode: str = "none",
+) -> np.ndarray:
+    """
+    In-memory point cloud of a VolumePacket: float32 (N,3) x,y,z, or (N,6)
+    x,y,z,r,g,b when color_mode="by_value". Coordinates are world voxel indices.
+    """
+    vol = np.asarray(pkt.volume, dtype=np.float32)
+    if vol.ndim != 4:
+        raise ValueError("Expected pkt.volume shape (Z,Y,X,C)")
+    _check_channel(int(vol.shape[3]), occupancy_channel)
+
+    xyz, rgb = _occupied_points(
+        vol[..., occupancy_channel],
+        (pkt.roi.z0, pkt.roi.y0, pkt.roi.x0),
+        threshold=threshold,
+        stride=stride,
+        color_mode=color_mode,
+    )
+    return _as_points(xyz, rgb)
+
+
+def iter_tile_points(
+    pkt: TilePacket,
+    *,
+    occupancy_channel: int = 0,
+    threshold: float = 0.5,
+    stride: int = 1,
+    color_mode: str = "none",
+) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Stream (xyz, rgb) point blocks tile by tile from a TilePacket, cropped to
+    its ROI; the ROI is never densified. Stride is anchored at the ROI origin,
+    so the union of the blocks equals volume_to_points() on pkt.dense().
+    """
+    _check_channel(int(pkt.tiles.shape[-1]), occupancy_channel)
+    roi: ROIBox = pkt.roi
+    stride = max(1, int(stride))
+
+    for i in range(len(pkt)):
+        z0, z1, y0, y1, x0, x1 = (int(v) for v in pkt.tile_bounds_zyx[i])
+        iz0, iz1 = max(z0, roi.z0), min(z1, roi.z1)
+        iy0, iy1 = max(y0, roi.y0), min(y1, roi.y1)
+        ix0, ix1 = max(x0, roi.x0), min(x1, roi.x1)
+        if iz0 >= iz1 or iy0 >= iy1 or ix0 >= ix1:
+            continue
+
+        occ = pkt.tiles[i, iz0 - z0:iz1 - z0, iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0, occupancy_channel]
+        phase = ((roi.z0 - iz0) % stride, (roi.y0 - iy0) % stride, (roi.x0 - ix0) % stride)
+        xyz, rgb = _occupied_points(
+            occ, (iz0, iy0, ix0), threshold=threshold, stride=stride, phase_zyx=phase, color_mode=color_mode
+        )
+        if xyz.shape[0]:
+            yield xyz, rgb
+
+
+def tiles_to_points(pkt: TilePacket, **kwargs) -> np.ndarray:
+    """
+    In-memory (N,3)/(N,6) point array from a TilePacket (see iter_tile_points).
+    """
+    blocks = [_as_points(xyz, rgb) for xyz, rgb in iter_tile_points(pkt, **kwargs)]
+    if not blocks:
+        cols = 6 if kwargs.get("color_mode", "none") == "by_value" else 3
+        return np.zeros((0, cols), dtype=np.float32)
+    return np.concatenate(blocks, axis=0)
+
+
+def tiles_to_pointcloud_ply(
+    pkt: TilePacket,
+    out_path: str,
+    *,
+    occupancy_channel: int = 0,
+    threshold: float = 0.5,
+    stride: int = 1,
+    color_mode: str = "none",
+    fmt: str = "binary_little_endian",
+) -> Tuple[str, int]:
+    """
+    Streaming PLY export from a TilePacket: points are written tile by tile
+    and the vertex count is patched into the header at the end.
+    Returns: (out_path, num_points)
+    """
+    if fmt not in PLY_FORMATS:
+        raise ValueError(f"fmt must be one of {PLY_FORMATS}, got {fmt!r}")
+    if color_mode not in ("none", "by_value"):
+        raise ValueError("color_mode must be 'none' or 'by_value'")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+
+    has_rgb = color_mode == "by_value"
+    n = 0
+    with open(out_path, "wb") as f:
+        f.write(_ply_header(0, has_rgb=has_rgb, fmt=fmt))
+        for xyz, rgb in iter_tile_points(
+            pkt, occupancy_channel=occupancy_channel, threshold=threshold, stride=stride, color_mode=color_mode
+        ):
+            _write_vertices(f, xyz, rgb, fmt)
+            n += int(xyz.shape[0])
+        f.seek(0)
+        f.write(_ply_header(n, has_rgb=has_rgb, fmt=fmt))
+
+    return out_path, n
 
 
 def volume_to_pointcloud_ply(
@@ -45,6 +286,7 @@ def volume_to_pointcloud_ply(
     threshold: float = 0.5,
     stride: int = 1,
     color_mode: str = "none",
+    fmt: str = "binary_little_endian",
 ) -> Tuple[str, int]:
     """
     Convert a VolumePacket volume (Z,Y,X,C) to a point cloud PLY.
@@ -55,55 +297,23 @@ def volume_to_pointcloud_ply(
     - color_mode:
         "none"      -> xyz only
         "by_value"  -> grayscale based on occupancy value
+    - fmt: "binary_little_endian" (default) or "ascii"
     Returns: (out_path, num_points)
     """
-    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-
     vol = np.asarray(pkt.volume, dtype=np.float32)
     if vol.ndim != 4:
         raise ValueError("Expected pkt.volume shape (Z,Y,X,C)")
-
-    Z, Y, X, C = vol.shape
-    if occupancy_channel < 0 or occupancy_channel >= C:
-        raise ValueError(f"occupancy_channel out of range (C={C})")
-
-    occ = vol[..., occupancy_channel]
-
-    if stride > 1:
-        occ_s = occ[::stride, ::stride, ::stride]
-        z_idx, y_idx, x_idx = np.where(occ_s >= threshold)
-        # map back to full-res indices
-        z_idx = z_idx * stride
-        y_idx = y_idx * stride
-        x_idx = x_idx * stride
-    else:
-        z_idx, y_idx, x_idx = np.where(occ >= threshold)
-
-    n = int(z_idx.shape[0])
-    if n == 0:
-        # write empty ply
-        _write_ply_xyzrgb(out_path, np.zeros((0, 3), dtype=np.float32), None)
-        return out_path, 0
+    _check_channel(int(vol.shape[3]), occupancy_channel)
 
     # Convert to world coordinates by adding ROI origin.
     # Note: coordinates are voxel centers in index space.
-    xyz = np.stack(
-        [
-            (x_idx + pkt.roi.x0).astype(np.float32),
-            (y_idx + pkt.roi.y0).astype(np.float32),
-            (z_idx + pkt.roi.z0).astype(np.float32),
-        ],
-        axis=1,
+    xyz, rgb = _occupied_points(
+        vol[..., occupancy_channel],
+        (pkt.roi.z0, pkt.roi.y0, pkt.roi.x0),
+        threshold=threshold,
+        stride=stride,
+        color_mode=color_mode,
     )
 
-    rgb = None
-    if color_mode == "by_value":
-        vals = occ[z_idx, y_idx, x_idx]
-        vals = np.clip(vals, 0.0, 1.0)
-        g = (vals * 255.0).astype(np.uint8)
-        rgb = np.stack([g, g, g], axis=1)
-    elif color_mode != "none":
-        raise ValueError("color_mode must be 'none' or 'by_value'")
-
-    _write_ply_xyzrgb(out_path, xyz, rgb)
-    return out_path, n
+    _write_ply_xyzrgb(out_path, xyz, rgb, fmt=fmt)
+    return out_path, int(xyz.shape[0])
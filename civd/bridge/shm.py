@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from civd.source import ROIBox, VolumePacket, Mode
+
+
+SHM_HEADER_SCHEMA_V1 = "civd.shm_header.v1"
+
+_ALIGN = 64
+_SEQ_WRITING = -1
+
+
+def _align(n: int) -> int:
+    return -(-int(n) // _ALIGN) * _ALIGN
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing segment without letting this process' resource
+    tracker unlink it on exit (the server owns the segment).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        pass
+
+    # Older Pythons always register attached segments. Unregistering afterwards
+    # breaks when server and client share one tracker (multiprocessing children),
+    # so skip the registration instead.
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *_a, **_k: None  # type: ignore[assignment]
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register  # type: ignore[assignment]
+
+
+@dataclass(frozen=True)
+class ShmPacketHeader:
+    """
+    Small, picklable/JSON-able descriptor of one packet living in a ring slot.
+    This is what travels between processes; the volume itself never does.
+    """
+    shm_name: str
+    slot: int
+    seq: int
+    offset: int
+    shape_zyxc: Tuple[int, int, int, int]
+    dtype: str
+    roi_zyx: Tuple[int, int, int, int, int, int]
+    time: str
+    mode: Mode
+    channels: List[str] = field(default_factory=list)
+    tile_size: int = 0
+    tiles_total: int = 0
+    tiles_included: int = 0
+    bytes_read: int = 0
+    decode_ms: float = 0.0
+    schema: str = SHM_HEADER_SCHEMA_V1
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["shape_zyxc"] = list(self.shape_zyxc)
+        d["roi_zyx"] = list(self.roi_zyx)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ShmPacketHeader":
+        """
+        Raises RuntimeError for the error headers serve() sends back when a
+        request fails.
+        """
+        if "error" in d:
+            raise RuntimeError(f"shm server: request for {d.get('time')!r} failed: {d['error']}")
+        d = dict(d)
+        d["shape_zyxc"] = tuple(int(v) for v in d["shape_zyxc"])
+        d["roi_zyx"] = tuple(int(v) for v in d["roi_zyx"])
+        return cls(**d)
+
+
+class ShmPacketRing:
+    """
+    Ring of fixed-size shared-memory slots holding decoded ROI volumes.
+
+    Layout of the segment:
+      [n_slots int64 sequence numbers][slot 0][slot 1]...   (64-byte aligned)
+
+    The writer (one CIVD server process) decodes straight into the next slot
+    via World.query(out=...) and hands out a ShmPacketHeader. Readers map the
+    slot with zero copies. Each slot carries the sequence number of the packet
+    it currently holds (-1 while being written), so a reader can tell if its
+    slot was recycled by the ring while it was still using it.
+    """
+
+    def __init__(self, *, slot_nbytes: int, n_slots: int = 4, name: Optional[str] = None):
+        if n_slots <= 0:
+            raise ValueError("n_slots must be > 0")
+        if slot_nbytes <= 0:
+            raise ValueError("slot_nbytes must be > 0")
+
+        self.n_slots = int(n_slots)
+        self.slot_nbytes = _align(slot_nbytes)
+        self._data_offset = _align(8 * self.n_slots)
+
+        size = self._data_offset + self.n_slots * self.slot_nbytes
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._seq = np.ndarray((self.n_slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._seq[:] = 0
+
+        self._next_slot = 0
+        self._next_seq = 1
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _slot_offset(self, slot: int) -> int:
+        return self._data_offset + int(slot) * self.slot_nbytes
+
+    def _acquire(self, shape_zyxc: Tuple[int, int, int, int]) -> Tuple[int, int, np.ndarray]:
+        nbytes = int(np.prod(shape_zyxc)) * np.dtype(np.float32).itemsize
+        if nbytes > self.slot_nbytes:
+            raise ValueError(f"packet needs {nbytes} bytes, ring slots hold {self.slot_nbytes}")
+
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.n_slots
+        seq = self._next_seq
+        self._next_seq += 1
+
+        self._seq[slot] = _SEQ_WRITING
+        view = np.ndarray(shape_zyxc, dtype=np.float32, buffer=self.shm.buf, offset=self._slot_offset(slot))
+        return slot, seq, view
+
+    def _commit(self, slot: int, seq: int, pkt: VolumePacket) -> ShmPacketHeader:
+        self._seq[slot] = seq
+        r = pkt.roi
+        return ShmPacketHeader(
+            shm_name=self.name,
+            slot=slot,
+            seq=seq,
+            offset=self._slot_offset(slot),
+            shape_zyxc=tuple(int(v) for v in pkt.shape_zyxc),
+            dtype="float32",
+            roi_zyx=(int(r.z0), int(r.z1), int(r.y0), int(r.y1), int(r.x0), int(r.x1)),
+            time=pkt.time,
+            mode=pkt.mode,
+            channels=list(pkt.channels),
+            tile_size=int(pkt.tile_size),
+            tiles_total=int(pkt.tiles_total),
+            tiles_included=int(pkt.tiles_included),
+            bytes_read=int(pkt.bytes_read),
+            decode_ms=float(pkt.decode_ms),
+        )
+
+    def publish(self, pkt: VolumePacket) -> ShmPacketHeader:
+        """
+        Copy an already decoded packet into the next slot.
+        """
+        slot, seq, view = self._acquire(pkt.shape_zyxc)
+        view[...] = pkt.volume
+        return self._commit(slot, seq, pkt)
+
+    def query(
+        self,
+        world: Any,
+        time_name: str,
+        roi: ROIBox,
+        channels: Optional[Sequence[int]] = None,
+        mode: Mode = "full",
+        **kwargs: Any,
+    ) -> ShmPacketHeader:
+        """
+        Decode an ROI straight into the next slot (no intermediate array).
+        Extra kwargs (lod, voxel_size) are passed to World.query.
+        """
+        shape = world.query_shape(time_name, roi, channels=channels, **kwargs)
+        slot, seq, view = self._acquire(shape)
+        try:
+            pkt = world.query(time_name, roi, channels=channels, mode=mode, out=view, **kwargs)
+        except BaseException:
+            self._seq[slot] = 0  # half-written: holds no packet, never left marked as being written
+            raise
+        return self._commit(slot, seq, pkt)
+
+    def close(self) -> None:
+        self._seq = None  # type: ignore[assignment]
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
+
+    def __enter__(self) -> "ShmPacketRing":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+        self.unlink()
+
+
+class ShmPacketClient:
+    """
+    Reader side: maps packets published into a ShmPacketRing by header.
+    """
+
+    def __init__(self, shm_name: str):
+        self.shm = _attach(shm_name)
+
+    def _seq_of(self, slot: int) -> int:
+        return int(np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=8 * int(slot))[0])
+
+    def is_current(self, header: ShmPacketHeader) -> bool:
+        """
+        True while the slot still holds the packet described by header.
+        """
+        return self._seq_of(header.slot) == int(header.seq)
+
+    def array(self, header: ShmPacketHeader) -> np.ndarray:
+        """
+        Zero-copy (roiZ, roiY, roiX, C) view of the packet volume.
+        Valid until the ring wraps around to this slot again (see is_current);
+        drop all views before close().
+        """
+        if not self.is_current(header):
+            raise RuntimeError(f"shm slot {header.slot} was recycled (seq {header.seq} is gone)")
+        return np.ndarray(header.shape_zyxc, dtype=np.dtype(header.dtype), buffer=self.shm.buf, offset=header.offset)
+
+    def packet(self, header: ShmPacketHeader) -> VolumePacket:
+        """
+        VolumePacket whose volume is the shared-memory view.
+        """
+        z0, z1, y0, y1, x0, x1 = header.roi_zyx
+        return VolumePacket(
+            schema_version="civd.packet.v1",
+            time=header.time,
+            mode=header.mode,
+            roi=ROIBox(z0=z0, z1=z1, y0=y0, y1=y1, x0=x0, x1=x1),
+            shape_zyxc=tuple(header.shape_zyxc),
+            tile_size=int(header.tile_size),
+            channels=list(header.channels),
+            tiles_total=int(header.tiles_total),
+            tiles_included=int(header.tiles_included),
+            bytes_read=int(header.bytes_read),
+            decode_ms=float(header.decode_ms),
+            volume=self.array(header),
+            tile_mask=None,
+            meta={"transport": "shm", "shm_name": header.shm_name, "slot": header.slot, "seq": header.seq},
+        )
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def __enter__(self) -> "ShmPacketClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def serve(
+    world: Any,
+    requests: Any,
+    headers: Any,
+    *,
+    ring: ShmPacketRing,
+    unlink: bool = False,
+) -> int:
+    """
+    Simple server loop for multiprocessing queues/pipes.
+
+    requests.get() yields ObservationRequest-like objects (time_name, roi,
+    channels, mode) or None to stop; one header dict per request is sent with
+    headers.put(). A request that fails gets an error header instead
+    ({"error", "time", "schema"}; ShmPacketHeader.from_dict raises it) and
+    the loop keeps serving. With unlink=True the server owns the ring and
+    closes and unlinks it on the way out, whatever the reason.
+    Returns the number of packets served.
+    """
+    n = 0
+    try:
+        while True:
+            req = requests.get()
+            if req is None:
+                return n
+            try:
+                hdr = ring.query(world, req.time_name, req.roi, channels=req.channels, mode=req.mode)
+            except Exception as e:
+                headers.put({
+                    "error": f"{type(e).__name__}: {e}",
+                    "time": getattr(req, "time_name", None),
+                    "schema": SHM_HEADER_SCHEMA_V1,
+                })
+                continue
+            headers.put(hdr.to_dict())
+            n += 1
+    finally:
+        if unlink:
+            ring.close()
+            ring.unlink()
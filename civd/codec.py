@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+def decompress_into(comp: bytes, out: np.ndarray) -> int:
+    """
+    Decompress one zstd tile frame straight into the memory of `out`.
+
+    `out` must be C-contiguous and exactly as large as the decoded frame
+    (e.g. an arena slot or a contiguous output block). This skips the
+    temporary bytes object + copy of decompress() -> frombuffer -> assign.
+    Returns the number of bytes written.
+    """
+    if not out.flags["C_CONTIGUOUS"]:
+        raise ValueError("decompress_into requires a C-contiguous output array")
+
+    import zstandard as zstd  # deferred: only paid by the first decode
+
+    mv = memoryview(out).cast("B")
+    n = 0
+    with zstd.ZstdDecompressor().stream_reader(comp) as reader:
+        while n < len(mv):
+            k = reader.readinto(mv[n:])
+            if not k:
+                break
+            n += k
+        if n == len(mv) and reader.read(1):
+            raise ValueError("zstd frame is larger than the output buffer")
+
+    if n != len(mv):
+        raise ValueError(f"zstd frame decoded to {n} bytes, expected {len(mv)}")
+    return n
+
+
+# Tile frame memory layouts. "zyxc" (interleaved channels) is the default;
+# "czyx" (planar, channels first) is flagged in the tile's codec dict as
+# {"name": "zstd", "level": L, "layout": "czyx"}.
+TILE_LAYOUTS = ("zyxc", "czyx")
+
+
+def check_layout(layout: str) -> str:
+    if layout not in TILE_LAYOUTS:
+        raise ValueError(f"layout must be one of {TILE_LAYOUTS}, got {layout!r}")
+    return layout
+
+
+def frame_layout(codec: Optional[Dict[str, Any]]) -> str:
+    """
+    Memory layout of a stored frame, from its codec dict.
+    """
+    if not isinstance(codec, dict):
+        return "zyxc"
+    return check_layout(codec.get("layout", "zyxc"))
+
+
+def layout_view(tile: np.ndarray, stored: str, layout: str) -> np.ndarray:
+    """
+    A tile held in `stored` layout, seen in `layout` (a view, never a copy).
+    """
+    if stored == check_layout(layout):
+        return tile
+    return np.moveaxis(tile, 0, -1) if stored == "czyx" else np.moveaxis(tile, -1, 0)
+
+
+def tile_codec(level: int, layout: str = "zyxc") -> Dict[str, Any]:
+    """
+    Codec dict for a zstd tile frame written in `layout`.
+    """
+    codec: Dict[str, Any] = {"name": "zstd", "level": int(level)}
+    if check_layout(layout) != "zyxc":
+        codec["layout"] = layout
+    return codec
+
+
+def tile_frame_bytes(tile: np.ndarray, layout: str = "zyxc") -> bytes:
+    """
+    Raw bytes of a (tz,ty,tx,C) float32 tile in the frame layout.
+    """
+    tile = np.asarray(tile, dtype=np.float32)
+    if check_layout(layout) == "czyx":
+        tile = np.moveaxis(tile, -1, 0)
+    return np.ascontiguousarray(tile).tobytes(order="C")
+
+
+def decompress_tile_into(comp: bytes, out: np.ndarray, codec: Optional[Dict[str, Any]] = None, *,
+                         layout: str = "zyxc") -> None:
+    """
+    Decode one tile frame into `out`, a tile array in `layout` ((tz,ty,tx,C)
+    or (C,tz,ty,tx)), whatever layout the frame was stored in. Frames
+    already in `layout` decode straight into contiguous `out`; others go
+    through one transposed copy.
+    """
+    stored = frame_layout(codec)
+    if stored == check_layout(layout) and out.flags["C_CONTIGUOUS"]:
+        decompress_into(comp, out)
+        return
+    if stored == layout:
+        tmp = np.empty(out.shape, dtype=np.float32)
+    elif stored == "czyx":
+        tmp = np.empty((out.shape[3],) + out.shape[:3], dtype=np.float32)
+    else:
+        tmp = np.empty(out.shape[1:] + (out.shape[0],), dtype=np.float32)
+    decompress_into(comp, tmp)
+    if stored == layout:
+        out[...] = tmp
+    else:
+        out[...] = np.moveaxis(tmp, 0, -1) if stored == "czyx" else np.moveaxis(tmp, -1, 0)
@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from civd.storage import Storage, get_storage, normalize_path
+from civd.tile_index import tcoords_from_entry
+from civd.time_loader import resolve_tile_frame
+
+
+CONTAINER_MAGIC = b"CIVDWLD1"
+CONTAINER_VERSION = 1
+CONTAINER_FORMAT = "civd_container"
+
+# magic, version, align, n_times, n_tiles, then (offset, length) of the
+# meta, directory, stats, dicts and frames sections
+_HEADER = struct.Struct("<8sIIIQ10Q")
+HEADER_SIZE = 128
+
+# one row per tile entry of every time and LOD level, in index order
+DIR_DTYPE = np.dtype([
+    ("time", "<u2"),
+    ("level", "u1"),
+    ("flags", "u1"),
+    ("coords", "<i4", (3,)),
+    ("bounds", "<i4", (6,)),
+    ("shape", "<i4", (4,)),
+    ("codec", "<u2"),
+    ("ref_time", "<u2"),
+    ("frame_off", "<u8"),
+    ("frame_len", "<u8"),
+    ("stats_off", "<i8"),
+    ("stats_len", "<u4"),
+    ("stats_sub", "u1"),
+    ("has_hash", "u1"),
+    ("_pad", "u1", (2,)),
+    ("hash", "u1", (32,)),
+])
+
+FLAG_DIRECT = 1   # payload stored at this time
+FLAG_REF = 2      # unchanged: frame of an earlier time
+FLAG_EMPTY = 4    # brick-map tombstone
+_NO_TIME = 0xFFFF
+
+
+def _align(n: int, a: int) -> int:
+    return -(-int(n) // a) * a
+
+
+def _levels(idx: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+    out = [(0, idx)]
+    lod = idx.get("lod")
+    if isinstance(lod, dict):
+        for lv in lod.get("levels") or []:
+            if isinstance(lv, dict):
+                out.append((int(lv.get("level", 0)), lv))
+    return out
+
+
+def _skeleton(idx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Index JSON without its tile entries (they live in the binary directory).
+    """
+    sk = {k: v for k, v in idx.items() if k != "tiles"}
+    lod = idx.get("lod")
+    if isinstance(lod, dict):
+        sk["lod"] = dict(lod)
+        sk["lod"]["levels"] = [
+            {k: v for k, v in lv.items() if k != "tiles"} for lv in lod.get("levels") or [] if isinstance(lv, dict)
+        ]
+    return sk
+
+
+def _stats_row(st: Dict[str, Any]) -> Tuple[np.ndarray, bool]:
+    parts = [np.asarray(st[f], dtype=np.float64).ravel() for f in ("min", "max", "mean")]
+    sub = st.get("sub")
+    if isinstance(sub, dict):
+        head = np.asarray(list(sub["shape_zyx"]) + list(sub["dims"]), dtype=np.float64)
+        parts = parts + [head] + [np.asarray(sub[f], dtype=np.float64).ravel() for f in ("min", "max", "mean")]
+    return np.concatenate(parts), isinstance(sub, dict)
+
+
+def _stats_dict(vals: np.ndarray, C: int, has_sub: bool) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "min": vals[0:C].tolist(),
+        "max": vals[C:2 * C].tolist(),
+        "mean": vals[2 * C:3 * C].tolist(),
+    }
+    if has_sub:
+        head = vals[3 * C:3 * C + 6].astype(np.int64).tolist()
+        n = head[3] * head[4] * head[5] * C
+        s0 = 3 * C + 6
+        out["sub"] = {
+            "shape_zyx": head[:3],
+            "dims": head[3:],
+            "min": vals[s0:s0 + n].tolist(),
+            "max": vals[s0 + n:s0 + 2 * n].tolist(),
+            "mean": vals[s0 + 2 * n:s0 + 3 * n].tolist(),
+        }
+    return out
+
+
+def _bounds6(entry: Dict[str, Any], tile_shape: Tuple[int, int, int], coords: Tuple[int, int, int]) -> List[int]:
+    b = entry.get("bounds_zyx", entry.get("bounds"))
+    if isinstance(b, (list, tuple)) and len(b) == 6:
+        return [int(v) for v in b]
+    if isinstance(b, dict):
+        return [int(b[k]) for k in ("z0", "z1", "y0", "y1", "x0", "x1")]
+    (sz, sy, sx), (tz, ty, tx) = tile_shape, coords
+    return [tz * sz, (tz + 1) * sz, ty * sy, (ty + 1) * sy, tx * sx, (tx + 1) * sx]
+
+
+def write_container(
+    out_path: str,
+    root: str = ".",
+    *,
+    times: Optional[Sequence[str]] = None,
+    align: int = 4096,
+    storage: Optional[Storage] = None,
+) -> Dict[str, Any]:
+    """
+    Convert a world tree (data/civd_time/<t>/index.json + packs) into one
+    .civd container file:
+
+      header     magic, version, section table (HEADER_SIZE bytes)
+      meta       JSON: times, index skeletons (everything but tile entries),
+                 codec table, per-time directory row ranges
+      directory  DIR_DTYPE rows for every tile of every time and LOD level
+      stats      float64 tile stats (min/max/mean, optional sub-bricks)
+      dicts      codec dictionaries (zstd dictionaries referenced by the
+                 codec table; empty for packs written without one)
+      frames     every distinct zstd frame once, each starting on an
+                 `align`-byte (page) boundary
+
+    Unchanged tiles (refs) point at the frame of the time that stored it,
+    so frames shared across times are written once. Metadata sits at the
+    front: opening costs one open and one read of the first pages.
+    """
+    from civd.world import World, _tile_shape_from_index
+
+    st = storage or get_storage()
+    w = World(root, storage=st)
+    times = list(times) if times is not None else w.times()
+    if not times:
+        raise ValueError(f"no time indices under {root}")
+    if len(times) >= _NO_TIME:
+        raise ValueError("too many times for one container")
+    time_pos = {t: i for i, t in enumerate(times)}
+
+    rows: List[Tuple[Any, ...]] = []
+    stats_parts: List[np.ndarray] = []
+    stats_pos = 0
+    codecs: List[Dict[str, Any]] = []
+    codec_ids: Dict[str, int] = {}
+    frames: Dict[Tuple[str, int, int], int] = {}     # source frame -> container frame number
+    frame_src: List[Tuple[str, int, int]] = []
+    frame_owner: List[int] = []                       # time that first stored it directly
+    skeletons: Dict[str, Any] = {}
+    ranges: Dict[str, List[int]] = {}
+
+    def _codec_id(c: Dict[str, Any]) -> int:
+        key = json.dumps(c, sort_keys=True)
+        if key not in codec_ids:
+            codec_ids[key] = len(codecs)
+            codecs.append(c)
+        return codec_ids[key]
+
+    for t in times:
+        ti = time_pos[t]
+        idx = w.load_time_index(t)
+        skeletons[t] = _skeleton(idx)
+        start = len(rows)
+        for level, lidx in _levels(idx):
+            tile_shape = _tile_shape_from_index(lidx)
+            for e in lidx.get("tiles", []):
+                if not isinstance(e, dict):
+                    continue
+                coords = tcoords_from_entry(e, tile_shape)
+                if coords is None:
+                    raise ValueError(f"{t} lod {level}: tile entry {e.get('tile_id', e.get('id'))!r} has no tile coords")
+                bounds = _bounds6(e, tile_shape, coords)
+                loc = resolve_tile_frame(e, lidx, st)
+                shape = [int(v) for v in loc["shape_zyxc"]]
+
+                ref_time = _NO_TIME
+                if loc["ref_mode"] == "empty":
+                    flags, fno, codec = FLAG_EMPTY, 0, 0
+                else:
+                    own = "offset" in e and "length" in e
+                    flags = FLAG_DIRECT if own else FLAG_REF
+                    key = (normalize_path(loc["pack"]), int(loc["offset"]), int(loc["length"]))
+                    if key not in frames:
+                        frames[key] = len(frame_src)
+                        frame_src.append(key)
+                        frame_owner.append(ti if own else _NO_TIME)
+                    fno = frames[key]
+                    if own and frame_owner[fno] == _NO_TIME:
+                        frame_owner[fno] = ti
+                    if not own:
+                        ref = e.get("ref") if isinstance(e.get("ref"), dict) else {}
+                        bt = ref.get("base_timestamp") or ref.get("time")
+                        ref_time = time_pos.get(bt, frame_owner[fno])
+                    codec = _codec_id(dict(loc.get("codec") or {"name": "zstd"}))
+
+                s_off, s_len, s_sub = -1, 0, 0
+                if isinstance(e.get("stats"), dict):
+                    vals, s_sub = _stats_row(e["stats"])
+                    stats_parts.append(vals)
+                    s_off, s_len = stats_pos, int(vals.shape[0])
+                    stats_pos += s_len
+
+                h = e.get("hash")
+                hb = bytes.fromhex(h) if isinstance(h, str) and len(h) == 64 else b""
+                rows.append((
+                    ti, level, flags, coords, bounds, shape, codec, ref_time,
+                    fno, 0, s_off, s_len, int(s_sub), 1 if hb else 0, (0, 0),
+                    tuple(hb.ljust(32, b"\0")),
+                ))
+        ranges[t] = [start, len(rows)]
+
+    directory = np.array(rows, dtype=DIR_DTYPE) if rows else np.zeros((0,), dtype=DIR_DTYPE)
+    stats = np.concatenate(stats_parts) if stats_parts else np.zeros((0,), dtype=np.float64)
+
+    # layout: header | meta | directory | stats | dicts | frames (aligned)
+    frame_offs = np.zeros((len(frame_src),), dtype=np.uint64)
+    meta = {
+        "schema_version": "civd.container.v1",
+        "times": times,
+        "indices": skeletons,
+        "ranges": ranges,
+        "codecs": codecs,
+        "dicts": [],
+    }
+    meta_b = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    meta_off = HEADER_SIZE
+    dir_off = _align(meta_off + len(meta_b), 64)
+    stats_off = _align(dir_off + directory.nbytes, 64)
+    dicts_off = _align(stats_off + stats.nbytes, 64)
+    dicts_len = 0
+    frames_off = _align(dicts_off + dicts_len, align)
+    pos = frames_off
+    for i, (_p, _o, n) in enumerate(frame_src):
+        frame_offs[i] = pos
+        pos = _align(pos + n, align)
+    frames_len = pos - frames_off
+
+    if len(directory):
+        has = directory["flags"] != FLAG_EMPTY
+        fno = directory["frame_off"][has].astype(np.int64)
+        directory["frame_len"][has] = np.array([frame_src[i][2] for i in fno], dtype=np.uint64)
+        directory["frame_off"][has] = frame_offs[fno]
+
+    header = _HEADER.pack(
+        CONTAINER_MAGIC, CONTAINER_VERSION, int(align), len(times), len(directory),
+        meta_off, len(meta_b), dir_off, directory.nbytes, stats_off, stats.nbytes,
+        dicts_off, dicts_len, frames_off, frames_len,
+    )
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(meta_b)
+        f.seek(dir_off)
+        f.write(directory.tobytes())
+        f.seek(stats_off)
+        f.write(stats.astype("<f8").tobytes())
+        f.seek(frames_off)
+        for i, data in enumerate(st.read_many(frame_src)):
+            f.seek(int(frame_offs[i]))
+            f.write(data)
+        f.truncate(frames_off + frames_len)
+    os.replace(tmp, out_path)
+
+    return {
+        "path": out_path,
+        "times": times,
+        "tiles": int(len(directory)),
+        "frames": len(frame_src),
+        "frame_bytes": int(sum(n for _p, _o, n in frame_src)),
+        "bytes": int(frames_off + frames_len),
+    }
+
+
+class ContainerStorage(Storage):
+    """
+    Storage over one .civd container, mapped once. The world reads as if it
+    were the usual tree: data/civd_time/<t>/index.json are built on demand
+    from the binary directory (their pack path is the container itself),
+    and frame reads are slices of the mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.key = normalize_path(os.path.basename(path))
+        self._f = open(path, "rb")
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            head = _HEADER.unpack_from(self._mm, 0)
+            if head[0] != CONTAINER_MAGIC:
+                raise ValueError(f"{path} is not a CIVD container (magic={head[0]!r})")
+            if head[1] != CONTAINER_VERSION:
+                raise ValueError(f"unsupported CIVD container version {head[1]}")
+            (self.align, self.n_times, self.n_tiles, meta_off, meta_len, dir_off, dir_len,
+             stats_off, stats_len, _dicts_off, _dicts_len, self.frames_off, self.frames_len) = head[2:]
+            self.meta = json.loads(self._mm[meta_off:meta_off + meta_len].decode("utf-8"))
+            self.directory = np.frombuffer(self._mm, dtype=DIR_DTYPE, count=self.n_tiles, offset=dir_off)
+            self.stats = np.frombuffer(self._mm, dtype="<f8", count=stats_len // 8, offset=stats_off)
+            self.times: List[str] = list(self.meta["times"])
+        except BaseException:
+            # don't leak the handle and mapping of a file we refuse
+            self.directory = self.stats = None
+            if self._mm is not None:
+                self._mm.close()
+            self._f.close()
+            raise
+        self._index_keys = {f"data/civd_time/{t}/index.json": t for t in self.times}
+
+    # ---- index synthesis ----
+
+    def _entries(self, t: str, level: int, C: int) -> List[Dict[str, Any]]:
+        r0, r1 = self.meta["ranges"][t]
+        rows = self.directory[r0:r1]
+        rows = rows[rows["level"] == level]
+        codecs = self.meta["codecs"]
+        out: List[Dict[str, Any]] = []
+        for r in rows:
+            tz, ty, tx = (int(v) for v in r["coords"])
+            shape = [int(v) for v in r["shape"]]
+            e: Dict[str, Any] = {
+                "tile_id": f"z{tz:02d}_y{ty:02d}_x{tx:02d}",
+                "tile_coords": {"tz": tz, "ty": ty, "tx": tx},
+                "shape_zyxc": shape,
+                "dtype": "float32",
+                "hash": bytes(r["hash"]).hex() if r["has_hash"] else None,
+            }
+            flags = int(r["flags"])
+            if flags & FLAG_EMPTY:
+                e["empty"] = True
+            elif flags & FLAG_DIRECT:
+                e["codec"] = dict(codecs[int(r["codec"])])
+                e["offset"] = int(r["frame_off"])
+                e["length"] = int(r["frame_len"])
+                e["raw_nbytes"] = int(np.prod(shape)) * 4
+            else:
+                bt = int(r["ref_time"])
+                e["ref"] = {
+                    "base_timestamp": self.times[bt] if bt != _NO_TIME else None,
+                    "base_pack": self.key,
+                    "offset": int(r["frame_off"]),
+                    "length": int(r["frame_len"]),
+                    "codec": dict(codecs[int(r["codec"])]),
+                }
+            if int(r["stats_off"]) >= 0:
+                s0 = int(r["stats_off"])
+                e["stats"] = _stats_dict(self.stats[s0:s0 + int(r["stats_len"])], C, bool(r["stats_sub"]))
+            e["bounds_zyx"] = [int(v) for v in r["bounds"]]
+            out.append(e)
+        return out
+
+    def index(self, t: str) -> Dict[str, Any]:
+        """
+        civd.index.v1 dict of time `t`, as read_json returns it for
+        data/civd_time/<t>/index.json.
+        """
+        idx = json.loads(json.dumps(self.meta["indices"][t]))
+        C = int(idx["volume"]["shape_zyxc"][3])
+        pack = {"path": self.key, "format": CONTAINER_FORMAT}
+        idx["pack"] = dict(pack)
+        idx["tiles"] = self._entries(t, 0, C)
+        lod = idx.get("lod")
+        if isinstance(lod, dict):
+            for lv in lod.get("levels") or []:
+                lv["pack"] = dict(pack)
+                lv["tiles"] = self._entries(t, int(lv.get("level", 0)), C)
+        return idx
+
+    # ---- Storage ----
+
+    def _check(self, path: str) -> None:
+        if normalize_path(path) != self.key:
+            raise FileNotFoundError(path)
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        self._check(path)
+        return self._mm[int(offset):int(offset) + int(length)]
+
+    def read_many(self, reqs: Sequence[Tuple[str, int, int]]) -> List[bytes]:
+        return [self.read(p, o, n) for p, o, n in reqs]
+
+    def read_json(self, path: str) -> Dict[str, Any]:
+        t = self._index_keys.get(normalize_path(path))
+        if t is None:
+            raise FileNotFoundError(path)
+        return self.index(t)
+
+    def read_all(self, path: str) -> bytes:
+        t = self._index_keys.get(normalize_path(path))
+        if t is not None:
+            return json.dumps(self.index(t)).encode("utf-8")
+        self._check(path)
+        return self._mm[:]
+
+    def size(self, path: str) -> int:
+        if normalize_path(path) in self._index_keys:
+            return len(self.read_all(path))
+        self._check(path)
+        return len(self._mm)
+
+    def exists(self, path: str) -> bool:
+        key = normalize_path(path)
+        return key == self.key or key in self._index_keys
+
+    def listdir(self, path: str) -> List[str]:
+        key = normalize_path(path)
+        if key == "data/civd_time":
+            return list(self.times)
+        if key == "data":
+            return ["civd_time"]
+        if key == "":
+            return ["data", self.key]
+        if key.startswith("data/civd_time/") and key.split("/")[2] in self.times and key.count("/") == 2:
+            return ["index.json"]
+        raise FileNotFoundError(path)
+
+    def close(self) -> None:
+        self.directory = self.stats = None  # release views into the mapping
+        self._mm.close()
+        self._f.close()
+
+
+def is_container(path: str) -> bool:
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
+
+def extract_container(path: str, out_root: str = ".") -> List[str]:
+    """
+    Convert a .civd container back into the directory layout: one
+    index.json and tiles.zstpack per time. A frame is written to the pack
+    of the first time that stores it; later times reference it there.
+    Returns the written index paths.
+    """
+    cs = ContainerStorage(path)
+    written: List[str] = []
+    owner: Dict[int, Tuple[str, int]] = {}   # container frame offset -> (pack path, offset)
+    try:
+        for t in cs.times:
+            idx = cs.index(t)
+            tdir = os.path.join(out_root, "data", "civd_time", t)
+            os.makedirs(tdir, exist_ok=True)
+            pack_rel = f"data/civd_time/{t}/tiles.zstpack"
+            pos = 0
+            with open(os.path.join(tdir, "tiles.zstpack"), "wb") as fpack:
+                for _level, lidx in _levels(idx):
+                    lidx["pack"] = {"path": pack_rel, "format": "concat_zstd_frames"}
+                    for e in lidx["tiles"]:
+                        loc = e if "offset" in e else e.get("ref")
+                        if not isinstance(loc, dict):
+                            continue
+                        src = int(loc["offset"])
+                        if src not in owner:
+                            fpack.write(cs.read(cs.key, src, int(loc["length"])))
+                            owner[src] = (pack_rel, pos)
+                            pos += int(loc["length"])
+                        dst_pack, dst_off = owner[src]
+                        if "offset" in e and dst_pack == pack_rel:
+                            e["offset"] = dst_off
+                        else:
+                            ref = dict(e.pop("ref", None) or {})
+                            for k in ("offset", "length", "raw_nbytes"):
+                                e.pop(k, None)
+                            ref.update({
+                                "base_timestamp": dst_pack.split("/")[2],
+                                "base_index": f"data/civd_time/{dst_pack.split('/')[2]}/index.json",
+                                "base_pack": dst_pack,
+                                "offset": dst_off,
+                                "length": int(loc["length"]),
+                                "codec": loc.get("codec", {"name": "zstd"}),
+                            })
+                            e["ref"] = ref
+            index_path = os.path.join(tdir, "index.json")
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(idx, f, indent=2)
+                f.write("\n")
+            written.append(index_path.replace("\\", "/"))
+    finally:
+        cs.close()
+    return written
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Convert between a CIVD world tree and a single-file .civd container.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="world tree -> .civd")
+    p.add_argument("out")
+    p.add_argument("--root", default=".")
+    p.add_argument("--align", type=int, default=4096)
+    u = sub.add_parser("unpack", help=".civd -> world tree")
+    u.add_argument("container")
+    u.add_argument("--out-root", default=".")
+    args = ap.parse_args()
+
+    if args.cmd == "pack":
+        info = write_container(args.out, args.root, align=args.align)
+        print(f"Wrote {info['path']}: {len(info['times'])} times, {info['tiles']} tiles, "
+              f"{info['frames']} frames, {info['bytes']:,} bytes")
+    else:
+        for p in extract_container(args.container, args.out_root):
+            print("Wrote", p)
+
+
+if __name__ == "__main__":
+    main()
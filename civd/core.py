@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Literal, Tuple
+from typing import Dict, Literal, Tuple, Union
 
 import numpy as np
 
 from civd.roi import ROIBox, roi_from_center_radius, roi_tiles
 from civd.roi_delta import roi_delta_tiles
-from civd.time_loader import load_index, decode_tile_from_entry
+from civd.schema import tile_shape_from_grid
+from civd.tile_index import BrickMap
+from civd.time_loader import load_index, decode_tile_from_entry, tile_shape_from_index
 
 CIVD_VERSION = "0.1.0-core"
 SUBMAP_SCHEMA_VERSION = "1.0"
@@ -47,6 +49,7 @@ class World:
         self.mode = mode
         self.default_tile_size = int(default_tile_size)
         self._time_index_cache: Dict[str, dict] = {}
+        self._tile_map_cache: Dict[str, BrickMap] = {}
 
     @staticmethod
     def open(root: str, *, mode: Literal["r", "rw"] = "r", default_tile_size: int = 32) -> "World":
@@ -71,12 +74,13 @@ class World:
         raise KeyError("pack path not found in index")
 
     def _tile_size_from_index(self, idx: dict) -> int:
+        """Nominal tile edge: grid.tile_size, or the largest edge of an anisotropic grid.tile_shape_zyx."""
         if "tile_size" in idx:
             return int(idx["tile_size"])
 
         grid = idx.get("grid")
-        if isinstance(grid, dict) and "tile_size" in grid:
-            return int(grid["tile_size"])
+        if isinstance(grid, dict) and ("tile_shape_zyx" in grid or "tile_size" in grid):
+            return max(tile_shape_from_grid(grid))
 
         tiles_meta = idx.get("tiles")
         if isinstance(tiles_meta, dict) and "tile_size" in tiles_meta:
@@ -84,7 +88,16 @@ class World:
 
         return self.default_tile_size
 
-    def _bounds_from_entry(self, e: dict, *, tile_size: int) -> Tuple[int, int, int, int, int, int]:
+    def _tile_shape_from_index(self, idx: dict) -> Tuple[int, int, int]:
+        try:
+            return tile_shape_from_index(idx)
+        except KeyError:
+            ts = self._tile_size_from_index(idx)
+            return (ts, ts, ts)
+
+    def _bounds_from_entry(
+        self, e: dict, *, tile_size: Union[int, Tuple[int, int, int]]
+    ) -> Tuple[int, int, int, int, int, int]:
         """Return bounds_zyx as (z0,z1,y0,y1,x0,x1) across schema variants.
 
         Supports:
@@ -92,7 +105,7 @@ class World:
           - dict forms: {'z0':..,'z1':..,'y0':..,'y1':..,'x0':..,'x1':..}
           - dict forms: {'z': [z0,z1], 'y':[y0,y1], 'x':[x0,x1]}
           - explicit z0/z1/y0/y1/x0/x1 fields
-          - infer from tile_id (z##_y##_x##) and tile_size
+          - infer from tile_id (z##_y##_x##) and tile_size (int or (tz,ty,tx))
         """
         b = e.get("bounds_zyx") or e.get("bounds") or e.get("bounds_zyx6")
 
@@ -120,8 +133,9 @@ class World:
             m = re.match(r"z(\d+)_y(\d+)_x(\d+)", tid)
             if m:
                 tz, ty, tx = map(int, m.groups())
-                z0, y0, x0 = tz * tile_size, ty * tile_size, tx * tile_size
-                return (z0, z0 + tile_size, y0, y0 + tile_size, x0, x0 + tile_size)
+                sz, sy, sx = tile_size if isinstance(tile_size, tuple) else (tile_size,) * 3
+                z0, y0, x0 = tz * sz, ty * sy, tx * sx
+                return (z0, z0 + sz, y0, y0 + sy, x0, x0 + sx)
 
         raise KeyError("No bounds fields in entry and cannot infer from tile_id")
 
@@ -137,6 +151,14 @@ class World:
             self._time_index_cache[time] = load_index(self.index_path(time))
         return self._time_index_cache[time]
 
+    def tile_map(self, time: str) -> BrickMap:
+        """
+        Cached BrickMap of one time's tiles, for ROI selection.
+        """
+        if time not in self._tile_map_cache:
+            self._tile_map_cache[time] = BrickMap.from_index(self.load_time_index(time))
+        return self._tile_map_cache[time]
+
     def meta(self, time: str = "t000") -> dict:
         idx = self.load_time_index(time)
         shape = self._shape_zyxc_from_index(idx)
@@ -146,6 +168,7 @@ class World:
             "time": time,
             "shape_zyxc": shape,
             "tile_size": self._tile_size_from_index(idx),
+            "tile_shape_zyx": self._tile_shape_from_index(idx),
             "channels": shape[3],
             "pack_path": self._pack_path_from_index(idx),
         }
@@ -182,9 +205,11 @@ class World:
         idx = self.load_time_index(time)
         pack_path = self._pack_path_from_index(idx)
         tile_size = self._tile_size_from_index(idx)
+        tile_shape = self._tile_shape_from_index(idx)
         shape_zyxc = self._shape_zyxc_from_index(idx)
 
-        entries = roi_tiles(idx, roi) if mode == "full" else roi_delta_tiles(idx, roi)
+        tmap = self.tile_map(time)
+        entries = roi_tiles(idx, roi, tile_map=tmap) if mode == "full" else roi_delta_tiles(idx, roi, tile_map=tmap)
 
         t0 = _time.perf_counter()
         tiles: Dict[str, np.ndarray] = {}
@@ -207,7 +232,7 @@ class World:
             tiles[tid] = arr
             bytes_out += arr.nbytes
 
-            tile_bounds[tid] = self._bounds_from_entry(e, tile_size=tile_size)
+            tile_bounds[tid] = self._bounds_from_entry(e, tile_size=tile_shape)
 
         t1 = _time.perf_counter()
 
@@ -3,9 +3,11 @@ from __future__ import annotations
 import json
 import os
 import time
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import zstandard as zstd
 
 def _pack_path_from_index(idx: dict) -> str:
     """
@@ -28,57 +30,52 @@ def _pack_path_from_index(idx: dict) -> str:
 
     raise TypeError(f"Unsupported index.pack type: {type(pack).__name__}")
 
-from civd.roi import roi_from_center_radius
-from civd.time_loader import load_index, decode_tile_from_entry
-
-SCHEMA_SUBMAP_V1 = "civd.submap.v1"
+from civd.roi import roi_from_center_radius, roi_tile_slots
+from civd.storage import get_storage, normalize_path
+from civd.submap_schema import SCHEMA_SUBMAP_V1, SCHEMA_SUBMAP_V2
+from civd.tile_index import BrickMap
+from civd.time_loader import (
+    load_index,
+    decode_frame,
+    decode_tile_from_entry,
+    read_tile_frame,
+    tile_shape_from_index,
+)
 
 
 def _tile_id_from_tcoords(tz: int, ty: int, tx: int) -> str:
     return f"z{tz:02d}_y{ty:02d}_x{tx:02d}"
 
 
-def _roi_tcoord_ranges(roi, tile_size: int) -> Tuple[range, range, range]:
-    tz0 = int(roi.z0) // tile_size
-    tz1 = (int(roi.z1) - 1) // tile_size
-    ty0 = int(roi.y0) // tile_size
-    ty1 = (int(roi.y1) - 1) // tile_size
-    tx0 = int(roi.x0) // tile_size
-    tx1 = (int(roi.x1) - 1) // tile_size
-    return range(tz0, tz1 + 1), range(ty0, ty1 + 1), range(tx0, tx1 + 1)
-
-
-def _bounds6_from_entry(entry: Dict[str, Any], *, tile_size: int) -> List[int]:
-    """
-    Return [z0,z1,y0,y1,x0,x1] for a tile entry, tolerant to schema variants.
-    Prefers explicit bounds_zyx, then bounds, else derives from tz/ty/tx.
-    """
-    b = entry.get("bounds_zyx", None)
-    if b is None:
-        b = entry.get("bounds", None)
-
-    if isinstance(b, (list, tuple)) and len(b) == 6:
-        return [int(x) for x in b]
+def _intersect(b: Tuple[int, ...], roi) -> Tuple[int, int, int, int, int, int]:
+    z0, z1, y0, y1, x0, x1 = b
+    return (
+        max(z0, roi.z0), min(z1, roi.z1),
+        max(y0, roi.y0), min(y1, roi.y1),
+        max(x0, roi.x0), min(x1, roi.x1),
+    )
 
-    if isinstance(b, dict):
-        if all(k in b for k in ("z0", "z1", "y0", "y1", "x0", "x1")):
-            return [int(b["z0"]), int(b["z1"]), int(b["y0"]), int(b["y1"]), int(b["x0"]), int(b["x1"])]
-        if all(k in b for k in ("z", "y", "x")):
-            z, y, x = b["z"], b["y"], b["x"]
-            return [int(z[0]), int(z[1]), int(y[0]), int(y[1]), int(x[0]), int(x[1])]
 
-    if all(k in entry for k in ("tz", "ty", "tx")):
-        tz, ty, tx = int(entry["tz"]), int(entry["ty"]), int(entry["tx"])
-        z0, y0, x0 = tz * tile_size, ty * tile_size, tx * tile_size
-        return [z0, z0 + tile_size, y0, y0 + tile_size, x0, x0 + tile_size]
+def _crop(tile_arr: np.ndarray, b: Tuple[int, ...], ib: Tuple[int, ...]) -> np.ndarray:
+    z0, _z1, y0, _y1, x0, _x1 = b
+    iz0, iz1, iy0, iy1, ix0, ix1 = ib
+    return tile_arr[iz0 - z0:iz1 - z0, iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0, :]
 
-    tc = entry.get("tcoords")
-    if isinstance(tc, dict) and all(k in tc for k in ("tz", "ty", "tx")):
-        tz, ty, tx = int(tc["tz"]), int(tc["ty"]), int(tc["tx"])
-        z0, y0, x0 = tz * tile_size, ty * tile_size, tx * tile_size
-        return [z0, z0 + tile_size, y0, y0 + tile_size, x0, x0 + tile_size]
 
-    raise KeyError("tile entry missing bounds (expected bounds_zyx/bounds or tz/ty/tx)")
+def _frame_job(entry: Dict[str, Any], idx: Dict[str, Any], b: Tuple[int, ...], roi, level: int) -> Dict[str, Any]:
+    """
+    One tile of a frames export: the source frame as-is when the tile lies
+    fully inside the ROI, else decoded, cropped to the ROI and re-encoded.
+    """
+    comp, loc = read_tile_frame(entry, idx)
+    ib = _intersect(b, roi)
+    if comp is None:
+        return {"bounds": ib, "frame": None, "source": "empty", "bytes_read": 0, "loc": loc}
+    if ib == tuple(b) and tuple(loc["shape_zyxc"][:3]) == (b[1] - b[0], b[3] - b[2], b[5] - b[4]):
+        return {"bounds": ib, "frame": comp, "source": "copied", "bytes_read": len(comp), "loc": loc}
+    crop = np.ascontiguousarray(_crop(decode_frame(comp, loc), b, ib))
+    frame = zstd.ZstdCompressor(level=level).compress(memoryview(crop.reshape(-1).view(np.uint8)))
+    return {"bounds": ib, "frame": frame, "source": "reencoded", "bytes_read": len(comp), "loc": loc}
 
 
 def export_submap(
@@ -88,20 +85,35 @@ def export_submap(
     *,
     mode: str = "full",
     out_dir: str = "exports",
+    format: str = "frames",
+    workers: Optional[int] = None,
+    level: int = 3,
 ) -> Dict[str, Any]:
     """
     Export an ROI submap for a given time index.
 
     mode:
-      - "full": decode all ROI tiles for the time
-      - "delta": decode only changed ROI tiles (skip tiles that contain 'ref')
-
-    Outputs:
-      - exports/submap_<time>_<mode>_z.._y.._x.._r.. .npz
-      - exports/submap_<time>_<mode>_... .json (civd.submap.v1 manifest)
+      - "full": all ROI tiles for the time
+      - "delta": only changed ROI tiles (skip tiles that contain 'ref')
+
+    format:
+      - "frames" (default, civd.submap.v2): one zstd frame per tile, streamed
+        to exports/submap_<...>.zstpack. Tiles fully inside the ROI are copied
+        byte-for-byte from the source pack (no decode, no re-encode); tiles
+        cut by the ROI are decoded, cropped and re-encoded at `level` in a
+        thread pool. The .json manifest lists every frame like an index
+        ("tiles" with offset/length/bounds_zyx), so read_submap() or
+        time_loader.decode_tile_from_entry can decode it.
+      - "npz" (civd.submap.v1): decoded (in parallel) into one dense ROI
+        array saved with np.savez_compressed.
+
+    ROI tiles are looked up in the index's BrickMap (civd.roi.roi_tile_slots)
+    and their bounds come from its tile coords. workers defaults to min(8, cpu count).
     """
     if mode not in ("full", "delta"):
         raise ValueError("mode must be 'full' or 'delta'")
+    if format not in ("frames", "npz"):
+        raise ValueError("format must be 'frames' or 'npz'")
 
     os.makedirs(out_dir, exist_ok=True)
 
@@ -113,9 +125,12 @@ def export_submap(
     vol_shape_zyx = tuple(int(v) for v in shape_zyxc[:3])
     C = int(shape_zyxc[3])
 
-    tile_size = int(idx["grid"]["tile_size"])
-    if tile_size <= 0:
+    tile_shape = tile_shape_from_index(idx)
+    if min(tile_shape) <= 0:
         raise KeyError("index.grid.tile_size missing/invalid (expected civd.index.v1)")
+    tile_size = int(idx["grid"].get("tile_size") or max(tile_shape))
+    grid_meta = idx.get("grid", {})
+    fill = float(grid_meta.get("empty_value", 0.0)) if isinstance(grid_meta, dict) else 0.0
 
     roi = roi_from_center_radius(
         center_zyx=center_zyx,
@@ -123,111 +138,146 @@ def export_submap(
         vol_shape_zyx=vol_shape_zyx,
     )
 
-    tzr, tyr, txr = _roi_tcoord_ranges(roi, tile_size)
+    # ROI tiles (delta: changed tiles only) and their bounds, clipped to the volume
+    tmap = BrickMap.from_index(idx)
+    sel = roi_tile_slots(idx, roi, delta=(mode == "delta"), tile_map=tmap)
+    lo = tmap.coords_of(sel) * np.array(tile_shape, dtype=np.int64)
+    hi = np.minimum(lo + np.array(tile_shape, dtype=np.int64), np.array(vol_shape_zyx, dtype=np.int64))
+    bounds = np.stack([lo[:, 0], hi[:, 0], lo[:, 1], hi[:, 1], lo[:, 2], hi[:, 2]], axis=1)
+    jobs = [(tmap.entries[s], tuple(b)) for s, b in zip(sel.tolist(), bounds.tolist())]
 
-    # ROI output buffer
     roiZ = int(roi.z1 - roi.z0)
     roiY = int(roi.y1 - roi.y0)
     roiX = int(roi.x1 - roi.x0)
-    out_vol = np.zeros((roiZ, roiY, roiX, C), dtype=np.float32)
-
-    tiles_total = 0
-    tiles_included = 0
-
-    t0 = time.perf_counter()
-
-    # iterate tiles from index (v1 currently: list)
-    for entry in idx.get("tiles", []):
-        if not isinstance(entry, dict):
-            continue
-
-        # delta mode: skip unchanged tiles
-        if mode == "delta" and "ref" in entry:
-            continue
-
-        # bounds -> tcoords -> ROI membership
-        b = _bounds6_from_entry(entry, tile_size=tile_size)
-        z0, z1, y0, y1, x0, x1 = b
-        tz = z0 // tile_size
-        ty = y0 // tile_size
-        tx = x0 // tile_size
-
-        # count membership against ROI ranges
-        if (tz not in tzr) or (ty not in tyr) or (tx not in txr):
-            continue
-
-        tiles_total += 1
-
-        # decode (time_loader resolves refs if present; delta mode avoids them)
-        tile_arr, _st = decode_tile_from_entry(entry, idx)
-
-        # intersect tile bounds with ROI bounds
-        iz0 = max(z0, roi.z0)
-        iz1 = min(z1, roi.z1)
-        iy0 = max(y0, roi.y0)
-        iy1 = min(y1, roi.y1)
-        ix0 = max(x0, roi.x0)
-        ix1 = min(x1, roi.x1)
-
-        if iz0 >= iz1 or iy0 >= iy1 or ix0 >= ix1:
-            continue
-
-        # offsets within tile
-        sz0 = iz0 - z0
-        sy0 = iy0 - y0
-        sx0 = ix0 - x0
-        sz1 = sz0 + (iz1 - iz0)
-        sy1 = sy0 + (iy1 - iy0)
-        sx1 = sx0 + (ix1 - ix0)
-
-        # offsets within ROI buffer
-        dz0 = iz0 - roi.z0
-        dy0 = iy0 - roi.y0
-        dx0 = ix0 - roi.x0
-        dz1 = dz0 + (iz1 - iz0)
-        dy1 = dy0 + (iy1 - iy0)
-        dx1 = dx0 + (ix1 - ix0)
-
-        out_vol[dz0:dz1, dy0:dy1, dx0:dx1, :] = tile_arr[sz0:sz1, sy0:sy1, sx0:sx1, :]
-        tiles_included += 1
-
-    decode_ms = (time.perf_counter() - t0) * 1000.0
 
     cz, cy, cx = [int(v) for v in center_zyx]
-    npz_name = f"submap_{time_name}_{mode}_z{cz}_y{cy}_x{cx}_r{int(radius_vox)}.npz"
-    json_name = f"submap_{time_name}_{mode}_z{cz}_y{cy}_x{cx}_r{int(radius_vox)}.json"
-    npz_path = os.path.join(out_dir, npz_name)
-    json_path = os.path.join(out_dir, json_name)
-
-    np.savez_compressed(npz_path, volume=out_vol)
-    bytes_npz = int(os.path.getsize(npz_path))
+    base = f"submap_{time_name}_{mode}_z{cz}_y{cy}_x{cx}_r{int(radius_vox)}"
+    json_path = os.path.join(out_dir, base + ".json")
+    n_workers = int(workers) if workers else min(8, os.cpu_count() or 1)
 
-    meta = {
-        "schema_version": SCHEMA_SUBMAP_V1,
+    meta: Dict[str, Any] = {
         "time": time_name,
         "mode": mode,
         "roi": {"z0": int(roi.z0), "z1": int(roi.z1), "y0": int(roi.y0), "y1": int(roi.y1), "x0": int(roi.x0), "x1": int(roi.x1)},
         "shape_zyxc": [roiZ, roiY, roiX, int(C)],
         "tile_size": int(tile_size),
-        "tiles_total": int(tiles_total),
-        "tiles_included": int(tiles_included),
-        "bytes_npz": int(bytes_npz),
-        "decode_ms": float(decode_ms),
+        "tile_shape_zyx": [int(v) for v in tile_shape],
+        "tiles_total": int(sel.shape[0]),
+        "tiles_included": int(len(jobs)),
+    }
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_workers) as ex:
+        if format == "npz":
+            out_vol = np.zeros((roiZ, roiY, roiX, C), dtype=np.float32)
+
+            def _decode(job):
+                entry, b = job
+                tile_arr, _st = decode_tile_from_entry(entry, idx)
+                iz0, iz1, iy0, iy1, ix0, ix1 = ib = _intersect(b, roi)
+                # tiles are disjoint, so workers write disjoint ROI blocks
+                out_vol[iz0 - roi.z0:iz1 - roi.z0, iy0 - roi.y0:iy1 - roi.y0, ix0 - roi.x0:ix1 - roi.x0, :] = (
+                    _crop(tile_arr, b, ib)
+                )
+
+            list(ex.map(_decode, jobs))
+            decode_ms = (time.perf_counter() - t0) * 1000.0
+
+            npz_path = os.path.join(out_dir, base + ".npz")
+            np.savez_compressed(npz_path, volume=out_vol)
+            bytes_npz = int(os.path.getsize(npz_path))
+            meta.update({
+                "schema_version": SCHEMA_SUBMAP_V1,
+                "bytes_npz": bytes_npz,
+                "decode_ms": float(decode_ms),
+                "npz_path": npz_path.replace("\\", "/"),
+            })
+            written = bytes_npz
+        else:
+            pack_path = os.path.join(out_dir, base + ".zstpack")
+            tiles_meta: List[Dict[str, Any]] = []
+            counts = {"copied": 0, "reencoded": 0, "empty": 0}
+            bytes_read = 0
+            offset = 0
+            # results arrive in tile order and are appended as they come
+            with open(pack_path, "wb") as f:
+                for r in ex.map(lambda job: _frame_job(job[0], idx, job[1], roi, level), jobs):
+                    z0, z1, y0, y1, x0, x1 = r["bounds"]
+                    tz, ty, tx = z0 // tile_shape[0], y0 // tile_shape[1], x0 // tile_shape[2]
+                    e: Dict[str, Any] = {
+                        "tile_id": _tile_id_from_tcoords(tz, ty, tx),
+                        "tile_coords": {"tz": tz, "ty": ty, "tx": tx},
+                        "bounds_zyx": [z0, z1, y0, y1, x0, x1],
+                        "shape_zyxc": [z1 - z0, y1 - y0, x1 - x0, int(C)],
+                        "source": r["source"],
+                    }
+                    counts[r["source"]] += 1
+                    bytes_read += r["bytes_read"]
+                    if r["frame"] is None:
+                        e["empty"] = True
+                    else:
+                        frame = r["frame"]
+                        f.write(frame)
+                        codec = r["loc"].get("codec") if r["source"] == "copied" else None
+                        e.update({
+                            "offset": offset,
+                            "length": len(frame),
+                            "codec": codec or {"name": "zstd", "level": int(level)},
+                        })
+                        offset += len(frame)
+                    tiles_meta.append(e)
+            decode_ms = (time.perf_counter() - t0) * 1000.0
+            meta.update({
+                "schema_version": SCHEMA_SUBMAP_V2,
+                "decode_ms": float(decode_ms),
+                "bytes_read": int(bytes_read),
+                "bytes_written": int(offset),
+                "tiles_copied": counts["copied"],
+                "tiles_reencoded": counts["reencoded"],
+                "tiles_empty": counts["empty"],
+                "fill_value": fill,
+                "volume": {"shape_zyxc": [roiZ, roiY, roiX, int(C)]},
+                "pack": {"path": pack_path.replace("\\", "/")},
+                "tiles": tiles_meta,
+            })
+            written = offset
+
+    meta.update({
         "source_index": index_path.replace("\\", "/"),
-        "npz_path": npz_path.replace("\\", "/"),
         "channels": [f"chan{i}" for i in range(int(C))],
-    }
+        "workers": n_workers,
+    })
 
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(meta, f, indent=2)
         f.write("\n")
 
-    print(f"Exported: {npz_path}")
-    print(f"  tiles: {tiles_included} decode_ms: {decode_ms:.2f} bytes: {bytes_npz}")
+    print(f"Exported: {json_path}")
+    print(f"  tiles: {len(jobs)} ms: {decode_ms:.2f} bytes: {written}")
 
     return meta
 
 
+def read_submap(manifest_path: str) -> np.ndarray:
+    """
+    Dense (roiZ, roiY, roiX, C) float32 array of an exported submap (either
+    format). Delta exports leave unchanged tiles at the fill value.
+    """
+    m = get_storage().read_json(normalize_path(manifest_path))
+    if m.get("schema_version") == SCHEMA_SUBMAP_V1:
+        return np.load(m["npz_path"])["volume"]
+
+    r = m["roi"]
+    out = np.full(tuple(int(v) for v in m["shape_zyxc"]), float(m.get("fill_value", 0.0)), dtype=np.float32)
+    for e in m.get("tiles", []):
+        if e.get("empty"):
+            continue
+        z0, z1, y0, y1, x0, x1 = (int(v) for v in e["bounds_zyx"])
+        tile_arr, _st = decode_tile_from_entry(e, m)
+        out[z0 - r["z0"]:z1 - r["z0"], y0 - r["y0"]:y1 - r["y0"], x0 - r["x0"]:x1 - r["x0"], :] = tile_arr
+    return out
+
+
 def main() -> None:
     center = (128, 128, 160)
     r = 40
@@ -1,13 +1,13 @@
-import json
 from typing import Dict, List, Tuple
 
 import numpy as np
-import zstandard as zstd
+
+from civd.storage import get_storage
+from civd.time_loader import decode_frame
 
 
 def load_index(path: str = "data/civd_tiles/index.json") -> Dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_storage().read_json(path)
 
 
 def read_tile(pack_path: str, tile_entry: Dict) -> np.ndarray:
@@ -19,15 +19,10 @@ def read_tile(pack_path: str, tile_entry: Dict) -> np.ndarray:
     length = tile_entry["length"]
     shape = tuple(tile_entry["shape_zyxc"])
 
-    with open(pack_path, "rb") as f:
-        f.seek(offset)
-        comp = f.read(length)
-
-    dctx = zstd.ZstdDecompressor()
-    raw = dctx.decompress(comp)
+    comp = get_storage().read(pack_path, offset, length)
 
-    arr = np.frombuffer(raw, dtype=np.float32).reshape(shape)
-    return arr
+    # planar (channels-first) frames come back as a (z,y,x,C) view
+    return decode_frame(comp, {"shape_zyxc": shape, "codec": tile_entry.get("codec")})
 
 
 def read_tiles(pack_path: str, tile_entries: List[Dict]) -> List[np.ndarray]:
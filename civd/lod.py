@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+LABEL_REDUCE_MODES = ("max", "mode")
+
+
+def _pad_even(vol: np.ndarray) -> np.ndarray:
+    """
+    Edge-pad Z/Y/X to even lengths so every 2x2x2 block is complete.
+    """
+    pad = [(0, int(n % 2)) for n in vol.shape[:3]] + [(0, 0)]
+    if any(p[1] for p in pad):
+        vol = np.pad(vol, pad, mode="edge")
+    return vol
+
+
+def _blocks(vol: np.ndarray) -> np.ndarray:
+    """
+    View (Z,Y,X,C) as (Z/2,Y/2,X/2,C,8): the 8 voxels of each 2x2x2 block last.
+    """
+    Z, Y, X, C = vol.shape
+    b = vol.reshape(Z // 2, 2, Y // 2, 2, X // 2, 2, C)
+    b = b.transpose(0, 2, 4, 6, 1, 3, 5)
+    return b.reshape(Z // 2, Y // 2, X // 2, C, 8)
+
+
+def _block_mode(b: np.ndarray) -> np.ndarray:
+    """
+    Most frequent value over the last axis (ties -> smallest value).
+    """
+    s = np.sort(b, axis=-1)
+    counts = np.zeros(s.shape, dtype=np.int8)
+    for j in range(s.shape[-1]):
+        counts[..., j] = (s == s[..., j:j + 1]).sum(axis=-1)
+    pick = np.argmax(counts, axis=-1)[..., None]
+    return np.take_along_axis(s, pick, axis=-1)[..., 0]
+
+
+def downsample2x(
+    vol: np.ndarray,
+    *,
+    label_channels: Sequence[int] = (),
+    label_reduce: str = "max",
+) -> np.ndarray:
+    """
+    Downsample a (Z,Y,X,C) float32 volume by 2 along each spatial axis.
+
+    - density channels: mean of each 2x2x2 block
+    - label_channels: max (default) or mode of each block, so the result
+      stays a valid class id instead of an average of ids
+    Odd axis lengths are edge-padded first (output length = ceil(n / 2)).
+    """
+    if vol.ndim != 4:
+        raise ValueError("downsample2x expects a (Z,Y,X,C) volume")
+    if label_reduce not in LABEL_REDUCE_MODES:
+        raise ValueError(f"label_reduce must be one of {LABEL_REDUCE_MODES}, got {label_reduce!r}")
+
+    C = int(vol.shape[3])
+    blocks = _blocks(_pad_even(np.asarray(vol, dtype=np.float32)))
+
+    out = blocks.mean(axis=-1, dtype=np.float32)
+    for c in label_channels:
+        c = int(c)
+        if c < 0 or c >= C:
+            continue
+        if label_reduce == "max":
+            out[..., c] = blocks[..., c, :].max(axis=-1)
+        else:
+            out[..., c] = _block_mode(blocks[..., c, :])
+
+    return np.ascontiguousarray(out, dtype=np.float32)
+
+
+def build_pyramid(
+    vol: np.ndarray,
+    levels: int,
+    *,
+    label_channels: Sequence[int] = (1,),
+    label_reduce: str = "max",
+) -> List[np.ndarray]:
+    """
+    Return [level1, level2, ...] (level 0 is `vol` itself and is not included).
+    Level k has voxel edge 2**k in level-0 voxels.
+    """
+    out: List[np.ndarray] = []
+    cur = vol
+    for _ in range(int(levels)):
+        cur = downsample2x(cur, label_channels=label_channels, label_reduce=label_reduce)
+        out.append(cur)
+    return out
+
+
+def lod_for_voxel_size(voxel_size: float, levels_available: int) -> int:
+    """
+    Coarsest level whose voxel edge (2**k level-0 voxels) does not exceed voxel_size.
+    """
+    if voxel_size <= 0:
+        raise ValueError("voxel_size must be > 0")
+    k = 0
+    while k < int(levels_available) and 2 ** (k + 1) <= voxel_size:
+        k += 1
+    return k
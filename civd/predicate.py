@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+
+OPS = (">", ">=", "<", "<=", "==", "!=", "between")
+
+_EXPR_RE = re.compile(r"^\s*(>=|<=|==|!=|>|<)\s*([-+0-9.eE]+|nan|inf|-inf)\s*$")
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """
+    Voxel value predicate for World.find().
+
+    op is one of OPS; "between" is inclusive [a, b]. A callable predicate
+    (fn: ndarray -> bool ndarray) is also accepted but cannot use tile
+    statistics, so every tile in the ROI gets decoded.
+    """
+    op: str
+    a: float = 0.0
+    b: Optional[float] = None
+    fn: Optional[Callable[[np.ndarray], np.ndarray]] = None
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        if self.fn is not None:
+            return np.asarray(self.fn(values), dtype=bool)
+        a = np.float32(self.a)
+        if self.op == ">":
+            return values > a
+        if self.op == ">=":
+            return values >= a
+        if self.op == "<":
+            return values < a
+        if self.op == "<=":
+            return values <= a
+        if self.op == "==":
+            return values == a
+        if self.op == "!=":
+            return values != a
+        return (values >= a) & (values <= np.float32(self.b))
+
+    def may_match(self, vmin: float, vmax: float) -> bool:
+        """
+        False only if no value in [vmin, vmax] can satisfy the predicate.
+        """
+        if self.fn is not None:
+            return True
+        a = float(self.a)
+        if self.op == ">":
+            return vmax > a
+        if self.op == ">=":
+            return vmax >= a
+        if self.op == "<":
+            return vmin < a
+        if self.op == "<=":
+            return vmin <= a
+        if self.op == "==":
+            return vmin <= a <= vmax
+        if self.op == "!=":
+            return not (vmin == vmax == a)
+        return vmax >= a and vmin <= float(self.b)
+
+    def describe(self) -> str:
+        if self.fn is not None:
+            return getattr(self.fn, "__name__", "callable")
+        if self.op == "between":
+            return f"between {self.a:g} {self.b:g}"
+        return f"{self.op} {self.a:g}"
+
+
+PredicateLike = Union[Predicate, str, tuple, Callable[[np.ndarray], np.ndarray]]
+
+
+def parse_predicate(pred: PredicateLike) -> Predicate:
+    """
+    Accepts a Predicate, a string ("> 0.5", "== 3"), a tuple ((">", 0.5),
+    ("between", 0.2, 0.8)) or a vectorized callable.
+    """
+    if isinstance(pred, Predicate):
+        return pred
+    if isinstance(pred, str):
+        m = _EXPR_RE.match(pred)
+        if not m:
+            raise ValueError(f"cannot parse predicate {pred!r} (expected e.g. '> 0.5')")
+        return Predicate(op=m.group(1), a=float(m.group(2)))
+    if isinstance(pred, tuple):
+        if not pred or pred[0] not in OPS:
+            raise ValueError(f"predicate op must be one of {OPS}, got {pred!r}")
+        if pred[0] == "between":
+            if len(pred) != 3:
+                raise ValueError("('between', lo, hi) needs two bounds")
+            lo, hi = float(pred[1]), float(pred[2])
+            if lo > hi:
+                raise ValueError("between: lo must be <= hi")
+            return Predicate(op="between", a=lo, b=hi)
+        if len(pred) != 2:
+            raise ValueError(f"({pred[0]!r}, value) expected, got {pred!r}")
+        return Predicate(op=pred[0], a=float(pred[1]))
+    if callable(pred):
+        return Predicate(op="callable", fn=pred)
+    raise TypeError(f"unsupported predicate type: {type(pred).__name__}")
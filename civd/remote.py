@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import http.client
+import json
+import queue
+import socket
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+from civd.tile_server import decode_batch
+from civd.world import World
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._path)
+        self.sock = sock
+
+
+class _ConnectionPool:
+    """
+    Keep-alive connections to one server, reused across requests and threads.
+    """
+
+    def __init__(self, url: str, *, size: int, timeout: float):
+        u = urlsplit(url)
+        self.scheme = u.scheme
+        self.netloc = u.netloc
+        self.path = u.path
+        self.timeout = float(timeout)
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max(1, int(size)))
+
+    def _new(self) -> http.client.HTTPConnection:
+        if self.scheme == "unix":
+            return _UnixHTTPConnection(self.path, self.timeout)
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = self._new()
+            reused = False
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except (http.client.HTTPException, ConnectionError, socket.timeout):
+            conn.close()
+            if not reused:
+                raise
+            # stale keep-alive connection: retry once on a fresh one
+            conn = self._new()
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        hdrs = {k.lower(): v for k, v in resp.getheaders()}
+        if resp.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return resp.status, hdrs, data
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RemoteWorld(World):
+    """
+    World backed by a civd.tile_server.TileServer ("http://host:port" or
+    "unix:///path.sock"); normally created through World.open(url).
+
+    Every query API works unchanged. Indices are fetched once per time, and
+    the frames a query needs are fetched in one POST /frames round trip per
+    `batch_size` tiles, never one per tile. Frames are kept in an LRU cache
+    of up to `cache_bytes` compressed bytes, so revisited tiles cost nothing
+    on the wire; connections are pooled and kept alive.
+
+    `stats` counts round_trips, bytes_received, cache_hits and cache_misses.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        pool_size: int = 4,
+        batch_size: int = 4096,
+        cache_bytes: int = 256 << 20,
+        timeout: float = 30.0,
+    ):
+        super().__init__(url, mode="r")
+        self.url = url
+        self.batch_size = max(1, int(batch_size))
+        self.cache_bytes = int(cache_bytes)
+        self._pool = _ConnectionPool(url, size=pool_size, timeout=timeout)
+        self._frames: "OrderedDict[Tuple[str, int, int], Tuple[Optional[bytes], Dict[str, Any]]]" = OrderedDict()
+        self._frames_nbytes = 0
+        self._slot_ids: Dict[Tuple[str, int], Dict[int, int]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"round_trips": 0, "bytes_received": 0, "cache_hits": 0, "cache_misses": 0}
+
+    # ---- transport ----
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None,
+                 headers: Optional[Dict[str, str]] = None, *, ok: Sequence[int] = (200,)) -> Tuple[Dict[str, str], bytes]:
+        status, hdrs, data = self._pool.request(method, path, body, headers)
+        with self._lock:
+            self.stats["round_trips"] += 1
+            self.stats["bytes_received"] += len(data)
+        if status not in ok:
+            try:
+                msg = json.loads(data.decode("utf-8")).get("error", "")
+            except ValueError:
+                msg = data[:200].decode("utf-8", "replace")
+            raise KeyError(f"{method} {path}: HTTP {status} {msg}")
+        return hdrs, data
+
+    def _get_json(self, path: str) -> Any:
+        _h, data = self._request("GET", path)
+        return json.loads(data.decode("utf-8"))
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def __enter__(self) -> "RemoteWorld":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ---- World backend ----
+
+    def load_time_index(self, time_name: str) -> Dict[str, Any]:
+        if time_name not in self._cache:
+            self._cache[time_name] = self._get_json("/index/" + quote(time_name))
+        return self._cache[time_name]
+
+    def times(self, refresh: bool = False) -> List[str]:
+        if self._times is None or refresh:
+            self._times = list(self._get_json("/times"))
+        return list(self._times)
+
+    def _slot_of(self, time_name: str, level: int) -> Dict[int, int]:
+        # tile_map slot of each entry object (the server numbers tiles the same way)
+        key = (time_name, int(level))
+        if key not in self._slot_ids:
+            self._slot_ids[key] = {id(e): i for i, e in enumerate(self.tile_map(time_name, lod=level).entries)}
+        return self._slot_ids[key]
+
+    def _read_frames(
+        self,
+        time_name: str,
+        level: int,
+        entries: Sequence[Dict[str, Any]],
+        idx: Dict[str, Any],
+    ) -> List[Tuple[Optional[bytes], Dict[str, Any]]]:
+        slot_of = self._slot_of(time_name, level)
+        keys = [(time_name, int(level), slot_of[id(e)]) for e in entries]
+
+        out: Dict[Tuple[str, int, int], Tuple[Optional[bytes], Dict[str, Any]]] = {}
+        missing: List[Tuple[str, int, int]] = []
+        with self._lock:
+            for k in keys:
+                hit = self._frames.get(k)
+                if hit is not None:
+                    self._frames.move_to_end(k)
+                    out[k] = hit
+                elif k not in out:
+                    missing.append(k)
+                    out[k] = None  # type: ignore[assignment]
+            self.stats["cache_hits"] += len(keys) - len(missing)
+            self.stats["cache_misses"] += len(missing)
+
+        for i in range(0, len(missing), self.batch_size):
+            chunk = missing[i:i + self.batch_size]
+            body = json.dumps({"time": time_name, "lod": int(level), "slots": [k[2] for k in chunk]}).encode("utf-8")
+            _h, data = self._request("POST", "/frames", body, {"Content-Type": "application/json"})
+            for k, fl in zip(chunk, decode_batch(data)):
+                out[k] = fl
+                self._remember(k, fl)
+
+        return [out[k] for k in keys]
+
+    def _remember(self, key: Tuple[str, int, int], fl: Tuple[Optional[bytes], Dict[str, Any]]) -> None:
+        n = len(fl[0]) if fl[0] is not None else 0
+        if n > self.cache_bytes:
+            return
+        with self._lock:
+            if key in self._frames:
+                return
+            self._frames[key] = fl
+            self._frames_nbytes += n
+            while self._frames_nbytes > self.cache_bytes:
+                _k, (comp, _loc) = self._frames.popitem(last=False)
+                self._frames_nbytes -= len(comp) if comp is not None else 0
+
+    def read_range(self, pack: str, offset: int, length: int) -> bytes:
+        """
+        `length` bytes of a pack file on the server, starting at `offset`
+        (HTTP range request; pack paths as they appear in the index).
+        """
+        if length <= 0:
+            return b""
+        path = "/pack/" + quote(str(pack).replace("\\", "/"))
+        _h, data = self._request("GET", path, headers={"Range": f"bytes={int(offset)}-{int(offset) + int(length) - 1}"},
+                                 ok=(206,))
+        return data
+
+    def _prepare_pack(self, pack: str) -> int:
+        # packs stay on the server: only check they exist and are large enough
+        return self.pack_size(pack)
+
+    def pack_size(self, pack: str) -> int:
+        """
+        Size in bytes of a pack file on the server.
+        """
+        path = "/pack/" + quote(str(pack).replace("\\", "/"))
+        hdrs, _data = self._request("GET", path, headers={"Range": "bytes=0-0"}, ok=(206, 416))
+        return int(hdrs["content-range"].rsplit("/", 1)[1])
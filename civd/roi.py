@@ -1,7 +1,13 @@
-import json
 import math
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from civd.roi_shapes import ROIShape
+from civd.storage import get_storage, normalize_path
+from civd.tile_index import BrickMap
+from civd.time_loader import tile_shape_from_index
 
 
 @dataclass(frozen=True)
@@ -49,63 +55,89 @@ def roi_from_center_radius(center_zyx: Tuple[int, int, int], radius_vox: int, vo
     return ROIBox(z0, z1, y0, y1, x0, x1)
 
 
-def roi_tiles(index: Dict, roi: ROIBox) -> List[Dict]:
+def _tcoord_ranges(roi: ROIBox, tile_shape: Tuple[int, int, int], grid_dims: Tuple[int, int, int]) -> Tuple[range, range, range]:
+    # tile ranges an ROI box covers, clipped to the grid
+    out = []
+    for lo, hi, t, n in zip((roi.z0, roi.y0, roi.x0), (roi.z1, roi.y1, roi.x1), tile_shape, grid_dims):
+        a = _clamp(int(lo) // t, 0, n)
+        b = _clamp((int(hi) + t - 1) // t, 0, n)
+        out.append(range(a, max(a, b)))
+    return (out[0], out[1], out[2])
+
+
+# BrickMaps of the last few indices selected from without a tile_map, so
+# repeated selections on one index build its map once. Entries hold the
+# index itself: an id() is not reused while its entry is alive.
+_TILE_MAPS: Dict[int, Tuple[Dict, object, int, BrickMap]] = {}
+_TILE_MAPS_MAX = 8
+
+
+def _index_tile_map(index: Dict) -> BrickMap:
+    tiles = index.get("tiles")
+    n = len(tiles) if isinstance(tiles, list) else -1
+    hit = _TILE_MAPS.get(id(index))
+    if hit is not None and hit[0] is index and hit[1] is tiles and hit[2] == n:
+        return hit[3]
+    tmap = BrickMap.from_index(index)
+    if len(_TILE_MAPS) >= _TILE_MAPS_MAX:
+        _TILE_MAPS.pop(next(iter(_TILE_MAPS)))
+    _TILE_MAPS[id(index)] = (index, tiles, n, tmap)
+    return tmap
+
+
+def roi_tile_slots(
+    index: Dict,
+    roi: Union[ROIBox, ROIShape],
+    *,
+    delta: bool = False,
+    tile_map: Optional[BrickMap] = None,
+) -> np.ndarray:
+    """
+    Entry slots (positions in tile_map.entries) of the tiles intersecting
+    the ROI, as an int64 array in (tz, ty, tx) order. delta=True keeps only
+    tiles stored at this timestamp (BrickMap.own_payload: no "ref").
+
+    tile_map is the index's BrickMap (e.g. World.tile_map). Without one, the
+    map is built on the first call for an index and reused while the same,
+    unmodified index dict is passed again.
+    """
+    tmap = tile_map if tile_map is not None else _index_tile_map(index)
+    tile_shape = tile_shape_from_index(index)
+    shape = roi if isinstance(roi, ROIShape) else None
+    zr, yr, xr = _tcoord_ranges(shape.bbox() if shape is not None else roi, tile_shape, tmap.grid_dims)
+    if shape is None:
+        slots = tmap.query_box(zr, yr, xr)
+    else:
+        vol = tuple(int(v) for v in index["volume"]["shape_zyxc"][:3])
+        slots = tmap.query_mask(zr, yr, xr, shape.tile_mask(zr, yr, xr, tile_shape, vol))
+    if delta:
+        slots = slots[tmap.own_payload[slots]]
+    return slots
+
+
+def roi_tiles(
+    index: Dict,
+    roi: Union[ROIBox, ROIShape],
+    *,
+    delta: bool = False,
+    tile_map: Optional[BrickMap] = None,
+) -> List[Dict]:
     """
-    Returns the tile entries from index['tiles'] that intersect the ROI.
-    Uses fast coordinate math (tile grid), not scanning the entire pack.
+    Returns the tile entries from index['tiles'] that intersect the ROI,
+    in (tz, ty, tx) order (see roi_tile_slots for the slot-array form).
 
     Intersection rule: tile bounds overlap ROI bounds in all 3 axes.
+    roi may also be an ROI shape (civd.roi_shapes); tiles inside its bounding
+    box that the shape does not touch are dropped. delta and tile_map are
+    as in roi_tile_slots.
     """
-    ts = index["tile_spec"]
-    tz, ty, tx = ts["tile_z"], ts["tile_y"], ts["tile_x"]
-
-    grid = index["grid"]
-    nz, ny, nx = grid["nz"], grid["ny"], grid["nx"]
-
-    # Convert ROI voxel bounds to inclusive tile coordinate ranges
-    # Using half-open intervals:
-    # start tile = floor(start / tile_size)
-    # end tile = ceil(end / tile_size) - 1
-    tz0 = roi.z0 // tz
-    ty0 = roi.y0 // ty
-    tx0 = roi.x0 // tx
-
-    tz1 = (roi.z1 + tz - 1) // tz - 1
-    ty1 = (roi.y1 + ty - 1) // ty - 1
-    tx1 = (roi.x1 + tx - 1) // tx - 1
-
-    # Clamp tile coords to grid
-    tz0 = _clamp(tz0, 0, nz - 1)
-    ty0 = _clamp(ty0, 0, ny - 1)
-    tx0 = _clamp(tx0, 0, nx - 1)
-
-    tz1 = _clamp(tz1, 0, nz - 1)
-    ty1 = _clamp(ty1, 0, ny - 1)
-    tx1 = _clamp(tx1, 0, nx - 1)
-
-    # Build a lookup from (tz,ty,tx) -> tile entry for O(1) access
-    # This avoids scanning all tiles each query.
-    lookup = {}
-    for t in index["tiles"]:
-        c = t["tile_coords"]
-        lookup[(c["tz"], c["ty"], c["tx"])] = t
-
-    hits: List[Dict] = []
-    for a in range(tz0, tz1 + 1):
-        for b in range(ty0, ty1 + 1):
-            for c in range(tx0, tx1 + 1):
-                entry = lookup.get((a, b, c))
-                if entry is not None:
-                    hits.append(entry)
-
-    # Deterministic ordering
-    hits.sort(key=lambda e: (e["tile_coords"]["tz"], e["tile_coords"]["ty"], e["tile_coords"]["tx"]))
-    return hits
+    tmap = tile_map if tile_map is not None else _index_tile_map(index)
+    ents = tmap.entries
+    return [ents[s] for s in roi_tile_slots(index, roi, delta=delta, tile_map=tmap).tolist()]
 
 
 def load_index(path: str = "data/civd_tiles/index.json") -> Dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_storage().read_json(normalize_path(path))
 
 
 if __name__ == "__main__":
@@ -1,13 +1,14 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from civd.roi import roi_tiles, ROIBox
+from civd.tile_index import BrickMap
 
 
-def roi_delta_tiles(index: Dict, roi: ROIBox) -> List[Dict]:
+def roi_delta_tiles(index: Dict, roi: ROIBox, *, tile_map: Optional[BrickMap] = None) -> List[Dict]:
     """
     Returns only the tiles inside ROI that are *new at this timestamp*.
     In Phase D timepacks, unchanged tiles have a 'ref' field.
     Changed tiles are stored locally and have no 'ref'.
+    tile_map: the index's BrickMap, if already built (see roi_tiles).
     """
-    tiles = roi_tiles(index, roi)
-    return [t for t in tiles if "ref" not in t]
+    return roi_tiles(index, roi, delta=True, tile_map=tile_map)
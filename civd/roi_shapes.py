@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Tuple, Union
+
+import numpy as np
+
+from civd.source import ROIBox
+
+
+Vec3 = Tuple[float, float, float]
+
+# Shapes live in continuous voxel coordinates (z, y, x): voxel (i, j, k)
+# spans [i, i+1) x [j, j+1) x [k, k+1) and belongs to a shape when its
+# center (i+0.5, j+0.5, k+0.5) does. A tile intersects a shape when the box
+# spanned by its voxel centers does, so tile selection never drops a voxel
+# the voxel mask keeps.
+
+_EPS = 1e-6
+
+
+def _vec3(v, name: str) -> np.ndarray:
+    a = np.asarray(v, dtype=np.float64).reshape(-1)
+    if a.shape != (3,):
+        raise ValueError(f"{name} must be a (z, y, x) triple")
+    return a
+
+
+def _unit(v, name: str) -> np.ndarray:
+    a = _vec3(v, name)
+    n = float(np.linalg.norm(a))
+    if n <= 0.0:
+        raise ValueError(f"{name} must be non-zero")
+    return a / n
+
+
+def _voxel_centers(roi: ROIBox) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # broadcastable (Z,1,1), (1,Y,1), (1,1,X) voxel-center coordinates
+    z = (np.arange(roi.z0, roi.z1, dtype=np.float64) + 0.5)[:, None, None]
+    y = (np.arange(roi.y0, roi.y1, dtype=np.float64) + 0.5)[None, :, None]
+    x = (np.arange(roi.x0, roi.x1, dtype=np.float64) + 0.5)[None, None, :]
+    return z, y, x
+
+
+def _box_dist2(p: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    # squared distance from points p (..., 3) to boxes [lo, hi] (..., 3)
+    d = p - np.clip(p, lo, hi)
+    return np.einsum("...i,...i->...", d, d)
+
+
+class ROIShape:
+    """
+    Base class of non-box ROIs (Sphere, Capsule, OrientedBox, Frustum).
+
+    Subclasses implement extent(), scaled(), contains() and
+    intersects_boxes(); bbox(), tile_mask() and voxel_mask() build on them.
+    Anywhere World accepts an ROIBox it also accepts a shape: the shape's
+    bbox() becomes the packet ROI and only tiles the shape touches are read.
+    """
+
+    def extent(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Continuous (lo, hi) float64 (3,) corners of the shape's bounding box.
+        """
+        raise NotImplementedError
+
+    def scaled(self, s: float) -> "ROIShape":
+        """
+        Same shape with every coordinate and length multiplied by s
+        (level-0 -> LOD level k is s = 1 / 2**k).
+        """
+        raise NotImplementedError
+
+    def contains(self, z, y, x) -> np.ndarray:
+        """
+        Bool array: which points (broadcastable z, y, x arrays) are inside.
+        """
+        raise NotImplementedError
+
+    def intersects_boxes(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """
+        Bool (N,): which closed axis-aligned boxes [lo[i], hi[i]] intersect
+        the shape (exact up to float rounding, never a false negative).
+        """
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return type(self).__name__.lower()
+
+    def bbox(self) -> ROIBox:
+        """
+        Smallest voxel box holding every voxel whose center is inside.
+        """
+        lo, hi = self.extent()
+        a = np.ceil(lo - 0.5 - _EPS).astype(np.int64)
+        b = np.floor(hi - 0.5 + _EPS).astype(np.int64) + 1
+        b = np.maximum(a, b)
+        return ROIBox(z0=int(a[0]), z1=int(b[0]), y0=int(a[1]), y1=int(b[1]), x0=int(a[2]), x1=int(b[2]))
+
+    def tile_mask(
+        self,
+        tz: range,
+        ty: range,
+        tx: range,
+        tile_shape_zyx: Tuple[int, int, int],
+        vol_shape_zyx: Tuple[int, int, int],
+    ) -> np.ndarray:
+        """
+        Bool (len(tz), len(ty), len(tx)) over a tile-coordinate box: True
+        where the tile holds at least one voxel center that may lie inside.
+        One vectorized test for the whole box; ragged edge tiles are clipped
+        to the volume.
+        """
+        sz, sy, sx = tile_shape_zyx
+        Z, Y, X = vol_shape_zyx
+        axes = []
+        for r, s, n in ((tz, sz, Z), (ty, sy, Y), (tx, sx, X)):
+            t = np.arange(r.start, r.stop, dtype=np.float64)
+            lo = t * s + 0.5
+            hi = np.minimum((t + 1) * s, n) - 0.5
+            axes.append((lo, hi))
+        (zl, zh), (yl, yh), (xl, xh) = axes
+        shape = (len(zl), len(yl), len(xl))
+        lo = np.stack(np.meshgrid(zl, yl, xl, indexing="ij"), axis=-1).reshape(-1, 3)
+        hi = np.stack(np.meshgrid(zh, yh, xh, indexing="ij"), axis=-1).reshape(-1, 3)
+        hit = self.intersects_boxes(lo, hi) & np.all(hi >= lo, axis=1)
+        return hit.reshape(shape)
+
+    def voxel_mask(self, roi: ROIBox) -> np.ndarray:
+        """
+        Bool (roiZ, roiY, roiX): True where the voxel center is inside.
+        """
+        z, y, x = _voxel_centers(roi)
+        m = np.broadcast_to(self.contains(z, y, x), roi.shape_zyx)
+        return np.ascontiguousarray(m)
+
+
+@dataclass(frozen=True)
+class Sphere(ROIShape):
+    """
+    Ball of `radius` voxels around center_zyx.
+    """
+    center_zyx: Vec3
+    radius: float
+
+    def extent(self):
+        c = _vec3(self.center_zyx, "center_zyx")
+        r = float(self.radius)
+        return c - r, c + r
+
+    def scaled(self, s: float) -> "Sphere":
+        return Sphere(tuple(float(v) * s for v in self.center_zyx), float(self.radius) * s)
+
+    def contains(self, z, y, x):
+        cz, cy, cx = (float(v) for v in self.center_zyx)
+        return (z - cz) ** 2 + (y - cy) ** 2 + (x - cx) ** 2 <= float(self.radius) ** 2
+
+    def intersects_boxes(self, lo, hi):
+        c = _vec3(self.center_zyx, "center_zyx")
+        return _box_dist2(c, lo, hi) <= float(self.radius) ** 2 + _EPS
+
+
+@dataclass(frozen=True)
+class Capsule(ROIShape):
+    """
+    Points within `radius` voxels of the segment p0_zyx -> p1_zyx (a swept
+    sphere, e.g. a robot link or a planned path segment).
+    """
+    p0_zyx: Vec3
+    p1_zyx: Vec3
+    radius: float
+
+    # golden-section steps for the segment/box distance (interval shrinks
+    # by 0.618 per step, 60 steps -> ~3e-13 of the segment length)
+    _STEPS = 60
+
+    def extent(self):
+        p0, p1 = _vec3(self.p0_zyx, "p0_zyx"), _vec3(self.p1_zyx, "p1_zyx")
+        r = float(self.radius)
+        return np.minimum(p0, p1) - r, np.maximum(p0, p1) + r
+
+    def scaled(self, s: float) -> "Capsule":
+        return Capsule(
+            tuple(float(v) * s for v in self.p0_zyx),
+            tuple(float(v) * s for v in self.p1_zyx),
+            float(self.radius) * s,
+        )
+
+    def contains(self, z, y, x):
+        p0, p1 = _vec3(self.p0_zyx, "p0_zyx"), _vec3(self.p1_zyx, "p1_zyx")
+        u = p1 - p0
+        L2 = float(u @ u)
+        dz, dy, dx = z - p0[0], y - p0[1], x - p0[2]
+        if L2 > 0.0:
+            t = np.clip((dz * u[0] + dy * u[1] + dx * u[2]) / L2, 0.0, 1.0)
+            dz, dy, dx = dz - t * u[0], dy - t * u[1], dx - t * u[2]
+        return dz * dz + dy * dy + dx * dx <= float(self.radius) ** 2
+
+    def intersects_boxes(self, lo, hi):
+        # dist^2(p0 + t*u, box) is convex in t, so a golden-section search
+        # over t in [0, 1] finds the segment/box distance for all boxes at once
+        p0, p1 = _vec3(self.p0_zyx, "p0_zyx"), _vec3(self.p1_zyx, "p1_zyx")
+        u = p1 - p0
+        n = lo.shape[0]
+
+        def f(t):
+            return _box_dist2(p0 + t[:, None] * u, lo, hi)
+
+        g = (math.sqrt(5.0) - 1.0) / 2.0
+        a, b = np.zeros(n), np.ones(n)
+        c, d = b - g * (b - a), a + g * (b - a)
+        fc, fd = f(c), f(d)
+        for _ in range(self._STEPS):
+            left = fc < fd
+            b = np.where(left, d, b)
+            a = np.where(left, a, c)
+            c, d = b - g * (b - a), a + g * (b - a)
+            fc, fd = f(c), f(d)
+        best = np.minimum(np.minimum(fc, fd), np.minimum(f(np.zeros(n)), f(np.ones(n))))
+        r = float(self.radius)
+        return best <= r * r + _EPS * max(1.0, r * r)
+
+
+# Corner order shared by OrientedBox and Frustum: corner 4*i + 2*j + k sits
+# at the i/j/k end (0 or 1) of the hexahedron's three local axes.
+_HEX_FACES = (
+    (0, 1, 3, 2), (4, 5, 7, 6),   # i = 0, i = 1
+    (0, 1, 5, 4), (2, 3, 7, 6),   # j = 0, j = 1
+    (0, 2, 6, 4), (1, 3, 7, 5),   # k = 0, k = 1
+)
+_HEX_EDGES = (
+    (0, 4), (1, 5), (2, 6), (3, 7),   # along i
+    (0, 2), (1, 3), (4, 6), (5, 7),   # along j
+    (0, 1), (2, 3), (4, 5), (6, 7),   # along k
+)
+_WORLD_AXES = np.eye(3)
+
+
+class _ConvexHexahedron(ROIShape):
+    """
+    Convex shape with 8 corners and 6 planar faces. Tile tests use the
+    separating axis theorem (face normals of both solids and all edge cross
+    products), which is exact for two convex polyhedra.
+    """
+
+    def corners(self) -> np.ndarray:
+        """
+        float64 (8, 3) corners in _HEX_FACES order.
+        """
+        raise NotImplementedError
+
+    def planes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Outward face normals (F, 3) and offsets (F,): inside is n.p <= d.
+        Faces collapsed to a point or a line (a frustum with near=0) are
+        skipped.
+        """
+        v = self.corners()
+        centroid = v.mean(axis=0)
+        normals, offsets = [], []
+        for a, b, c, d in _HEX_FACES:
+            n = np.cross(v[c] - v[a], v[d] - v[b])
+            norm = float(np.linalg.norm(n))
+            if norm <= _EPS:
+                continue
+            n = n / norm
+            off = float(n @ v[a])
+            if float(n @ centroid) > off:
+                n, off = -n, -off
+            normals.append(n)
+            offsets.append(off)
+        return np.array(normals), np.array(offsets)
+
+    def extent(self):
+        v = self.corners()
+        return v.min(axis=0), v.max(axis=0)
+
+    def contains(self, z, y, x):
+        normals, offsets = self.planes()
+        inside = True
+        for n, off in zip(normals, offsets):
+            inside = inside & (z * n[0] + y * n[1] + x * n[2] <= off + _EPS)
+        return inside
+
+    def _sat_axes(self) -> np.ndarray:
+        v = self.corners()
+        normals, _ = self.planes()
+        edges = np.array([v[b] - v[a] for a, b in _HEX_EDGES])
+        cross = np.cross(edges[:, None, :], _WORLD_AXES[None, :, :]).reshape(-1, 3)
+        axes = np.concatenate([_WORLD_AXES, normals, cross])
+        norm = np.linalg.norm(axes, axis=1)
+        return axes[norm > _EPS] / norm[norm > _EPS, None]
+
+    def intersects_boxes(self, lo, hi):
+        axes = self._sat_axes()                       # (A, 3)
+        proj = self.corners() @ axes.T                # (8, A)
+        pmin, pmax = proj.min(axis=0), proj.max(axis=0)
+        c = ((lo + hi) * 0.5) @ axes.T                # (N, A)
+        r = ((hi - lo) * 0.5) @ np.abs(axes).T
+        separated = (c + r < pmin - _EPS) | (c - r > pmax + _EPS)
+        return ~separated.any(axis=1)
+
+
+@dataclass(frozen=True)
+class OrientedBox(_ConvexHexahedron):
+    """
+    Box centered at center_zyx with half edge lengths half_extents along its
+    own axes. rotation is a 3x3 matrix whose columns are the box axes in
+    world (z, y, x) coordinates (orthonormal; identity = axis-aligned).
+    """
+    center_zyx: Vec3
+    half_extents: Vec3
+    rotation: Tuple[Vec3, Vec3, Vec3] = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+
+    def corners(self):
+        c = _vec3(self.center_zyx, "center_zyx")
+        h = _vec3(self.half_extents, "half_extents")
+        R = np.asarray(self.rotation, dtype=np.float64).reshape(3, 3)
+        sign = np.array([[i, j, k] for i in (-1, 1) for j in (-1, 1) for k in (-1, 1)], dtype=np.float64)
+        return c + (sign * h) @ R.T
+
+    def scaled(self, s: float) -> "OrientedBox":
+        return OrientedBox(
+            tuple(float(v) * s for v in self.center_zyx),
+            tuple(float(v) * s for v in self.half_extents),
+            self.rotation,
+        )
+
+
+@dataclass(frozen=True)
+class Frustum(_ConvexHexahedron):
+    """
+    Pinhole camera view volume between the near and far planes.
+
+    position_zyx is the camera center, forward_zyx the viewing direction and
+    up_zyx the image "up" hint (need not be orthogonal to forward). fov_y_deg
+    is the vertical field of view, aspect = width / height. Distances are in
+    voxels.
+    """
+    position_zyx: Vec3
+    forward_zyx: Vec3
+    up_zyx: Vec3
+    fov_y_deg: float
+    aspect: float
+    near: float
+    far: float
+
+    def __post_init__(self):
+        if not (0.0 < float(self.fov_y_deg) < 180.0):
+            raise ValueError("fov_y_deg must be in (0, 180)")
+        if float(self.aspect) <= 0.0:
+            raise ValueError("aspect must be > 0")
+        if not (0.0 <= float(self.near) < float(self.far)):
+            raise ValueError("need 0 <= near < far")
+
+    def corners(self):
+        p = _vec3(self.position_zyx, "position_zyx")
+        f = _unit(self.forward_zyx, "forward_zyx")
+        right = np.cross(f, _vec3(self.up_zyx, "up_zyx"))
+        if float(np.linalg.norm(right)) <= _EPS:
+            raise ValueError("up_zyx must not be parallel to forward_zyx")
+        right /= np.linalg.norm(right)
+        up = np.cross(right, f)
+        tan_h = math.tan(math.radians(float(self.fov_y_deg)) / 2.0)
+        out = np.empty((8, 3))
+        for i, dist in enumerate((float(self.near), float(self.far))):
+            h = dist * tan_h
+            w = h * float(self.aspect)
+            for j, sj in enumerate((-1.0, 1.0)):
+                for k, sk in enumerate((-1.0, 1.0)):
+                    out[4 * i + 2 * j + k] = p + f * dist + up * (sj * h) + right * (sk * w)
+        return out
+
+    def scaled(self, s: float) -> "Frustum":
+        return Frustum(
+            tuple(float(v) * s for v in self.position_zyx),
+            self.forward_zyx,
+            self.up_zyx,
+            self.fov_y_deg,
+            self.aspect,
+            float(self.near) * s,
+            float(self.far) * s,
+        )
+
+
+ROILike = Union[ROIBox, ROIShape]
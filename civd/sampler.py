@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import time as _time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from civd.codec import check_layout
+from civd.source import ObservationRequest, ROIBox
+from civd.tile_cache import FrameKey, TileCache, frame_key
+from civd.time_loader import resolve_tile_frame
+from civd.world import World, _roi_tcoord_ranges, _shape_zyxc_from_index, _tile_shape_from_index
+
+
+# tile_stats() dict -> (N,) non-negative tile weights
+WeightFn = Callable[[Dict[str, Any]], np.ndarray]
+
+_UNRESOLVED = object()
+
+
+@dataclass
+class SampleBatch:
+    """
+    One batch of crops: the requests (in read order) and their volumes
+    stacked as (B, Z, Y, X, C), or (B, C, Z, Y, X) for layout="czyx".
+    """
+    requests: List[ObservationRequest]
+    volume: np.ndarray
+    load_ms: float
+
+
+class ROISampler:
+    """
+    Random fixed-size training crops from a World, read in a tile-friendly
+    order.
+
+    sample(n) draws crops uniformly over the volume of a random time, or,
+    with weight="occupancy", around tiles picked in proportion to the tile
+    mean of `weight_channel` from the index stats (tile_stats(); nothing is
+    decoded), so mostly-empty space is rarely drawn. weight may also be a
+    callable mapping a tile_stats() dict to (N,) tile weights.
+
+    batches() yields SampleBatch objects. Every batch is an independent
+    draw; schedule() only changes the order inside it, so that crops sharing
+    tiles are read while those tiles are still in the world's tile_cache
+    (civd.tile_cache.TileCache, `cache_bytes`). With prefetch=True the next
+    batch is read in a background thread while the current one is consumed.
+
+    The sampler reads through world.tile_cache: `cache` (or a new
+    TileCache(cache_bytes) if the world has none) is installed there.
+    stats and samples_per_sec() report the effective throughput.
+    """
+
+    def __init__(
+        self,
+        world: Union[str, World],
+        size_zyx: Sequence[int],
+        *,
+        times: Optional[Sequence[str]] = None,
+        channels: Optional[Sequence[int]] = None,
+        batch_size: int = 32,
+        weight: Union[None, str, WeightFn] = None,
+        weight_channel: int = 0,
+        cache: Optional[TileCache] = None,
+        cache_bytes: int = 256 << 20,
+        reorder: bool = True,
+        prefetch: bool = True,
+        layout: str = "zyxc",
+        seed: Optional[int] = None,
+    ):
+        self.world = world if isinstance(world, World) else World.open(world)
+        self.size = tuple(int(v) for v in size_zyx)
+        if len(self.size) != 3 or min(self.size) <= 0:
+            raise ValueError(f"size_zyx must be three positive ints, got {tuple(size_zyx)!r}")
+        if not (weight is None or weight == "occupancy" or callable(weight)):
+            raise ValueError(f"weight must be None, 'occupancy' or a callable, got {weight!r}")
+
+        self.times = list(times) if times is not None else self.world.times()
+        if not self.times:
+            raise ValueError("world has no times to sample")
+        self.channels = None if channels is None else [int(c) for c in channels]
+        self.batch_size = max(1, int(batch_size))
+        self.weight = weight
+        self.weight_channel = int(weight_channel)
+        self.reorder = bool(reorder)
+        self.prefetch = bool(prefetch)
+        self.layout = check_layout(layout)
+
+        if cache is not None:
+            self.world.tile_cache = cache
+        elif self.world.tile_cache is None:
+            self.world.tile_cache = TileCache(cache_bytes)
+        self.cache: TileCache = self.world.tile_cache
+
+        self.source = self.world.as_observation_source()
+        self._rng = np.random.default_rng(seed)
+        self._infos: Dict[str, Dict[str, Any]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.stats = {"batches": 0, "samples": 0, "seconds": 0.0, "load_s": 0.0, "wait_s": 0.0}
+
+    # ---- per-time metadata ----
+
+    def _info(self, time_name: str) -> Dict[str, Any]:
+        info = self._infos.get(time_name)
+        if info is not None:
+            return info
+        idx = self.world.load_time_index(time_name)
+        Z, Y, X, C = _shape_zyxc_from_index(idx)
+        if any(s > d for s, d in zip(self.size, (Z, Y, X))):
+            raise ValueError(f"crop {self.size} does not fit the {time_name} volume {(Z, Y, X)}")
+        tile_shape = _tile_shape_from_index(idx)
+        info = {
+            "idx": idx,
+            "shape": (Z, Y, X),
+            "channels": C,
+            "tile_shape": tile_shape,
+            "tile_nbytes": int(np.prod(tile_shape)) * C * 4,
+            "keys": {},
+            "cdf": None,
+        }
+        if self.weight is not None:
+            st = self.world.tile_stats(time_name)
+            w = self._tile_weights(st)
+            if w.sum() > 0:
+                info["cdf"] = np.cumsum(w)
+                info["bounds"] = st["bounds"]
+        self._infos[time_name] = info
+        return info
+
+    def _tile_weights(self, st: Dict[str, Any]) -> np.ndarray:
+        n = len(st["bounds"])
+        if callable(self.weight):
+            w = np.asarray(self.weight(st), dtype=np.float64).reshape(-1)
+            if w.shape != (n,):
+                raise ValueError(f"weight function returned {w.shape[0]} weights for {n} tiles")
+        else:
+            w = st["mean"][:, self.weight_channel].astype(np.float64) if n else np.zeros((0,))
+            # tiles built without stats count as average ones
+            if np.isnan(w).all():
+                w = np.ones((n,))
+            else:
+                w = np.where(np.isnan(w), np.nanmean(w), w)
+        return np.clip(np.nan_to_num(w), 0.0, None)
+
+    def sample_shape(self) -> Tuple[int, ...]:
+        """
+        Shape of one crop volume: (Z, Y, X, C), or (C, Z, Y, X) for "czyx".
+        """
+        C = len(self.channels) if self.channels is not None else self._info(self.times[0])["channels"]
+        return (C,) + self.size if self.layout == "czyx" else self.size + (C,)
+
+    # ---- sampling ----
+
+    def sample(self, n: Optional[int] = None) -> List[ObservationRequest]:
+        """
+        `n` random crops (batch_size by default), in draw order.
+        """
+        n = self.batch_size if n is None else int(n)
+        picks = self._rng.integers(len(self.times), size=n)
+        return [self._draw(self.times[int(i)]) for i in picks]
+
+    def _draw(self, time_name: str) -> ObservationRequest:
+        info = self._info(time_name)
+        hi = [d - s for d, s in zip(info["shape"], self.size)]
+        rng = self._rng
+        if info["cdf"] is None:
+            o = [int(rng.integers(h + 1)) for h in hi]
+        else:
+            cdf = info["cdf"]
+            k = int(np.searchsorted(cdf, rng.random() * cdf[-1], side="right"))
+            b = info["bounds"][min(k, len(cdf) - 1)]
+            # a voxel of the picked tile, placed anywhere inside the crop
+            o = []
+            for a in range(3):
+                v = int(rng.integers(b[2 * a], min(int(b[2 * a + 1]), info["shape"][a])))
+                o.append(int(np.clip(v - int(rng.integers(self.size[a])), 0, hi[a])))
+        roi = ROIBox(o[0], o[0] + self.size[0], o[1], o[1] + self.size[1], o[2], o[2] + self.size[2])
+        return ObservationRequest(time_name, roi, channels=self.channels, layout=self.layout)
+
+    # ---- scheduling ----
+
+    def tile_keys(self, req: ObservationRequest) -> FrozenSet[FrameKey]:
+        """
+        Frames a crop reads (civd.tile_cache.frame_key), so crops of
+        different times that share payloads through refs share keys.
+        """
+        info = self._info(req.time_name)
+        tmap = self.world.tile_map(req.time_name)
+        keys = set()
+        for s in tmap.query_box(*_roi_tcoord_ranges(req.roi, info["tile_shape"])):
+            s = int(s)
+            k = info["keys"].get(s, _UNRESOLVED)
+            if k is _UNRESOLVED:
+                k = frame_key(resolve_tile_frame(tmap.entries[s], info["idx"], self.world.storage))
+                info["keys"][s] = k
+            if k is not None:
+                keys.add(k)
+        return frozenset(keys)
+
+    def _locality(self, req: ObservationRequest) -> Tuple[int, ...]:
+        tz, ty, tx = self._info(req.time_name)["tile_shape"]
+        r = req.roi
+        return (self.times.index(req.time_name), r.z0 // tz, r.y0 // ty, r.x0 // tx)
+
+    def schedule(self, reqs: Sequence[ObservationRequest]) -> List[ObservationRequest]:
+        """
+        Reorder crops for tile reuse under the cache budget.
+
+        Greedy: starting from what the tile cache holds now, always read
+        next the crop with the most tiles still cached, simulating the LRU
+        (capacity = cache budget / tile size) as crops are read. Ties go to
+        the (time, tile coordinate) order, which keeps neighbours together.
+        """
+        reqs = sorted(reqs, key=self._locality)
+        if len(reqs) < 3:
+            return reqs
+        keys = [self.tile_keys(r) for r in reqs]
+        cap = self.cache.capacity_tiles(max(i["tile_nbytes"] for i in self._infos.values()))
+        lru: "OrderedDict[Any, None]" = OrderedDict.fromkeys(self.cache.keys())
+
+        todo = list(range(len(reqs)))
+        order: List[ObservationRequest] = []
+        while todo:
+            j = max(range(len(todo)), key=lambda j: sum(1 for k in keys[todo[j]] if k in lru))
+            i = todo.pop(j)
+            order.append(reqs[i])
+            for k in keys[i]:
+                lru[k] = None
+                lru.move_to_end(k)
+            while len(lru) > cap:
+                lru.popitem(last=False)
+        return order
+
+    # ---- reading ----
+
+    def load(self, reqs: Sequence[ObservationRequest]) -> SampleBatch:
+        """
+        Read crops, in the given order, into one stacked array.
+        """
+        t0 = _time.perf_counter()
+        vol = np.empty((len(reqs),) + self.sample_shape(), dtype=np.float32)
+        for i, req in enumerate(reqs):
+            self.source.observe(req, out=vol[i])
+        return SampleBatch(list(reqs), vol, (_time.perf_counter() - t0) * 1000.0)
+
+    def _plan(self) -> List[ObservationRequest]:
+        reqs = self.sample()
+        return self.schedule(reqs) if self.reorder else reqs
+
+    def _submit(self, reqs: List[ObservationRequest]) -> "Future[SampleBatch]":
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="civd-sampler")
+        return self._pool.submit(self.load, reqs)
+
+    def batches(self, n_batches: Optional[int] = None) -> Iterator[SampleBatch]:
+        """
+        Yield `n_batches` batches (endlessly if None).
+        """
+        t_start = _time.perf_counter()
+        seconds0 = self.stats["seconds"]
+        pending: Optional[Future] = None
+        reqs = self._plan()
+        if self.prefetch:
+            pending = self._submit(reqs)
+        i = 0
+        try:
+            while n_batches is None or i < n_batches:
+                t0 = _time.perf_counter()
+                batch = pending.result() if pending is not None else self.load(reqs)
+                self.stats["wait_s"] += _time.perf_counter() - t0
+                self.stats["load_s"] += batch.load_ms / 1000.0
+                i += 1
+                pending = None
+                if n_batches is None or i < n_batches:
+                    reqs = self._plan()
+                    if self.prefetch:
+                        pending = self._submit(reqs)
+                self.stats["batches"] += 1
+                self.stats["samples"] += len(batch.requests)
+                self.stats["seconds"] = seconds0 + (_time.perf_counter() - t_start)
+                yield batch
+        finally:
+            if pending is not None:
+                pending.cancel()
+            self.stats["seconds"] = seconds0 + (_time.perf_counter() - t_start)
+
+    def samples_per_sec(self) -> float:
+        """
+        Effective throughput of batches() so far, consumer time included.
+        """
+        return self.stats["samples"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __iter__(self) -> Iterator[SampleBatch]:
+        return self.batches()
+
+    def __enter__(self) -> "ROISampler":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List
 
+from civd.tile_stats import validate_entry_stats
+
 
 SCHEMA_INDEX_V1 = "civd.index.v1"
 
@@ -50,6 +52,14 @@ def _as_int_list6(bounds: Any) -> List[int]:
 
     raise SchemaError(f"bounds_zyx not normalizable to 6-int list: got {type(bounds)} -> {bounds}")
 
+def infer_tile_shape_from_bounds(bounds6: List[int]) -> List[int]:
+    z0, z1, y0, y1, x0, x1 = bounds6
+    shape = [int(z1 - z0), int(y1 - y0), int(x1 - x0)]
+    if min(shape) <= 0:
+        raise SchemaError(f"invalid tile shape inferred from bounds: {bounds6}")
+    return shape
+
+
 def infer_tile_size_from_bounds(bounds6: List[int]) -> int:
     z0, z1, *_ = bounds6
     ts = int(z1 - z0)
@@ -58,12 +68,94 @@ def infer_tile_size_from_bounds(bounds6: List[int]) -> int:
     return ts
 
 
+def tile_shape_from_grid(grid: Dict[str, Any]) -> List[int]:
+    """
+    [tile_z, tile_y, tile_x] from grid.tile_shape_zyx (anisotropic) or grid.tile_size (cubic).
+    """
+    if "tile_shape_zyx" in grid:
+        ts = grid["tile_shape_zyx"]
+        if not (isinstance(ts, (list, tuple)) and len(ts) == 3):
+            raise SchemaError("[index.grid] tile_shape_zyx must be [tile_z, tile_y, tile_x]")
+        shape = [int(v) for v in ts]
+        if "tile_size" in grid and shape != [int(grid["tile_size"])] * 3:
+            raise SchemaError("[index.grid] tile_size disagrees with tile_shape_zyx")
+    else:
+        shape = [int(_require(grid, "tile_size", "index.grid"))] * 3
+    if min(shape) <= 0:
+        raise SchemaError("[index.grid] tile_size must be > 0")
+    return shape
+
+
+def _check_tile_bounds(b6: List[int], tile_shape: List[int], vol_zyx: tuple, ctx: str) -> None:
+    """
+    Every tile spans exactly the grid tile shape, except ragged edge tiles,
+    which are shorter and end at the volume boundary.
+    """
+    for axis, name in enumerate("zyx"):
+        lo, hi = b6[2 * axis], b6[2 * axis + 1]
+        extent = hi - lo
+        nominal = tile_shape[axis]
+        if extent == nominal:
+            continue
+        if 0 < extent < nominal and hi == int(vol_zyx[axis]):
+            continue
+        raise SchemaError(
+            f"[{ctx}] bounds_zyx tile size mismatch on {name}: expected {nominal} "
+            f"(or a ragged edge ending at {vol_zyx[axis]}), got {b6}"
+        )
+
+
+def _check_tile_entries(
+    tiles: List[Any], tile_shape: List[int], vol_zyx: tuple, channels: int, layout: Any, ctx: str
+) -> None:
+    """
+    Per-entry checks shared by the level-0 tiles and every LOD level's.
+    """
+    for i, e in enumerate(tiles):
+        if not isinstance(e, dict):
+            raise SchemaError(f"[{ctx}.tiles[{i}]] entry must be an object")
+
+        tid = _require(e, "tile_id", f"{ctx}.tiles[{i}]")
+        if not isinstance(tid, str) or not tid:
+            raise SchemaError(f"[{ctx}.tiles[{i}]] tile_id must be a non-empty string")
+
+        b6 = _as_int_list6(_require(e, "bounds_zyx", f"{ctx}.tiles[{i}]"))
+        _check_tile_bounds(b6, tile_shape, vol_zyx, f"{ctx}.tiles[{i}]")
+
+        # storage fields: either local (offset/length), ref, or a brick-map tombstone
+        if e.get("empty"):
+            if layout != "brickmap":
+                raise SchemaError(f"[{ctx}.tiles[{i}]] empty tombstones require grid.layout='brickmap'")
+        elif "ref" in e:
+            ref = e["ref"]
+            if not isinstance(ref, dict):
+                raise SchemaError(f"[{ctx}.tiles[{i}]] ref must be an object")
+
+            if "time" in ref:
+                if not isinstance(ref["time"], str) or not ref["time"]:
+                    raise SchemaError(f"[{ctx}.tiles[{i}].ref] time must be a non-empty string if present")
+
+            _require(ref, "offset", f"{ctx}.tiles[{i}].ref")
+            _require(ref, "length", f"{ctx}.tiles[{i}].ref")
+        else:
+            _require(e, "offset", f"{ctx}.tiles[{i}]")
+            _require(e, "length", f"{ctx}.tiles[{i}]")
+
+        # optional per-tile value statistics (civd.tile_stats)
+        if "stats" in e:
+            errs = validate_entry_stats(e["stats"], channels, f"[{ctx}.tiles[{i}]]")
+            if errs:
+                raise SchemaError(errs[0])
+
+
 def verify_index_v1(idx: Dict[str, Any]) -> Dict[str, Any]:
     """
     Validate an index.json matches civd.index.v1.
     Notes:
       - bounds_zyx must be the 6-int list form in v1.
       - ref.time is OPTIONAL in v1 (back-compat). If present, must be a non-empty string.
+      - grid carries tile_size (cubic) and/or tile_shape_zyx (anisotropic);
+        ragged edge tiles may be shorter than the tile shape.
     """
     schema_version = _require(idx, "schema_version", "index")
     if schema_version != SCHEMA_INDEX_V1:
@@ -83,9 +175,7 @@ def verify_index_v1(idx: Dict[str, Any]) -> Dict[str, Any]:
     grid = _require(idx, "grid", "index")
     if not isinstance(grid, dict):
         raise SchemaError("[index] grid must be an object")
-    tile_size = int(_require(grid, "tile_size", "index.grid"))
-    if tile_size <= 0:
-        raise SchemaError("[index.grid] tile_size must be > 0")
+    tile_shape = tile_shape_from_grid(grid)
 
     pack = _require(idx, "pack", "index")
     if not isinstance(pack, dict):
@@ -95,37 +185,39 @@ def verify_index_v1(idx: Dict[str, Any]) -> Dict[str, Any]:
         raise SchemaError("[index.pack] path must be a non-empty string")
 
     tiles = _require(idx, "tiles", "index")
-    if not isinstance(tiles, list) or len(tiles) == 0:
+    if not isinstance(tiles, list) or (len(tiles) == 0 and grid.get("layout") != "brickmap"):
+        # brick-map (sparse) indices may legitimately list no occupied tiles
         raise SchemaError("[index] tiles must be a non-empty list")
 
-    for i, e in enumerate(tiles):
-        if not isinstance(e, dict):
-            raise SchemaError(f"[index.tiles[{i}]] entry must be an object")
-
-        tid = _require(e, "tile_id", f"index.tiles[{i}]")
-        if not isinstance(tid, str) or not tid:
-            raise SchemaError(f"[index.tiles[{i}]] tile_id must be a non-empty string")
-
-        b6 = _as_int_list6(_require(e, "bounds_zyx", f"index.tiles[{i}]"))
-        if (b6[1] - b6[0]) != tile_size:
-            raise SchemaError(
-                f"[index.tiles[{i}]] bounds_zyx tile size mismatch: expected {tile_size}, got {b6}"
-            )
-
-        # storage fields: either local (offset/length) or ref
-        if "ref" in e:
-            ref = e["ref"]
-            if not isinstance(ref, dict):
-                raise SchemaError(f"[index.tiles[{i}]] ref must be an object")
-
-            if "time" in ref:
-                if not isinstance(ref["time"], str) or not ref["time"]:
-                    raise SchemaError(f"[index.tiles[{i}].ref] time must be a non-empty string if present")
-
-            _require(ref, "offset", f"index.tiles[{i}].ref")
-            _require(ref, "length", f"index.tiles[{i}].ref")
-        else:
-            _require(e, "offset", f"index.tiles[{i}]")
-            _require(e, "length", f"index.tiles[{i}]")
+    _check_tile_entries(tiles, tile_shape, (Z, Y, X), C, grid.get("layout"), "index")
+
+    # Optional LOD pyramid: each level is a sub-index with its own tiles
+    lod = idx.get("lod")
+    if lod is not None:
+        if not isinstance(lod, dict) or not isinstance(lod.get("levels"), list):
+            raise SchemaError("[index.lod] must be an object with a levels list")
+        for j, lv in enumerate(lod["levels"]):
+            ctx = f"index.lod.levels[{j}]"
+            if not isinstance(lv, dict):
+                raise SchemaError(f"[{ctx}] must be an object")
+            if int(_require(lv, "level", ctx)) <= 0:
+                raise SchemaError(f"[{ctx}] level must be >= 1")
+            lv_shape = _require(_require(lv, "volume", ctx), "shape_zyxc", f"{ctx}.volume")
+            if not (isinstance(lv_shape, list) and len(lv_shape) == 4) or min(int(v) for v in lv_shape) <= 0:
+                raise SchemaError(f"[{ctx}.volume] shape_zyxc must be positive [Z,Y,X,C]")
+            if int(lv_shape[3]) != C:
+                raise SchemaError(f"[{ctx}.volume] has {lv_shape[3]} channels, level 0 has {C}")
+            _require(_require(lv, "pack", ctx), "path", f"{ctx}.pack")
+            lv_tiles = _require(lv, "tiles", ctx)
+            if not isinstance(lv_tiles, list):
+                raise SchemaError(f"[{ctx}] tiles must be a list")
+            # a level without its own grid keeps the level-0 tile shape
+            lv_grid = lv.get("grid")
+            if lv_grid is not None and not isinstance(lv_grid, dict):
+                raise SchemaError(f"[{ctx}] grid must be an object")
+            has_shape = isinstance(lv_grid, dict) and ("tile_shape_zyx" in lv_grid or "tile_size" in lv_grid)
+            lv_tile_shape = tile_shape_from_grid(lv_grid) if has_shape else tile_shape
+            lv_vol = tuple(int(v) for v in lv_shape[:3])
+            _check_tile_entries(lv_tiles, lv_tile_shape, lv_vol, C, (lv_grid or grid).get("layout"), ctx)
 
     return idx
@@ -55,6 +55,9 @@ class VolumePacket:
 
     meta: Dict[str, Any] = field(default_factory=dict)
 
+    # exact (tile_z, tile_y, tile_x) for anisotropic grids; tile_size is the largest edge
+    tile_shape_zyx: Optional[Tuple[int, int, int]] = None
+
     @property
     def roi_shape_zyx(self) -> Tuple[int, int, int]:
         z, y, x, _c = self.shape_zyxc
@@ -65,6 +68,350 @@ class VolumePacket:
         return int(self.shape_zyxc[3])
 
 
+TILE_PACKET_SCHEMA_V1: SchemaName = "civd.tilepacket.v1"
+
+
+@dataclass
+class TilePacket:
+    """
+    Tile-aligned ROI packet: decoded tiles without stitching into an ROI array.
+
+    - tiles is ONE contiguous arena shaped (N, tz, ty, tx, C); tile i is tiles[i]
+      (a view). Ragged edge tiles and tiles cut by nothing are stored in the
+      top-left corner of their slot, the rest of the slot is padding.
+    - tile_bounds_zyx (N,6) int32: world bounds of each tile's valid data
+    - tile_coords_zyx (N,3) int32: tile grid coords
+    - tile_mask: bool over the ROI's tile grid (nTz, nTy, nTx), True where a tile
+      is included (delta mode leaves unchanged tiles False)
+    - dense() stitches the ROI (roiZ, roiY, roiX, C) lazily, only on demand
+    """
+
+    schema_version: SchemaName
+    time: str
+    mode: Mode
+
+    roi: ROIBox
+    shape_zyxc: Tuple[int, int, int, int]   # ROI shape, as in VolumePacket
+    tile_shape_zyx: Tuple[int, int, int]
+    channels: List[str]
+
+    tiles_total: int
+    tiles_included: int
+
+    bytes_read: int
+    decode_ms: float
+
+    tiles: np.ndarray
+    tile_bounds_zyx: np.ndarray
+    tile_coords_zyx: np.ndarray
+    tile_mask: np.ndarray
+    fill_value: float = 0.0
+
+    meta: Dict[str, Any] = field(default_factory=dict)
+    _dense: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def __len__(self) -> int:
+        return int(self.tiles.shape[0])
+
+    def tile(self, i: int) -> np.ndarray:
+        """
+        View of tile i cropped to its valid (non-padding) extent.
+        """
+        z0, z1, y0, y1, x0, x1 = (int(v) for v in self.tile_bounds_zyx[i])
+        return self.tiles[i, : z1 - z0, : y1 - y0, : x1 - x0, :]
+
+    def dense(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Materialize the ROI-local (roiZ, roiY, roiX, C) array (cached).
+        With out=, stitch into a caller-provided buffer instead (not cached).
+        """
+        if out is not None:
+            check_out_buffer(out, self.shape_zyxc)
+            fill_uncovered(out, self.roi, self.tile_shape_zyx, self.tile_mask, self.fill_value)
+            return stitch_tiles(self.tiles, self.tile_bounds_zyx, self.roi, self.shape_zyxc, out=out)
+        if self._dense is None:
+            self._dense = stitch_tiles(
+                self.tiles, self.tile_bounds_zyx, self.roi, self.shape_zyxc, fill_value=self.fill_value
+            )
+        return self._dense
+
+
+COMPRESSED_PACKET_SCHEMA_V1: SchemaName = "civd.compressedpacket.v1"
+
+
+@dataclass
+class CompressedPacket:
+    """
+    Tiles of an ROI as their stored compressed frames (World.read_compressed).
+
+    Nothing is decompressed: relays forward frames as-is and receivers decode
+    only the tiles they use (decode_tile / to_tile_packet).
+
+    - frames[i]: the tile's zstd frame (bytes), or None for a brick-map
+      tombstone (the tile reads as fill_value)
+    - codecs[i]: codec dict of the frame, e.g. {"name": "zstd", "level": 3}
+    - tile_shapes_zyxc (N,4) int32: decoded shape of each frame (ragged edge
+      tiles are smaller than tile_shape_zyx)
+    - tile_bounds_zyx (N,6) / tile_coords_zyx (N,3) int32, as in TilePacket
+    - all channels are always included (frames hold every channel)
+    """
+
+    schema_version: SchemaName
+    time: str
+    mode: Mode
+
+    roi: ROIBox
+    shape_zyxc: Tuple[int, int, int, int]
+    tile_shape_zyx: Tuple[int, int, int]
+    channels: List[str]
+
+    tiles_total: int
+    tiles_included: int
+    bytes_read: int
+    read_ms: float
+
+    frames: List[Optional[bytes]]
+    codecs: List[Dict[str, Any]]
+    tile_shapes_zyxc: np.ndarray
+    tile_bounds_zyx: np.ndarray
+    tile_coords_zyx: np.ndarray
+    tile_mask: np.ndarray
+    fill_value: float = 0.0
+
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @property
+    def compressed_nbytes(self) -> int:
+        return sum(len(f) for f in self.frames if f is not None)
+
+    def decode_tile(self, i: int) -> np.ndarray:
+        """
+        Decode tile i into a (tz,ty,tx,C) float32 array of its own shape.
+        """
+        from civd.codec import decompress_tile_into
+
+        shape = tuple(int(v) for v in self.tile_shapes_zyxc[i])
+        out = np.empty(shape, dtype=np.float32)
+        if self.frames[i] is None:
+            out.fill(self.fill_value)
+        else:
+            decompress_tile_into(self.frames[i], out, self.codecs[i])
+        return out
+
+    def to_tile_packet(self) -> "TilePacket":
+        """
+        Decode every frame into a TilePacket (same layout as World.query_tiles).
+        """
+        import time as _time
+
+        sz, sy, sx = self.tile_shape_zyx
+        C = int(self.shape_zyxc[3])
+        arena = np.empty((len(self), sz, sy, sx, C), dtype=np.float32)
+        t0 = _time.perf_counter()
+        for i in range(len(self)):
+            tz, ty, tx = (int(v) for v in self.tile_shapes_zyxc[i][:3])
+            slot = arena[i]
+            if (tz, ty, tx) != (sz, sy, sx):
+                slot.fill(self.fill_value)
+            slot[:tz, :ty, :tx] = self.decode_tile(i)
+        decode_ms = (_time.perf_counter() - t0) * 1000.0
+        return TilePacket(
+            schema_version=TILE_PACKET_SCHEMA_V1,
+            time=self.time,
+            mode=self.mode,
+            roi=self.roi,
+            shape_zyxc=self.shape_zyxc,
+            tile_shape_zyx=self.tile_shape_zyx,
+            channels=list(self.channels),
+            tiles_total=self.tiles_total,
+            tiles_included=self.tiles_included,
+            bytes_read=self.bytes_read,
+            decode_ms=float(decode_ms),
+            tiles=arena,
+            tile_bounds_zyx=self.tile_bounds_zyx,
+            tile_coords_zyx=self.tile_coords_zyx,
+            tile_mask=self.tile_mask,
+            fill_value=self.fill_value,
+            meta=dict(self.meta),
+        )
+
+
+SEQUENCE_PACKET_SCHEMA_V1: SchemaName = "civd.sequencepacket.v1"
+
+
+@dataclass
+class SequencePacket:
+    """
+    One ROI over a sequence of times (World.query_timerange).
+
+    - volume is ONE array shaped (T, roiZ, roiY, roiX, C), or
+      (T, C, roiZ, roiY, roiX) for layout "czyx"; volume[i] is times[i]
+    - frame_source (T,) int32: the first frame of the run of identical frames
+      frame i belongs to (i itself when it differs from frame i-1). With
+      repeat_frames=False only those source frames are written, and frame(i)
+      / frames() return views of them
+    - unique_payloads counts the tile frames decoded; tiles_included the tile
+      placements they were copied or broadcast into
+    """
+
+    schema_version: SchemaName
+    times: List[str]
+    roi: ROIBox
+    shape_zyxc: Tuple[int, int, int, int]   # per-frame ROI shape, as in VolumePacket
+    tile_size: int
+    channels: List[str]
+
+    tiles_total: int
+    tiles_included: int
+    unique_payloads: int
+
+    bytes_read: int
+    decode_ms: float
+
+    volume: np.ndarray
+    frame_source: np.ndarray
+
+    meta: Dict[str, Any] = field(default_factory=dict)
+    tile_shape_zyx: Optional[Tuple[int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def frame(self, i: int) -> np.ndarray:
+        """
+        Volume of frame i (a view; repeated frames share their source's view).
+        """
+        return self.volume[int(self.frame_source[i])]
+
+    def frames(self) -> List[np.ndarray]:
+        return [self.frame(i) for i in range(len(self.times))]
+
+
+FIND_RESULT_SCHEMA_V1: SchemaName = "civd.findresult.v1"
+
+
+@dataclass
+class FindResult:
+    """
+    Voxels of an ROI matching a value predicate (World.find).
+
+    - coords_zyx (N,3) int32 world voxel coords and values (N,) float32 of the
+      matches, sorted by tile then z,y,x (output "coords" or "both")
+    - tile_coords_zyx (M,3) / tile_bounds_zyx (M,6) int32 of tiles with at
+      least one match, and tile_masks (M, tz, ty, tx) bool in tile-local
+      coordinates, False outside the ROI (output "mask" or "both")
+    """
+
+    schema_version: SchemaName
+    time: str
+    roi: ROIBox
+    channel: int
+    predicate: str
+
+    tiles_total: int
+    tiles_candidates: int   # tiles decoded (or known to match) after stats pruning
+    tiles_pruned: int
+    tiles_matched: int
+
+    bytes_read: int
+    decode_ms: float
+
+    coords_zyx: Optional[np.ndarray] = None
+    values: Optional[np.ndarray] = None
+    tile_coords_zyx: Optional[np.ndarray] = None
+    tile_bounds_zyx: Optional[np.ndarray] = None
+    tile_masks: Optional[np.ndarray] = None
+
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def count(self) -> int:
+        if self.coords_zyx is not None:
+            return int(self.coords_zyx.shape[0])
+        return int(self.tile_masks.sum()) if self.tile_masks is not None else 0
+
+
+def check_out_buffer(out: np.ndarray, shape_zyxc: Tuple[int, int, int, int]) -> None:
+    """
+    Validate a caller-provided output buffer (out=) for an ROI decode.
+    """
+    if not isinstance(out, np.ndarray):
+        raise TypeError("out must be a numpy array")
+    if tuple(out.shape) != tuple(shape_zyxc):
+        raise ValueError(f"out has shape {tuple(out.shape)}, expected {tuple(shape_zyxc)}")
+    if out.dtype != np.float32:
+        raise ValueError(f"out must be float32, got {out.dtype}")
+    if not out.flags["WRITEABLE"]:
+        raise ValueError("out must be writeable")
+
+
+def fill_uncovered(
+    out: np.ndarray,
+    roi: ROIBox,
+    tile_shape_zyx: Tuple[int, int, int],
+    tile_mask: np.ndarray,
+    fill_value: float = 0.0,
+) -> np.ndarray:
+    """
+    Write fill_value into the ROI regions that no decoded tile will cover.
+
+    tile_mask is a bool grid over the ROI's tiles (True = tile will be written).
+    Fully covered ROIs are not touched at all; mostly uncovered ROIs get one
+    whole-buffer fill, which is cheaper than many small slab writes.
+    """
+    uncovered = ~np.asarray(tile_mask, dtype=bool)
+    if not uncovered.any():
+        return out
+    if uncovered.mean() > 0.5:
+        out.fill(fill_value)
+        return out
+
+    sz, sy, sx = tile_shape_zyx
+    tz0, ty0, tx0 = roi.z0 // sz, roi.y0 // sy, roi.x0 // sx
+    for i, j, k in np.argwhere(uncovered):
+        z0, z1 = max((tz0 + i) * sz, roi.z0), min((tz0 + i + 1) * sz, roi.z1)
+        y0, y1 = max((ty0 + j) * sy, roi.y0), min((ty0 + j + 1) * sy, roi.y1)
+        x0, x1 = max((tx0 + k) * sx, roi.x0), min((tx0 + k + 1) * sx, roi.x1)
+        out[z0 - roi.z0:z1 - roi.z0, y0 - roi.y0:y1 - roi.y0, x0 - roi.x0:x1 - roi.x0, :] = fill_value
+    return out
+
+
+def stitch_tiles(
+    tiles: np.ndarray,
+    tile_bounds_zyx: np.ndarray,
+    roi: ROIBox,
+    shape_zyxc: Tuple[int, int, int, int],
+    *,
+    fill_value: float = 0.0,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Copy tile-aligned data into an ROI-local (roiZ, roiY, roiX, C) array.
+    Tile voxels outside the ROI are ignored; ROI voxels no tile covers keep
+    fill_value (or, with out=, whatever the buffer already holds).
+    """
+    if out is None:
+        out = np.full(shape_zyxc, fill_value, dtype=tiles.dtype)
+
+    for tile, b in zip(tiles, tile_bounds_zyx):
+        z0, z1, y0, y1, x0, x1 = (int(v) for v in b)
+
+        iz0, iz1 = max(z0, roi.z0), min(z1, roi.z1)
+        iy0, iy1 = max(y0, roi.y0), min(y1, roi.y1)
+        ix0, ix1 = max(x0, roi.x0), min(x1, roi.x1)
+        if iz0 >= iz1 or iy0 >= iy1 or ix0 >= ix1:
+            continue
+
+        out[iz0 - roi.z0:iz1 - roi.z0, iy0 - roi.y0:iy1 - roi.y0, ix0 - roi.x0:ix1 - roi.x0, :] = tile[
+            iz0 - z0:iz1 - z0, iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0, :
+        ]
+
+    return out
+
+
 @dataclass(frozen=True)
 class ObservationRequest:
     """
@@ -74,6 +421,7 @@ class ObservationRequest:
     roi: ROIBox
     channels: Optional[Sequence[int]] = None
     mode: Mode = "full"
+    layout: str = "zyxc"  # "czyx": channels-first volume (World.query layout=)
 
 
 class ObservationSource(Protocol):
@@ -92,10 +440,23 @@ class CivdObservationSource:
     def __init__(self, world: Any):
         self._world = world
 
-    def observe(self, req: ObservationRequest) -> VolumePacket:
+    def observe(self, req: ObservationRequest, out: Optional[np.ndarray] = None) -> VolumePacket:
         return self._world.query(
             time_name=req.time_name,
             roi=req.roi,
             channels=req.channels,
             mode=req.mode,
+            out=out,
+            layout=req.layout,
+        )
+
+    def observe_tiles(self, req: ObservationRequest) -> TilePacket:
+        """
+        Tile-aligned variant of observe(): no stitching into an ROI array.
+        """
+        return self._world.query_tiles(
+            time_name=req.time_name,
+            roi=req.roi,
+            channels=req.channels,
+            mode=req.mode,
         )
@@ -0,0 +1,540 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+# (path, offset, length) of one byte range
+ReadRequest = Tuple[str, int, int]
+
+
+@lru_cache(maxsize=4096)
+def normalize_path(path: str) -> str:
+    """
+    Canonical storage key of a path written into an index: forward slashes
+    (shipped indices carry Windows separators, e.g.
+    "data/civd_time/t001\\\\tiles.zstpack"), no "." segments or leading "./".
+    Cached, so each distinct index path is normalized once.
+    """
+    p = posixpath.normpath(str(path).replace("\\", "/"))
+    return "" if p == "." else p
+
+
+def _coalesce(reqs: Sequence[ReadRequest], gap: int) -> List[Tuple[str, int, int, List[int]]]:
+    """
+    Merge requests on the same path whose ranges are at most `gap` bytes
+    apart. Returns (path, offset, length, [request positions]) spans.
+    """
+    order = sorted(range(len(reqs)), key=lambda i: (reqs[i][0], reqs[i][1]))
+    spans: List[Tuple[str, int, int, List[int]]] = []
+    for i in order:
+        path, off, n = reqs[i]
+        if spans:
+            p, s0, sn, members = spans[-1]
+            if p == path and off <= s0 + sn + gap:
+                spans[-1] = (p, s0, max(sn, off + n - s0), members + [i])
+                continue
+        spans.append((path, off, n, [i]))
+    return spans
+
+
+class Storage:
+    """
+    Where pack and index bytes come from. Every CIVD reader goes through a
+    Storage, so the I/O strategy is chosen per deployment without touching
+    World: pass one to World.open(..., storage=) or install a process-wide
+    default with set_storage().
+
+    Paths are index paths (normalized with normalize_path). Backends
+    implement read(); read_many() batches the reads of one query and, by
+    default, merges ranges closer than `coalesce_gap` bytes into one read.
+    """
+
+    coalesce_gap: int = 0
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        raise NotImplementedError
+
+    def read_all(self, path: str) -> bytes:
+        return self.read(path, 0, self.size(path))
+
+    def size(self, path: str) -> int:
+        raise NotImplementedError
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.size(path)
+            return True
+        except (FileNotFoundError, KeyError):
+            return False
+
+    def listdir(self, path: str) -> List[str]:
+        raise NotImplementedError
+
+    def read_many(self, reqs: Sequence[ReadRequest]) -> List[bytes]:
+        out: List[bytes] = [b""] * len(reqs)
+        for path, off, n, members in _coalesce(reqs, self.coalesce_gap):
+            if len(members) == 1:
+                out[members[0]] = self.read(path, off, n)
+                continue
+            buf = memoryview(self.read(path, off, n))
+            for i in members:
+                o = reqs[i][1] - off
+                out[i] = bytes(buf[o:o + reqs[i][2]])
+        return out
+
+    def read_json(self, path: str) -> Dict[str, Any]:
+        return json.loads(self.read_all(path).decode("utf-8"))
+
+    def prepare(self, path: str) -> None:
+        """
+        Get `path` ready for reads (open a handle, map the file) ahead of the
+        first query; World.warm() calls it for every pack. Default: nothing.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Storage":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class _KeyedStorage(Storage):
+    """
+    Storage over a flat {normalized path: member} namespace.
+    """
+
+    def _names(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def listdir(self, path: str) -> List[str]:
+        base = normalize_path(path)
+        prefix = base + "/" if base else ""
+        out = set()
+        for name in self._names():
+            if name.startswith(prefix):
+                out.add(name[len(prefix):].split("/", 1)[0])
+        if not out:
+            raise FileNotFoundError(path)
+        return sorted(out)
+
+
+class _Handle:
+    """
+    An open file shared by concurrent readers: closed once it has been
+    retired (evicted or storage closed) and its last reader has released it.
+    Both transitions happen under the owning storage's lock.
+    """
+
+    __slots__ = ("f", "refs", "retired", "seek_lock")
+
+    def __init__(self, f: Any):
+        self.f = f
+        self.refs = 0
+        self.retired = False
+        self.seek_lock = threading.Lock()
+
+    def retire(self) -> None:
+        self.retired = True
+        if self.refs == 0:
+            self.f.close()
+
+
+class LocalStorage(Storage):
+    """
+    Plain files under `root` (relative index paths resolve against it).
+
+    File handles stay open and reads use positional I/O (os.pread where
+    available), so concurrent readers need no seek lock. Ranges of one
+    query closer than `coalesce_gap` bytes are read with a single call.
+    """
+
+    def __init__(self, root: str = ".", *, coalesce_gap: int = 64 << 10, max_open: int = 64):
+        self.root = root
+        self.coalesce_gap = int(coalesce_gap)
+        self.max_open = int(max_open)
+        self._files: "OrderedDict[str, _Handle]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fs(self, path: str) -> str:
+        p = normalize_path(path)
+        return p if os.path.isabs(p) or self.root in ("", ".") else os.path.join(self.root, p)
+
+    def _acquire(self, path: str) -> "_Handle":
+        # keyed by absolute path: relative index paths follow the working directory
+        key = os.path.abspath(self._fs(path))
+        with self._lock:
+            h = self._files.get(key)
+            if h is None:
+                h = _Handle(open(key, "rb"))
+                self._files[key] = h
+                while len(self._files) > self.max_open:
+                    self._files.popitem(last=False)[1].retire()
+            else:
+                self._files.move_to_end(key)
+            h.refs += 1
+            return h
+
+    def _release(self, h: "_Handle") -> None:
+        with self._lock:
+            h.refs -= 1
+            if h.retired and h.refs == 0:
+                h.f.close()
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        # the handle stays open until this read releases it, even if another
+        # thread evicts it from the open-file LRU meanwhile
+        h = self._acquire(path)
+        try:
+            if hasattr(os, "pread"):
+                return os.pread(h.f.fileno(), int(length), int(offset))
+            with h.seek_lock:
+                h.f.seek(int(offset))
+                return h.f.read(int(length))
+        finally:
+            self._release(h)
+
+    def read_all(self, path: str) -> bytes:
+        with open(self._fs(path), "rb") as f:
+            return f.read()
+
+    def prepare(self, path: str) -> None:
+        self._release(self._acquire(path))
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(self._fs(path))
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(self._fs(path))
+
+    def listdir(self, path: str) -> List[str]:
+        return sorted(os.listdir(self._fs(path) or "."))
+
+    def close(self) -> None:
+        with self._lock:
+            for h in self._files.values():
+                h.retire()
+            self._files.clear()
+
+
+class MmapStorage(LocalStorage):
+    """
+    Files under `root`, each mapped once; reads are slices of the mapping
+    (the page cache does the read-ahead), so there is nothing to coalesce.
+    """
+
+    def __init__(self, root: str = ".", *, max_open: int = 64):
+        super().__init__(root, coalesce_gap=0, max_open=max_open)
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def _map(self, path: str) -> mmap.mmap:
+        key = os.path.abspath(self._fs(path))
+        m = self._maps.get(key)
+        if m is None:
+            with self._lock:
+                m = self._maps.get(key)
+                if m is None:
+                    with open(key, "rb") as f:
+                        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._maps[key] = m
+        return m
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        return self._map(path)[int(offset):int(offset) + int(length)]
+
+    def read_many(self, reqs: Sequence[ReadRequest]) -> List[bytes]:
+        return [self.read(p, o, n) for p, o, n in reqs]
+
+    def prepare(self, path: str) -> None:
+        self._map(path)
+
+    def close(self) -> None:
+        super().close()
+        for m in self._maps.values():
+            m.close()
+        self._maps.clear()
+
+
+class MemoryStorage(_KeyedStorage):
+    """
+    Files held in memory ({path: bytes}); from_dir() loads a world tree.
+    """
+
+    def __init__(self, files: Optional[Mapping[str, bytes]] = None):
+        self.files: Dict[str, bytes] = {normalize_path(k): bytes(v) for k, v in (files or {}).items()}
+
+    @classmethod
+    def from_dir(cls, root: str = ".", *, subdir: str = "data") -> "MemoryStorage":
+        files: Dict[str, bytes] = {}
+        for dirpath, _dirs, names in os.walk(os.path.join(root, subdir)):
+            for name in names:
+                full = os.path.join(dirpath, name)
+                with open(full, "rb") as f:
+                    files[os.path.relpath(full, root)] = f.read()
+        return cls(files)
+
+    def put(self, path: str, data: bytes) -> None:
+        self.files[normalize_path(path)] = bytes(data)
+
+    def _get(self, path: str) -> bytes:
+        try:
+            return self.files[normalize_path(path)]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        return self._get(path)[int(offset):int(offset) + int(length)]
+
+    def read_all(self, path: str) -> bytes:
+        return self._get(path)
+
+    def read_many(self, reqs: Sequence[ReadRequest]) -> List[bytes]:
+        return [self.read(p, o, n) for p, o, n in reqs]
+
+    def size(self, path: str) -> int:
+        return len(self._get(path))
+
+    def _names(self) -> Iterable[str]:
+        return self.files.keys()
+
+
+class RangeStorage(_KeyedStorage):
+    """
+    Object-store style storage: everything goes through one range-read
+    callable fetch(path, offset, length) -> bytes (an S3/GCS ranged GET, an
+    HTTP Range request, ...), plus size(path) and optional listing callables.
+
+    Reads are rounded out to `block_size` blocks, kept in an LRU of
+    `cache_blocks` blocks, and extended by `readahead` blocks, so nearby
+    tiles of a query cost one request. The blocks one read_many() call
+    needs are fetched as coalesced spans, one request each.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int, int], bytes],
+        size: Callable[[str], int],
+        *,
+        list_names: Optional[Callable[[], Iterable[str]]] = None,
+        block_size: int = 1 << 20,
+        cache_blocks: int = 64,
+        readahead: int = 1,
+    ):
+        self.fetch = fetch
+        self._size_fn = size
+        self._list_names = list_names
+        self.block_size = int(block_size)
+        self.cache_blocks = int(cache_blocks)
+        self.readahead = int(readahead)
+        self._blocks: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @classmethod
+    def from_tile_server(cls, url: str, **kw: Any) -> "RangeStorage":
+        """
+        Range reads against a civd.tile_server.TileServer (/pack endpoint).
+        """
+        from civd.remote import RemoteWorld
+
+        remote = RemoteWorld(url)
+        return cls(remote.read_range, remote.pack_size, **kw)
+
+    def size(self, path: str) -> int:
+        key = normalize_path(path)
+        if key not in self._sizes:
+            self._sizes[key] = int(self._size_fn(key))
+        return self._sizes[key]
+
+    def _names(self) -> Iterable[str]:
+        if self._list_names is None:
+            raise NotImplementedError("RangeStorage needs list_names= to list directories")
+        return (normalize_path(n) for n in self._list_names())
+
+    def _fetch_blocks(self, key: str, blocks: Sequence[int]) -> None:
+        size = self.size(key)
+        want = sorted(set(b for b in blocks if b * self.block_size < size))
+        with self._lock:
+            want = [b for b in want if (key, b) not in self._blocks]
+        # consecutive missing blocks are one request
+        runs: List[List[int]] = []
+        for b in want:
+            if runs and b == runs[-1][-1] + 1:
+                runs[-1].append(b)
+            else:
+                runs.append([b])
+        for run in runs:
+            off = run[0] * self.block_size
+            n = min(size, (run[-1] + 1) * self.block_size) - off
+            data = self.fetch(key, off, n)
+            self.requests += 1
+            with self._lock:
+                for j, b in enumerate(run):
+                    self._blocks[(key, b)] = data[j * self.block_size:(j + 1) * self.block_size]
+                    self._blocks.move_to_end((key, b))
+                while len(self._blocks) > self.cache_blocks:
+                    self._blocks.popitem(last=False)
+
+    def _span_blocks(self, off: int, n: int, *, readahead: bool) -> List[int]:
+        b0 = off // self.block_size
+        b1 = (off + max(n, 1) - 1) // self.block_size
+        return list(range(b0, b1 + 1 + (self.readahead if readahead else 0)))
+
+    def _assemble(self, key: str, off: int, n: int) -> bytes:
+        bs = self.block_size
+        parts = []
+        with self._lock:
+            for b in self._span_blocks(off, n, readahead=False):
+                blk = self._blocks.get((key, b))
+                if blk is None:
+                    return b""
+                self._blocks.move_to_end((key, b))
+                lo = max(off, b * bs) - b * bs
+                hi = min(off + n, (b + 1) * bs) - b * bs
+                parts.append(blk[lo:hi])
+        return b"".join(parts)
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        return self.read_many([(path, offset, length)])[0]
+
+    def read_many(self, reqs: Sequence[ReadRequest]) -> List[bytes]:
+        keyed = [(normalize_path(p), int(o), int(n)) for p, o, n in reqs]
+        by_key: Dict[str, List[int]] = {}
+        for key, off, n in keyed:
+            by_key.setdefault(key, []).extend(self._span_blocks(off, n, readahead=True))
+        for key, blocks in by_key.items():
+            self._fetch_blocks(key, blocks)
+        out: List[bytes] = []
+        for key, off, n in keyed:
+            data = self._assemble(key, off, n)
+            if len(data) != n:
+                # evicted by a large batch: read it directly
+                data = self.fetch(key, off, n)
+                self.requests += 1
+            out.append(data)
+        return out
+
+    def read_all(self, path: str) -> bytes:
+        key = normalize_path(path)
+        return self.fetch(key, 0, self.size(key))
+
+
+class ArchiveStorage(_KeyedStorage):
+    """
+    A world packed into one .zip or .tar file (members named like index
+    paths, optionally under `prefix`).
+
+    Stored (uncompressed) zip members and all tar members are read in place
+    with positional reads on the archive; compressed zip members are
+    inflated once on first access and kept in memory.
+    """
+
+    def __init__(self, path: str, *, prefix: str = ""):
+        self.path = path
+        self.prefix = normalize_path(prefix)
+        self._members: Dict[str, Tuple[int, int]] = {}      # name -> (data offset, size)
+        self._inflated: Dict[str, bytes] = {}
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._lock = threading.Lock()
+
+        if zipfile.is_zipfile(path):
+            self._zip = zipfile.ZipFile(path)
+            with open(path, "rb") as f:
+                for info in self._zip.infolist():
+                    if info.is_dir():
+                        continue
+                    name = self._strip(info.filename)
+                    if info.compress_type == zipfile.ZIP_STORED:
+                        # data starts after the local header (its extra field may differ from the central one)
+                        f.seek(info.header_offset + 26)
+                        n_name, n_extra = int.from_bytes(f.read(2), "little"), int.from_bytes(f.read(2), "little")
+                        self._members[name] = (info.header_offset + 30 + n_name + n_extra, info.file_size)
+                    else:
+                        self._members[name] = (-1, info.file_size)
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path, "r:") as tf:
+                for ti in tf.getmembers():
+                    if ti.isfile():
+                        self._members[self._strip(ti.name)] = (ti.offset_data, ti.size)
+        else:
+            raise ValueError(f"{path} is neither a zip nor an uncompressed tar archive")
+        self._f = open(path, "rb")
+
+    def _strip(self, name: str) -> str:
+        name = normalize_path(name)
+        if self.prefix and name.startswith(self.prefix + "/"):
+            return name[len(self.prefix) + 1:]
+        return name
+
+    def _member(self, path: str) -> Tuple[str, int, int]:
+        key = normalize_path(path)
+        try:
+            off, size = self._members[key]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+        return key, off, size
+
+    def _inflate(self, key: str) -> bytes:
+        with self._lock:
+            data = self._inflated.get(key)
+            if data is None:
+                name = next(i.filename for i in self._zip.infolist() if self._strip(i.filename) == key)
+                data = self._inflated[key] = self._zip.read(name)
+        return data
+
+    def read(self, path: str, offset: int, length: int) -> bytes:
+        key, base, size = self._member(path)
+        offset, length = int(offset), max(0, min(int(length), size - int(offset)))
+        if base < 0:
+            return self._inflate(key)[offset:offset + length]
+        if hasattr(os, "pread"):
+            return os.pread(self._f.fileno(), length, base + offset)
+        with self._lock:
+            self._f.seek(base + offset)
+            return self._f.read(length)
+
+    def size(self, path: str) -> int:
+        return self._member(path)[2]
+
+    def _names(self) -> Iterable[str]:
+        return self._members.keys()
+
+    def close(self) -> None:
+        self._f.close()
+        if self._zip is not None:
+            self._zip.close()
+
+
+_default: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    """
+    Process-wide default storage (LocalStorage over the working directory,
+    where index pack paths are rooted).
+    """
+    global _default
+    if _default is None:
+        _default = LocalStorage(".")
+    return _default
+
+
+def set_storage(storage: Optional[Storage]) -> None:
+    """
+    Install the default storage used by readers not given one explicitly
+    (None restores the local filesystem).
+    """
+    global _default
+    _default = storage
@@ -5,6 +5,7 @@ from typing import Any, Dict, List
 
 
 SCHEMA_SUBMAP_V1 = "civd.submap.v1"
+SCHEMA_SUBMAP_V2 = "civd.submap.v2"
 
 
 @dataclass(frozen=True)
@@ -36,10 +37,10 @@ def _req_float(d: Dict[str, Any], k: str, ctx: str) -> float:
         raise SubmapSchemaError(f"[{ctx}] {k} must be float-like, got {type(v)} -> {v}")
 
 
-def verify_submap_v1(m: Dict[str, Any]) -> Dict[str, Any]:
+def _verify_common(m: Dict[str, Any], schema: str) -> None:
     sv = _req(m, "schema_version", "submap")
-    if sv != SCHEMA_SUBMAP_V1:
-        raise SubmapSchemaError(f"[submap] schema_version must be '{SCHEMA_SUBMAP_V1}', got '{sv}'")
+    if sv != schema:
+        raise SubmapSchemaError(f"[submap] schema_version must be '{schema}', got '{sv}'")
 
     time = _req(m, "time", "submap")
     if not isinstance(time, str) or not time:
@@ -66,6 +67,11 @@ def verify_submap_v1(m: Dict[str, Any]) -> Dict[str, Any]:
     if tile_size <= 0:
         raise SubmapSchemaError("[submap] tile_size must be > 0")
 
+    if "tile_shape_zyx" in m:
+        ts = m["tile_shape_zyx"]
+        if not (isinstance(ts, list) and len(ts) == 3 and min(int(v) for v in ts) > 0):
+            raise SubmapSchemaError("[submap] tile_shape_zyx must be [tile_z, tile_y, tile_x] > 0")
+
     tiles_total = _req_int(m, "tiles_total", "submap")
     tiles_included = _req_int(m, "tiles_included", "submap")
     if tiles_total <= 0 or tiles_included <= 0:
@@ -73,13 +79,8 @@ def verify_submap_v1(m: Dict[str, Any]) -> Dict[str, Any]:
     if tiles_included > tiles_total:
         raise SubmapSchemaError("[submap] tiles_included cannot exceed tiles_total")
 
-    _req_int(m, "bytes_npz", "submap")
     _req_float(m, "decode_ms", "submap")
 
-    npz_path = _req(m, "npz_path", "submap")
-    if not isinstance(npz_path, str) or not npz_path:
-        raise SubmapSchemaError("[submap] npz_path must be a non-empty string")
-
     src = _req(m, "source_index", "submap")
     if not isinstance(src, str) or not src:
         raise SubmapSchemaError("[submap] source_index must be a non-empty string")
@@ -88,4 +89,56 @@ def verify_submap_v1(m: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(channels, list) or len(channels) == 0:
         raise SubmapSchemaError("[submap] channels must be a non-empty list")
 
+
+def verify_submap_v1(m: Dict[str, Any]) -> Dict[str, Any]:
+    _verify_common(m, SCHEMA_SUBMAP_V1)
+
+    _req_int(m, "bytes_npz", "submap")
+
+    npz_path = _req(m, "npz_path", "submap")
+    if not isinstance(npz_path, str) or not npz_path:
+        raise SubmapSchemaError("[submap] npz_path must be a non-empty string")
+
     return m
+
+
+def verify_submap_v2(m: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Frames submap: a pack of per-tile zstd frames plus an index-like tile list.
+    """
+    _verify_common(m, SCHEMA_SUBMAP_V2)
+
+    pack = _req(m, "pack", "submap")
+    if not (isinstance(pack, dict) and isinstance(pack.get("path"), str) and pack["path"]):
+        raise SubmapSchemaError("[submap] pack.path must be a non-empty string")
+    written = _req_int(m, "bytes_written", "submap")
+
+    tiles = _req(m, "tiles", "submap")
+    if not isinstance(tiles, list) or len(tiles) != int(m["tiles_included"]):
+        raise SubmapSchemaError("[submap] tiles must list tiles_included entries")
+    roi = m["roi"]
+    for i, t in enumerate(tiles):
+        ctx = f"submap.tiles[{i}]"
+        b = _req(t, "bounds_zyx", ctx)
+        if not (isinstance(b, list) and len(b) == 6):
+            raise SubmapSchemaError(f"[{ctx}] bounds_zyx must be [z0,z1,y0,y1,x0,x1]")
+        z0, z1, y0, y1, x0, x1 = (int(v) for v in b)
+        if not (roi["z0"] <= z0 < z1 <= roi["z1"] and roi["y0"] <= y0 < y1 <= roi["y1"] and roi["x0"] <= x0 < x1 <= roi["x1"]):
+            raise SubmapSchemaError(f"[{ctx}] bounds_zyx must lie inside the roi")
+        if t.get("empty"):
+            continue
+        off = _req_int(t, "offset", ctx)
+        length = _req_int(t, "length", ctx)
+        if off < 0 or length <= 0 or off + length > written:
+            raise SubmapSchemaError(f"[{ctx}] frame [offset, offset+length) must lie inside the pack")
+
+    return m
+
+
+def verify_submap(m: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Verify a submap manifest of either schema version.
+    """
+    if m.get("schema_version") == SCHEMA_SUBMAP_V2:
+        return verify_submap_v2(m)
+    return verify_submap_v1(m)
@@ -6,7 +6,10 @@ from typing import Dict, Tuple, List
 import numpy as np
 import zstandard as zstd
 
-from civd.tiler import TileSpec, _iter_tile_bounds
+from civd.codec import tile_codec, tile_frame_bytes
+from civd.lod import build_pyramid
+from civd.tile_stats import compute_tile_stats
+from civd.tiler import TileSpec, _grid_meta, _is_empty_tile, _iter_tile_bounds, _lod_level_meta
 
 
 def tile_hash(tile: np.ndarray) -> str:
@@ -18,6 +21,136 @@ def tile_hash(tile: np.ndarray) -> str:
     return h
 
 
+def _write_timepack_tiles(
+    fpack,
+    vol: np.ndarray,
+    spec: TileSpec,
+    cctx,
+    *,
+    byte_offset: int,
+    codec_level: int,
+    base: Dict = None,
+    base_tiles: List[Dict] = None,
+    base_index_path: str = None,
+    empty_value: float = None,
+    stats: int = None,
+    tile_layout: str = "zyxc",
+) -> Tuple[List[Dict], int, int, int]:
+    """
+    Write the tiles of vol that differ from base_tiles (by hash) into fpack.
+    Unchanged tiles become 'ref' entries pointing into the base pack.
+
+    With empty_value set (brick-map layout), empty tiles are omitted; a tile
+    that was occupied in the base and is now empty gets an "empty" tombstone
+    entry so delta readers still see the change.
+
+    stats (see civd.tiler._write_tile_arrays) adds value statistics to every
+    entry, refs and tombstones included, computed from this time's tile.
+
+    tile_layout sets the frame layout of changed tiles (civd.codec); refs
+    keep the codec, and so the layout, of the frame they point at.
+
+    Returns (tile entries, next byte offset, changed, unchanged).
+    """
+    tile_entries: List[Dict] = []
+
+    # Build base tile hash lookup if base exists
+    base_hash = {}
+    base_lookup = {}
+    for t in base_tiles or []:
+        base_hash[t["tile_id"]] = t.get("hash")
+        base_lookup[t["tile_id"]] = t
+
+    changed = 0
+    unchanged = 0
+
+    for tile_id, bounds, tcoords, grid in _iter_tile_bounds(vol.shape, spec):
+        z0, z1, y0, y1, x0, x1 = bounds
+        tile = np.ascontiguousarray(vol[z0:z1, y0:y1, x0:x1, :])
+
+        if empty_value is not None and _is_empty_tile(tile, empty_value):
+            bt = base_lookup.get(tile_id)
+            if bt is not None and not bt.get("empty"):
+                tile_entries.append({
+                    "tile_id": tile_id,
+                    "tile_coords": {"tz": tcoords[0], "ty": tcoords[1], "tx": tcoords[2]},
+                    "bounds": {"z0": z0, "z1": z1, "y0": y0, "y1": y1, "x0": x0, "x1": x1},
+                    "shape_zyxc": [z1 - z0, y1 - y0, x1 - x0, spec.channels],
+                    "dtype": "float32",
+                    "hash": None,
+                    "empty": True,
+                })
+                if stats is not None:
+                    tile_entries[-1]["stats"] = compute_tile_stats(tile, subbrick=stats)
+                changed += 1
+            continue
+
+        h = tile_hash(tile)
+
+        if base and base_hash.get(tile_id) == h:
+            # Unchanged: reference base tile entry
+            bt = base_lookup[tile_id]
+            if isinstance(bt.get("ref"), dict):
+                # base tile is itself a ref: point at the pack that holds the bytes
+                ref = dict(bt["ref"])
+            else:
+                ref = {
+                    "base_timestamp": base.get("timestamp", "t000"),
+                    "base_index": base_index_path,
+                    "base_pack": base["pack"]["path"],
+                    "offset": bt["offset"],
+                    "length": bt["length"],
+                    "codec": bt["codec"],
+                }
+            tile_entries.append({
+                "tile_id": tile_id,
+                "tile_coords": bt["tile_coords"],
+                "bounds": bt.get("bounds", bt.get("bounds_zyx")),
+                "shape_zyxc": bt["shape_zyxc"],
+                "dtype": bt["dtype"],
+                "hash": h,
+                "ref": ref,
+            })
+            if stats is not None:
+                tile_entries[-1]["stats"] = compute_tile_stats(tile, subbrick=stats)
+            unchanged += 1
+            continue
+
+        # Changed (or no base): write as new compressed tile in this timepack
+        raw = tile_frame_bytes(tile, tile_layout)
+        comp = cctx.compress(raw)
+        fpack.write(comp)
+
+        tile_entries.append({
+            "tile_id": tile_id,
+            "tile_coords": {"tz": tcoords[0], "ty": tcoords[1], "tx": tcoords[2]},
+            "bounds": {"z0": z0, "z1": z1, "y0": y0, "y1": y1, "x0": x0, "x1": x1},
+            "shape_zyxc": [z1 - z0, y1 - y0, x1 - x0, spec.channels],
+            "dtype": "float32",
+            "hash": h,
+            "codec": tile_codec(codec_level, tile_layout),
+            "offset": byte_offset,
+            "length": len(comp),
+            "raw_nbytes": len(raw),
+        })
+        if stats is not None:
+            tile_entries[-1]["stats"] = compute_tile_stats(tile, subbrick=stats)
+        byte_offset += len(comp)
+        changed += 1
+
+    return tile_entries, byte_offset, changed, unchanged
+
+
+def _base_lod_tiles(base: Dict, level: int) -> List[Dict]:
+    if not base:
+        return []
+    levels = (base.get("lod") or {}).get("levels") or []
+    for lv in levels:
+        if int(lv.get("level", -1)) == level:
+            return lv.get("tiles", [])
+    return []
+
+
 def build_timepack(
     volume_path: str,
     out_dir: str,
@@ -25,11 +158,30 @@ def build_timepack(
     codec_level: int = 3,
     timestamp: str = "t000",
     base_index_path: str = None,
+    lod_levels: int = 0,
+    label_channels: Tuple[int, ...] = (1,),
+    label_reduce: str = "max",
+    sparse: bool = False,
+    empty_value: float = 0.0,
+    tile_stats: bool = True,
+    stats_subbrick: int = 0,
+    tile_layout: str = "zyxc",
 ) -> Dict:
     """
     If base_index_path is provided, writes ONLY changed tiles relative to base index.
     Unchanged tiles are referenced via 'ref' entries pointing to base pack + offsets.
 
+    sparse=True writes a brick-map index (see civd.tiler.build_tiles).
+
+    tile_stats / stats_subbrick store per-tile value statistics (see
+    civd.tiler.build_tiles).
+
+    lod_levels > 0 also writes a mip pyramid (see civd.tiler.build_tiles); each
+    level is delta-encoded against the same level of the base index.
+
+    tile_layout="czyx" writes changed tiles planar, channels first (see
+    civd.tiler.build_tiles).
+
     Writes:
       out_dir/tiles.zstpack
       out_dir/index.json
@@ -51,80 +203,60 @@ def build_timepack(
     pack_path = os.path.join(out_dir, "tiles.zstpack")
     index_path = os.path.join(out_dir, "index.json")
 
-    tile_entries: List[Dict] = []
-    byte_offset = 0
-
-    # Build base tile hash lookup if base exists
-    base_hash = {}
-    base_lookup = {}
-    if base:
-        for t in base["tiles"]:
-            base_hash[t["tile_id"]] = t.get("hash")
-            base_lookup[t["tile_id"]] = t
-
-    changed = 0
-    unchanged = 0
+    levels: List[Dict] = []
+    empty = float(empty_value) if sparse else None
+    stats = int(stats_subbrick) if tile_stats else None
 
     with open(pack_path, "wb") as fpack:
-        for tile_id, bounds, tcoords, grid in _iter_tile_bounds(vol.shape, spec):
-            z0, z1, y0, y1, x0, x1 = bounds
-            tile = np.ascontiguousarray(vol[z0:z1, y0:y1, x0:x1, :])
-
-            h = tile_hash(tile)
+        tile_entries, byte_offset, changed, unchanged = _write_timepack_tiles(
+            fpack, vol, spec, cctx,
+            byte_offset=0,
+            codec_level=codec_level,
+            base=base,
+            base_tiles=base["tiles"] if base else None,
+            base_index_path=base_index_path,
+            empty_value=empty,
+            stats=stats,
+            tile_layout=tile_layout,
+        )
 
-            if base and base_hash.get(tile_id) == h:
-                # Unchanged: reference base tile entry
-                bt = base_lookup[tile_id]
-                tile_entries.append({
-                    "tile_id": tile_id,
-                    "tile_coords": bt["tile_coords"],
-                    "bounds": bt["bounds"],
-                    "shape_zyxc": bt["shape_zyxc"],
-                    "dtype": bt["dtype"],
-                    "hash": h,
-                    "ref": {
-                        "base_timestamp": base.get("timestamp", "t000"),
-                        "base_index": base_index_path,
-                        "base_pack": base["pack"]["path"],
-                        "offset": bt["offset"],
-                        "length": bt["length"],
-                        "codec": bt["codec"],
-                    }
-                })
-                unchanged += 1
-                continue
-
-            # Changed (or no base): write as new compressed tile in this timepack
-            raw = tile.tobytes(order="C")
-            comp = cctx.compress(raw)
-            fpack.write(comp)
-
-            tile_entries.append({
-                "tile_id": tile_id,
-                "tile_coords": {"tz": tcoords[0], "ty": tcoords[1], "tx": tcoords[2]},
-                "bounds": {"z0": z0, "z1": z1, "y0": y0, "y1": y1, "x0": x0, "x1": x1},
-                "shape_zyxc": [spec.tile_z, spec.tile_y, spec.tile_x, spec.channels],
-                "dtype": "float32",
-                "hash": h,
-                "codec": {"name": "zstd", "level": codec_level},
-                "offset": byte_offset,
-                "length": len(comp),
-                "raw_nbytes": len(raw),
-            })
-            byte_offset += len(comp)
-            changed += 1
+        for k, lvol in enumerate(
+            build_pyramid(vol, lod_levels, label_channels=label_channels, label_reduce=label_reduce), start=1
+        ):
+            start = byte_offset
+            entries, byte_offset, _c, _u = _write_timepack_tiles(
+                fpack, lvol, spec, cctx,
+                byte_offset=start,
+                codec_level=codec_level,
+                base=base,
+                base_tiles=_base_lod_tiles(base, k),
+                base_index_path=base_index_path,
+                empty_value=empty,
+                stats=stats,
+                tile_layout=tile_layout,
+            )
+            levels.append(_lod_level_meta(
+                k, lvol, spec, entries, pack_path=pack_path, section=(start, byte_offset),
+                empty_value=empty, stats=stats,
+            ))
 
     index = {
         "schema": "civd.phase_d.timepack.v1",
         "timestamp": timestamp,
         "volume": {"path": volume_path, "shape_zyxc": [Z, Y, X, C], "dtype": "float32"},
         "tile_spec": {"tile_z": spec.tile_z, "tile_y": spec.tile_y, "tile_x": spec.tile_x, "channels": spec.channels},
-        "grid": {"nz": Z // spec.tile_z, "ny": Y // spec.tile_y, "nx": X // spec.tile_x, "tile_count": len(tile_entries)},
+        "grid": _grid_meta((Z, Y, X, C), spec, len(tile_entries), empty_value=empty, stats=stats),
         "pack": {"path": pack_path, "format": "concat_zstd_frames"},
         "base_index": base_index_path,
         "stats": {"changed_tiles": changed, "unchanged_tiles": unchanged},
         "tiles": tile_entries,
     }
+    if levels:
+        index["lod"] = {
+            "label_channels": [int(c) for c in label_channels],
+            "label_reduce": label_reduce,
+            "levels": levels,
+        }
 
     with open(index_path, "w", encoding="utf-8") as f:
         json.dump(index, f, indent=2)
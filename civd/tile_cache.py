@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from civd.codec import frame_layout, layout_view
+
+
+FrameKey = Tuple[str, int, int]
+
+
+def frame_key(loc: Dict[str, Any]) -> Optional[FrameKey]:
+    """
+    Identity of the frame behind a tile location (resolve_tile_frame):
+    (pack, offset, length). Tiles that reference the same payload through
+    refs share a key. None for tombstones, which have no frame.
+    """
+    if loc.get("ref_mode") == "empty":
+        return None
+    return (str(loc["pack"]), int(loc["offset"]), int(loc["length"]))
+
+
+class TileCache:
+    """
+    Thread-safe LRU of decoded tiles, keyed by frame identity (frame_key),
+    holding up to `max_bytes` of float32 tile data.
+
+    Set it as `World.tile_cache` and query() takes already decoded tiles
+    from it instead of reading and decompressing them again. Tiles are kept
+    in their stored frame layout and handed out read-only, as a transposed
+    view when the other layout is asked for.
+
+    `stats` counts hits, misses and evictions.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self._tiles: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, loc: Dict[str, Any], layout: str = "zyxc") -> Optional[np.ndarray]:
+        """
+        Decoded tile for a location in `layout`, or None if not cached.
+        """
+        key = frame_key(loc)
+        with self._lock:
+            arr = self._tiles.get(key) if key is not None else None
+            if arr is None:
+                self.stats["misses"] += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.stats["hits"] += 1
+        return layout_view(arr, frame_layout(loc.get("codec")), layout)
+
+    def put(self, loc: Dict[str, Any], arr: np.ndarray) -> None:
+        """
+        Remember a tile decoded in its stored frame layout.
+        """
+        key = frame_key(loc)
+        if key is None or arr.nbytes > self.max_bytes:
+            return
+        arr = arr.view()
+        arr.flags.writeable = False
+        with self._lock:
+            if key in self._tiles:
+                return
+            self._tiles[key] = arr
+            self.nbytes += arr.nbytes
+            while self.nbytes > self.max_bytes:
+                _k, old = self._tiles.popitem(last=False)
+                self.nbytes -= old.nbytes
+                self.stats["evictions"] += 1
+
+    def keys(self) -> List[Hashable]:
+        """
+        Cached frame keys, least recently used first.
+        """
+        with self._lock:
+            return list(self._tiles)
+
+    def capacity_tiles(self, tile_nbytes: int) -> int:
+        """
+        How many tiles of `tile_nbytes` fit in the budget.
+        """
+        return max(1, self.max_bytes // max(1, int(tile_nbytes)))
+
+    def hit_rate(self) -> float:
+        n = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / n if n else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tiles.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._tiles
+
+    def __len__(self) -> int:
+        return len(self._tiles)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import io
+import os
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from civd.source import ROIBox
+from civd.storage import Storage, get_storage, normalize_path
+
+
+TILE_HISTORY_SCHEMA_V1 = "civd.tilehistory.v1"
+
+
+def history_path(root: str, lod: int = 0) -> str:
+    """
+    Where the change history of one LOD level is stored, next to data/civd_time.
+    """
+    rel = os.path.join("data", "civd_history", f"lod{int(lod)}.npz")
+    return rel if root in ("", ".") else os.path.join(root, rel)
+
+
+class TileHistory:
+    """
+    Per-tile change history of a world at one LOD level: for every tile
+    (tz,ty,tx), the times at which it has a local payload (its own frame or
+    a brick-map tombstone) rather than a ref to an earlier one.
+
+    All changes live in ONE sorted int64 array of codes key * T + time
+    position (key = the BrickMap linear grid key, T = number of times), so
+    "latest version at or before t", "changes in [t0, t1]" and "tiles
+    changed between t0 and t1" are binary searches, vectorized over tiles.
+    """
+
+    def __init__(
+        self,
+        times: Sequence[str],
+        grid_dims: Tuple[int, int, int],
+        tile_shape: Tuple[int, int, int],
+        codes: np.ndarray,
+        lod: int = 0,
+    ):
+        self.times = [str(t) for t in times]
+        self.grid_dims = tuple(int(v) for v in grid_dims)
+        self.tile_shape = tuple(int(v) for v in tile_shape)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.lod = int(lod)
+        self._pos = {t: i for i, t in enumerate(self.times)}
+
+    # ---- build / persist ----
+
+    @classmethod
+    def build(cls, world: Any, times: Optional[Sequence[str]] = None, lod: int = 0) -> "TileHistory":
+        """
+        Scan the tile maps of `times` (all of the world's by default), once.
+        """
+        from civd.world import _lod_level_index, _tile_shape_from_index
+
+        times = list(world.times() if times is None else times)
+        T = max(1, len(times))
+        parts: List[np.ndarray] = []
+        grid_dims: Optional[Tuple[int, int, int]] = None
+        tile_shape: Tuple[int, int, int] = (0, 0, 0)
+        for i, t in enumerate(times):
+            tmap = world.tile_map(t, lod=lod)
+            if grid_dims is None:
+                grid_dims = tmap.grid_dims
+                idx = world.load_time_index(t)
+                tile_shape = _tile_shape_from_index(_lod_level_index(idx, lod) if lod else idx)
+            elif tmap.grid_dims != grid_dims:
+                raise ValueError(f"time {t} has tile grid {tmap.grid_dims}, expected {grid_dims}")
+            parts.append(tmap.keys[tmap.own_payload[tmap.slots]] * T + i)
+        codes = np.sort(np.concatenate(parts)) if parts else np.zeros((0,), dtype=np.int64)
+        return cls(times, grid_dims or (0, 0, 0), tile_shape, codes, lod=lod)
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                schema_version=np.array(TILE_HISTORY_SCHEMA_V1),
+                times=np.array(self.times, dtype=str),
+                grid_dims=np.array(self.grid_dims, dtype=np.int64),
+                tile_shape=np.array(self.tile_shape, dtype=np.int64),
+                lod=np.array(self.lod, dtype=np.int64),
+                codes=self.codes,
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str, storage: Optional[Storage] = None) -> "TileHistory":
+        st = storage or get_storage()
+        with np.load(io.BytesIO(st.read_all(normalize_path(path))), allow_pickle=False) as z:
+            if str(z["schema_version"]) != TILE_HISTORY_SCHEMA_V1:
+                raise ValueError(f"{path}: unsupported tile history schema {z['schema_version']}")
+            return cls(
+                [str(t) for t in z["times"]],
+                tuple(z["grid_dims"]),
+                tuple(z["tile_shape"]),
+                z["codes"],
+                lod=int(z["lod"]),
+            )
+
+    # ---- queries ----
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def position(self, time_name: str) -> int:
+        if time_name not in self._pos:
+            raise KeyError(f"time {time_name!r} is not in the tile history")
+        return self._pos[time_name]
+
+    def _keys(self, coords: Any) -> np.ndarray:
+        c = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        _nz, ny, nx = self.grid_dims
+        return (c[:, 0] * ny + c[:, 1]) * nx + c[:, 2]
+
+    def versions(self, tz: int, ty: int, tx: int) -> List[str]:
+        """
+        Times at which tile (tz,ty,tx) changed, in order.
+        """
+        return self.changes((tz, ty, tx), self.times[0], self.times[-1]) if self.times else []
+
+    def latest(self, tcoords: Tuple[int, int, int], time_name: str) -> Optional[str]:
+        """
+        Time of the version of a tile current at `time_name` (its last change
+        at or before it), or None if it had none yet.
+        """
+        T = len(self.times)
+        key = int(self._keys(tcoords)[0])
+        i = int(np.searchsorted(self.codes, key * T + self.position(time_name), side="right")) - 1
+        if i < 0 or int(self.codes[i]) // T != key:
+            return None
+        return self.times[int(self.codes[i]) % T]
+
+    def changes(self, tcoords: Tuple[int, int, int], t0: str, t1: str) -> List[str]:
+        """
+        Times in [t0, t1] at which a tile changed.
+        """
+        T = len(self.times)
+        base = int(self._keys(tcoords)[0]) * T
+        lo = np.searchsorted(self.codes, base + self.position(t0), side="left")
+        hi = np.searchsorted(self.codes, base + self.position(t1), side="right")
+        return [self.times[int(c) % T] for c in self.codes[lo:hi]]
+
+    def changed(self, coords: Any, t0: str, t1: str) -> np.ndarray:
+        """
+        (N,) bool: which of the (N,3) tile coords changed after t0, up to and
+        including t1, i.e. must be re-read to bring t0's data to t1.
+        """
+        T = len(self.times)
+        i0, i1 = self.position(t0), self.position(t1)
+        if i1 < i0:
+            raise ValueError(f"{t1} comes before {t0}")
+        base = self._keys(coords) * T
+        lo = np.searchsorted(self.codes, base + i0, side="right")
+        hi = np.searchsorted(self.codes, base + i1, side="right")
+        return hi > lo
+
+    def changed_tiles(self, t0: str, t1: str, roi: Optional[ROIBox] = None) -> np.ndarray:
+        """
+        (N,3) int64 coords of the tiles (inside `roi`, in this level's voxels,
+        or anywhere) that changed after t0, up to and including t1.
+        """
+        nz, ny, nx = self.grid_dims
+        if roi is None:
+            # every tile: scan the changes themselves, not the grid
+            T = len(self.times)
+            i0, i1 = self.position(t0), self.position(t1)
+            if i1 < i0:
+                raise ValueError(f"{t1} comes before {t0}")
+            pos = self.codes % T
+            keys = np.unique(self.codes[(pos > i0) & (pos <= i1)] // T)
+            return np.stack([keys // (ny * nx), (keys // nx) % ny, keys % nx], axis=1)
+        ranges = tuple(
+            range(max(0, lo // s), min(n, -(-hi // s)))
+            for lo, hi, s, n in zip((roi.z0, roi.y0, roi.x0), (roi.z1, roi.y1, roi.x1), self.tile_shape, self.grid_dims)
+        )
+        zz, yy, xx = np.meshgrid(*(np.arange(r.start, r.stop) for r in ranges), indexing="ij")
+        coords = np.stack([zz.ravel(), yy.ravel(), xx.ravel()], axis=1).astype(np.int64)
+        return coords[self.changed(coords, t0, t1)]
+
+
+def main() -> None:
+    import argparse
+
+    from civd.world import World
+
+    ap = argparse.ArgumentParser(description="Precompute the per-tile change history of a CIVD world.")
+    ap.add_argument("--root", default=".")
+    ap.add_argument("--lod", type=int, action="append", help="LOD level(s) (default: all)")
+    args = ap.parse_args()
+
+    w = World.open(args.root)
+    times = w.times()
+    if not times:
+        raise SystemExit("no times under data/civd_time")
+    # meta()["lod_levels"] counts the levels above level 0
+    levels = args.lod if args.lod else range(int(w.meta(times[0])["lod_levels"]) + 1)
+    for lod in levels:
+        h = TileHistory.build(w, times, lod=lod)
+        path = h.save(history_path(args.root, lod))
+        print(f"lod {lod}: {len(h)} tile changes over {len(times)} times -> {path}")
+
+
+if __name__ == "__main__":
+    main()
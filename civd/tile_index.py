@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from civd.time_loader import tile_shape_from_index
+
+
+LAYOUT_DENSE = "dense"
+LAYOUT_BRICKMAP = "brickmap"
+
+_TILE_ID_RE = re.compile(r"z(\d+)_y(\d+)_x(\d+)")
+
+
+def _grid_dims_from_index(idx: Dict[str, Any], tile_shape: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    grid = idx.get("grid", {})
+    if isinstance(grid, dict) and all(k in grid for k in ("nz", "ny", "nx")):
+        return (int(grid["nz"]), int(grid["ny"]), int(grid["nx"]))
+    Z, Y, X = (int(v) for v in idx["volume"]["shape_zyxc"][:3])
+    sz, sy, sx = tile_shape
+    return (-(-Z // sz), -(-Y // sy), -(-X // sx))
+
+
+def _has_own_payload(entry: Dict[str, Any]) -> bool:
+    """
+    True if this tile entry contains actual payload data
+    for the current time index (i.e. should be included in delta).
+    Brick-map tombstones ("empty") count: the tile was cleared at this time.
+    """
+    if entry.get("empty"):
+        return True
+
+    if isinstance(entry.get("offset"), int) and isinstance(entry.get("length"), int):
+        return True
+
+    payload = entry.get("payload")
+    if isinstance(payload, dict):
+        if isinstance(payload.get("offset"), int) and isinstance(payload.get("length"), int):
+            return True
+
+    return False
+
+
+def tcoords_from_entry(entry: Dict[str, Any], tile_shape: Tuple[int, int, int]) -> Optional[Tuple[int, int, int]]:
+    """
+    (tz,ty,tx) of a tile entry, tolerant to schema variants:
+    tile_coords / tcoords dicts, flat tz/ty/tx, bounds (list or dict), tile_id.
+    """
+    for key in ("tile_coords", "tcoords"):
+        tc = entry.get(key)
+        if isinstance(tc, dict) and all(k in tc for k in ("tz", "ty", "tx")):
+            return (int(tc["tz"]), int(tc["ty"]), int(tc["tx"]))
+
+    if all(k in entry for k in ("tz", "ty", "tx")):
+        return (int(entry["tz"]), int(entry["ty"]), int(entry["tx"]))
+
+    sz, sy, sx = tile_shape
+    b = entry.get("bounds_zyx", entry.get("bounds"))
+    if isinstance(b, (list, tuple)) and len(b) == 6:
+        return (int(b[0]) // sz, int(b[2]) // sy, int(b[4]) // sx)
+    if isinstance(b, dict) and all(k in b for k in ("z0", "y0", "x0")):
+        return (int(b["z0"]) // sz, int(b["y0"]) // sy, int(b["x0"]) // sx)
+
+    tid = entry.get("tile_id") or entry.get("id") or entry.get("tile")
+    if isinstance(tid, str):
+        m = _TILE_ID_RE.match(tid)
+        if m:
+            tz, ty, tx = (int(v) for v in m.groups())
+            return (tz, ty, tx)
+
+    return None
+
+
+class BrickMap:
+    """
+    Hashed brick map over tile coordinates.
+
+    Only tiles that exist in the index ("bricks") are stored, keyed by their
+    linear grid key (tz*ny + ty)*nx + tx in one sorted int64 array; absent
+    bricks are implicit (empty). Lookups and ROI box queries are vectorized
+    binary searches, so their cost scales with occupied tiles, not with the
+    bounding-box volume of the grid.
+
+    Works for dense indices too (every brick present).
+
+    own_payload[slot] is True where entries[slot] stores its own payload at
+    this time (changed tiles and tombstones, not refs): what delta mode keeps.
+    Built on first use and kept with the map.
+    """
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        grid_dims: Tuple[int, int, int],
+        entries: Optional[Sequence[Dict[str, Any]]] = None,
+    ):
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        self.grid_dims = tuple(int(v) for v in grid_dims)
+        keys = self._keys(coords)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.coords = coords[order]
+        # position of each brick in the original entries list
+        self.slots = order.astype(np.int64)
+        self.entries: List[Dict[str, Any]] = list(entries) if entries is not None else []
+        self._own_payload: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_index(cls, idx: Dict[str, Any]) -> "BrickMap":
+        tile_shape = tile_shape_from_index(idx)
+        grid_dims = _grid_dims_from_index(idx, tile_shape)
+
+        entries: List[Dict[str, Any]] = []
+        flat: List[int] = []
+        for e in idx.get("tiles", []):
+            if not isinstance(e, dict):
+                continue
+            # fast path for the canonical schema, the rest goes through tcoords_from_entry
+            tc = e.get("tile_coords")
+            try:
+                flat += (tc["tz"], tc["ty"], tc["tx"])
+            except (KeyError, TypeError):
+                tc = tcoords_from_entry(e, tile_shape)
+                if tc is None:
+                    # not fatal: some indices may not store explicit coords
+                    continue
+                flat += tc
+            entries.append(e)
+
+        coords = np.fromiter(flat, dtype=np.int64, count=len(flat)).reshape(-1, 3)
+        return cls(coords, grid_dims, entries)
+
+    def _keys(self, coords: np.ndarray) -> np.ndarray:
+        _nz, ny, nx = self.grid_dims
+        return (coords[:, 0] * ny + coords[:, 1]) * nx + coords[:, 2]
+
+    def __len__(self) -> int:
+        return int(self.keys.shape[0])
+
+    @property
+    def own_payload(self) -> np.ndarray:
+        if self._own_payload is None:
+            self._own_payload = np.fromiter(
+                (_has_own_payload(e) for e in self.entries), dtype=bool, count=len(self.entries)
+            )
+        return self._own_payload
+
+    @property
+    def occupancy(self) -> float:
+        nz, ny, nx = self.grid_dims
+        total = nz * ny * nx
+        return (len(self) / total) if total else 0.0
+
+    def lookup(self, tz: int, ty: int, tx: int) -> int:
+        """
+        Entry slot of brick (tz,ty,tx), or -1 if the brick is absent.
+        """
+        nz, ny, nx = self.grid_dims
+        if not (0 <= tz < nz and 0 <= ty < ny and 0 <= tx < nx):
+            return -1
+        key = (tz * ny + ty) * nx + tx
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self) and int(self.keys[i]) == key:
+            return int(self.slots[i])
+        return -1
+
+    def __contains__(self, tcoords: Tuple[int, int, int]) -> bool:
+        return self.lookup(*tcoords) >= 0
+
+    def query_box(self, tz: range, ty: range, tx: range) -> np.ndarray:
+        """
+        Entry slots of occupied bricks inside the tile-coordinate box, in
+        (tz,ty,tx) order. Probes the candidate keys when the box is small,
+        otherwise masks the occupied coordinates.
+        """
+        nz, ny, nx = self.grid_dims
+        z0, z1 = max(0, tz.start), min(nz, tz.stop)
+        y0, y1 = max(0, ty.start), min(ny, ty.stop)
+        x0, x1 = max(0, tx.start), min(nx, tx.stop)
+        if z0 >= z1 or y0 >= y1 or x0 >= x1 or len(self) == 0:
+            return np.zeros((0,), dtype=np.int64)
+
+        box = (z1 - z0) * (y1 - y0) * (x1 - x0)
+        if box <= len(self):
+            zz, yy, xx = np.meshgrid(
+                np.arange(z0, z1), np.arange(y0, y1), np.arange(x0, x1), indexing="ij"
+            )
+            cand = ((zz * ny + yy) * nx + xx).ravel()
+            pos = np.searchsorted(self.keys, cand)
+            pos = np.minimum(pos, len(self) - 1)
+            hit = self.keys[pos] == cand
+            return self.slots[pos[hit]]
+
+        c = self.coords
+        m = (
+            (c[:, 0] >= z0) & (c[:, 0] < z1)
+            & (c[:, 1] >= y0) & (c[:, 1] < y1)
+            & (c[:, 2] >= x0) & (c[:, 2] < x1)
+        )
+        return self.slots[m]
+
+    def absent_box(self, tz: range, ty: range, tx: range) -> np.ndarray:
+        """
+        (N,3) int64 coords of the absent bricks inside the tile-coordinate
+        box, in (tz,ty,tx) order: the complement of query_box().
+        """
+        nz, ny, nx = self.grid_dims
+        z0, z1 = max(0, tz.start), min(nz, tz.stop)
+        y0, y1 = max(0, ty.start), min(ny, ty.stop)
+        x0, x1 = max(0, tx.start), min(nx, tx.stop)
+        if z0 >= z1 or y0 >= y1 or x0 >= x1:
+            return np.zeros((0, 3), dtype=np.int64)
+        zz, yy, xx = np.meshgrid(
+            np.arange(z0, z1), np.arange(y0, y1), np.arange(x0, x1), indexing="ij"
+        )
+        cand = np.stack([zz.ravel(), yy.ravel(), xx.ravel()], axis=1).astype(np.int64)
+        if len(self) == 0:
+            return cand
+        keys = self._keys(cand)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self) - 1)
+        return cand[self.keys[pos] != keys]
+
+    def coords_of(self, slots: np.ndarray) -> np.ndarray:
+        """
+        (N,3) int64 tile coords of entry slots (as returned by query_box).
+        """
+        pos = np.empty_like(self.slots)
+        pos[self.slots] = np.arange(len(self), dtype=np.int64)
+        return self.coords[pos[np.asarray(slots, dtype=np.int64)]]
+
+    def query_mask(self, tz: range, ty: range, tx: range, mask: np.ndarray) -> np.ndarray:
+        """
+        Like query_box(), restricted to the cells where `mask` (a bool array
+        shaped like the box) is True, e.g. the tiles an ROI shape touches.
+        """
+        nz, ny, nx = self.grid_dims
+        iz, iy, ix = np.nonzero(np.asarray(mask, dtype=bool))
+        cz, cy, cx = iz + tz.start, iy + ty.start, ix + tx.start
+        ok = (cz >= 0) & (cz < nz) & (cy >= 0) & (cy < ny) & (cx >= 0) & (cx < nx)
+        if not ok.any() or len(self) == 0:
+            return np.zeros((0,), dtype=np.int64)
+        cand = ((cz[ok].astype(np.int64) * ny + cy[ok]) * nx + cx[ok])
+        pos = np.minimum(np.searchsorted(self.keys, cand), len(self) - 1)
+        hit = self.keys[pos] == cand
+        return self.slots[pos[hit]]
+
+
+def index_layout(idx: Dict[str, Any]) -> str:
+    grid = idx.get("grid", {})
+    if isinstance(grid, dict) and grid.get("layout") == LAYOUT_BRICKMAP:
+        return LAYOUT_BRICKMAP
+    return LAYOUT_DENSE
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import socketserver
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from civd.storage import Storage, normalize_path
+from civd.tile_index import _TILE_ID_RE, BrickMap
+from civd.time_loader import _pack_path_from_index
+from civd.world import World, _lod_level_index, _lod_levels_from_index
+
+
+TILE_SERVER_SCHEMA_V1 = "civd.tileserver.v1"
+
+# batch response: <uint64 header_len> <header json> <frame bytes...>
+_BATCH_HEADER = struct.Struct("<Q")
+
+_RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+def encode_batch(frames: Sequence[Tuple[Optional[bytes], Dict[str, Any]]]) -> bytes:
+    """
+    Serialize (frame, location) pairs into one batch body: a JSON header
+    with every location and frame length (-1 for tombstones), then the
+    frames back to back.
+    """
+    locs: List[Dict[str, Any]] = []
+    lengths: List[int] = []
+    for comp, loc in frames:
+        locs.append({k: v for k, v in loc.items() if k != "pack"})
+        lengths.append(-1 if comp is None else len(comp))
+    head = json.dumps({"schema_version": TILE_SERVER_SCHEMA_V1, "locs": locs, "lengths": lengths}).encode("utf-8")
+    return b"".join([_BATCH_HEADER.pack(len(head)), head] + [c for c, _loc in frames if c is not None])
+
+
+def decode_batch(body: bytes) -> List[Tuple[Optional[bytes], Dict[str, Any]]]:
+    """
+    Inverse of encode_batch.
+    """
+    (n,) = _BATCH_HEADER.unpack_from(body, 0)
+    pos = _BATCH_HEADER.size
+    head = json.loads(bytes(body[pos:pos + n]).decode("utf-8"))
+    pos += n
+    out: List[Tuple[Optional[bytes], Dict[str, Any]]] = []
+    for loc, length in zip(head["locs"], head["lengths"]):
+        if length < 0:
+            out.append((None, loc))
+            continue
+        out.append((bytes(body[pos:pos + length]), loc))
+        pos += length
+    return out
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Endpoints (GET unless noted):
+
+      /times                          JSON list of time names
+      /index/<time>                   index.json of one time
+      /tile/<time>/<tile>?lod=L       one raw tile frame; <tile> is a tile_map
+                                      slot or a tile id like z01_y02_x03
+      POST /frames                    batch of raw frames, body
+                                      {"time", "lod", "slots": [...]}
+      /pack/<path>                    pack bytes; honours "Range: bytes=a-b"
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "civd-tileserver/1"
+    # headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def address_string(self) -> str:
+        # unix sockets have no (host, port) client address
+        addr = self.client_address
+        return addr[0] if isinstance(addr, tuple) and addr else "unix"
+
+    # ---- responses ----
+
+    def _send(self, body: bytes, *, ctype: str = "application/octet-stream", status: int = 200,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, obj: Any) -> None:
+        self._send(json.dumps(obj).encode("utf-8"), ctype="application/json")
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(json.dumps({"error": message}).encode("utf-8"), ctype="application/json", status=status)
+
+    # ---- routing ----
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            if parts == ["times"]:
+                self._send_json(self.server.world.times(refresh=True))
+            elif len(parts) == 2 and parts[0] == "index":
+                self._send_json(self.server.world.load_time_index(parts[1]))
+            elif len(parts) == 3 and parts[0] == "tile":
+                lod = int(query.get("lod", ["0"])[0])
+                slot = self.server.slot_of(parts[1], lod, parts[2])
+                ((comp, loc),) = self.server.read_slots(parts[1], lod, [slot])
+                if comp is None:
+                    self._send(b"", status=204, headers={"X-Civd-Empty": "1"})
+                else:
+                    self._send(bytes(comp), headers={"X-Civd-Shape": ",".join(str(v) for v in loc["shape_zyxc"])})
+            elif len(parts) >= 2 and parts[0] == "pack":
+                self._send_pack("/".join(parts[1:]))
+            else:
+                self._error(404, f"no such endpoint: {url.path}")
+        except (KeyError, IndexError, ValueError, FileNotFoundError) as e:
+            self._error(404, str(e))
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        try:
+            n = int(self.headers.get("Content-Length", "0"))
+            req = json.loads(self.rfile.read(n).decode("utf-8")) if n else {}
+            if url.path.rstrip("/") != "/frames":
+                self._error(404, f"no such endpoint: {url.path}")
+                return
+            frames = self.server.read_slots(str(req["time"]), int(req.get("lod", 0)), [int(s) for s in req["slots"]])
+            self._send(encode_batch(frames))
+        except (KeyError, IndexError, ValueError, FileNotFoundError) as e:
+            self._error(400, str(e))
+
+    def _send_pack(self, rel: str) -> None:
+        storage = self.server.world.storage
+        path = self.server.pack_path(rel)
+        size = storage.size(path)
+        rng = self.headers.get("Range")
+        if rng is None:
+            self._send(storage.read_all(path))
+            return
+        m = _RANGE_RE.match(rng.strip())
+        if not m:
+            self._error(416, f"unsupported range {rng!r}")
+            return
+        start = int(m.group(1))
+        end = min(size - 1, int(m.group(2))) if m.group(2) else size - 1
+        if start > end:
+            self._send(b"", status=416, headers={"Content-Range": f"bytes */{size}"})
+            return
+        body = storage.read(path, start, end - start + 1)
+        self._send(body, status=206, headers={"Content-Range": f"bytes {start}-{end}/{size}"})
+
+
+class _UnixHandler(_Handler):
+    disable_nagle_algorithm = False  # TCP_NODELAY does not apply to Unix sockets
+
+
+class _ServerMixin:
+    """
+    State shared by the TCP and Unix-socket servers.
+    """
+
+    world: World
+    verbose: bool = False
+
+    def read_slots(self, time_name: str, lod: int, slots: Sequence[int]):
+        idx = self.world.load_time_index(time_name)
+        if lod:
+            idx = _lod_level_index(idx, lod)
+        tmap = self.world.tile_map(time_name, lod=lod)
+        for s in slots:
+            self.check_slot(tmap, time_name, lod, s)
+        entries = [tmap.entries[s] for s in slots]
+        return self.world._read_frames(time_name, lod, entries, idx)
+
+    @staticmethod
+    def check_slot(tmap: BrickMap, time_name: str, lod: int, slot: int) -> int:
+        # client-supplied slots: never wrap around (negative) or run off the end
+        if not 0 <= slot < len(tmap.entries):
+            raise KeyError(f"no tile slot {slot} at {time_name} lod {lod} ({len(tmap.entries)} tiles)")
+        return slot
+
+    def slot_of(self, time_name: str, lod: int, tile: str) -> int:
+        if tile.isdigit():
+            return self.check_slot(self.world.tile_map(time_name, lod=lod), time_name, lod, int(tile))
+        m = _TILE_ID_RE.fullmatch(tile)
+        slot = self.world.tile_map(time_name, lod=lod).lookup(*(int(v) for v in m.groups())) if m else -1
+        if slot < 0:
+            raise KeyError(f"no tile {tile!r} at {time_name} lod {lod}")
+        return slot
+
+    def served_packs(self) -> FrozenSet[str]:
+        """
+        Normalized paths of every pack some index of the world refers to: each
+        time's pack, its LOD level packs and the base packs its refs point
+        into. Rebuilt when the listed times change.
+        """
+        times = tuple(self.world.times(refresh=True))
+        cached = getattr(self, "_served_packs", None)
+        if cached is not None and cached[0] == times:
+            return cached[1]
+        packs = set()
+        for t in times:
+            idx = self.world.load_time_index(t)
+            for ix in [idx] + _lod_levels_from_index(idx):
+                packs.add(normalize_path(_pack_path_from_index(ix)))
+                for e in ix.get("tiles", []):
+                    ref = e.get("ref")
+                    base = isinstance(ref, dict) and (
+                        ref.get("base_pack") or ref.get("pack") or ref.get("pack_path") or ref.get("path")
+                    )
+                    if base:
+                        packs.add(normalize_path(base))
+        frozen = frozenset(packs)
+        self._served_packs = (times, frozen)
+        return frozen
+
+    def pack_path(self, rel: str) -> str:
+        # only packs an index refers to: never other files under the root
+        path = normalize_path(rel)
+        if not path or path not in self.served_packs() or not self.world.storage.exists(path):
+            raise FileNotFoundError(rel)
+        return path
+
+
+class _TCPServer(_ServerMixin, ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class TileServer:
+    """
+    Serves one CIVD world (index metadata and raw tile frames) over HTTP on
+    TCP or a Unix socket, so several machines can read it without copying
+    packs. Frames are never decoded on the server.
+
+    Use World.open("http://host:port") or World.open("unix:///path.sock")
+    (civd.remote.RemoteWorld) on the client side. Bytes come from `storage`
+    (civd.storage; by default local files relative to the working directory,
+    so run it from the world directory).
+    """
+
+    def __init__(
+        self,
+        root: str = ".",
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        unix_socket: Optional[str] = None,
+        verbose: bool = False,
+        storage: Optional[Storage] = None,
+    ):
+        self.world = World.open(root, storage=storage)
+        if unix_socket is not None:
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            self._server = _UnixServer(unix_socket, _UnixHandler)
+            self.url = "unix://" + os.path.abspath(unix_socket)
+        else:
+            self._server = _TCPServer((host, int(port)), _Handler)
+            h, p = self._server.server_address[:2]
+            self.url = f"http://{h}:{p}"
+        self._server.world = self.world
+        self._server.verbose = verbose
+        self.unix_socket = unix_socket
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "TileServer":
+        """
+        Serve in a background daemon thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="civd-tileserver", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.unix_socket is not None and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+    def __enter__(self) -> "TileServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Serve a CIVD world over HTTP or a Unix socket.")
+    ap.add_argument("--root", default=".")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--unix", default=None, help="Unix socket path (instead of TCP)")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+
+    srv = TileServer(args.root, host=args.host, port=args.port, unix_socket=args.unix, verbose=args.verbose)
+    print(f"CIVD tile server: {srv.url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from civd.roi_shapes import ROIShape
+from civd.source import ROIBox
+
+
+GridDims = Tuple[int, int, int]
+
+# popcount of every byte value (np.bitwise_count needs numpy >= 2.0)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class TileSet:
+    """
+    Set of tile coordinates over one tile grid, stored as a packed bitset
+    (one bit per tile, linear key (tz*ny + ty)*nx + tx, like BrickMap).
+
+    Sets on the same grid combine with | (union), & (intersection),
+    - (difference) and ^ (symmetric difference); ~s is the complement within
+    the grid. A 256^3-tile grid costs 2 MiB, and every operation is a single
+    vectorized pass over the bytes.
+
+    `lod` records which pyramid level the grid belongs to, so World can
+    query a set without re-deriving it.
+    """
+
+    __slots__ = ("grid_dims", "lod", "bits")
+
+    def __init__(self, grid_dims: GridDims, bits: Optional[np.ndarray] = None, *, lod: int = 0):
+        self.grid_dims: GridDims = tuple(int(v) for v in grid_dims)
+        self.lod = int(lod)
+        nbytes = -(-self.size // 8)
+        if bits is None:
+            bits = np.zeros((nbytes,), dtype=np.uint8)
+        bits = np.asarray(bits, dtype=np.uint8).reshape(-1)
+        if bits.shape[0] != nbytes:
+            raise ValueError(f"bitset needs {nbytes} bytes for grid {self.grid_dims}, got {bits.shape[0]}")
+        self.bits = bits
+
+    # ---- construction ----
+
+    @classmethod
+    def empty(cls, grid_dims: GridDims, *, lod: int = 0) -> "TileSet":
+        return cls(grid_dims, lod=lod)
+
+    @classmethod
+    def full(cls, grid_dims: GridDims, *, lod: int = 0) -> "TileSet":
+        return cls.from_mask(np.ones(tuple(int(v) for v in grid_dims), dtype=bool), lod=lod)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray, *, lod: int = 0) -> "TileSet":
+        """
+        From a dense bool (nz, ny, nx) grid mask.
+        """
+        m = np.asarray(mask, dtype=bool)
+        if m.ndim != 3:
+            raise ValueError("mask must be (nz, ny, nx)")
+        return cls(m.shape, np.packbits(m.reshape(-1)), lod=lod)
+
+    @classmethod
+    def from_coords(cls, grid_dims: GridDims, coords: Union[np.ndarray, Iterable], *, lod: int = 0) -> "TileSet":
+        """
+        From (N, 3) tile coords; coords outside the grid are ignored.
+        """
+        out = cls(grid_dims, lod=lod)
+        c = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        nz, ny, nx = out.grid_dims
+        ok = (
+            (c[:, 0] >= 0) & (c[:, 0] < nz)
+            & (c[:, 1] >= 0) & (c[:, 1] < ny)
+            & (c[:, 2] >= 0) & (c[:, 2] < nx)
+        )
+        keys = (c[ok, 0] * ny + c[ok, 1]) * nx + c[ok, 2]
+        np.bitwise_or.at(out.bits, keys >> 3, (0x80 >> (keys & 7)).astype(np.uint8))
+        return out
+
+    @classmethod
+    def from_box(cls, grid_dims: GridDims, tz: range, ty: range, tx: range, *, lod: int = 0) -> "TileSet":
+        """
+        Every tile of a tile-coordinate box (clipped to the grid).
+        """
+        m = np.zeros(tuple(int(v) for v in grid_dims), dtype=bool)
+        m[max(0, tz.start):tz.stop, max(0, ty.start):ty.stop, max(0, tx.start):tx.stop] = True
+        return cls.from_mask(m, lod=lod)
+
+    @classmethod
+    def from_roi(
+        cls,
+        roi: Union[ROIBox, ROIShape],
+        tile_shape_zyx: Tuple[int, int, int],
+        vol_shape_zyx: Tuple[int, int, int],
+        *,
+        lod: int = 0,
+    ) -> "TileSet":
+        """
+        Grid tiles touching an ROI box or shape (voxels of the same level as
+        the tile grid).
+        """
+        sz, sy, sx = (int(v) for v in tile_shape_zyx)
+        Z, Y, X = (int(v) for v in vol_shape_zyx)
+        grid = (-(-Z // sz), -(-Y // sy), -(-X // sx))
+        shape = roi if isinstance(roi, ROIShape) else None
+        box = shape.bbox() if shape is not None else roi
+        z0, z1 = max(0, int(box.z0)), min(Z, int(box.z1))
+        y0, y1 = max(0, int(box.y0)), min(Y, int(box.y1))
+        x0, x1 = max(0, int(box.x0)), min(X, int(box.x1))
+        if z0 >= z1 or y0 >= y1 or x0 >= x1:
+            return cls(grid, lod=lod)
+        tz = range(z0 // sz, (z1 - 1) // sz + 1)
+        ty = range(y0 // sy, (y1 - 1) // sy + 1)
+        tx = range(x0 // sx, (x1 - 1) // sx + 1)
+        m = np.zeros(grid, dtype=bool)
+        if shape is None:
+            m[tz.start:tz.stop, ty.start:ty.stop, tx.start:tx.stop] = True
+        else:
+            m[tz.start:tz.stop, ty.start:ty.stop, tx.start:tx.stop] = shape.tile_mask(
+                tz, ty, tx, (sz, sy, sx), (Z, Y, X)
+            )
+        return cls.from_mask(m, lod=lod)
+
+    # ---- views ----
+
+    @property
+    def size(self) -> int:
+        nz, ny, nx = self.grid_dims
+        return nz * ny * nx
+
+    def dense(self) -> np.ndarray:
+        """
+        bool (nz, ny, nx) grid mask.
+        """
+        return np.unpackbits(self.bits, count=self.size).view(bool).reshape(self.grid_dims)
+
+    def keys(self) -> np.ndarray:
+        """
+        Sorted int64 linear keys of the members.
+        """
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.size)).astype(np.int64)
+
+    def coords(self) -> np.ndarray:
+        """
+        (N, 3) int32 tile coords of the members, in (tz, ty, tx) order.
+        """
+        k = self.keys()
+        _nz, ny, nx = self.grid_dims
+        return np.stack([k // (ny * nx), (k // nx) % ny, k % nx], axis=1).astype(np.int32)
+
+    def box(self) -> Tuple[range, range, range]:
+        """
+        Smallest tile-coordinate box holding every member (empty ranges for
+        an empty set).
+        """
+        m = self.dense()
+        if not m.any():
+            return (range(0, 0), range(0, 0), range(0, 0))
+        out = []
+        for axis in ((1, 2), (0, 2), (0, 1)):
+            nz = np.flatnonzero(m.any(axis=axis))
+            out.append(range(int(nz[0]), int(nz[-1]) + 1))
+        return (out[0], out[1], out[2])
+
+    def mask(self, tz: range, ty: range, tx: range) -> np.ndarray:
+        """
+        bool members over a tile-coordinate box (False outside the grid).
+        """
+        out = np.zeros((len(tz), len(ty), len(tx)), dtype=bool)
+        nz, ny, nx = self.grid_dims
+        z0, z1 = max(0, tz.start), min(nz, tz.stop)
+        y0, y1 = max(0, ty.start), min(ny, ty.stop)
+        x0, x1 = max(0, tx.start), min(nx, tx.stop)
+        if z0 < z1 and y0 < y1 and x0 < x1:
+            out[z0 - tz.start:z1 - tz.start, y0 - ty.start:y1 - ty.start, x0 - tx.start:x1 - tx.start] = (
+                self.dense()[z0:z1, y0:y1, x0:x1]
+            )
+        return out
+
+    # ---- set protocol ----
+
+    def __len__(self) -> int:
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def __bool__(self) -> bool:
+        return bool(self.bits.any())
+
+    def __contains__(self, tcoords: Tuple[int, int, int]) -> bool:
+        tz, ty, tx = (int(v) for v in tcoords)
+        nz, ny, nx = self.grid_dims
+        if not (0 <= tz < nz and 0 <= ty < ny and 0 <= tx < nx):
+            return False
+        k = (tz * ny + ty) * nx + tx
+        return bool(self.bits[k >> 3] & (0x80 >> (k & 7)))
+
+    def __iter__(self):
+        return (tuple(int(v) for v in c) for c in self.coords())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TileSet):
+            return NotImplemented
+        return self.grid_dims == other.grid_dims and self.lod == other.lod and np.array_equal(self.bits, other.bits)
+
+    def __repr__(self) -> str:
+        return f"TileSet(grid_dims={self.grid_dims}, lod={self.lod}, n={len(self)})"
+
+    def _check(self, other: "TileSet") -> None:
+        if not isinstance(other, TileSet):
+            raise TypeError(f"expected TileSet, got {type(other).__name__}")
+        if self.grid_dims != other.grid_dims or self.lod != other.lod:
+            raise ValueError(
+                f"tile sets are on different grids: {self.grid_dims}@lod{self.lod} vs {other.grid_dims}@lod{other.lod}"
+            )
+
+    def _new(self, bits: np.ndarray) -> "TileSet":
+        return TileSet(self.grid_dims, bits, lod=self.lod)
+
+    def __or__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        return self._new(self.bits | other.bits)
+
+    def __and__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        return self._new(self.bits & other.bits)
+
+    def __sub__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        return self._new(self.bits & ~other.bits)
+
+    def __xor__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        return self._new(self.bits ^ other.bits)
+
+    def __invert__(self) -> "TileSet":
+        out = ~self.bits
+        tail = self.size & 7
+        if tail:
+            # keep the padding bits of the last byte clear
+            out[-1] &= np.uint8((0xFF << (8 - tail)) & 0xFF)
+        return self._new(out)
+
+    def __ior__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        np.bitwise_or(self.bits, other.bits, out=self.bits)
+        return self
+
+    def __iand__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        np.bitwise_and(self.bits, other.bits, out=self.bits)
+        return self
+
+    def __isub__(self, other: "TileSet") -> "TileSet":
+        self._check(other)
+        np.bitwise_and(self.bits, ~other.bits, out=self.bits)
+        return self
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+
+    def copy(self) -> "TileSet":
+        return self._new(self.bits.copy())
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+STATS_FIELDS = ("min", "max", "mean")
+
+
+def _sub_shape3(subbrick: Any) -> Tuple[int, int, int]:
+    if isinstance(subbrick, (tuple, list)):
+        bz, by, bx = (int(v) for v in subbrick)
+    else:
+        bz = by = bx = int(subbrick)
+    if min(bz, by, bx) <= 0:
+        raise ValueError("stats subbrick edge must be > 0")
+    return (bz, by, bx)
+
+
+def compute_tile_stats(tile: np.ndarray, *, subbrick: Any = None) -> Dict[str, Any]:
+    """
+    Per-channel min/max/mean of one (z,y,x,C) tile, as stored in index entries
+    under "stats". subbrick=b (or (bz,by,bx)) also records the same statistics
+    for every b^3 sub-brick of the tile (ragged at the tile edge):
+
+      {"min": [C], "max": [C], "mean": [C],
+       "sub": {"shape_zyx": [bz,by,bx], "dims": [dz,dy,dx],
+               "min": [dz*dy*dx*C], "max": [...], "mean": [...]}}   # (dz,dy,dx,C) row-major
+    """
+    t = np.asarray(tile, dtype=np.float32)
+    C = int(t.shape[3])
+    flat = t.reshape(-1, C)
+
+    out: Dict[str, Any] = {
+        "min": [float(v) for v in flat.min(axis=0)],
+        "max": [float(v) for v in flat.max(axis=0)],
+        "mean": [float(v) for v in flat.mean(axis=0, dtype=np.float64)],
+    }
+
+    if subbrick:
+        bz, by, bx = _sub_shape3(subbrick)
+        Z, Y, X = t.shape[:3]
+        dz, dy, dx = -(-Z // bz), -(-Y // by), -(-X // bx)
+        padded = np.full((dz * bz, dy * by, dx * bx, C), np.nan, dtype=np.float32)
+        padded[:Z, :Y, :X] = t
+        blocks = padded.reshape(dz, bz, dy, by, dx, bx, C)
+        out["sub"] = {
+            "shape_zyx": [bz, by, bx],
+            "dims": [dz, dy, dx],
+            "min": np.nanmin(blocks, axis=(1, 3, 5)).ravel().tolist(),
+            "max": np.nanmax(blocks, axis=(1, 3, 5)).ravel().tolist(),
+            "mean": np.nanmean(blocks, axis=(1, 3, 5), dtype=np.float64).ravel().tolist(),
+        }
+
+    return out
+
+
+def stats_meta(*, subbrick: Any = None) -> Dict[str, Any]:
+    """
+    grid["tile_stats"] marker written next to entries that carry "stats".
+    """
+    return {
+        "fields": list(STATS_FIELDS),
+        "subbrick_zyx": list(_sub_shape3(subbrick)) if subbrick else None,
+    }
+
+
+def entry_stats(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    st = entry.get("stats")
+    if isinstance(st, dict) and all(isinstance(st.get(k), list) for k in STATS_FIELDS):
+        return st
+    return None
+
+
+def _range_hits(vmin, vmax, lo: Optional[float], hi: Optional[float]):
+    ok = True
+    if lo is not None:
+        ok = ok & (vmax >= lo)
+    if hi is not None:
+        ok = ok & (vmin <= hi)
+    return ok
+
+
+def may_contain(entry: Dict[str, Any], channel: int, lo: Optional[float] = None, hi: Optional[float] = None) -> bool:
+    """
+    False only if the entry's stats prove no voxel of `channel` lies in
+    [lo, hi] (either side may be None). Entries without stats return True.
+    """
+    st = entry_stats(entry)
+    if st is None:
+        return True
+    c = int(channel)
+    return bool(_range_hits(st["min"][c], st["max"][c], lo, hi))
+
+
+def subbrick_mask(
+    entry: Dict[str, Any],
+    channel: int,
+    lo: Optional[float] = None,
+    hi: Optional[float] = None,
+) -> Optional[Tuple[Tuple[int, int, int], np.ndarray]]:
+    """
+    ((bz,by,bx), bool (dz,dy,dx)) of sub-bricks that may hold values of
+    `channel` in [lo, hi], or None when the entry has no sub-brick stats.
+    """
+    st = entry_stats(entry)
+    sub = st.get("sub") if st else None
+    if not isinstance(sub, dict):
+        return None
+    dims = tuple(int(v) for v in sub["dims"])
+    shape = tuple(int(v) for v in sub["shape_zyx"])
+    C = len(st["min"])
+    vmin = np.asarray(sub["min"], dtype=np.float32).reshape(*dims, C)[..., int(channel)]
+    vmax = np.asarray(sub["max"], dtype=np.float32).reshape(*dims, C)[..., int(channel)]
+    return shape, np.asarray(_range_hits(vmin, vmax, lo, hi), dtype=bool)
+
+
+def stats_arrays(entries: Sequence[Dict[str, Any]], C: int) -> Dict[str, np.ndarray]:
+    """
+    Stack entry stats into arrays: min/max/mean float32 (N,C) (NaN where an
+    entry has no stats) and has_stats bool (N,).
+    """
+    n = len(entries)
+    out = {k: np.full((n, C), np.nan, dtype=np.float32) for k in STATS_FIELDS}
+    has = np.zeros((n,), dtype=bool)
+    for i, e in enumerate(entries):
+        st = entry_stats(e)
+        if st is None:
+            continue
+        has[i] = True
+        for k in STATS_FIELDS:
+            out[k][i] = st[k]
+    out["has_stats"] = has
+    return out
+
+
+def empty_tile_stats(shape_zyxc: Sequence[int], fill: float, *, subbrick: Any = None) -> Dict[str, Any]:
+    """
+    Stats of a tile made only of `fill` (brick-map tombstones).
+    """
+    return compute_tile_stats(np.full(tuple(int(v) for v in shape_zyxc), fill, dtype=np.float32), subbrick=subbrick)
+
+
+def validate_entry_stats(st: Any, C: int, ctx: str) -> List[str]:
+    """
+    Problems with an entry's "stats" block (empty list if it is well formed).
+    """
+    errs: List[str] = []
+    if not isinstance(st, dict):
+        return [f"{ctx} stats must be an object"]
+    for k in STATS_FIELDS:
+        v = st.get(k)
+        if not (isinstance(v, list) and len(v) == C):
+            errs.append(f"{ctx} stats.{k} must be a list of {C} numbers")
+    sub = st.get("sub")
+    if sub is not None:
+        dims = sub.get("dims") if isinstance(sub, dict) else None
+        if not (isinstance(dims, list) and len(dims) == 3):
+            errs.append(f"{ctx} stats.sub.dims must be [dz,dy,dx]")
+        else:
+            n = int(np.prod([int(d) for d in dims])) * C
+            for k in STATS_FIELDS:
+                v = sub.get(k)
+                if not (isinstance(v, list) and len(v) == n):
+                    errs.append(f"{ctx} stats.sub.{k} must be a list of {n} numbers")
+    return errs
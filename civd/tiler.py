@@ -1,11 +1,16 @@
 import json
 import os
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import zstandard as zstd
 
+from civd.codec import tile_codec, tile_frame_bytes
+from civd.lod import build_pyramid
+from civd.tile_index import LAYOUT_BRICKMAP
+from civd.tile_stats import compute_tile_stats, stats_meta
+
 
 @dataclass(frozen=True)
 class TileSpec:
@@ -15,44 +20,230 @@ class TileSpec:
     channels: int = 2  # density + semantic-as-float32
 
 
+def _grid_dims(vol_shape_zyxc: Tuple[int, int, int, int], spec: TileSpec) -> Tuple[int, int, int]:
+    # ceil: non-divisible volumes get ragged (smaller) edge tiles
+    Z, Y, X, _C = vol_shape_zyxc
+    return (-(-Z // spec.tile_z), -(-Y // spec.tile_y), -(-X // spec.tile_x))
+
+
 def _iter_tile_bounds(vol_shape_zyxc: Tuple[int, int, int, int], spec: TileSpec):
+    """
+    Yield (tile_id, bounds, tcoords, grid) for every tile of the volume.
+
+    Tiles may be anisotropic (tile_z/tile_y/tile_x differ). Volumes that are not
+    divisible by the tile shape get ragged edge tiles whose bounds are clipped
+    to the volume.
+    """
     Z, Y, X, C = vol_shape_zyxc
     assert C == spec.channels, f"Expected C={spec.channels}, got C={C}"
 
-    if (Z % spec.tile_z) or (Y % spec.tile_y) or (X % spec.tile_x):
-        raise ValueError(
-            f"Volume shape {vol_shape_zyxc} must be divisible by tile size "
-            f"({spec.tile_z},{spec.tile_y},{spec.tile_x})."
-        )
+    if min(spec.tile_z, spec.tile_y, spec.tile_x) <= 0:
+        raise ValueError(f"Tile shape must be positive, got ({spec.tile_z},{spec.tile_y},{spec.tile_x}).")
 
-    nz = Z // spec.tile_z
-    ny = Y // spec.tile_y
-    nx = X // spec.tile_x
+    nz, ny, nx = _grid_dims(vol_shape_zyxc, spec)
 
     for tz in range(nz):
         z0 = tz * spec.tile_z
-        z1 = z0 + spec.tile_z
+        z1 = min(Z, z0 + spec.tile_z)
         for ty in range(ny):
             y0 = ty * spec.tile_y
-            y1 = y0 + spec.tile_y
+            y1 = min(Y, y0 + spec.tile_y)
             for tx in range(nx):
                 x0 = tx * spec.tile_x
-                x1 = x0 + spec.tile_x
+                x1 = min(X, x0 + spec.tile_x)
                 tile_id = f"z{tz:02d}_y{ty:02d}_x{tx:02d}"
                 yield tile_id, (z0, z1, y0, y1, x0, x1), (tz, ty, tx), (nz, ny, nx)
 
 
+def _is_empty_tile(tile: np.ndarray, empty_value: float) -> bool:
+    return bool(np.all(tile == np.float32(empty_value)))
+
+
+def _iter_vol_tiles(vol: np.ndarray, spec: TileSpec, *, empty_value: Optional[float] = None):
+    """
+    Yield (tile_id, bounds, tcoords, tile) for vol. With empty_value set
+    (sparse/brickmap layout), tiles made only of empty_value are skipped.
+    """
+    for tile_id, bounds, tcoords, grid in _iter_tile_bounds(vol.shape, spec):
+        z0, z1, y0, y1, x0, x1 = bounds
+        tile = vol[z0:z1, y0:y1, x0:x1, :]  # float32 tile
+        if empty_value is not None and _is_empty_tile(tile, empty_value):
+            continue
+        yield tile_id, bounds, tcoords, tile
+
+
+def _write_tile_arrays(
+    fpack,
+    tiles,
+    spec: TileSpec,
+    cctx,
+    *,
+    byte_offset: int,
+    codec_level: int,
+    stats: Optional[int] = None,
+    tile_layout: str = "zyxc",
+) -> Tuple[List[Dict], int]:
+    """
+    Compress (tile_id, bounds, tcoords, tile) items into fpack starting at byte_offset.
+    stats: None = no value statistics, 0 = per-tile min/max/mean, b > 0 = also
+    per b^3 sub-brick (see civd.tile_stats).
+    tile_layout="czyx" stores each frame planar, channels first (civd.codec).
+    Returns (tile entries, next byte offset).
+    """
+    tile_entries: List[Dict] = []
+
+    for tile_id, bounds, tcoords, tile in tiles:
+        z0, z1, y0, y1, x0, x1 = bounds
+        # Ensure contiguous bytes for consistent compression
+        tile = np.ascontiguousarray(tile, dtype=np.float32)
+
+        raw = tile_frame_bytes(tile, tile_layout)
+        comp = cctx.compress(raw)
+
+        fpack.write(comp)
+
+        entry = {
+            "tile_id": tile_id,
+            "tile_coords": {"tz": tcoords[0], "ty": tcoords[1], "tx": tcoords[2]},
+            "bounds": {"z0": z0, "z1": z1, "y0": y0, "y1": y1, "x0": x0, "x1": x1},
+            "shape_zyxc": [z1 - z0, y1 - y0, x1 - x0, spec.channels],
+            "dtype": "float32",
+            "codec": tile_codec(codec_level, tile_layout),
+            "offset": byte_offset,
+            "length": len(comp),
+            "raw_nbytes": len(raw),
+        }
+        if stats is not None:
+            entry["stats"] = compute_tile_stats(tile, subbrick=stats)
+        tile_entries.append(entry)
+        byte_offset += len(comp)
+
+    return tile_entries, byte_offset
+
+
+def _write_tiles(
+    fpack,
+    vol: np.ndarray,
+    spec: TileSpec,
+    cctx,
+    *,
+    byte_offset: int,
+    codec_level: int,
+    empty_value: Optional[float] = None,
+    stats: Optional[int] = None,
+    tile_layout: str = "zyxc",
+) -> Tuple[List[Dict], int]:
+    """
+    Compress every (non-empty, if empty_value is set) tile of vol into fpack.
+    Returns (tile entries, next byte offset).
+    """
+    return _write_tile_arrays(
+        fpack,
+        _iter_vol_tiles(vol, spec, empty_value=empty_value),
+        spec,
+        cctx,
+        byte_offset=byte_offset,
+        codec_level=codec_level,
+        stats=stats,
+        tile_layout=tile_layout,
+    )
+
+
+def _grid_meta(
+    shape_zyxc: Tuple[int, int, int, int],
+    spec: TileSpec,
+    tile_count: int,
+    *,
+    empty_value: Optional[float] = None,
+    stats: Optional[int] = None,
+) -> Dict:
+    nz, ny, nx = _grid_dims(shape_zyxc, spec)
+    grid = {
+        "nz": nz, "ny": ny, "nx": nx,
+        "tile_count": tile_count,
+        "tile_shape_zyx": [spec.tile_z, spec.tile_y, spec.tile_x],
+    }
+    # tile_size is only meaningful for cubic tiles (civd.index.v1 readers)
+    if spec.tile_z == spec.tile_y == spec.tile_x:
+        grid["tile_size"] = spec.tile_z
+    # sparse worlds: only occupied tiles are listed; absent tiles read as empty_value
+    if empty_value is not None:
+        grid["layout"] = LAYOUT_BRICKMAP
+        grid["empty_value"] = float(empty_value)
+    # entries carry per-tile value statistics ("stats")
+    if stats is not None:
+        grid["tile_stats"] = stats_meta(subbrick=stats)
+    return grid
+
+
+def _lod_level_meta(
+    level: int,
+    vol: np.ndarray,
+    spec: TileSpec,
+    entries: List[Dict],
+    *,
+    pack_path: str,
+    section: Tuple[int, int],
+    empty_value: Optional[float] = None,
+    stats: Optional[int] = None,
+) -> Dict:
+    """
+    One LOD level, shaped like an index (volume/grid/pack/tiles) so readers can
+    treat it as a sub-index of its own. All levels share the level-0 pack file;
+    `pack.section` is the byte range the level occupies inside it.
+    """
+    shape = [int(v) for v in vol.shape]
+    return {
+        "level": level,
+        "scale": 2 ** level,
+        "volume": {"shape_zyxc": shape, "dtype": "float32"},
+        "tile_spec": {"tile_z": spec.tile_z, "tile_y": spec.tile_y, "tile_x": spec.tile_x, "channels": spec.channels},
+        "grid": _grid_meta(tuple(shape), spec, len(entries), empty_value=empty_value, stats=stats),
+        "pack": {
+            "path": pack_path,
+            "format": "concat_zstd_frames",
+            "section": {"offset": int(section[0]), "length": int(section[1] - section[0])},
+        },
+        "tiles": entries,
+    }
+
+
 def build_tiles(
     volume_path: str = "data/volume.npy",
     out_dir: str = "data/civd_tiles",
     spec: TileSpec = TileSpec(),
     codec_level: int = 3,
+    lod_levels: int = 0,
+    label_channels: Tuple[int, ...] = (1,),
+    label_reduce: str = "max",
+    sparse: bool = False,
+    empty_value: float = 0.0,
+    tile_stats: bool = True,
+    stats_subbrick: int = 0,
+    tile_layout: str = "zyxc",
 ) -> Dict:
     """
     Writes:
       - tiles.zstpack  (concatenated compressed tiles)
       - index.json     (tile metadata + byte offsets for random access)
 
+    tile_layout="czyx" stores tiles planar (channels first; flagged in each
+    tile's codec), so channels-first reads (World.query(layout="czyx"))
+    decode without a transpose. Readers handle both layouts.
+
+    tile_stats=True stores per-channel min/max/mean in every tile entry
+    ("stats"), and per stats_subbrick^3 sub-brick if stats_subbrick > 0, so
+    threshold/value queries can skip tiles without decoding them.
+
+    sparse=True writes a brick-map index (grid.layout="brickmap"): tiles made
+    only of empty_value are not stored or listed, and readers treat them as
+    empty. Index size and ROI query cost then follow occupied space.
+
+    lod_levels > 0 also builds a mip pyramid (civd.lod): level k is the volume
+    downsampled 2**k (mean for density, label_reduce for label_channels),
+    tiled with the same TileSpec and appended to the pack as its own section.
+    Levels are listed under index["lod"]["levels"].
+
     Returns:
       index dict (also written to index.json)
     """
@@ -72,40 +263,151 @@ def build_tiles(
     pack_path = os.path.join(out_dir, "tiles.zstpack")
     index_path = os.path.join(out_dir, "index.json")
 
-    tile_entries: List[Dict] = []
-    byte_offset = 0
+    levels: List[Dict] = []
+    empty = float(empty_value) if sparse else None
+    stats = int(stats_subbrick) if tile_stats else None
 
     with open(pack_path, "wb") as fpack:
-        for tile_id, bounds, tcoords, grid in _iter_tile_bounds(vol.shape, spec):
-            z0, z1, y0, y1, x0, x1 = bounds
-            tile = vol[z0:z1, y0:y1, x0:x1, :]  # float32 tile
-            # Ensure contiguous bytes for consistent compression
-            tile = np.ascontiguousarray(tile)
-
-            raw = tile.tobytes(order="C")
-            comp = cctx.compress(raw)
-
-            fpack.write(comp)
-
-            entry = {
-                "tile_id": tile_id,
-                "tile_coords": {"tz": tcoords[0], "ty": tcoords[1], "tx": tcoords[2]},
-                "bounds": {"z0": z0, "z1": z1, "y0": y0, "y1": y1, "x0": x0, "x1": x1},
-                "shape_zyxc": [spec.tile_z, spec.tile_y, spec.tile_x, spec.channels],
-                "dtype": "float32",
-                "codec": {"name": "zstd", "level": codec_level},
-                "offset": byte_offset,
-                "length": len(comp),
-                "raw_nbytes": len(raw),
-            }
-            tile_entries.append(entry)
-            byte_offset += len(comp)
+        tile_entries, byte_offset = _write_tiles(
+            fpack, vol, spec, cctx, byte_offset=0, codec_level=codec_level, empty_value=empty, stats=stats,
+            tile_layout=tile_layout,
+        )
+
+        for k, lvol in enumerate(
+            build_pyramid(vol, lod_levels, label_channels=label_channels, label_reduce=label_reduce), start=1
+        ):
+            start = byte_offset
+            entries, byte_offset = _write_tiles(
+                fpack, lvol, spec, cctx, byte_offset=start, codec_level=codec_level, empty_value=empty, stats=stats,
+                tile_layout=tile_layout,
+            )
+            levels.append(_lod_level_meta(
+                k, lvol, spec, entries, pack_path=pack_path, section=(start, byte_offset),
+                empty_value=empty, stats=stats,
+            ))
 
     index = {
         "schema": "civd.phase_c.tilepack.v1",
         "volume": {"path": volume_path, "shape_zyxc": [Z, Y, X, C], "dtype": "float32"},
         "tile_spec": {"tile_z": spec.tile_z, "tile_y": spec.tile_y, "tile_x": spec.tile_x, "channels": spec.channels},
-        "grid": {"nz": Z // spec.tile_z, "ny": Y // spec.tile_y, "nx": X // spec.tile_x, "tile_count": len(tile_entries)},
+        "grid": _grid_meta((Z, Y, X, C), spec, len(tile_entries), empty_value=empty, stats=stats),
+        "pack": {"path": pack_path, "format": "concat_zstd_frames"},
+        "tiles": tile_entries,
+    }
+    if levels:
+        index["lod"] = {
+            "label_channels": [int(c) for c in label_channels],
+            "label_reduce": label_reduce,
+            "levels": levels,
+        }
+
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+    return index
+
+
+def _iter_point_tiles(
+    points_zyx: np.ndarray,
+    values: np.ndarray,
+    shape_zyx: Tuple[int, int, int],
+    spec: TileSpec,
+    empty_value: float,
+):
+    """
+    Bin voxel points into tiles and yield (tile_id, bounds, tcoords, tile) for
+    occupied tiles only, in (tz,ty,tx) order. Later points win on duplicates.
+    """
+    Z, Y, X = shape_zyx
+    nz, ny, nx = _grid_dims((Z, Y, X, spec.channels), spec)
+
+    tcoords = points_zyx // np.array([spec.tile_z, spec.tile_y, spec.tile_x], dtype=np.int64)
+    keys = (tcoords[:, 0] * ny + tcoords[:, 1]) * nx + tcoords[:, 2]
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    pts = points_zyx[order]
+    vals = values[order]
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros((0,), dtype=np.int64)
+    ends = np.r_[starts[1:], len(keys)]
+
+    for a, b in zip(starts, ends):
+        key = int(keys[a])
+        tz, rem = divmod(key, ny * nx)
+        ty, tx = divmod(rem, nx)
+        z0, y0, x0 = tz * spec.tile_z, ty * spec.tile_y, tx * spec.tile_x
+        z1, y1, x1 = min(Z, z0 + spec.tile_z), min(Y, y0 + spec.tile_y), min(X, x0 + spec.tile_x)
+
+        tile = np.full((z1 - z0, y1 - y0, x1 - x0, spec.channels), empty_value, dtype=np.float32)
+        p = pts[a:b]
+        tile[p[:, 0] - z0, p[:, 1] - y0, p[:, 2] - x0, :] = vals[a:b]
+        tile_id = f"z{tz:02d}_y{ty:02d}_x{tx:02d}"
+        yield tile_id, (z0, z1, y0, y1, x0, x1), (tz, ty, tx), tile
+
+
+def build_tiles_from_points(
+    points_zyx: np.ndarray,
+    values: np.ndarray,
+    shape_zyx: Tuple[int, int, int],
+    out_dir: str = "data/civd_tiles",
+    spec: TileSpec = TileSpec(),
+    codec_level: int = 3,
+    empty_value: float = 0.0,
+    tile_stats: bool = True,
+    stats_subbrick: int = 0,
+    tile_layout: str = "zyxc",
+) -> Dict:
+    """
+    Build a sparse (brick-map) tile pack straight from voxel points, without
+    materializing the dense volume. Intended for LiDAR-style maps.
+
+    - points_zyx: (N,3) integer voxel coordinates inside shape_zyx
+    - values: (N,C) float32 per-point channels (or (N,) for C=1)
+    Voxels not covered by any point read as empty_value.
+
+    Writes tiles.zstpack + index.json like build_tiles(sparse=True).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    Z, Y, X = (int(v) for v in shape_zyx)
+    pts = np.asarray(points_zyx).astype(np.int64, copy=False).reshape(-1, 3)
+    vals = np.asarray(values, dtype=np.float32)
+    if vals.ndim == 1:
+        vals = vals[:, None]
+    if vals.shape != (pts.shape[0], spec.channels):
+        raise ValueError(f"values must be shaped ({pts.shape[0]}, {spec.channels}), got {vals.shape}")
+    inside = (
+        (pts[:, 0] >= 0) & (pts[:, 0] < Z)
+        & (pts[:, 1] >= 0) & (pts[:, 1] < Y)
+        & (pts[:, 2] >= 0) & (pts[:, 2] < X)
+    )
+    if not bool(np.all(inside)):
+        raise ValueError(f"points_zyx outside volume shape {(Z, Y, X)}")
+
+    cctx = zstd.ZstdCompressor(level=codec_level)
+    stats = int(stats_subbrick) if tile_stats else None
+
+    pack_path = os.path.join(out_dir, "tiles.zstpack")
+    index_path = os.path.join(out_dir, "index.json")
+
+    with open(pack_path, "wb") as fpack:
+        tile_entries, _ = _write_tile_arrays(
+            fpack,
+            _iter_point_tiles(pts, vals, (Z, Y, X), spec, float(empty_value)),
+            spec,
+            cctx,
+            byte_offset=0,
+            codec_level=codec_level,
+            stats=stats,
+            tile_layout=tile_layout,
+        )
+
+    C = spec.channels
+    index = {
+        "schema": "civd.phase_c.tilepack.v1",
+        "volume": {"path": None, "source": "points", "shape_zyxc": [Z, Y, X, C], "dtype": "float32"},
+        "tile_spec": {"tile_z": spec.tile_z, "tile_y": spec.tile_y, "tile_x": spec.tile_x, "channels": C},
+        "grid": _grid_meta((Z, Y, X, C), spec, len(tile_entries), empty_value=float(empty_value), stats=stats),
         "pack": {"path": pack_path, "format": "concat_zstd_frames"},
         "tiles": tile_entries,
     }
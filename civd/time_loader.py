@@ -2,18 +2,17 @@ from __future__ import annotations
 
 import os, json
 import numpy as np
-import zstandard as zstd
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 
-def load_index(path: str) -> Dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+from civd.codec import check_layout, frame_layout
+from civd.storage import Storage, get_storage, normalize_path
 
+def load_index(path: str, storage: Optional[Storage] = None) -> Dict:
+    return (storage or get_storage()).read_json(path)
 
-def _read_comp_slice(pack_path: str, offset: int, length: int) -> bytes:
-    with open(pack_path, "rb") as f:
-        f.seek(offset)
-        return f.read(length)
+
+def _read_comp_slice(pack_path: str, offset: int, length: int, storage: Optional[Storage] = None) -> bytes:
+    return (storage or get_storage()).read(pack_path, offset, length)
 
 def _pack_path_from_index(idx: Dict[str, Any]) -> str:
     """
@@ -51,39 +50,86 @@ def _pack_path_from_index(idx: Dict[str, Any]) -> str:
 
     raise KeyError("Could not resolve pack path from index (expected idx.pack.path or equivalent)")
 
-def decode_tile_from_entry(entry: Dict, idx: Dict) -> tuple[np.ndarray, dict]:
+def tile_shape_from_index(idx: Dict) -> Tuple[int, int, int]:
     """
-    Decode a tile entry for the current time index.
+    Nominal (tile_z, tile_y, tile_x) of an index grid.
+
+    Supports:
+      - idx["grid"]["tile_shape_zyx"]   (anisotropic grids)
+      - idx["tile_spec"]{tile_z,tile_y,tile_x}
+      - idx["grid"]["tile_size"]        (cubic civd.index.v1)
+    """
+    grid = idx.get("grid")
+    if isinstance(grid, dict):
+        ts = grid.get("tile_shape_zyx")
+        if isinstance(ts, (list, tuple)) and len(ts) == 3:
+            return (int(ts[0]), int(ts[1]), int(ts[2]))
+
+    spec = idx.get("tile_spec")
+    if isinstance(spec, dict) and all(k in spec for k in ("tile_z", "tile_y", "tile_x")):
+        return (int(spec["tile_z"]), int(spec["tile_y"]), int(spec["tile_x"]))
+
+    if isinstance(grid, dict) and "tile_size" in grid:
+        t = int(grid["tile_size"])
+        return (t, t, t)
+
+    raise KeyError("index has no tile shape (grid.tile_shape_zyx, tile_spec or grid.tile_size)")
+
+
+def _tile_shape_zyxc(entry: Dict, idx: Dict) -> Tuple[int, int, int, int]:
+    """
+    Decoded shape of one tile. Ragged edge tiles are smaller than the grid's
+    nominal tile shape, so per-entry shape/bounds win over the grid.
+    """
+    C = int(idx["volume"]["shape_zyxc"][3])
+
+    shape = entry.get("shape_zyxc")
+    if isinstance(shape, (list, tuple)) and len(shape) == 4:
+        return (int(shape[0]), int(shape[1]), int(shape[2]), int(shape[3]))
+
+    b = entry.get("bounds_zyx", entry.get("bounds"))
+    if isinstance(b, (list, tuple)) and len(b) == 6:
+        return (int(b[1]) - int(b[0]), int(b[3]) - int(b[2]), int(b[5]) - int(b[4]), C)
+    if isinstance(b, dict) and all(k in b for k in ("z0", "z1", "y0", "y1", "x0", "x1")):
+        return (int(b["z1"]) - int(b["z0"]), int(b["y1"]) - int(b["y0"]), int(b["x1"]) - int(b["x0"]), C)
+
+    tz, ty, tx = tile_shape_from_index(idx)
+    return (tz, ty, tx, C)
+
+
+def resolve_tile_frame(entry: Dict, idx: Dict, storage: Optional[Storage] = None) -> Dict:
+    """
+    Locate the compressed frame behind a tile entry without reading it.
+    Pack paths come back normalized (storage.normalize_path).
+
+    Returns a location dict:
+      {"pack", "offset", "length", "shape_zyxc", "codec", "ref_mode"}
+    or, for brick-map tombstones, {"ref_mode": "empty", "shape_zyxc", "fill"}.
 
     Supports:
       - Direct tile payload: {offset,length,codec?} in the current pack
       - Ref to base pack slice (Phase D reuse): ref={base_pack,offset,length,codec?}
       - Ref to other time by (time,id): ref={time|base_timestamp, id|tile_id}
+      - Brick-map tombstone: {"empty": true} decodes to grid.empty_value
     """
-    # --- helpers ---
-    def _shape_and_tile_size(_idx: Dict) -> tuple[int, int]:
-        shape_zyxc = _idx["volume"]["shape_zyxc"]
-        C = int(shape_zyxc[3])
-        tile_size = int(_idx["grid"]["tile_size"])
-        return C, tile_size
-
-    # --- current pack path ---
-    pack_path = _pack_path_from_index(idx)
-
     # --- normalize ---
     ref = entry.get("ref", None)
 
+    # Brick-map tombstone: tile became empty at this time (no payload)
+    if entry.get("empty"):
+        fill = float((idx.get("grid") or {}).get("empty_value", 0.0))
+        return {"ref_mode": "empty", "shape_zyxc": _tile_shape_zyxc(entry, idx), "fill": fill}
+
     # If entry has direct bytes in current pack, use them
     if "offset" in entry and "length" in entry:
-        offset = int(entry["offset"])
-        length = int(entry["length"])
-        C, tile_size = _shape_and_tile_size(idx)
-
-        comp = _read_comp_slice(pack_path, offset, length)
-        raw = zstd.ZstdDecompressor().decompress(comp)
-        arr = np.frombuffer(raw, dtype=np.float32).reshape((tile_size, tile_size, tile_size, C))
-        stats = {"bytes_read": length, "decoded_bytes": int(arr.nbytes), "ref_mode": "direct"}
-        return arr, stats
+        return {
+            "pack": normalize_path(_pack_path_from_index(idx)),
+            "offset": int(entry["offset"]),
+            "length": int(entry["length"]),
+            "shape_zyxc": _tile_shape_zyxc(entry, idx),
+            "codec": entry.get("codec", {"name": "zstd"}),
+            "ref_mode": "direct",
+        }
 
     # If no ref, we cannot decode
     if ref is None:
@@ -101,17 +147,14 @@ def decode_tile_from_entry(entry: Dict, idx: Dict) -> tuple[np.ndarray, dict]:
         base_len = ref.get("length")
 
         if base_pack is not None and base_off is not None and base_len is not None:
-            pack2 = str(base_pack).replace("\\", "/")
-            offset2 = int(base_off)
-            length2 = int(base_len)
-
-            C, tile_size = _shape_and_tile_size(idx)
-
-            comp = _read_comp_slice(pack2, offset2, length2)
-            raw = zstd.ZstdDecompressor().decompress(comp)
-            arr = np.frombuffer(raw, dtype=np.float32).reshape((tile_size, tile_size, tile_size, C))
-            stats = {"bytes_read": length2, "decoded_bytes": int(arr.nbytes), "ref_mode": "pack_slice"}
-            return arr, stats
+            return {
+                "pack": normalize_path(base_pack),
+                "offset": int(base_off),
+                "length": int(base_len),
+                "shape_zyxc": _tile_shape_zyxc(entry, idx),
+                "codec": ref.get("codec", {"name": "zstd"}),
+                "ref_mode": "pack_slice",
+            }
 
         # --- fallback: ref points to another time by (time,id) ---
         ref_time = (
@@ -134,8 +177,8 @@ def decode_tile_from_entry(entry: Dict, idx: Dict) -> tuple[np.ndarray, dict]:
 
         # Load base index and decode from that time's pack using id lookup
         base_index_path = os.path.join("data", "civd_time", str(ref_time), "index.json")
-        base_idx = load_index(base_index_path)
-        base_pack_path = _pack_path_from_index(base_idx)
+        base_idx = load_index(base_index_path, storage)
+        base_pack_path = normalize_path(_pack_path_from_index(base_idx))
 
         # build lookup dict for base tiles
         tiles = base_idx.get("tiles", [])
@@ -154,19 +197,86 @@ def decode_tile_from_entry(entry: Dict, idx: Dict) -> tuple[np.ndarray, dict]:
         if "offset" not in found or "length" not in found:
             raise KeyError("base tile entry missing offset/length")
 
-        offset3 = int(found["offset"])
-        length3 = int(found["length"])
-        C, tile_size = _shape_and_tile_size(base_idx)
-
-        comp = _read_comp_slice(base_pack_path, offset3, length3)
-        raw = zstd.ZstdDecompressor().decompress(comp)
-        arr = np.frombuffer(raw, dtype=np.float32).reshape((tile_size, tile_size, tile_size, C))
-        stats = {"bytes_read": length3, "decoded_bytes": int(arr.nbytes), "ref_mode": "time_id"}
-        return arr, stats
+        return {
+            "pack": base_pack_path,
+            "offset": int(found["offset"]),
+            "length": int(found["length"]),
+            "shape_zyxc": _tile_shape_zyxc(found, base_idx),
+            "codec": found.get("codec", {"name": "zstd"}),
+            "ref_mode": "time_id",
+        }
 
     # --- ref as string/tuple/etc not supported in this build ---
     raise KeyError(f"Unresolvable ref type: {type(ref).__name__} value={ref!r}")
 
+
+def read_tile_frame(entry: Dict, idx: Dict, storage: Optional[Storage] = None) -> Tuple[Optional[bytes], Dict]:
+    """
+    Read the compressed frame of a tile entry (no decompression).
+    Returns (frame bytes or None for tombstones, location dict from resolve_tile_frame).
+    """
+    loc = resolve_tile_frame(entry, idx, storage)
+    if loc["ref_mode"] == "empty":
+        return None, loc
+    return _read_comp_slice(loc["pack"], loc["offset"], loc["length"], storage), loc
+
+
+def read_tile_frames(
+    entries: Sequence[Dict],
+    idx: Dict,
+    storage: Optional[Storage] = None,
+) -> List[Tuple[Optional[bytes], Dict]]:
+    """
+    read_tile_frame for many entries as one Storage.read_many batch, so the
+    backend can merge, reorder or prefetch the reads.
+    """
+    st = storage or get_storage()
+    locs = [resolve_tile_frame(e, idx, st) for e in entries]
+    want = [i for i, loc in enumerate(locs) if loc["ref_mode"] != "empty"]
+    data = st.read_many([(locs[i]["pack"], locs[i]["offset"], locs[i]["length"]) for i in want])
+    out: List[Tuple[Optional[bytes], Dict]] = [(None, loc) for loc in locs]
+    for i, comp in zip(want, data):
+        out[i] = (comp, locs[i])
+    return out
+
+
+def decode_frame(comp: Optional[bytes], loc: Dict, layout: str = "zyxc") -> np.ndarray:
+    """
+    Decode a frame returned by read_tile_frame into a (tz,ty,tx,C) float32
+    array, or (C,tz,ty,tx) with layout="czyx". Frames stored planar
+    (codec layout "czyx", civd.codec) decode natively to czyx; asking for
+    the other layout returns a transposed view, never a copy.
+    """
+    check_layout(layout)
+    tz, ty, tx, c = (int(v) for v in loc["shape_zyxc"])
+    if comp is None:
+        shape = (c, tz, ty, tx) if layout == "czyx" else (tz, ty, tx, c)
+        return np.full(shape, loc.get("fill", 0.0), dtype=np.float32)
+    import zstandard as zstd  # deferred: only paid by the first decode
+
+    raw = zstd.ZstdDecompressor().decompress(comp)
+    if frame_layout(loc.get("codec")) == "czyx":
+        arr = np.frombuffer(raw, dtype=np.float32).reshape(c, tz, ty, tx)
+        return arr if layout == "czyx" else np.moveaxis(arr, 0, -1)
+    arr = np.frombuffer(raw, dtype=np.float32).reshape(tz, ty, tx, c)
+    return np.moveaxis(arr, -1, 0) if layout == "czyx" else arr
+
+
+def decode_tile_from_entry(entry: Dict, idx: Dict, storage: Optional[Storage] = None) -> tuple[np.ndarray, dict]:
+    """
+    Decode a tile entry for the current time index.
+
+    See resolve_tile_frame for the supported entry/ref layouts.
+    """
+    comp, loc = read_tile_frame(entry, idx, storage)
+    arr = decode_frame(comp, loc)
+    stats = {
+        "bytes_read": int(loc.get("length", 0)),
+        "decoded_bytes": int(arr.nbytes),
+        "ref_mode": loc["ref_mode"],
+    }
+    return arr, stats
+
 def decode_tiles(index_path: str, tile_entries: List[Dict]) -> List[np.ndarray]:
     """
     Decode a list of tile entries given an index.json path.
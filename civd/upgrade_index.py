@@ -8,6 +8,7 @@ from typing import Any, Dict, List
 from civd.schema import (
     SCHEMA_INDEX_V1,
     _as_int_list6,
+    infer_tile_shape_from_bounds,
     infer_tile_size_from_bounds,
     verify_index_v1,
 )
@@ -42,40 +43,43 @@ def infer_tile_size(idx: Dict[str, Any], default_ts: int = 32) -> int:
     return int(default_ts)
 
 
-def upgrade_index_inplace(index_path: str, *, default_tile_size: int = 32) -> None:
-    idx = load_json(index_path)
+def infer_tile_shape(idx: Dict[str, Any], default_ts: int = 32) -> List[int]:
+    """
+    [tile_z, tile_y, tile_x] of an index: explicit grid/tile_spec first,
+    then the first tile's bounds, then a cubic default.
+    """
+    grid = idx.get("grid")
+    if isinstance(grid, dict) and isinstance(grid.get("tile_shape_zyx"), (list, tuple)):
+        return [int(v) for v in grid["tile_shape_zyx"]]
 
-    # Ensure top-level schema_version
-    idx["schema_version"] = SCHEMA_INDEX_V1
+    spec = idx.get("tile_spec")
+    if isinstance(spec, dict) and all(k in spec for k in ("tile_z", "tile_y", "tile_x")):
+        return [int(spec["tile_z"]), int(spec["tile_y"]), int(spec["tile_x"])]
 
-    # Ensure volume.shape_zyxc exists in object form
-    if "volume" not in idx or not isinstance(idx["volume"], dict):
-        # Try to lift legacy
-        if "shape_zyxc" in idx:
-            idx["volume"] = {"shape_zyxc": idx["shape_zyxc"]}
-        else:
-            raise RuntimeError("Cannot upgrade: missing volume.shape_zyxc (or legacy shape_zyxc)")
+    if isinstance(grid, dict) and "tile_size" in grid:
+        return [int(grid["tile_size"])] * 3
 
-    # Ensure pack.path exists in object form
-    if "pack" not in idx or not isinstance(idx["pack"], dict):
-        if "pack_path" in idx:
-            idx["pack"] = {"path": idx["pack_path"]}
-        else:
-            raise RuntimeError("Cannot upgrade: missing pack.path (or legacy pack_path)")
+    tiles = idx.get("tiles")
+    if isinstance(tiles, list) and len(tiles) > 0:
+        e0 = tiles[0]
+        if isinstance(e0, dict):
+            b = e0.get("bounds_zyx") or e0.get("bounds") or e0.get("bounds_zyx6")
+            if b is not None:
+                return infer_tile_shape_from_bounds(_as_int_list6(b))
 
-    # Tile size
-    ts = infer_tile_size(idx, default_ts=default_tile_size)
+    return [int(default_ts)] * 3
 
-    # Ensure grid object
-    if "grid" not in idx or not isinstance(idx["grid"], dict):
-        idx["grid"] = {}
-    idx["grid"]["tile_size"] = int(ts)
 
-    # Normalize each tile entry
-    tiles = idx.get("tiles")
-    if not isinstance(tiles, list) or len(tiles) == 0:
-        raise RuntimeError("Cannot upgrade: tiles must be a non-empty list")
+def _set_grid_tile_shape(grid: Dict[str, Any], shape: List[int]) -> None:
+    grid["tile_shape_zyx"] = [int(v) for v in shape]
+    if shape[0] == shape[1] == shape[2]:
+        grid["tile_size"] = int(shape[0])
+    else:
+        # tile_size only describes cubic grids
+        grid.pop("tile_size", None)
+
 
+def _normalize_tile_entries(tiles: List[Dict[str, Any]]) -> None:
     for i, e in enumerate(tiles):
         if not isinstance(e, dict):
             raise RuntimeError(f"Tile entry {i} is not an object")
@@ -104,6 +108,53 @@ def upgrade_index_inplace(index_path: str, *, default_tile_size: int = 32) -> No
             else:
                 raise RuntimeError(f"Tile entry {i} missing tile_id")
 
+
+def upgrade_index_inplace(index_path: str, *, default_tile_size: int = 32) -> None:
+    idx = load_json(index_path)
+
+    # Ensure top-level schema_version
+    idx["schema_version"] = SCHEMA_INDEX_V1
+
+    # Ensure volume.shape_zyxc exists in object form
+    if "volume" not in idx or not isinstance(idx["volume"], dict):
+        # Try to lift legacy
+        if "shape_zyxc" in idx:
+            idx["volume"] = {"shape_zyxc": idx["shape_zyxc"]}
+        else:
+            raise RuntimeError("Cannot upgrade: missing volume.shape_zyxc (or legacy shape_zyxc)")
+
+    # Ensure pack.path exists in object form
+    if "pack" not in idx or not isinstance(idx["pack"], dict):
+        if "pack_path" in idx:
+            idx["pack"] = {"path": idx["pack_path"]}
+        else:
+            raise RuntimeError("Cannot upgrade: missing pack.path (or legacy pack_path)")
+
+    # Tile shape (cubic -> also grid.tile_size)
+    shape = infer_tile_shape(idx, default_ts=default_tile_size)
+
+    # Ensure grid object
+    if "grid" not in idx or not isinstance(idx["grid"], dict):
+        idx["grid"] = {}
+    _set_grid_tile_shape(idx["grid"], shape)
+
+    # Normalize each tile entry
+    tiles = idx.get("tiles")
+    if not isinstance(tiles, list) or len(tiles) == 0:
+        raise RuntimeError("Cannot upgrade: tiles must be a non-empty list")
+    _normalize_tile_entries(tiles)
+
+    # LOD levels (civd.lod pyramids) carry their own grid + tiles
+    lod = idx.get("lod")
+    if isinstance(lod, dict):
+        for lv in lod.get("levels", []):
+            if not isinstance(lv, dict) or not isinstance(lv.get("tiles"), list):
+                raise RuntimeError("Cannot upgrade: lod level must be an object with a tiles list")
+            if not isinstance(lv.get("grid"), dict):
+                lv["grid"] = {}
+            _set_grid_tile_shape(lv["grid"], infer_tile_shape(lv, default_ts=shape[0]))
+            _normalize_tile_entries(lv["tiles"])
+
     # Validate upgraded index
     verify_index_v1(idx)
 
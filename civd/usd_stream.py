@@ -6,6 +6,7 @@ import numpy as np
 
 from civd.roi import roi_tiles, ROIBox
 from civd.roi_delta import roi_delta_tiles
+from civd.tile_index import BrickMap
 from civd.time_loader import load_index, decode_tile_from_entry
 
 
@@ -49,6 +50,7 @@ class USDLikeStream:
     def __init__(self, index_path: str, cache_tiles: int = 128):
         self.idx = load_index(index_path)
         self.pack_path = self.idx["pack"]["path"]
+        self.tile_map = BrickMap.from_index(self.idx)
         self.cache = LRUCache(max_tiles=cache_tiles)
 
     def _io_estimate(self, entry: Dict) -> int:
@@ -57,11 +59,11 @@ class USDLikeStream:
         return int(entry["length"])
 
     def load_region(self, roi: ROIBox) -> Tuple[np.ndarray, StreamStats]:
-        tiles = roi_tiles(self.idx, roi)
+        tiles = roi_tiles(self.idx, roi, tile_map=self.tile_map)
         return self._load_tiles(tiles)
 
     def apply_delta(self, roi: ROIBox) -> Tuple[np.ndarray, StreamStats]:
-        tiles = roi_delta_tiles(self.idx, roi)
+        tiles = roi_delta_tiles(self.idx, roi, tile_map=self.tile_map)
         return self._load_tiles(tiles)
 
     def _load_tiles(self, tiles: List[Dict]) -> Tuple[np.ndarray, StreamStats]:
@@ -102,7 +104,7 @@ class USDLikeStream:
         Returns number of removed tiles.
         """
         # simplest: remove all ROI tiles from cache
-        tiles = roi_tiles(self.idx, roi)
+        tiles = roi_tiles(self.idx, roi, tile_map=self.tile_map)
         removed = 0
         for entry in tiles:
             tid = entry["tile_id"]
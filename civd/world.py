@@ -2,56 +2,59 @@ from __future__ import annotations
 
 import os
 import time as _time
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Literal
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Literal, Union
 
 import numpy as np
 
-def _tile_id_from_entry(entry: Dict[str, Any], *, tile_size: int) -> Optional[str]:
-    """
-    Return canonical tile id like z02_y03_x04 from a tile entry.
-    Works even when 'id' is missing by using tz/ty/tx, tcoords, or bounds.
-    """
-    tid = entry.get("id")
-    if isinstance(tid, str) and tid:
-        return tid
-
-    if all(k in entry for k in ("tz", "ty", "tx")):
-        return _tile_id_from_tcoords(int(entry["tz"]), int(entry["ty"]), int(entry["tx"]))
-
-    tc = entry.get("tcoords")
-    if isinstance(tc, dict) and all(k in tc for k in ("tz", "ty", "tx")):
-        return _tile_id_from_tcoords(int(tc["tz"]), int(tc["ty"]), int(tc["tx"]))
-
-    b = entry.get("bounds_zyx", entry.get("bounds"))
-    if isinstance(b, (list, tuple)) and len(b) == 6:
-        z0, _, y0, _, x0, _ = [int(v) for v in b]
-        return _tile_id_from_tcoords(z0 // tile_size, y0 // tile_size, x0 // tile_size)
-
-    if isinstance(b, dict) and all(k in b for k in ("z0", "y0", "x0")):
-        return _tile_id_from_tcoords(int(b["z0"]) // tile_size, int(b["y0"]) // tile_size, int(b["x0"]) // tile_size)
-
-    return None
-
-
-def _has_own_payload(entry: Dict[str, Any]) -> bool:
-    """
-    True if this tile entry contains actual payload data
-    for the current time index (i.e. should be included in delta).
-    """
-    if isinstance(entry.get("offset"), int) and isinstance(entry.get("length"), int):
-        return True
-
-    payload = entry.get("payload")
-    if isinstance(payload, dict):
-        if isinstance(payload.get("offset"), int) and isinstance(payload.get("length"), int):
-            return True
-
-    return False
-
-from civd.source import ROIBox, VolumePacket, Mode
+TileSize = Union[int, Tuple[int, int, int]]
+
+
+def _tile_shape3(tile_size: TileSize) -> Tuple[int, int, int]:
+    # int -> cubic tile, (tz,ty,tx) -> anisotropic tile
+    if isinstance(tile_size, (tuple, list)):
+        tz, ty, tx = (int(v) for v in tile_size)
+        return (tz, ty, tx)
+    t = int(tile_size)
+    return (t, t, t)
+
+
+from civd.codec import check_layout, decompress_tile_into, frame_layout, layout_view
+from civd.lod import lod_for_voxel_size
+from civd.predicate import PredicateLike, parse_predicate
+from civd.roi_shapes import ROILike, ROIShape
+from civd.tile_set import TileSet
+from civd.source import (
+    ROIBox,
+    VolumePacket,
+    TilePacket,
+    CompressedPacket,
+    FindResult,
+    SequencePacket,
+    TILE_PACKET_SCHEMA_V1,
+    COMPRESSED_PACKET_SCHEMA_V1,
+    FIND_RESULT_SCHEMA_V1,
+    SEQUENCE_PACKET_SCHEMA_V1,
+    Mode,
+    check_out_buffer,
+    fill_uncovered,
+)
+from civd.tile_index import LAYOUT_BRICKMAP, BrickMap, index_layout
+from civd.tile_stats import entry_stats, may_contain, stats_arrays
+from civd.schema import SchemaError, verify_index_v1
 
 # Reuse your existing loader utilities:
-from civd.time_loader import load_index, decode_tile_from_entry
+from civd.time_loader import (
+    load_index,
+    tile_shape_from_index,
+    read_tile_frames,
+    resolve_tile_frame,
+    decode_frame,
+)
+from civd.storage import Storage, get_storage, normalize_path
+from civd.tile_cache import TileCache, frame_key
+from civd.tile_history import TileHistory, history_path
 
 
 PACKET_SCHEMA_V1 = "civd.packet.v1"
@@ -65,14 +68,33 @@ def _index_path(root: str, time_name: str) -> str:
 
 
 def _tile_size_from_index(idx: Dict[str, Any]) -> int:
+    """
+    Nominal tile edge: civd.index.v1 grid.tile_size for cubic grids, else the
+    largest edge of the (anisotropic) tile shape. See _tile_shape_from_index.
+    """
     # civd.index.v1: idx["grid"]["tile_size"]
     grid = idx.get("grid", {})
     ts = int(grid.get("tile_size", 0))
+    if ts <= 0:
+        try:
+            ts = max(tile_shape_from_index(idx))
+        except KeyError:
+            ts = 0
     if ts <= 0:
         raise KeyError("index.grid.tile_size missing or invalid")
     return ts
 
 
+def _tile_shape_from_index(idx: Dict[str, Any]) -> Tuple[int, int, int]:
+    try:
+        shape = tile_shape_from_index(idx)
+    except KeyError:
+        raise KeyError("index.grid.tile_shape_zyx / tile_size missing or invalid")
+    if min(shape) <= 0:
+        raise KeyError("index tile shape must be positive")
+    return shape
+
+
 def _shape_zyxc_from_index(idx: Dict[str, Any]) -> Tuple[int, int, int, int]:
     vol = idx.get("volume", {})
     shape = vol.get("shape_zyxc")
@@ -82,10 +104,13 @@ def _shape_zyxc_from_index(idx: Dict[str, Any]) -> Tuple[int, int, int, int]:
     return (z, y, x, c)
 
 
-def _bounds6_from_entry(entry: Dict[str, Any], *, tile_size: int) -> Tuple[int, int, int, int, int, int]:
+def _bounds6_from_entry(entry: Dict[str, Any], *, tile_size: TileSize) -> Tuple[int, int, int, int, int, int]:
     """
     Return (z0,z1,y0,y1,x0,x1) tolerant to schema variants.
+    Bounds derived from tile coords use the nominal tile shape; callers clip
+    them against the volume for ragged edge tiles.
     """
+    sz, sy, sx = _tile_shape3(tile_size)
     b = entry.get("bounds_zyx", entry.get("bounds"))
     if isinstance(b, (list, tuple)) and len(b) == 6:
         z0, z1, y0, y1, x0, x1 = [int(v) for v in b]
@@ -97,31 +122,209 @@ def _bounds6_from_entry(entry: Dict[str, Any], *, tile_size: int) -> Tuple[int,
     # Derive from tz/ty/tx
     if all(k in entry for k in ("tz", "ty", "tx")):
         tz, ty, tx = int(entry["tz"]), int(entry["ty"]), int(entry["tx"])
-        z0, y0, x0 = tz * tile_size, ty * tile_size, tx * tile_size
-        return (z0, z0 + tile_size, y0, y0 + tile_size, x0, x0 + tile_size)
+        z0, y0, x0 = tz * sz, ty * sy, tx * sx
+        return (z0, z0 + sz, y0, y0 + sy, x0, x0 + sx)
 
     tc = entry.get("tcoords")
     if isinstance(tc, dict) and all(k in tc for k in ("tz", "ty", "tx")):
         tz, ty, tx = int(tc["tz"]), int(tc["ty"]), int(tc["tx"])
-        z0, y0, x0 = tz * tile_size, ty * tile_size, tx * tile_size
-        return (z0, z0 + tile_size, y0, y0 + tile_size, x0, x0 + tile_size)
+        z0, y0, x0 = tz * sz, ty * sy, tx * sx
+        return (z0, z0 + sz, y0, y0 + sy, x0, x0 + sx)
 
     raise KeyError("tile entry missing bounds (bounds_zyx/bounds or tz/ty/tx)")
 
 
-def _roi_tcoord_ranges(roi: ROIBox, tile_size: int) -> Tuple[range, range, range]:
-    tz0 = int(roi.z0) // tile_size
-    tz1 = (int(roi.z1) - 1) // tile_size
-    ty0 = int(roi.y0) // tile_size
-    ty1 = (int(roi.y1) - 1) // tile_size
-    tx0 = int(roi.x0) // tile_size
-    tx1 = (int(roi.x1) - 1) // tile_size
+def _lod_levels_from_index(idx: Dict[str, Any]) -> List[Dict[str, Any]]:
+    lod = idx.get("lod")
+    if not isinstance(lod, dict):
+        return []
+    levels = lod.get("levels")
+    if not isinstance(levels, list):
+        return []
+    return sorted((lv for lv in levels if isinstance(lv, dict)), key=lambda lv: int(lv.get("level", 0)))
+
+
+def _select_lod(idx: Dict[str, Any], *, lod: Optional[int], voxel_size: Optional[float]) -> int:
+    """
+    Resolve the pyramid level to read: explicit lod wins, else the coarsest
+    level meeting voxel_size. A level the index does not store falls back to
+    the coarsest stored level below it (past the top: the coarsest stored).
+    """
+    stored = [0] + [int(lv.get("level", 0)) for lv in _lod_levels_from_index(idx)]
+    if lod is not None:
+        k = int(lod)
+        if k < 0:
+            raise ValueError("lod must be >= 0")
+    elif voxel_size is not None:
+        k = lod_for_voxel_size(float(voxel_size), max(stored))
+    else:
+        return 0
+    return max(v for v in stored if v <= k)
+
+
+def _lod_level_index(idx: Dict[str, Any], level: int) -> Dict[str, Any]:
+    for lv in _lod_levels_from_index(idx):
+        if int(lv.get("level", 0)) == level:
+            return lv
+    raise KeyError(f"index has no lod level {level}")
+
+
+def _roi_at_scale(roi: ROIBox, scale: int) -> ROIBox:
+    # smallest level box covering the level-0 box
+    return ROIBox(
+        z0=int(roi.z0) // scale, z1=-(-int(roi.z1) // scale),
+        y0=int(roi.y0) // scale, y1=-(-int(roi.y1) // scale),
+        x0=int(roi.x0) // scale, x1=-(-int(roi.x1) // scale),
+    )
+
+
+def _clamp_roi(roi: ROIBox, shape_zyx: Tuple[int, int, int]) -> ROIBox:
+    Z, Y, X = shape_zyx
+    return ROIBox(
+        z0=max(0, int(roi.z0)), z1=min(Z, int(roi.z1)),
+        y0=max(0, int(roi.y0)), y1=min(Y, int(roi.y1)),
+        x0=max(0, int(roi.x0)), x1=min(X, int(roi.x1)),
+    )
+
+
+def _select_level(
+    idx: Dict[str, Any],
+    roi: Union[ROILike, TileSet],
+    *,
+    lod: Optional[int],
+    voxel_size: Optional[float],
+) -> int:
+    # a TileSet already lives on one level's grid
+    if isinstance(roi, TileSet):
+        if lod is not None and int(lod) != roi.lod:
+            raise ValueError(f"lod={lod} does not match the tile set's lod {roi.lod}")
+        level = _select_lod(idx, lod=roi.lod, voxel_size=None)
+        if level != roi.lod:
+            raise ValueError(f"tile set lod {roi.lod} is not stored in this index")
+        return level
+    return _select_lod(idx, lod=lod, voxel_size=voxel_size)
+
+
+def _resolve_roi(
+    roi: Union[ROILike, TileSet],
+    scale: int,
+    idx: Dict[str, Any],
+) -> Tuple[ROIBox, Optional[Union[ROIShape, TileSet]]]:
+    """
+    (box, selector) for a level-0 ROIBox or ROIShape, or a TileSet, at the
+    level whose index is idx. For a shape the box is its voxel bounding box
+    and the selector the scaled shape; for a tile set the box spans its
+    member tiles and the selector is the set itself.
+    """
+    if isinstance(roi, TileSet):
+        sz, sy, sx = _tile_shape_from_index(idx)
+        tz, ty, tx = roi.box()
+        box = ROIBox(
+            z0=tz.start * sz, z1=tz.stop * sz, y0=ty.start * sy, y1=ty.stop * sy, x0=tx.start * sx, x1=tx.stop * sx,
+        )
+        return box, roi
+    if isinstance(roi, ROIShape):
+        shape = roi.scaled(1.0 / scale) if scale > 1 else roi
+        return shape.bbox(), shape
+    return (_roi_at_scale(roi, scale) if scale > 1 else roi), None
+
+
+def _roi_tcoord_ranges(roi: ROIBox, tile_size: TileSize) -> Tuple[range, range, range]:
+    sz, sy, sx = _tile_shape3(tile_size)
+    tz0 = int(roi.z0) // sz
+    tz1 = (int(roi.z1) - 1) // sz
+    ty0 = int(roi.y0) // sy
+    ty1 = (int(roi.y1) - 1) // sy
+    tx0 = int(roi.x0) // sx
+    tx1 = (int(roi.x1) - 1) // sx
     return (range(tz0, tz1 + 1), range(ty0, ty1 + 1), range(tx0, tx1 + 1))
 
 
-def _tile_id_from_tcoords(tz: int, ty: int, tx: int) -> str:
-    # padded to match your existing naming
-    return f"z{tz:02d}_y{ty:02d}_x{tx:02d}"
+def _roi_slots(
+    tmap: BrickMap,
+    tzr: range,
+    tyr: range,
+    txr: range,
+    shape: Optional[Union[ROIShape, TileSet]],
+    tile_shape: Tuple[int, int, int],
+    vol_shape_zyx: Tuple[int, int, int],
+) -> np.ndarray:
+    # entry slots of the bricks in the tile box, minus those an ROI shape
+    # misses or a tile set leaves out
+    if shape is None:
+        return tmap.query_box(tzr, tyr, txr)
+    if isinstance(shape, TileSet):
+        if shape.grid_dims != tmap.grid_dims:
+            raise ValueError(f"tile set grid {shape.grid_dims} does not match the index grid {tmap.grid_dims}")
+        return tmap.query_mask(tzr, tyr, txr, shape.mask(tzr, tyr, txr))
+    return tmap.query_mask(tzr, tyr, txr, shape.tile_mask(tzr, tyr, txr, tile_shape, vol_shape_zyx))
+
+
+def _index_runs(ix: Sequence[int]) -> List[Tuple[int, int]]:
+    # sorted ints -> [start, stop) runs of consecutive values
+    runs: List[Tuple[int, int]] = []
+    for i in ix:
+        if runs and runs[-1][1] == i:
+            runs[-1] = (runs[-1][0], i + 1)
+        else:
+            runs.append((i, i + 1))
+    return runs
+
+
+def _selector_name(shape: Optional[Union[ROIShape, TileSet]]) -> str:
+    if shape is None:
+        return "box"
+    return "tileset" if isinstance(shape, TileSet) else shape.describe()
+
+
+@dataclass
+class _ROIPlan:
+    """
+    What every ROI read of one time resolves before touching a pack
+    (World._plan): the level index, the clamped level ROI and its selector,
+    and the selected tile entries with their bounds, clipped to the volume.
+    """
+    root_idx: Dict[str, Any]
+    idx: Dict[str, Any]
+    level: int
+    roi: ROIBox
+    shape: Optional[Union[ROIShape, TileSet]]
+    tile_shape: Tuple[int, int, int]
+    shape_zyxc: Tuple[int, int, int, int]
+    fill: float
+    tranges: Tuple[range, range, range]
+    tmap: BrickMap
+    slots: np.ndarray
+    entries: List[Dict[str, Any]]
+    bounds: List[Tuple[int, int, int, int, int, int]]
+
+    @property
+    def scale(self) -> int:
+        return 2 ** self.level
+
+    @property
+    def tiles_total(self) -> int:
+        tzr, tyr, txr = self.tranges
+        return len(tzr) * len(tyr) * len(txr)
+
+    def coverage(self) -> np.ndarray:
+        # bool (nz, ny, nx) over the ROI tile box: True where a selected tile sits
+        tzr, tyr, txr = self.tranges
+        sz, sy, sx = self.tile_shape
+        mask = np.zeros((len(tzr), len(tyr), len(txr)), dtype=bool)
+        for z0, _z1, y0, _y1, x0, _x1 in self.bounds:
+            mask[z0 // sz - tzr.start, y0 // sy - tyr.start, x0 // sx - txr.start] = True
+        return mask
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "index_schema_version": self.root_idx.get("schema_version", "unknown"),
+            "lod": self.level,
+            "lod_scale": self.scale,
+            "layout": index_layout(self.idx),
+            "tiles_occupied": int(len(self.slots)),
+            "roi_shape": _selector_name(self.shape),
+        }
 
 
 class World:
@@ -133,53 +336,355 @@ class World:
         from civd.source import CivdObservationSource
         return CivdObservationSource(self)
 
-    def __init__(self, root: str = ".", *, mode: Literal["r", "rw"] = "r"):
+    def __init__(self, root: str = ".", *, mode: Literal["r", "rw"] = "r", storage: Optional[Storage] = None):
         self.root = root
         self.mode = mode
+        # where index and pack bytes come from (civd.storage); local files by default
+        self.storage: Storage = storage if storage is not None else get_storage()
         self._cache: Dict[str, Dict[str, Any]] = {}
+        self._tile_maps: Dict[Tuple[str, int], BrickMap] = {}
+        # optional LRU of decoded tiles (civd.tile_cache) consulted by query()
+        self.tile_cache: Optional[TileCache] = None
+        self._histories: Dict[int, TileHistory] = {}
+        self._times: Optional[List[str]] = None
 
     @staticmethod
-    def open(root: str = ".", *, mode: Literal["r", "rw"] = "r") -> "World":
-        return World(root, mode=mode)
+    def open(
+        root: str = ".",
+        *,
+        mode: Literal["r", "rw"] = "r",
+        storage: Optional[Storage] = None,
+        warm: bool = False,
+    ) -> "World":
+        """
+        Open a world tree, a .civd container or a tile server URL. Nothing
+        is read until the first query unless warm=True (see warm()).
+        """
+        # a tile server URL opens a read-only network-backed world
+        if root.startswith(("http://", "https://", "unix://")):
+            from civd.remote import RemoteWorld
+            w: World = RemoteWorld(root)
+        # a single-file .civd container, mapped once
+        elif root.endswith(".civd") and os.path.isfile(root):
+            from civd.container import ContainerStorage
+            w = World(".", mode="r", storage=ContainerStorage(root))
+        else:
+            w = World(root, mode=mode, storage=storage)
+        return w.warm() if warm else w
+
+    def warm(self, times: Optional[Sequence[str]] = None, *, validate: bool = True) -> "World":
+        """
+        Do the first-query work up front: parse every time index (all by
+        default), build the tile maps of every LOD level, open or map the
+        packs they read from, and, with validate=True, check each index
+        against civd.index.v1 and that every pack covers the frames it is
+        asked for. Raises civd.schema.SchemaError on a bad world.
+        Returns self, so World.open(root).warm() chains.
+        """
+        extents: Dict[str, int] = {}
+        for t in (self.times() if times is None else times):
+            idx = self.load_time_index(t)
+            if validate:
+                try:
+                    verify_index_v1(idx)
+                except SchemaError as e:
+                    raise SchemaError(f"{t}: {e}") from None
+            for level in [0] + [int(lv.get("level", 0)) for lv in _lod_levels_from_index(idx)]:
+                lidx = _lod_level_index(idx, level) if level else idx
+                for e in self.tile_map(t, lod=level).entries:
+                    loc = resolve_tile_frame(e, lidx, self.storage)
+                    if loc["ref_mode"] != "empty":
+                        end = int(loc["offset"]) + int(loc["length"])
+                        extents[loc["pack"]] = max(extents.get(loc["pack"], 0), end)
+
+        for pack, end in sorted(extents.items()):
+            size = self._prepare_pack(pack)
+            if validate and size < end:
+                raise SchemaError(f"pack {pack} is {size} bytes, its index reads up to byte {end}")
+        return self
+
+    def _prepare_pack(self, pack: str) -> int:
+        # open/map a pack ahead of the first read; returns its size in bytes
+        self.storage.prepare(pack)
+        return self.storage.size(pack)
 
     def load_time_index(self, time_name: str) -> Dict[str, Any]:
         if time_name not in self._cache:
-            self._cache[time_name] = load_index(_index_path(self.root, time_name))
+            self._cache[time_name] = load_index(_index_path(self.root, time_name), self.storage)
         return self._cache[time_name]
 
+    def times(self, refresh: bool = False) -> List[str]:
+        """
+        Time names present under data/civd_time (sorted), e.g. ["t000", "t001"].
+        Listed once per read-only World (refresh=True lists again); worlds
+        opened with mode="rw" list on every call.
+        """
+        if self._times is not None and not refresh and self.mode != "rw":
+            return list(self._times)
+        base = normalize_path(os.path.dirname(os.path.dirname(_index_path(self.root, "_"))))
+        try:
+            names = self.storage.listdir(base)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        self._times = sorted(name for name in names if self.storage.exists(f"{base}/{name}/index.json"))
+        return list(self._times)
+
+    def tile_map(self, time_name: str, lod: int = 0) -> BrickMap:
+        """
+        Cached BrickMap (tile-coordinate lookup) for one time and LOD level.
+        """
+        key = (time_name, int(lod))
+        if key not in self._tile_maps:
+            idx = self.load_time_index(time_name)
+            if lod:
+                idx = _lod_level_index(idx, int(lod))
+            self._tile_maps[key] = BrickMap.from_index(idx)
+        return self._tile_maps[key]
+
+    def tile_history(self, lod: int = 0) -> TileHistory:
+        """
+        Per-tile change history over all times (civd.tile_history) at one
+        LOD level. Read from data/civd_history/lod<k>.npz (written by
+        `python -m civd.tile_history`) when it matches the current times and
+        tile grid, otherwise built from the indices; cached either way.
+        """
+        lod = int(lod)
+        times = self.times()
+        h = self._histories.get(lod)
+        if h is not None and h.times == times:
+            return h
+        h = None
+        if times:
+            try:
+                h = TileHistory.load(history_path(self.root, lod), self.storage)
+            except (OSError, KeyError, ValueError):
+                h = None
+            if h is not None and not self._history_matches(h, times, lod):
+                h = None
+        if h is None:
+            h = TileHistory.build(self, times, lod=lod)
+        self._histories[lod] = h
+        return h
+
+    def _history_matches(self, h: TileHistory, times: List[str], lod: int) -> bool:
+        # a stored history is only used for the same times on the same grid
+        if h.times != times or h.lod != lod:
+            return False
+        idx = self.load_time_index(times[0])
+        if lod > 0:
+            idx = _lod_level_index(idx, lod)
+        return h.tile_shape == _tile_shape_from_index(idx) and h.grid_dims == self.tile_map(times[0], lod=lod).grid_dims
+
+    def _read_frames(
+        self,
+        time_name: str,
+        level: int,
+        entries: Sequence[Dict[str, Any]],
+        idx: Dict[str, Any],
+    ) -> List[Tuple[Optional[bytes], Dict[str, Any]]]:
+        """
+        (frame, location) of each tile entry of one time/LOD level, as
+        time_loader.read_tile_frame returns them. Every query reads its tiles
+        through here as one storage batch; a backend that fetches frames
+        remotely overrides it to batch them.
+        """
+        return read_tile_frames(entries, idx, self.storage)
+
+    def _decode_frames(
+        self,
+        time_name: str,
+        level: int,
+        entries: Sequence[Dict[str, Any]],
+        idx: Dict[str, Any],
+        layout: str = "zyxc",
+    ) -> List[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        (decoded tile in `layout`, location) of each tile entry. With a
+        tile_cache set, cached frames are not read again and the rest are
+        read as one _read_frames batch, decoded and remembered.
+        """
+        cache = self.tile_cache
+        if cache is None:
+            return [(decode_frame(comp, loc, layout), loc) for comp, loc in self._read_frames(time_name, level, entries, idx)]
+
+        out: List[Any] = [None] * len(entries)
+        missing: List[int] = []
+        for i, e in enumerate(entries):
+            loc = resolve_tile_frame(e, idx, self.storage)
+            arr = cache.get(loc, layout) if frame_key(loc) is not None else None
+            if arr is None:
+                missing.append(i)
+            else:
+                out[i] = (arr, loc)
+        frames = self._read_frames(time_name, level, [entries[i] for i in missing], idx)
+        for i, (comp, loc) in zip(missing, frames):
+            arr = decode_frame(comp, loc, frame_layout(loc.get("codec")))
+            cache.put(loc, arr)
+            out[i] = (layout_view(arr, frame_layout(loc.get("codec")), layout), loc)
+        return out
+
+    def _plan(
+        self,
+        time_name: str,
+        roi: Union[ROILike, TileSet],
+        *,
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+        level: Optional[int] = None,
+        mode: Mode = "full",
+        since: Optional[str] = None,
+    ) -> _ROIPlan:
+        """
+        Shared setup of the ROI reads (query, query_tiles, read_compressed,
+        query_timerange, find): pick the LOD level (or take `level`), resolve
+        and clamp the ROI at it, and select its tiles from the tile map.
+        mode="delta" keeps the tiles with their own payload at this time;
+        since=t0 keeps those that changed after t0 (tile_history()).
+        """
+        if mode not in ("full", "delta"):
+            raise ValueError("mode must be 'full' or 'delta'")
+        root_idx = idx = self.load_time_index(time_name)
+        if level is None:
+            level = _select_level(idx, roi, lod=lod, voxel_size=voxel_size)
+        if level > 0:
+            idx = _lod_level_index(idx, level)
+        box, shape = _resolve_roi(roi, 2 ** level, idx)
+
+        tile_shape = _tile_shape_from_index(idx)
+        Z, Y, X, C = _shape_zyxc_from_index(idx)
+        box = _clamp_roi(box, (Z, Y, X))
+        grid = idx.get("grid", {})
+        fill = float(grid.get("empty_value", 0.0)) if isinstance(grid, dict) else 0.0
+
+        tzr, tyr, txr = _roi_tcoord_ranges(box, tile_shape)
+        # Only bricks present in the index are visited (all of them for dense
+        # indices, just the occupied ones for brick-map indices).
+        tmap = self.tile_map(time_name, lod=level)
+        slots = _roi_slots(tmap, tzr, tyr, txr, shape, tile_shape, (Z, Y, X))
+
+        # delta mode: skip tiles that are only refs (unchanged); against an
+        # arbitrary earlier time, skip those that did not change since then
+        picked = slots
+        if since is not None:
+            if len(slots):
+                picked = slots[self.tile_history(level).changed(tmap.coords_of(slots), since, time_name)]
+        elif mode == "delta":
+            picked = slots[tmap.own_payload[slots]]
+        entries = [tmap.entries[int(s)] for s in picked]
+
+        bounds = []
+        for e in entries:
+            z0, z1, y0, y1, x0, x1 = _bounds6_from_entry(e, tile_size=tile_shape)
+            bounds.append((z0, min(z1, Z), y0, min(y1, Y), x0, min(x1, X)))
+
+        return _ROIPlan(
+            root_idx=root_idx,
+            idx=idx,
+            level=level,
+            roi=box,
+            shape=shape,
+            tile_shape=tile_shape,
+            shape_zyxc=(Z, Y, X, C),
+            fill=fill,
+            tranges=(tzr, tyr, txr),
+            tmap=tmap,
+            slots=slots,
+            entries=entries,
+            bounds=bounds,
+        )
+
     def meta(self, time: str = "t000") -> Dict[str, Any]:
-        idx = self.load_time_index(time_name)
+        idx = self.load_time_index(time)
         z, y, x, c = _shape_zyxc_from_index(idx)
         return {
             "schema_version": idx.get("schema_version", "unknown"),
             "time": time,
             "shape_zyxc": (z, y, x, c),
             "tile_size": _tile_size_from_index(idx),
+            "tile_shape_zyx": _tile_shape_from_index(idx),
             "pack": idx.get("pack", {}),
+            "lod_levels": len(_lod_levels_from_index(idx)),
         }
 
-    def query(
+    def query_shape(
         self,
         time_name: str,
-        roi: ROIBox,
+        roi: Union[ROILike, TileSet],
         channels: Optional[Sequence[int]] = None,
-        mode: Mode = "full",
-    ) -> VolumePacket:
-
-        if mode not in ("full", "delta"):
-            raise ValueError("mode must be 'full' or 'delta'")
-
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+    ) -> Tuple[int, int, int, int]:
+        """
+        (roiZ, roiY, roiX, C) that query() would return, without decoding.
+        Use it to size out= buffers.
+        """
         idx = self.load_time_index(time_name)
-        tile_size = _tile_size_from_index(idx)
+        level = _select_level(idx, roi, lod=lod, voxel_size=voxel_size)
+        if level > 0:
+            idx = _lod_level_index(idx, level)
+        roi, _shape = _resolve_roi(roi, 2 ** level, idx)
         Z, Y, X, C = _shape_zyxc_from_index(idx)
+        roiZ, roiY, roiX = _clamp_roi(roi, (Z, Y, X)).shape_zyx
+        outC = C if channels is None else len(channels)
+        return (roiZ, roiY, roiX, outC)
 
-        # clamp ROI
-        roi = ROIBox(
-            z0=max(0, int(roi.z0)), z1=min(Z, int(roi.z1)),
-            y0=max(0, int(roi.y0)), y1=min(Y, int(roi.y1)),
-            x0=max(0, int(roi.x0)), x1=min(X, int(roi.x1)),
-        )
-
+    def query(
+        self,
+        time_name: str,
+        roi: Union[ROILike, TileSet],
+        channels: Optional[Sequence[int]] = None,
+        mode: Mode = "full",
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+        out: Optional[np.ndarray] = None,
+        mask_outside: bool = False,
+        layout: str = "zyxc",
+        since: Optional[str] = None,
+    ) -> VolumePacket:
+        """
+        Decode an ROI at one time.
+
+        roi is always given in level-0 voxels. lod=k (or voxel_size=v, the
+        coarsest level whose voxel edge 2**k <= v) reads the k-th pyramid level
+        instead; the packet's roi/volume are then in level-k voxels and
+        meta["lod_scale"] maps them back (level-0 = level-k * scale).
+
+        out: optional preallocated float32 (roiZ, roiY, roiX, C) array (after
+        ROI clamping) to decode into; packet.volume is then `out` itself.
+        Only ROI regions no tile covers are filled, so high-rate loops can
+        reuse one buffer without reallocating or re-zeroing it.
+
+        roi may also be an ROI shape (civd.roi_shapes: Sphere, Capsule,
+        OrientedBox, Frustum). The packet covers the shape's bounding box but
+        only tiles the shape touches are read; mask_outside=True also sets
+        voxels outside the shape to the fill value.
+
+        roi may also be a TileSet (see tile_set()): exactly its member tiles
+        are read, at the set's lod, and the packet covers their bounding box.
+
+        layout="czyx" returns a channels-first (C, roiZ, roiY, roiX) volume
+        (and expects `out` in that shape): each tile is scattered straight
+        into it, so consumers such as torch need no permute copy. Packs
+        written with tile_layout="czyx" (civd.tiler) decode with no
+        transpose at all. meta["volume_layout"] records the layout;
+        shape_zyxc still lists (Z, Y, X, C).
+
+        With w.tile_cache set (civd.tile_cache.TileCache), tiles decoded by
+        earlier queries are reused instead of read and decompressed again.
+
+        since=t0 returns a delta against any earlier time t0, not just the
+        previous one: only tiles that changed after t0 (per tile_history())
+        are read, each at its version current at time_name.
+        """
+
+        if since is not None:
+            mode = "delta"
+        check_layout(layout)
+        planar = layout == "czyx"
+
+        plan = self._plan(time_name, roi, lod=lod, voxel_size=voxel_size, mode=mode, since=since)
+        roi, shape, tile_shape, fill = plan.roi, plan.shape, plan.tile_shape, plan.fill
+        C = plan.shape_zyxc[3]
         roiZ, roiY, roiX = roi.shape_zyx
         if channels is None:
             chan_idx = list(range(C))
@@ -187,43 +692,24 @@ class World:
             chan_idx = [int(i) for i in channels]
         outC = len(chan_idx)
 
-        out = np.zeros((roiZ, roiY, roiX, outC), dtype=np.float32)
-
-        tzr, tyr, txr = _roi_tcoord_ranges(roi, tile_size)
-        roi_tile_ids = [_tile_id_from_tcoords(tz, ty, tx) for tz in tzr for ty in tyr for tx in txr]
-        tiles_total = len(roi_tile_ids)
-
-        # Build quick lookup from id -> entry.
-        # Your civd.index.v1 currently has idx["tiles"] as a list of dict entries.
-        tile_entries: List[Dict[str, Any]] = [e for e in idx.get("tiles", []) if isinstance(e, dict)]
-        by_id: Dict[str, Dict[str, Any]] = {}
-
-        for e in tile_entries:
-            tid = _tile_id_from_entry(e, tile_size=tile_size)
-            if tid:
-                by_id[tid] = e
+        out_shape = (outC, roiZ, roiY, roiX) if planar else (roiZ, roiY, roiX, outC)
+        if out is None:
+            out = np.empty(out_shape, dtype=np.float32)
+        else:
+            check_out_buffer(out, out_shape)
+        # (Z,Y,X,C) view of the output, whatever its memory layout
+        out_zyxc = np.moveaxis(out, 0, -1) if planar else out
+        fill_uncovered(out_zyxc, roi, tile_shape, plan.coverage(), fill)
 
         tiles_included = 0
         bytes_read = 0
 
         t0 = _time.perf_counter()
 
-        for tid in roi_tile_ids:
-            e = by_id.get(tid)
-            if e is None:
-                # not fatal: some indices may not store explicit ids
-                continue
-
-            # delta mode: skip tiles that are only refs (unchanged)
-            if mode == "delta" and not _has_own_payload(e):
-                continue
-
-            tile_arr, st = decode_tile_from_entry(e, idx)
+        tiles = self._decode_frames(time_name, plan.level, plan.entries, plan.idx, layout)
+        for (tile_arr, loc), (z0, z1, y0, y1, x0, x1) in zip(tiles, plan.bounds):
             tiles_included += 1
-            if isinstance(st, dict):
-                bytes_read += int(st.get("bytes_read", 0))
-
-            z0, z1, y0, y1, x0, x1 = _bounds6_from_entry(e, tile_size=tile_size)
+            bytes_read += int(loc.get("length", 0))
 
             # intersection in world coords
             iz0, iz1 = max(z0, roi.z0), min(z1, roi.z1)
@@ -241,7 +727,13 @@ class World:
             dz1, dy1, dx1 = dz0 + (iz1 - iz0), dy0 + (iy1 - iy0), dx0 + (ix1 - ix0)
 
             # select channels
-            out[dz0:dz1, dy0:dy1, dx0:dx1, :] = tile_arr[sz0:sz1, sy0:sy1, sx0:sx1, :][:, :, :, chan_idx]
+            if planar:
+                out[:, dz0:dz1, dy0:dy1, dx0:dx1] = tile_arr[:, sz0:sz1, sy0:sy1, sx0:sx1][chan_idx]
+            else:
+                out[dz0:dz1, dy0:dy1, dx0:dx1, :] = tile_arr[sz0:sz1, sy0:sy1, sx0:sx1, :][:, :, :, chan_idx]
+
+        if isinstance(shape, ROIShape) and mask_outside:
+            out_zyxc[~shape.voxel_mask(roi)] = fill
 
         decode_ms = (_time.perf_counter() - t0) * 1000.0
 
@@ -251,18 +743,579 @@ class World:
             mode=mode,
             roi=roi,
             shape_zyxc=(roiZ, roiY, roiX, outC),
-            tile_size=tile_size,
+            tile_size=_tile_size_from_index(plan.idx),
             channels=[f"chan{i}" for i in chan_idx],
-            tiles_total=tiles_total,
+            tiles_total=plan.tiles_total,
             tiles_included=tiles_included,
             bytes_read=int(bytes_read),
             decode_ms=float(decode_ms),
             volume=out,
             tile_mask=None,
-            meta={"index_schema_version": idx.get("schema_version", "unknown")},
+            tile_shape_zyx=tile_shape,
+            meta=dict(plan.meta(), volume_layout=layout, since=since),
         )
         return packet
 
+    def query_timerange(
+        self,
+        roi: ROILike,
+        times: Optional[Sequence[str]] = None,
+        channels: Optional[Sequence[int]] = None,
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+        out: Optional[np.ndarray] = None,
+        mask_outside: bool = False,
+        layout: str = "zyxc",
+        repeat_frames: bool = True,
+    ) -> SequencePacket:
+        """
+        Decode one ROI at several times (all of them by default) into a
+        single (T, roiZ, roiY, roiX, C) array, or (T, C, roiZ, roiY, roiX)
+        with layout="czyx".
+
+        Each distinct tile payload is decoded once, however many frames
+        reference it: tiles shared through refs resolve to the same frame
+        location (civd.tile_cache.frame_key) and are broadcast into every
+        frame that places them, one copy per run of consecutive frames.
+        Frames whose tiles are all unchanged from the previous frame are
+        marked in packet.frame_source; repeat_frames=False leaves them
+        unwritten, to be read as views through packet.frame(i).
+
+        Arguments are as for query(); all times must share one grid.
+        """
+        check_layout(layout)
+        planar = layout == "czyx"
+        times = list(self.times() if times is None else times)
+        if not times:
+            raise ValueError("query_timerange needs at least one time")
+
+        level = _select_level(self.load_time_index(times[0]), roi, lod=lod, voxel_size=voxel_size)
+        plans = [self._plan(t, roi, level=level) for t in times]
+        p0 = plans[0]
+        roi, shape, tile_shape = p0.roi, p0.shape, p0.tile_shape
+        C = p0.shape_zyxc[3]
+        for t, p in zip(times[1:], plans[1:]):
+            if p.shape_zyxc != p0.shape_zyxc or p.tile_shape != tile_shape:
+                raise ValueError(f"time {t} is on a different grid than {times[0]}")
+
+        roiZ, roiY, roiX = roi.shape_zyx
+        chan_idx = list(range(C)) if channels is None else [int(i) for i in channels]
+        all_channels = chan_idx == list(range(C))
+        outC = len(chan_idx)
+        T = len(times)
+
+        t0 = _time.perf_counter()
+
+        # what each frame places: (payload key, tile bounds); the first
+        # (frame, entry) referencing each payload is the one decoded
+        first: Dict[Any, Tuple[int, Dict[str, Any]]] = {}
+        placed: List[List[Tuple[Any, Tuple[int, ...]]]] = []
+        fills = [p.fill for p in plans]
+        for i, p in enumerate(plans):
+            frame: List[Tuple[Any, Tuple[int, ...]]] = []
+            for e, b in zip(p.entries, p.bounds):
+                loc = resolve_tile_frame(e, p.idx, self.storage)
+                key = frame_key(loc)
+                if key is None:
+                    key = ("empty", float(loc.get("fill", 0.0)), tuple(loc["shape_zyxc"]))
+                first.setdefault(key, (i, e))
+                frame.append((key, b))
+            placed.append(frame)
+
+        # runs of identical frames
+        frame_source = np.arange(T, dtype=np.int32)
+        for i in range(1, T):
+            if fills[i] == fills[i - 1] and set(placed[i]) == set(placed[i - 1]):
+                frame_source[i] = frame_source[i - 1]
+        written = [i for i in range(T) if repeat_frames or frame_source[i] == i]
+
+        # decode every payload a written frame needs, once, batched per time
+        need: Dict[int, List[Any]] = {}
+        for key in {k for i in written for k, _b in placed[i]}:
+            need.setdefault(first[key][0], []).append(key)
+        tiles: Dict[Any, np.ndarray] = {}
+        bytes_read = 0
+        for i, keys in need.items():
+            decoded = self._decode_frames(times[i], level, [first[k][1] for k in keys], plans[i].idx, layout)
+            for k, (arr, loc) in zip(keys, decoded):
+                tiles[k] = arr
+                bytes_read += int(loc.get("length", 0))
+
+        out_shape = (T, outC, roiZ, roiY, roiX) if planar else (T, roiZ, roiY, roiX, outC)
+        if out is None:
+            out = np.empty(out_shape, dtype=np.float32)
+        else:
+            check_out_buffer(out, out_shape)
+        # (T,Z,Y,X,C) view of the output, whatever its memory layout
+        out_zyxc = np.moveaxis(out, 1, -1) if planar else out
+
+        # every (payload, position) once, broadcast over its frames
+        users: Dict[Tuple[Any, Tuple[int, ...]], List[int]] = {}
+        tiles_included = 0
+        for i in written:
+            for key, b in placed[i]:
+                users.setdefault((key, b), []).append(i)
+            tiles_included += len(placed[i])
+            fill_uncovered(out_zyxc[i], roi, tile_shape, plans[i].coverage(), fills[i])
+
+        for (key, (z0, z1, y0, y1, x0, x1)), frames in users.items():
+            iz0, iz1 = max(z0, roi.z0), min(z1, roi.z1)
+            iy0, iy1 = max(y0, roi.y0), min(y1, roi.y1)
+            ix0, ix1 = max(x0, roi.x0), min(x1, roi.x1)
+            if iz0 >= iz1 or iy0 >= iy1 or ix0 >= ix1:
+                continue
+            sz0, sy0, sx0 = iz0 - z0, iy0 - y0, ix0 - x0
+            sz1, sy1, sx1 = sz0 + (iz1 - iz0), sy0 + (iy1 - iy0), sx0 + (ix1 - ix0)
+            dz0, dy0, dx0 = iz0 - roi.z0, iy0 - roi.y0, ix0 - roi.x0
+            dz1, dy1, dx1 = dz0 + (iz1 - iz0), dy0 + (iy1 - iy0), dx0 + (ix1 - ix0)
+
+            tile_arr = tiles[key]
+            if planar:
+                src = tile_arr[:, sz0:sz1, sy0:sy1, sx0:sx1]
+                src = src if all_channels else src[chan_idx]
+            else:
+                src = tile_arr[sz0:sz1, sy0:sy1, sx0:sx1, :]
+                src = src if all_channels else src[:, :, :, chan_idx]
+            for a, b in _index_runs(frames):
+                if planar:
+                    out[a:b, :, dz0:dz1, dy0:dy1, dx0:dx1] = src
+                else:
+                    out[a:b, dz0:dz1, dy0:dy1, dx0:dx1, :] = src
+
+        if isinstance(shape, ROIShape) and mask_outside:
+            outside = ~shape.voxel_mask(roi)
+            for i in written:
+                out_zyxc[i][outside] = fills[i]
+
+        decode_ms = (_time.perf_counter() - t0) * 1000.0
+
+        return SequencePacket(
+            schema_version=SEQUENCE_PACKET_SCHEMA_V1,
+            times=times,
+            roi=roi,
+            shape_zyxc=(roiZ, roiY, roiX, outC),
+            tile_size=_tile_size_from_index(p0.idx),
+            channels=[f"chan{i}" for i in chan_idx],
+            tiles_total=p0.tiles_total * T,
+            tiles_included=tiles_included,
+            unique_payloads=len(tiles),
+            bytes_read=int(bytes_read),
+            decode_ms=float(decode_ms),
+            volume=out,
+            frame_source=frame_source,
+            tile_shape_zyx=tile_shape,
+            meta={
+                "index_schema_version": p0.root_idx.get("schema_version", "unknown"),
+                "lod": level,
+                "lod_scale": p0.scale,
+                "frames_written": len(written),
+                "frames_repeated": int(np.count_nonzero(frame_source != np.arange(T))),
+                "roi_shape": _selector_name(shape),
+                "volume_layout": layout,
+            },
+        )
+
+    def tile_set(
+        self,
+        time_name: str,
+        roi: Optional[ROILike] = None,
+        mode: Mode = "full",
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+    ) -> TileSet:
+        """
+        TileSet of the grid tiles an ROI box or shape touches (whole grid if
+        roi is None), for set algebra before querying, e.g. the tiles newly
+        exposed by a moving sensor:
+
+            new = w.tile_set(t, roi_now) - w.tile_set(t, roi_prev)
+            pkt = w.query_tiles(t, new)
+
+        mode="full" selects by geometry only (absent brick-map tiles are
+        included, they read as empty); mode="delta" keeps just the tiles
+        with their own payload at this time (changed tiles).
+        """
+        if mode not in ("full", "delta"):
+            raise ValueError("mode must be 'full' or 'delta'")
+        idx = self.load_time_index(time_name)
+        level = _select_lod(idx, lod=lod, voxel_size=voxel_size)
+        if level > 0:
+            idx = _lod_level_index(idx, level)
+        tile_shape = _tile_shape_from_index(idx)
+        Z, Y, X, _C = _shape_zyxc_from_index(idx)
+        tmap = self.tile_map(time_name, lod=level)
+
+        if roi is None:
+            ts = TileSet.full(tmap.grid_dims, lod=level)
+        else:
+            box, shape = _resolve_roi(roi, 2 ** level, idx)
+            ts = TileSet.from_roi(shape if shape is not None else box, tile_shape, (Z, Y, X), lod=level)
+        if ts.grid_dims != tmap.grid_dims:
+            ts = TileSet.from_coords(tmap.grid_dims, ts.coords(), lod=level)
+        if mode == "delta":
+            tzr, tyr, txr = ts.box()
+            slots = tmap.query_mask(tzr, tyr, txr, ts.mask(tzr, tyr, txr))
+            ts = TileSet.from_coords(tmap.grid_dims, tmap.coords_of(slots[tmap.own_payload[slots]]), lod=level)
+        return ts
+
+    def tile_stats(
+        self,
+        time_name: str,
+        roi: Optional[ROIBox] = None,
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Per-tile value statistics of the tiles touching an ROI (whole grid if
+        roi is None), read from the index only (nothing is decoded):
+
+          coords (N,3) int32, bounds (N,6) int32,
+          min/max/mean (N,C) float32 (NaN for tiles built without stats),
+          has_stats (N,) bool
+        """
+        idx = self.load_time_index(time_name)
+        level = _select_lod(idx, lod=lod, voxel_size=voxel_size)
+        if level > 0:
+            idx = _lod_level_index(idx, level)
+        tile_shape = _tile_shape_from_index(idx)
+        Z, Y, X, C = _shape_zyxc_from_index(idx)
+
+        tmap = self.tile_map(time_name, lod=level)
+        if roi is None:
+            roi = ROIBox(0, Z, 0, Y, 0, X)
+        elif level > 0:
+            roi = _roi_at_scale(roi, 2 ** level)
+        roi = _clamp_roi(roi, (Z, Y, X))
+        slots = tmap.query_box(*_roi_tcoord_ranges(roi, tile_shape))
+        entries = [tmap.entries[int(s)] for s in slots]
+
+        bounds = np.array(
+            [_bounds6_from_entry(e, tile_size=tile_shape) for e in entries], dtype=np.int32
+        ).reshape(-1, 6)
+        sz, sy, sx = tile_shape
+        out: Dict[str, Any] = {
+            "time": time_name,
+            "lod": level,
+            "coords": np.stack([bounds[:, 0] // sz, bounds[:, 2] // sy, bounds[:, 4] // sx], axis=1),
+            "bounds": bounds,
+        }
+        out.update(stats_arrays(entries, C))
+        return out
+
+    def query_tiles(
+        self,
+        time_name: str,
+        roi: Union[ROILike, TileSet],
+        channels: Optional[Sequence[int]] = None,
+        mode: Mode = "full",
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+        value_range: Optional[Tuple[int, Optional[float], Optional[float]]] = None,
+        mask_outside: bool = False,
+    ) -> TilePacket:
+        """
+        Decode the tiles touching an ROI without stitching them.
+
+        Same arguments as query(). Tiles are decoded straight into one
+        contiguous (N, tz, ty, tx, C) arena (zstd frames are decompressed in
+        place when all channels are requested); the ROI-local array is only
+        built if TilePacket.dense() is called.
+
+        value_range=(channel, lo, hi) skips, without decoding, tiles whose
+        stored stats prove that no voxel of `channel` (an index into the
+        volume's channels) lies in [lo, hi]; either bound may be None. Use it
+        for threshold extraction, e.g. (0, 0.5, None) for density >= 0.5.
+        Skipped tiles are left out of the packet (meta["tiles_pruned"]).
+
+        ROI shapes, tile sets and mask_outside work as in query(); masking
+        is applied to each decoded tile.
+        """
+
+        plan = self._plan(time_name, roi, lod=lod, voxel_size=voxel_size, mode=mode)
+        roi, shape, tile_shape, fill = plan.roi, plan.shape, plan.tile_shape, plan.fill
+        C = plan.shape_zyxc[3]
+        roiZ, roiY, roiX = roi.shape_zyx
+
+        chan_idx = list(range(C)) if channels is None else [int(i) for i in channels]
+        all_channels = chan_idx == list(range(C))
+        outC = len(chan_idx)
+
+        entries, bounds_list = plan.entries, plan.bounds
+        tiles_pruned = 0
+        if value_range is not None:
+            vc, lo, hi = value_range
+            keep = [may_contain(e, int(vc), lo, hi) for e in entries]
+            entries = [e for e, k in zip(entries, keep) if k]
+            bounds_list = [b for b, k in zip(bounds_list, keep) if k]
+            tiles_pruned = len(keep) - len(entries)
+
+        sz, sy, sx = tile_shape
+        N = len(entries)
+        arena = np.empty((N, sz, sy, sx, outC), dtype=np.float32)
+        bounds = np.array(bounds_list, dtype=np.int32).reshape(N, 6)
+        coords = np.stack([bounds[:, 0] // sz, bounds[:, 2] // sy, bounds[:, 4] // sx], axis=1)
+        tzr, tyr, txr = plan.tranges
+        mask = np.zeros((len(tzr), len(tyr), len(txr)), dtype=bool)
+        mask[coords[:, 0] - tzr.start, coords[:, 1] - tyr.start, coords[:, 2] - txr.start] = True
+
+        bytes_read = 0
+        t0 = _time.perf_counter()
+
+        frames = self._read_frames(time_name, plan.level, entries, plan.idx)
+        for i, ((comp, loc), (z0, z1, y0, y1, x0, x1)) in enumerate(zip(frames, bounds_list)):
+            slot = arena[i]
+            if comp is None:
+                slot.fill(loc.get("fill", fill))
+            else:
+                bytes_read += int(loc["length"])
+                if all_channels and tuple(loc["shape_zyxc"]) == (sz, sy, sx, C):
+                    # full tile, all channels: decode straight into the arena slot
+                    decompress_tile_into(comp, slot, loc.get("codec"))
+                else:
+                    tile_arr = decode_frame(comp, loc)
+                    tz_, ty_, tx_ = tile_arr.shape[:3]
+                    if (tz_, ty_, tx_) != (sz, sy, sx):
+                        slot.fill(fill)
+                    slot[:tz_, :ty_, :tx_, :] = tile_arr if all_channels else tile_arr[..., chan_idx]
+
+            if isinstance(shape, ROIShape) and mask_outside:
+                vm = shape.voxel_mask(ROIBox(z0, z1, y0, y1, x0, x1))
+                slot[: z1 - z0, : y1 - y0, : x1 - x0][~vm] = fill
+
+        decode_ms = (_time.perf_counter() - t0) * 1000.0
+
+        return TilePacket(
+            schema_version=TILE_PACKET_SCHEMA_V1,
+            time=time_name,
+            mode=mode,
+            roi=roi,
+            shape_zyxc=(roiZ, roiY, roiX, outC),
+            tile_shape_zyx=tile_shape,
+            channels=[f"chan{i}" for i in chan_idx],
+            tiles_total=plan.tiles_total,
+            tiles_included=N,
+            bytes_read=int(bytes_read),
+            decode_ms=float(decode_ms),
+            tiles=arena,
+            tile_bounds_zyx=bounds,
+            tile_coords_zyx=coords,
+            tile_mask=mask,
+            fill_value=fill,
+            meta=dict(plan.meta(), tiles_pruned=int(tiles_pruned)),
+        )
+
+    def read_compressed(
+        self,
+        time_name: str,
+        roi: Union[ROILike, TileSet],
+        mode: Mode = "full",
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+    ) -> CompressedPacket:
+        """
+        The tiles touching an ROI as their stored zstd frames, straight from
+        the pack(s): no decompression, no recompression.
+
+        Tiles are selected exactly as in query_tiles() (ROI boxes, shapes,
+        tile sets, LOD, delta mode); delta references are followed to the
+        pack holding the payload. Each frame comes with its codec dict,
+        decoded shape and bounds, so a relay can forward frames byte-for-byte
+        and the receiver decodes only the tiles it uses
+        (CompressedPacket.decode_tile / to_tile_packet). Frames always hold
+        every channel.
+        """
+
+        plan = self._plan(time_name, roi, lod=lod, voxel_size=voxel_size, mode=mode)
+        roi, tile_shape, fill = plan.roi, plan.tile_shape, plan.fill
+        C = plan.shape_zyxc[3]
+        roiZ, roiY, roiX = roi.shape_zyx
+
+        sz, sy, sx = tile_shape
+        N = len(plan.entries)
+        frames: List[Optional[bytes]] = []
+        codecs: List[Dict[str, Any]] = []
+        shapes = np.zeros((N, 4), dtype=np.int32)
+        bounds = np.array(plan.bounds, dtype=np.int32).reshape(N, 6)
+        coords = np.stack([bounds[:, 0] // sz, bounds[:, 2] // sy, bounds[:, 4] // sx], axis=1)
+        tzr, tyr, txr = plan.tranges
+        mask = np.zeros((len(tzr), len(tyr), len(txr)), dtype=bool)
+        mask[coords[:, 0] - tzr.start, coords[:, 1] - tyr.start, coords[:, 2] - txr.start] = True
+
+        bytes_read = 0
+        t0 = _time.perf_counter()
+
+        frames_locs = self._read_frames(time_name, plan.level, plan.entries, plan.idx)
+        for i, ((comp, loc), (z0, z1, y0, y1, x0, x1)) in enumerate(zip(frames_locs, plan.bounds)):
+            shapes[i] = tuple(int(v) for v in loc.get("shape_zyxc", (z1 - z0, y1 - y0, x1 - x0, C)))
+            frames.append(comp)
+            if comp is None:
+                codecs.append({"name": "empty", "fill": float(loc.get("fill", fill))})
+            else:
+                bytes_read += int(loc["length"])
+                codecs.append(dict(loc.get("codec") or {"name": "zstd"}))
+
+        read_ms = (_time.perf_counter() - t0) * 1000.0
+
+        return CompressedPacket(
+            schema_version=COMPRESSED_PACKET_SCHEMA_V1,
+            time=time_name,
+            mode=mode,
+            roi=roi,
+            shape_zyxc=(roiZ, roiY, roiX, C),
+            tile_shape_zyx=tile_shape,
+            channels=[f"chan{i}" for i in range(C)],
+            tiles_total=plan.tiles_total,
+            tiles_included=N,
+            bytes_read=int(bytes_read),
+            read_ms=float(read_ms),
+            frames=frames,
+            codecs=codecs,
+            tile_shapes_zyxc=shapes,
+            tile_bounds_zyx=bounds,
+            tile_coords_zyx=coords,
+            tile_mask=mask,
+            fill_value=fill,
+            meta=plan.meta(),
+        )
+
+    def find(
+        self,
+        time_name: str,
+        roi: ROIBox,
+        predicate: PredicateLike,
+        channel: int = 0,
+        *,
+        output: Literal["coords", "mask", "both"] = "coords",
+        workers: Optional[int] = None,
+        lod: Optional[int] = None,
+        voxel_size: Optional[float] = None,
+    ) -> FindResult:
+        """
+        Voxels of `channel` inside an ROI that satisfy a value predicate, e.g.
+        w.find("t001", roi, "> 0.5") or w.find("t001", roi, ("==", 3), channel=1).
+
+        Tiles whose stored stats (civd.tile_stats) rule the predicate out are
+        skipped without being read; the remaining candidates are decoded and
+        tested in a thread pool (workers, default: min(8, cpu count)).
+        output="coords" returns sparse (N,3) coords + values, "mask" returns a
+        per-tile bitmask, "both" returns both. Coordinates are in level voxels
+        when lod/voxel_size selects a pyramid level.
+        """
+        if output not in ("coords", "mask", "both"):
+            raise ValueError("output must be 'coords', 'mask' or 'both'")
+        pred = parse_predicate(predicate)
+
+        plan = self._plan(time_name, roi, lod=lod, voxel_size=voxel_size)
+        roi, tile_shape, fill = plan.roi, plan.tile_shape, plan.fill
+        Z, Y, X, C = plan.shape_zyxc
+        c = int(channel)
+        if c < 0 or c >= C:
+            raise ValueError(f"channel out of range (C={C})")
+        level, idx = plan.level, plan.idx
+        tiles_total = plan.tiles_total
+
+        sz, sy, sx = tile_shape
+        jobs: List[Tuple[Tuple[int, int, int, int, int, int], Optional[Dict[str, Any]]]] = []
+        pruned = 0
+        for e, b in zip(plan.entries, plan.bounds):
+            st = entry_stats(e)
+            if st is not None and not pred.may_match(st["min"][c], st["max"][c]):
+                pruned += 1
+                continue
+            jobs.append((b, e))
+
+        # brick-map: absent bricks are entirely empty_value
+        if index_layout(idx) == LAYOUT_BRICKMAP and len(plan.slots) < tiles_total:
+            if bool(pred(np.full((1,), fill, dtype=np.float32))[0]):
+                lo = plan.tmap.absent_box(*plan.tranges) * np.array(tile_shape, dtype=np.int64)
+                hi = np.minimum(lo + np.array(tile_shape, dtype=np.int64), np.array((Z, Y, X), dtype=np.int64))
+                for (z0, y0, x0), (z1, y1, x1) in zip(lo.tolist(), hi.tolist()):
+                    jobs.append(((z0, z1, y0, y1, x0, x1), None))
+            else:
+                pruned += tiles_total - len(plan.slots)
+
+        read = [e for _b, e in jobs if e is not None]
+        frames = dict(zip((id(e) for e in read), self._read_frames(time_name, level, read, idx)))
+
+        def _work(job):
+            (z0, z1, y0, y1, x0, x1), e = job
+            iz0, iz1 = max(z0, roi.z0), min(z1, roi.z1)
+            iy0, iy1 = max(y0, roi.y0), min(y1, roi.y1)
+            ix0, ix1 = max(x0, roi.x0), min(x1, roi.x1)
+            if e is None:
+                vals = np.full((iz1 - iz0, iy1 - iy0, ix1 - ix0), fill, dtype=np.float32)
+                nbytes = 0
+            else:
+                comp, loc = frames[id(e)]
+                nbytes = int(loc.get("length", 0))
+                vals = decode_frame(comp, loc)[iz0 - z0:iz1 - z0, iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0, c]
+            return (z0, y0, x0), (iz0, iy0, ix0), vals, pred(vals), nbytes
+
+        t0 = _time.perf_counter()
+        n_workers = int(workers) if workers else min(8, os.cpu_count() or 1)
+        if n_workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=n_workers) as ex:
+                results = list(ex.map(_work, jobs))
+        else:
+            results = [_work(j) for j in jobs]
+        decode_ms = (_time.perf_counter() - t0) * 1000.0
+
+        want_coords = output in ("coords", "both")
+        want_mask = output in ("mask", "both")
+        coords_parts: List[np.ndarray] = []
+        value_parts: List[np.ndarray] = []
+        tcoords: List[Tuple[int, int, int]] = []
+        tbounds: List[Tuple[int, int, int, int, int, int]] = []
+        masks: List[np.ndarray] = []
+        bytes_read = 0
+
+        for ((z0, y0, x0), (iz0, iy0, ix0), vals, m, nbytes), (b, _e) in zip(results, jobs):
+            bytes_read += nbytes
+            if not m.any():
+                continue
+            tcoords.append((z0 // sz, y0 // sy, x0 // sx))
+            tbounds.append(b)
+            if want_coords:
+                zz, yy, xx = np.nonzero(m)
+                coords_parts.append(
+                    np.stack([zz + iz0, yy + iy0, xx + ix0], axis=1).astype(np.int32, copy=False)
+                )
+                value_parts.append(vals[m])
+            if want_mask:
+                tm = np.zeros((sz, sy, sx), dtype=bool)
+                dz, dy, dx = iz0 - z0, iy0 - y0, ix0 - x0
+                tm[dz:dz + m.shape[0], dy:dy + m.shape[1], dx:dx + m.shape[2]] = m
+                masks.append(tm)
+
+        result = FindResult(
+            schema_version=FIND_RESULT_SCHEMA_V1,
+            time=time_name,
+            roi=roi,
+            channel=c,
+            predicate=pred.describe(),
+            tiles_total=tiles_total,
+            tiles_candidates=len(jobs),
+            tiles_pruned=pruned,
+            tiles_matched=len(tcoords),
+            bytes_read=int(bytes_read),
+            decode_ms=float(decode_ms),
+            tile_coords_zyx=np.array(tcoords, dtype=np.int32).reshape(-1, 3),
+            tile_bounds_zyx=np.array(tbounds, dtype=np.int32).reshape(-1, 6),
+            meta={"lod": level, "lod_scale": 2 ** level, "layout": index_layout(idx), "workers": n_workers},
+        )
+        if want_coords:
+            result.coords_zyx = (
+                np.concatenate(coords_parts) if coords_parts else np.zeros((0, 3), dtype=np.int32)
+            )
+            result.values = (
+                np.concatenate(value_parts) if value_parts else np.zeros((0,), dtype=np.float32)
+            )
+        if want_mask:
+            result.tile_masks = (
+                np.stack(masks) if masks else np.zeros((0, sz, sy, sx), dtype=bool)
+            )
+        return result
+
     def apply_delta(self, *, base: VolumePacket, delta: VolumePacket) -> VolumePacket:
         # v1 rule: ROI + channels must match to apply delta deterministically
         if base.roi != delta.roi:
@@ -286,6 +1339,7 @@ class World:
             roi=base.roi,
             shape_zyxc=base.shape_zyxc,
             tile_size=base.tile_size,
+            tile_shape_zyx=base.tile_shape_zyx,
             channels=base.channels,
             tiles_total=base.tiles_total,
             tiles_included=base.tiles_total,